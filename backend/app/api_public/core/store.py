@@ -22,6 +22,14 @@ from typing import Optional
 from app.api_public import config
 
 
+def _json_default(o):
+    """json.dumps `default=`: trade ledgers serialize via `to_dicts()` (duck-typed
+    so this module never imports numpy/pandas — the API gate installs neither)."""
+    if hasattr(o, "to_dicts"):
+        return o.to_dicts()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
 def _now() -> float:
     return time.time()
 
@@ -233,7 +241,8 @@ class Store:
             self._con.execute(
                 "INSERT OR REPLACE INTO backtest_results (job_id, api_key_id, status, raw_json, meta_json, ts)"
                 " VALUES (?,?,?,?,?,?)",
-                (job_id, api_key_id, status, json.dumps(raw), json.dumps(meta), _now()),
+                (job_id, api_key_id, status, json.dumps(raw, default=_json_default),
+                 json.dumps(meta), _now()),
             )
             self._con.commit()
 
@@ -6,6 +6,8 @@
    layer, never the JIT engine modules. We inspect real import statements via AST
    (not comments/docstrings).
 2. The OpenAPI document generates and exposes the contract paths.
+3. core/ stays importable with only fastapi/uvicorn/pydantic installed (the
+   Bruno API gate): no module-level numpy/pandas/app.services imports.
 """
 from __future__ import annotations
 
@@ -57,6 +59,24 @@ def test_facade_bridges_only_via_orchestrator():
     assert any("backtest_orchestrator" in m for m in mods)
 
 
+def test_core_has_no_heavy_top_level_imports():
+    offenders = []
+    for path in (API_DIR / "core").rglob("*.py"):
+        if "tests" in path.parts:
+            continue
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in tree.body:  # module level only: lazy imports are fine
+            if isinstance(node, ast.Import):
+                mods = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                mods = [node.module or ""]
+            else:
+                continue
+            offenders += [f"{path.name}: imports {m}" for m in mods
+                          if m.split(".")[0] in ("numpy", "pandas") or m.startswith("app.services")]
+    assert not offenders, f"core/ must import without numpy/pandas: {offenders}"
+
+
 def test_openapi_generates_with_contract_paths():
     schema = app.openapi()
     paths = schema["paths"]
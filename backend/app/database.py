@@ -116,9 +116,26 @@ def _establish_connection():
             pass
         return con
 
+def _sync_daily_replica_views(con):
+    """GCS: apunta daily_metrics a la réplica local (app.db.daily_replica) cuando
+    existe; si desaparece, vuelve a las vistas sobre el lake. Re-attach sólo
+    cuando cambia la generación publicada."""
+    from app.db import daily_replica
+    gen = daily_replica.replica_generation()
+    if gen == getattr(_local, "replica_gen", None):
+        return
+    if gen is not None and daily_replica.attach_replica(con):
+        _local.replica_gen = gen
+        return
+    if getattr(_local, "replica_gen", None) is not None:
+        daily_replica.detach_replica(con)
+        _init_connection_views(con, "gcs")
+    _local.replica_gen = None
+
 def get_db_connection(read_only=False):
     if not hasattr(_local, "conn") or _local.conn is None:
         _local.conn = _establish_connection()
+        _local.replica_gen = None
     else:
         # Verify the cached connection is still alive
         try:
@@ -126,6 +143,12 @@ def get_db_connection(read_only=False):
         except Exception:
             # Connection was closed or broken — re-establish
             _local.conn = _establish_connection()
+            _local.replica_gen = None
+    if os.getenv("DB_PROVIDER", "motherduck").lower() == "gcs":
+        try:
+            _sync_daily_replica_views(_local.conn)
+        except Exception as e:
+            print(f"[WARN] daily_metrics replica unavailable: {e}")
     return _local.conn
 
 def reset_connection():
@@ -0,0 +1,406 @@
+"""
+Réplica local de daily_metrics en DuckDB nativo.
+
+En modo GCS la vista massive.daily_metrics lee ``daily_metrics/*/*/*.parquet``
+remoto: screener, /api/data/filter, market analysis y ticker_analysis pagan
+round-trips y footers con el object cache frío. Aquí se mantiene, junto a la
+réplica de slabs (replica_sync), una base DuckDB persistente con:
+
+  * tabla ``daily_metrics`` — columnas del parquet + year/month hive, ordenada
+    por (timestamp, ticker) → las zone maps (min/max por row group) de DuckDB
+    podan por fecha; índice ART por ticker para los lookups de ticker_analysis;
+  * tabla ``_replica_files`` — {path, token, year, month} ya cargados.
+
+Ficheros (mismo esquema que los deltas del slab mensual): una base
+``{stem}.{uid}.duckdb`` y segmentos delta ``{stem}.delta-{seq:04d}-{uid}.duckdb``
+con las mismas dos tablas, listados en ``{replica_path}.manifest.json``
+({"base", "deltas", "rows"}). Cada fichero se escribe una vez y no se modifica:
+los lectores de otros procesos lo tienen adjunto READ_ONLY (lock compartido de
+DuckDB), así que nada se escribe en sitio. El manifest se publica el último
+con os.replace; los ficheros que deja de listar se borran después (quien los
+tenga adjuntos sigue leyendo el inode).
+
+Refresco incremental (sync_daily_replica): los ficheros nuevos van a un delta
+(coste ∝ filas nuevas, sin copiar la base). Un fichero consumido que cambió o
+desapareció, o BTT_DAILY_REPLICA_MAX_DELTAS deltas, compactan: base nueva =
+base + deltas sin los meses a recargar + esos meses releídos de la fuente,
+ordenada por (timestamp, ticker).
+
+Lectura: database.get_db_connection adjunta la base y los deltas
+(attach_replica) y redefine las vistas daily_metrics sobre su unión con la
+misma proyección que la vista GCS; si falta o está desactivada, todo sigue
+leyendo del lake.
+
+Gated por BTT_DAILY_REPLICA_ENABLED. La lectura es best-effort (nunca lanza; ante
+cualquier fallo se sigue leyendo del lake); sync_daily_replica lanza y la
+atrapa el daemon de replica_sync.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("backtester.daily_replica")
+
+_FOLDER = "daily_metrics"
+_ALIAS = "dm_replica"
+_CHECK_S = float(os.getenv("BTT_DAILY_REPLICA_CHECK_S", "5"))
+_MAX_DELTAS = int(os.getenv("BTT_DAILY_REPLICA_MAX_DELTAS", "8"))
+_GEN_CACHE: dict = {}
+_SYNC_LOCK = threading.Lock()
+
+# Misma proyección que la vista massive.daily_metrics (database._init_connection_views)
+_VIEW_SQL = (
+    "SELECT * EXCLUDE (pmh_gap_pct), gap_pct AS gap_at_open_pct, "
+    "((pm_high - prev_close) / NULLIF(prev_close, 0) * 100) as pmh_gap_pct "
+    "FROM ({source})"
+)
+
+
+def replica_enabled() -> bool:
+    return os.getenv("BTT_DAILY_REPLICA_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def replica_path() -> str:
+    p = os.getenv("BTT_DAILY_REPLICA_PATH", "").strip()
+    if p:
+        return p
+    from app.db.slab_builder import slab_root
+    return os.path.join(slab_root(), "daily_metrics.duckdb")
+
+
+def _sql_list(paths) -> str:
+    return "[" + ", ".join("'" + str(p).replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _sql_str(path: str) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _manifest_path(path: str) -> str:
+    return f"{path}.manifest.json"
+
+
+def _read_manifest(path: str) -> dict | None:
+    """Manifest publicado, o None. Una réplica anterior sin manifest (un único
+    fichero en `path`) se lee como base sin deltas."""
+    try:
+        with open(_manifest_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    if os.path.exists(path):
+        return {"base": os.path.basename(path), "deltas": [], "rows": None}
+    return None
+
+
+def _segment_paths(path: str, manifest: dict | None) -> list:
+    """Ficheros publicados (base primero, luego deltas en orden)."""
+    if not manifest:
+        return []
+    folder = os.path.dirname(path)
+    return [os.path.join(folder, n) for n in [manifest["base"]] + list(manifest.get("deltas") or [])]
+
+
+def _new_segment_path(path: str, kind: str) -> str:
+    stem = os.path.splitext(path)[0]
+    return f"{stem}.{kind}-{uuid.uuid4().hex[:8]}.duckdb"
+
+
+def _remove_files(paths) -> None:
+    for p in paths:
+        for cand in (p, f"{p}.wal"):
+            try:
+                os.remove(cand)
+            except OSError:
+                pass
+
+
+# ── descubrimiento de la fuente ──────────────────────────────────────────────
+
+def discover_daily_files(source: str = None) -> dict:
+    """{(year, month): {path: token}} de los parquet de daily_metrics en la fuente
+    (misma convención y tokens "size|mtime" que replica_sync.discover_months)."""
+    from app.db import replica_sync
+    source = source if source is not None else replica_sync.REPLICA_SOURCE
+    found: dict = {}
+    if source == "gcs":
+        from app.db.connection import get_connection, GCS_BUCKET
+        try:
+            tokens = replica_sync._gcs_file_tokens(
+                get_connection(), f"gs://{GCS_BUCKET}/cold_storage/{_FOLDER}/*/*/*.parquet")
+        except Exception as e:
+            logger.warning(f"[DAILY REPLICA] listado GCS falló: {e}")
+            return {}
+        for f, tok in tokens.items():
+            m = replica_sync._HIVE_RE.search(f)
+            if m:
+                found.setdefault((int(m.group(1)), int(m.group(2))), {})[f] = tok
+        return found
+
+    base = os.path.join(source, _FOLDER)
+    if not os.path.isdir(base):
+        return {}
+    for ydir in sorted(os.listdir(base)):
+        if not ydir.startswith("year="):
+            continue
+        for mdir in sorted(os.listdir(os.path.join(base, ydir))):
+            if not mdir.startswith("month="):
+                continue
+            try:
+                key = (int(ydir.split("=")[1]), int(mdir.split("=")[1]))
+            except ValueError:
+                continue
+            files = replica_sync._local_file_tokens(os.path.join(base, ydir, mdir))
+            if files:
+                found[key] = files
+    return found
+
+
+# ── escritura ────────────────────────────────────────────────────────────────
+
+def _configure_remote(con) -> None:
+    """httpfs + secreto HMAC para leer gs:// desde la conexión de escritura."""
+    con.execute("INSTALL httpfs; LOAD httpfs;")
+    key, secret = os.getenv("GCS_HMAC_KEY"), os.getenv("GCS_HMAC_SECRET")
+    if key and secret:
+        con.execute(f"CREATE OR REPLACE SECRET dm_replica_gcs (TYPE GCS, KEY_ID '{key}', SECRET '{secret}')")
+
+
+def _has_table(con, name: str) -> bool:
+    return bool(con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?", [name]).fetchone()[0])
+
+
+def _known_files(segments: list) -> dict:
+    """{path: (token, year, month)} ya cargados en los ficheros publicados.
+    Un fichero ilegible invalida el conjunto ({} → rebuild completo)."""
+    import duckdb
+    known = {}
+    for seg in segments:
+        try:
+            con = duckdb.connect(seg, read_only=True)
+        except Exception:
+            return {}
+        try:
+            if not (_has_table(con, "_replica_files") and _has_table(con, "daily_metrics")):
+                return {}
+            known.update({p: (tok, y, m) for p, tok, y, m in
+                          con.execute("SELECT path, token, year, month FROM _replica_files").fetchall()})
+        finally:
+            con.close()
+    return known
+
+
+def _parquet_src(paths) -> str:
+    return f"read_parquet({_sql_list(sorted(paths))}, hive_partitioning=true, union_by_name=true)"
+
+
+def _write_segment(target: str, remote: bool, fill) -> int:
+    """Escribe un fichero DuckDB nuevo como .tmp (`fill(con)` crea daily_metrics y
+    _replica_files) y lo publica con os.replace. Devuelve sus filas."""
+    import duckdb
+    tmp = f"{target}.tmp"
+    _remove_files([tmp])
+    con = duckdb.connect(tmp)
+    try:
+        if remote:
+            _configure_remote(con)
+        fill(con)
+        rows = con.execute("SELECT count(*) FROM daily_metrics").fetchone()[0]
+        con.execute("CHECKPOINT")
+    except Exception:
+        con.close()
+        _remove_files([tmp])
+        raise
+    con.close()
+    os.replace(tmp, target)
+    return int(rows)
+
+
+def _insert_files(con, paths, current: dict) -> None:
+    con.execute("CREATE TABLE IF NOT EXISTS _replica_files "
+                "(path VARCHAR, token VARCHAR, year INTEGER, month INTEGER)")
+    con.executemany("INSERT INTO _replica_files VALUES (?, ?, ?, ?)",
+                    [[p, *current[p]] for p in sorted(paths)])
+
+
+def _full_build(con, files: dict, current: dict) -> None:
+    paths = [p for fs in files.values() for p in fs]
+    con.execute(f"CREATE TABLE daily_metrics AS SELECT * FROM {_parquet_src(paths)} "
+                "ORDER BY timestamp, ticker")
+    _insert_files(con, paths, current)
+    con.execute("CREATE INDEX dm_replica_ticker ON daily_metrics (ticker)")
+
+
+def _compact(con, segments: list, reload_months: set, new_paths: list, current: dict) -> None:
+    """Base nueva desde la publicada + deltas (sin `reload_months`) + `new_paths`."""
+    for i, seg in enumerate(segments):
+        con.execute(f"ATTACH {_sql_str(seg)} AS seg{i} (READ_ONLY)")
+    keep = ""
+    if reload_months:
+        keep = " WHERE NOT (" + " OR ".join(
+            f"(year = {int(y)} AND month = {int(m)})" for y, m in sorted(reload_months)) + ")"
+
+    def _union(table):
+        return " UNION ALL BY NAME ".join(
+            f"SELECT * FROM seg{i}.{table}{keep}" for i in range(len(segments)))
+
+    rows = _union("daily_metrics")
+    if new_paths:
+        rows += f" UNION ALL BY NAME SELECT * FROM {_parquet_src(new_paths)}"
+    con.execute(f"CREATE TABLE daily_metrics AS SELECT * FROM ({rows}) ORDER BY timestamp, ticker")
+    con.execute(f"CREATE TABLE _replica_files AS {_union('_replica_files')}")
+    for i in range(len(segments)):
+        con.execute(f"DETACH seg{i}")
+    _insert_files(con, new_paths, current)
+    con.execute("CREATE INDEX dm_replica_ticker ON daily_metrics (ticker)")
+
+
+def _publish_manifest(path: str, manifest: dict, previous: list) -> None:
+    """Publica el manifest (último paso) y borra los ficheros que ya no lista."""
+    tmp = f"{_manifest_path(path)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, _manifest_path(path))
+    listed = set(_segment_paths(path, manifest))
+    _remove_files([p for p in previous if p not in listed])
+
+
+def sync_daily_replica(source: str = None, years: set = None) -> dict:
+    """Una pasada de refresco. Devuelve {action, files, months, rows}.
+
+    action: "built" (réplica nueva), "appended" (ficheros nuevos en un delta),
+    "compacted" (meses recargados o demasiados deltas: base nueva), "unchanged"
+    o "empty"."""
+    import duckdb
+
+    with _SYNC_LOCK:
+        files = {k: v for k, v in discover_daily_files(source).items()
+                 if not years or k[0] in years}
+        if not files:
+            return {"action": "empty", "files": 0, "months": 0, "rows": 0}
+
+        path = replica_path()
+        manifest = _read_manifest(path)
+        segments = _segment_paths(path, manifest)
+        known = _known_files(segments) if segments else {}
+        current = {p: (tok, y, m) for (y, m), fs in files.items() for p, tok in fs.items()}
+
+        # mes a recargar: un fichero consumido cambió de token o ya no existe
+        reload_months = {(y, m) for p, (tok, y, m) in known.items()
+                         if p not in current or current[p][0] != tok}
+        new_paths = sorted(p for p, (_tok, y, m) in current.items()
+                           if p not in known or (y, m) in reload_months)
+        if known and not new_paths and not reload_months:
+            return {"action": "unchanged", "files": 0, "months": 0, "rows": 0}
+
+        t0 = time.time()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        remote = any(p.startswith("gs://") for p in current)
+        deltas = list((manifest or {}).get("deltas") or []) if known else []
+        if not known:
+            action, new_paths = "built", sorted(current)
+            base = _new_segment_path(path, "base")
+            rows = _write_segment(base, remote, lambda con: _full_build(con, files, current))
+            manifest = {"base": os.path.basename(base), "deltas": [], "rows": rows}
+        elif reload_months or len(deltas) + 1 >= _MAX_DELTAS or manifest.get("rows") is None:
+            action = "compacted"
+            base = _new_segment_path(path, "base")
+            try:
+                rows = _write_segment(base, remote, lambda con: _compact(
+                    con, segments, reload_months, new_paths, current))
+            except duckdb.Error as e:
+                # esquemas incompatibles entre segmentos y fuente: rebuild completo
+                logger.info(f"[DAILY REPLICA] compactación incompatible ({e}); rebuild completo")
+                action, new_paths = "built", sorted(current)
+                rows = _write_segment(base, remote, lambda con: _full_build(con, files, current))
+            manifest = {"base": os.path.basename(base), "deltas": [], "rows": rows}
+        else:
+            action = "appended"
+            delta = _new_segment_path(path, f"delta-{len(deltas) + 1:04d}")
+
+            def _fill(con):
+                con.execute(f"CREATE TABLE daily_metrics AS SELECT * FROM {_parquet_src(new_paths)} "
+                            "ORDER BY timestamp, ticker")
+                _insert_files(con, new_paths, current)
+            added = _write_segment(delta, remote, _fill)
+            rows = int(manifest["rows"]) + added
+            manifest = {"base": manifest["base"], "deltas": deltas + [os.path.basename(delta)],
+                        "rows": rows}
+        _publish_manifest(path, manifest, segments)
+        _GEN_CACHE.clear()
+
+        months = len({current[p][1:] for p in new_paths})
+        logger.info(f"[DAILY REPLICA] {action}: {len(new_paths)} ficheros, {months} meses, "
+                    f"{rows} filas ({round(time.time() - t0, 1)}s)")
+        return {"action": action, "files": len(new_paths), "months": months, "rows": rows}
+
+
+# ── lectura ──────────────────────────────────────────────────────────────────
+
+def replica_generation():
+    """mtime_ns del manifest publicado (o del fichero único de una réplica
+    anterior), o None si desactivada/ausente. Cacheado _CHECK_S segundos para
+    no hacer un stat por petición."""
+    if not replica_enabled():
+        return None
+    path = replica_path()
+    now = time.monotonic()
+    hit = _GEN_CACHE.get(path)
+    if hit is not None and now - hit[0] < _CHECK_S:
+        return hit[1]
+    gen = None
+    for cand in (_manifest_path(path), path):
+        try:
+            gen = os.stat(cand).st_mtime_ns
+            break
+        except OSError:
+            continue
+    _GEN_CACHE[path] = (now, gen)
+    return gen
+
+
+def _attached_aliases(con) -> list:
+    return [r[0] for r in con.execute(
+        "SELECT database_name FROM duckdb_databases() WHERE database_name = ? "
+        "OR database_name LIKE ?", [_ALIAS, f"{_ALIAS}_d%"]).fetchall()]
+
+
+def is_attached(con) -> bool:
+    try:
+        return bool(con.execute(
+            "SELECT count(*) FROM duckdb_databases() WHERE database_name = ?", [_ALIAS]).fetchone()[0])
+    except Exception:
+        return False
+
+
+def attach_replica(con) -> bool:
+    """(Re)adjunta base + deltas en ``con`` y apunta las vistas daily_metrics a su unión."""
+    path = replica_path()
+    try:
+        segments = _segment_paths(path, _read_manifest(path))
+        if not segments:
+            raise FileNotFoundError(path)
+        detach_replica(con)
+        aliases = [_ALIAS] + [f"{_ALIAS}_d{i}" for i in range(1, len(segments))]
+        for alias, seg in zip(aliases, segments):
+            con.execute(f"ATTACH {_sql_str(seg)} AS {alias} (READ_ONLY)")
+        source = " UNION ALL BY NAME ".join(f"SELECT * FROM {a}.daily_metrics" for a in aliases)
+        con.execute(f"CREATE OR REPLACE VIEW massive.daily_metrics AS {_VIEW_SQL.format(source=source)}")
+        con.execute("CREATE OR REPLACE VIEW daily_metrics AS SELECT * FROM massive.daily_metrics")
+        return True
+    except Exception as e:
+        logger.warning(f"[DAILY REPLICA] attach falló, se sigue leyendo del lake: {e}")
+        detach_replica(con)
+        return False
+
+
+def detach_replica(con) -> None:
+    try:
+        for alias in _attached_aliases(con):
+            con.execute(f"DETACH {alias}")
+    except Exception:
+        pass
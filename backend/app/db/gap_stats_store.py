@@ -0,0 +1,321 @@
+"""
+Store columnar de días de gap por ticker (runner stats de Ticker Analysis).
+
+get_gap_stats_all_days recalculaba en cada petición: filtraba el hot cache (o
+lanzaba ``SELECT * FROM daily_metrics WHERE ticker = ?``), montaba un DataFrame
+por offset 0/+1/+2 y, para el chart 15-min, pedía velas 1-min a Massive o
+streameaba intradía de GCS (iter_intraday_groups_streamed) fecha a fecha.
+
+Aquí se mantiene una base DuckDB persistente, ordenada por ticker:
+
+  * tabla ``gap_days`` — una fila por (ticker, gap_date, day_offset ∈ {0,1,2}):
+    el día de gap (pmh_gap_pct >= GAP_THRESHOLD) y las dos sesiones siguientes
+    del ticker, con rth_open/high/low/close y pm_high, más el camino intradía
+    compacto del día: ``path_sum`` FLOAT[48] / ``path_n`` SMALLINT[48] = suma y
+    nº de velas de (close − rth_open) / rth_open × 100 por franja de 15 min
+    04:00–16:00 (sacado de los slabs; NULL si el día aún no estaba en ninguno);
+  * tabla ``_gap_meta`` — watermark (max timestamp de daily_metrics consumido).
+
+Refresco (refresh_gap_stats, lo llama el daemon de replica_sync tras el
+catch-up diario): sólo los tickers con filas posteriores al watermark se
+recalculan (sus +1/+2 pendientes se completan), junto con los que tienen
+caminos NULL pendientes; los caminos ya guardados se reutilizan. Se escribe
+sobre una copia y se publica con os.replace.
+
+Lectura (read_gap_days): una query por ticker sobre el índice ART. Gated por
+BTT_GAP_STATS_ENABLED; best-effort — None ante cualquier fallo y el endpoint
+sigue con el cálculo por petición.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("backtester.gap_stats_store")
+
+GAP_THRESHOLD = 20.0
+OFFSETS = (0, 1, 2)
+N_BINS = 48                     # franjas de 15 min de 04:00 a 16:00
+_BIN_START_MIN = 4 * 60
+_BIN_MINUTES = 15
+_RTH_START_MIN = 9 * 60 + 30
+_NS_PER_MIN = 60_000_000_000
+_CHECK_S = float(os.getenv("BTT_GAP_STATS_CHECK_S", "5"))
+
+_SYNC_LOCK = threading.Lock()
+_READER_LOCK = threading.Lock()
+_READER: dict = {}
+
+_SOURCE_SQL = """
+WITH d AS (
+    SELECT ticker, timestamp, pmh_gap_pct, rth_open, rth_high, rth_low, rth_close, pm_high,
+           row_number() OVER (PARTITION BY ticker ORDER BY timestamp) AS rn
+    FROM daily_metrics {where}
+), g AS (
+    SELECT ticker, rn, timestamp AS gap_ts FROM d WHERE pmh_gap_pct >= ?
+)
+SELECT g.ticker, CAST(g.gap_ts AS DATE) AS gap_date, CAST(d.rn - g.rn AS TINYINT) AS day_offset,
+       CAST(d.timestamp AS DATE) AS day,
+       CAST(d.rth_open AS DOUBLE) AS rth_open, CAST(d.rth_high AS DOUBLE) AS rth_high,
+       CAST(d.rth_low AS DOUBLE) AS rth_low, CAST(d.rth_close AS DOUBLE) AS rth_close,
+       CAST(d.pm_high AS DOUBLE) AS pm_high
+FROM g JOIN d ON d.ticker = g.ticker AND d.rn BETWEEN g.rn AND g.rn + 2
+ORDER BY g.ticker, gap_date, day_offset
+"""
+
+_COLUMNS = ("ticker", "gap_date", "day_offset", "day", "rth_open", "rth_high", "rth_low",
+            "rth_close", "pm_high", "path_sum", "path_n")
+
+
+def store_enabled() -> bool:
+    return os.getenv("BTT_GAP_STATS_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def store_path() -> str:
+    p = os.getenv("BTT_GAP_STATS_PATH", "").strip()
+    if p:
+        return p
+    from app.db.slab_builder import slab_root
+    return os.path.join(slab_root(), "gap_stats.duckdb")
+
+
+# ── caminos intradía ─────────────────────────────────────────────────────────
+
+def bin_labels() -> list:
+    """[(nombre 'HH:MM-HH:MM', is_premarket)] de las N_BINS franjas."""
+    out = []
+    for i in range(N_BINS):
+        a = _BIN_START_MIN + i * _BIN_MINUTES
+        b = a + _BIN_MINUTES
+        out.append((f"{a // 60:02d}:{a % 60:02d}-{b // 60:02d}:{b % 60:02d}", a < _RTH_START_MIN))
+    return out
+
+
+def day_path(ts_ns, open_, close, rth_open=None):
+    """(sum float32[48], n int16[48]) de un día. rth_open de daily_metrics; si
+    falta, open de la primera vela >= 09:30 (o la primera del día), como el
+    chart por petición. Sin velas o sin open válido → camino vacío (todo 0)."""
+    sums = np.zeros(N_BINS, dtype=np.float64)
+    counts = np.zeros(N_BINS, dtype=np.int64)
+    if len(ts_ns):
+        mod = (np.asarray(ts_ns, dtype=np.int64) // _NS_PER_MIN) % 1440
+        if rth_open is None or not np.isfinite(rth_open) or rth_open == 0:
+            after = np.flatnonzero(mod >= _RTH_START_MIN)
+            rth_open = float(open_[after[0]] if len(after) else open_[0])
+        if np.isfinite(rth_open) and rth_open != 0:
+            pct = (np.asarray(close, dtype=np.float64) - rth_open) / rth_open * 100.0
+            m = (mod >= _BIN_START_MIN) & (mod < _BIN_START_MIN + N_BINS * _BIN_MINUTES) & np.isfinite(pct)
+            b = (mod[m] - _BIN_START_MIN) // _BIN_MINUTES
+            sums = np.bincount(b, weights=pct[m], minlength=N_BINS)
+            counts = np.bincount(b, minlength=N_BINS)
+    return sums.astype(np.float32), counts.astype(np.int16)
+
+
+def chart_from_paths(path_sums, path_counts) -> list:
+    """Chart 15-min [{bin, avg_change_pct, is_premarket}] agregando los caminos
+    guardados: media por vela de todas las fechas (misma ponderación que
+    compute_price_change_chart_from_df)."""
+    if not len(path_sums):
+        return []
+    total = np.sum([np.asarray(s, dtype=np.float64) for s in path_sums], axis=0)
+    n = np.sum([np.asarray(c, dtype=np.int64) for c in path_counts], axis=0)
+    labels = bin_labels()
+    return [{"bin": labels[i][0], "avg_change_pct": float(total[i] / n[i]),
+             "is_premarket": bool(labels[i][1])} for i in np.flatnonzero(n > 0)]
+
+
+def _compute_paths(df: pd.DataFrame, known: dict) -> tuple:
+    """(path_sum, path_n) por fila de df. Reutiliza ``known`` {(ticker, day): path};
+    el resto sale del slab del mes (None si el mes no tiene slab o el par aún no
+    está en él — el intradía del día puede llegar después que daily_metrics)."""
+    from app.db.slab_store import get_month_any_kind
+
+    sums, counts = [None] * len(df), [None] * len(df)
+    days = df["day"].astype(str).str[:10].tolist()
+    todo: dict = {}
+    for i, (t, d) in enumerate(zip(df["ticker"], days)):
+        hit = known.get((t, d))
+        if hit is not None:
+            sums[i], counts[i] = hit
+        else:
+            todo.setdefault((int(d[:4]), int(d[5:7])), []).append(i)
+    rth_opens = df["rth_open"].to_numpy(dtype=np.float64)
+    for (y, m), rows in sorted(todo.items()):
+        slab = get_month_any_kind(y, m)
+        if slab is None:
+            continue
+        for i in rows:
+            arr = slab.slice_pair(df["ticker"].iat[i], days[i])
+            if arr is not None:
+                sums[i], counts[i] = day_path(arr.ts_ns, arr.open, arr.close, rth_opens[i])
+    return sums, counts
+
+
+# ── escritura ────────────────────────────────────────────────────────────────
+
+def _read_state(path: str):
+    """(watermark, threshold, tickers con caminos NULL) del store publicado, o None."""
+    if not os.path.exists(path):
+        return None
+    import duckdb
+    try:
+        con = duckdb.connect(path, read_only=True)
+    except Exception:
+        return None
+    try:
+        row = con.execute("SELECT watermark, threshold FROM _gap_meta").fetchone()
+        if not row:
+            return None
+        pending = [r[0] for r in con.execute(
+            "SELECT DISTINCT ticker FROM gap_days WHERE path_n IS NULL").fetchall()]
+        return row[0], row[1], pending
+    except Exception:
+        return None
+    finally:
+        con.close()
+
+
+def _known_paths(con, tickers) -> dict:
+    rows = con.execute(
+        "SELECT ticker, CAST(day AS VARCHAR), path_sum, path_n FROM gap_days "
+        "WHERE path_n IS NOT NULL AND ticker IN (SELECT unnest(?::VARCHAR[]))",
+        [list(tickers)]).fetchall()
+    return {(t, d): (np.asarray(s, dtype=np.float32), np.asarray(n, dtype=np.int16))
+            for t, d, s, n in rows}
+
+
+def _create_tables(con) -> None:
+    con.execute("DROP TABLE IF EXISTS gap_days")
+    con.execute("CREATE TABLE gap_days (ticker VARCHAR, gap_date DATE, day_offset TINYINT, day DATE, "
+                "rth_open DOUBLE, rth_high DOUBLE, rth_low DOUBLE, rth_close DOUBLE, pm_high DOUBLE, "
+                "path_sum FLOAT[], path_n SMALLINT[])")
+    con.execute("DROP TABLE IF EXISTS _gap_meta")
+    con.execute("CREATE TABLE _gap_meta (watermark TIMESTAMP, threshold DOUBLE)")
+
+
+def refresh_gap_stats(con=None, rebuild: bool = False) -> dict:
+    """Una pasada de refresco desde daily_metrics de ``con`` (por defecto
+    get_db_connection: réplica local si está adjunta, si no el lake).
+    Devuelve {action, tickers, rows}; action: built | appended | unchanged | empty."""
+    import duckdb
+
+    with _SYNC_LOCK:
+        if con is None:
+            from app.database import get_db_connection
+            con = get_db_connection()
+        src_max = con.execute("SELECT max(timestamp) FROM daily_metrics").fetchone()[0]
+        if src_max is None:
+            return {"action": "empty", "tickers": 0, "rows": 0}
+
+        path = store_path()
+        state = _read_state(path)
+        full = rebuild or state is None or state[1] != GAP_THRESHOLD
+        if not full and state[0] is not None and src_max <= state[0]:
+            return {"action": "unchanged", "tickers": 0, "rows": 0}
+
+        t0 = time.time()
+        if full:
+            df = con.execute(_SOURCE_SQL.format(where=""), [GAP_THRESHOLD]).fetch_df()
+            tickers = sorted(set(df["ticker"]))
+        else:
+            tickers = sorted({r[0] for r in con.execute(
+                "SELECT DISTINCT ticker FROM daily_metrics WHERE timestamp > ?", [state[0]]).fetchall()}
+                | set(state[2]))
+            df = con.execute(
+                _SOURCE_SQL.format(where="WHERE ticker IN (SELECT unnest(?::VARCHAR[]))"),
+                [tickers, GAP_THRESHOLD]).fetch_df()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        for p in (tmp, f"{tmp}.wal"):
+            if os.path.exists(p):
+                os.remove(p)
+        if not full:
+            shutil.copyfile(path, tmp)
+
+        out = duckdb.connect(tmp)
+        try:
+            if full:
+                _create_tables(out)
+                known = {}
+            else:
+                known = _known_paths(out, tickers)
+                out.execute("DELETE FROM gap_days WHERE ticker IN (SELECT unnest(?::VARCHAR[]))", [tickers])
+            df["path_sum"], df["path_n"] = _compute_paths(df, known)
+            rows = df[list(_COLUMNS)].sort_values(["ticker", "gap_date", "day_offset"])
+            out.register("_gap_rows", rows)
+            out.execute("INSERT INTO gap_days SELECT * FROM _gap_rows")
+            out.unregister("_gap_rows")
+            out.execute("DELETE FROM _gap_meta")
+            out.execute("INSERT INTO _gap_meta VALUES (?, ?)", [src_max, GAP_THRESHOLD])
+            out.execute("CREATE INDEX IF NOT EXISTS gap_days_ticker ON gap_days (ticker)")
+            total = out.execute("SELECT count(*) FROM gap_days").fetchone()[0]
+            out.execute("CHECKPOINT")
+        except Exception:
+            out.close()
+            for p in (tmp, f"{tmp}.wal"):
+                if os.path.exists(p):
+                    os.remove(p)
+            raise
+        out.close()
+        os.replace(tmp, path)
+        with _READER_LOCK:
+            _READER.clear()
+
+        action = "built" if full else "appended"
+        logger.info(f"[GAP STATS] {action}: {len(tickers)} tickers, {len(df)} filas "
+                    f"({total} en total, {round(time.time() - t0, 1)}s)")
+        return {"action": action, "tickers": len(tickers), "rows": int(total)}
+
+
+# ── lectura ──────────────────────────────────────────────────────────────────
+
+def _reader():
+    """Conexión read-only cacheada; se reabre si el store publicado cambió
+    (stat como mucho cada _CHECK_S)."""
+    import duckdb
+
+    path = store_path()
+    now = time.monotonic()
+    with _READER_LOCK:
+        hit = _READER.get(path)
+        if hit is not None and now - hit[0] < _CHECK_S:
+            return hit[2]
+        try:
+            gen = os.stat(path).st_mtime_ns
+        except OSError:
+            _READER.pop(path, None)
+            return None
+        if hit is not None and hit[1] == gen:
+            _READER[path] = (now, gen, hit[2])
+            return hit[2]
+        con = duckdb.connect(path, read_only=True)
+        _READER[path] = (now, gen, con)
+        return con
+
+
+def read_gap_days(ticker: str):
+    """Filas de gap_days del ticker ordenadas por (day_offset, gap_date), o None
+    si el store está desactivado, no existe o no tiene días de gap del ticker."""
+    if not store_enabled():
+        return None
+    try:
+        base = _reader()
+        if base is None:
+            return None
+        cur = base.cursor()
+        try:
+            df = cur.execute(
+                "SELECT day_offset, gap_date, day, rth_open, rth_high, rth_low, rth_close, pm_high, "
+                "path_sum, path_n FROM gap_days WHERE ticker = ? ORDER BY day_offset, gap_date",
+                [ticker.upper()]).fetch_df()
+        finally:
+            cur.close()
+    except Exception as e:
+        logger.warning(f"[GAP STATS] lectura de {ticker} falló: {e}")
+        return None
+    return df if not df.empty else None
@@ -0,0 +1,358 @@
+"""
+Grid pack — dataset del optimizador publicado UNA vez en memoria compartida (mmap).
+
+Antes, run_optimization_grid pasaba `precomputed_groups` (lista de day_df por
+(date, ticker)) + `qualifying_df` por `initargs` del pool forkserver: cada worker
+deserializaba una copia COMPLETA del dataset antes de evaluar un solo punto
+(GBs de IPC y N× RSS en BROAD). Ahora el padre publica el dataset en disco
+compartido (tmpfs /dev/shm por defecto) con la misma forma columnar que el slab:
+
+  {BTT_GRID_PACK_DIR}/{pack_id}/pairs.arrow       Arrow IPC SIN compresión (mmap)
+                                                  ts_ns int64 + OHLCV (dtype de la fuente)
+  .../index.parquet                               (date, ticker, kind, year, month,
+                                                   row_start, row_end, layout)
+  .../qualifying.pkl                              qualifying_df (pickle: fidelidad exacta)
+
+y los workers solo reciben la RUTA: abren el mmap (páginas compartidas vía page
+cache, sin copia por worker) y reconstruyen cada day_df de forma perezosa al
+iterar un punto del grid.
+
+Pares servidos desde el slab store (BTT_SLAB_STREAM_ENABLED): el índice guarda
+una REF (kind, year, month, row_start, row_end, layout) al slab mensual en vez de
+copiar las filas a pairs.arrow — `kind` vacío = filas propias del pack. El worker
+resuelve la ref con slab_store.get_month_layout (mmap ya compartido por page
+cache): si el mes se reconstruyó y ese layout ya no está en el proceso, lanza
+StaleSlabRef y el chunk falla (el padre lo recomputa con los slabs que fijó al
+abrir el pack, o el job falla) — nunca lee las barras de otro par. Cada
+GridPack fija (pin_slab) los slabs de sus refs mientras está abierto. Los puntos
+sin caché de señales no reconstruyen day_df para esos pares: iter_slab_items
+los entrega al pipeline slab de run_backtest como payload "ref".
+
+Contrato de equivalencia con el path legacy (list(groupby(["date","ticker"]))):
+  - mismo orden de pares (claves del groupby ordenadas);
+  - mismas filas por par y en el MISMO orden fuente (sin sort/dedup: eso lo sigue
+    haciendo run_backtest igual que con el day_df legacy);
+  - mismos dtypes de OHLCV (se guardan tal cual vienen del caché; los slabs
+    guardan float32/int32, los mismos dtypes que el caché por-ticker).
+Los pares ref del slab llegan ya ordenados/dedup por el builder; el sort+dedup
+de run_backtest sobre ellos es un no-op (misma semántica keep-first).
+"""
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as pa_ipc
+
+logger = logging.getLogger("backtester.grid_pack")
+
+_PRICE_COLS = ("open", "high", "low", "close")
+_STALE_PACK_SECONDS = 6 * 3600  # packs huérfanos (worker/padre muerto) > 6h se purgan
+
+
+def grid_pack_enabled() -> bool:
+    """Escape hatch: BTT_GRID_PACK_ENABLED=0 vuelve al ctx pickled por initargs."""
+    return os.getenv("BTT_GRID_PACK_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def grid_pack_root() -> str:
+    """tmpfs si existe (/dev/shm: RAM compartida, sin I/O de disco); si no, tmpdir."""
+    env = os.getenv("BTT_GRID_PACK_DIR")
+    if env:
+        return env
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/btt_grid"
+    return os.path.join(tempfile.gettempdir(), "btt_grid")
+
+
+def _pack_paths(pack_dir: str) -> dict:
+    return {
+        "dir": pack_dir,
+        "pairs": os.path.join(pack_dir, "pairs.arrow"),
+        "index": os.path.join(pack_dir, "index.parquet"),
+        "qualifying": os.path.join(pack_dir, "qualifying.pkl"),
+    }
+
+
+def _prune_stale_packs(root: str) -> None:
+    """Best-effort: borra packs de sweeps que murieron sin limpiar."""
+    try:
+        now = time.time()
+        for name in os.listdir(root):
+            p = os.path.join(root, name)
+            try:
+                if os.path.isdir(p) and now - os.stat(p).st_mtime > _STALE_PACK_SECONDS:
+                    shutil.rmtree(p, ignore_errors=True)
+            except OSError:
+                continue
+    except OSError:
+        pass
+
+
+def _ts_ns(col: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_datetime64_any_dtype(col):
+        col = pd.to_datetime(col)
+    return col.values.astype("datetime64[ns]").astype(np.int64)
+
+
+def publish_grid_pack(intraday_df: pd.DataFrame | None, qualifying_df: pd.DataFrame,
+                      root: str | None = None, slab_refs: pd.DataFrame | None = None) -> str:
+    """Publica intraday (agrupado por (date, ticker)) + qualifying y devuelve el
+    directorio del pack. Reordena las filas UNA vez con un argsort estable sobre
+    el nº de grupo — sin materializar un DataFrame por par.
+
+    `slab_refs` (slab_store.slab_pair_refs) añade pares servidos por referencia
+    al slab mensual; el índice final se ordena por (date, ticker) como el groupby.
+    """
+    t0 = time.time()
+    root = root or grid_pack_root()
+    os.makedirs(root, exist_ok=True)
+    _prune_stale_packs(root)
+    pack_dir = os.path.join(root, f"{os.getpid()}_{uuid.uuid4().hex[:12]}")
+    paths = _pack_paths(pack_dir)
+    os.makedirs(pack_dir)
+
+    try:
+        own_index, n = _write_own_pairs(intraday_df, paths["pairs"])
+        index = own_index
+        if slab_refs is not None and not slab_refs.empty:
+            refs = slab_refs[list(_INDEX_COLS)].copy()
+            refs["date"] = refs["date"].astype(str)
+            refs["ticker"] = refs["ticker"].astype(str)
+            index = pd.concat([own_index, refs], ignore_index=True)
+            # un par vive en UN solo mes → sin colisiones entre propios y refs
+            index = index.sort_values(["date", "ticker"], kind="stable").reset_index(drop=True)
+        index.to_parquet(paths["index"], index=False)
+
+        with open(paths["qualifying"], "wb") as f:
+            pickle.dump(qualifying_df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        shutil.rmtree(pack_dir, ignore_errors=True)
+        raise
+
+    n_refs = len(index) - len(own_index)
+    logger.info(
+        f"[GRID_PACK] publicado {len(index):,} pares ({n_refs:,} ref slab) / "
+        f"{n:,} filas propias en {pack_dir} ({round(time.time() - t0, 2)}s)"
+    )
+    return pack_dir
+
+
+_INDEX_COLS = ("date", "ticker", "kind", "year", "month", "row_start", "row_end", "layout")
+
+
+def _write_own_pairs(intraday_df: pd.DataFrame | None, pairs_path: str):
+    """Escribe pairs.arrow con las filas agrupadas por par. Devuelve (índice, n_filas)."""
+    if intraday_df is None or intraday_df.empty:
+        return pd.DataFrame({c: pd.Series(dtype=object if c in ("date", "ticker", "kind", "layout")
+                                          else np.int64) for c in _INDEX_COLS}), 0
+    keys_df = pd.DataFrame({
+        "date": intraday_df["date"].astype(str).str[:10].values,
+        "ticker": intraday_df["ticker"].astype(str).values,
+    })
+    # sort=True → mismo orden de claves que list(groupby(["date","ticker"]));
+    # argsort estable → dentro de cada par se conserva el orden fuente.
+    gid = keys_df.groupby(["date", "ticker"], sort=True).ngroup().values
+    order = np.argsort(gid, kind="stable")
+    gid_sorted = gid[order]
+    n = len(order)
+    if n:
+        change = np.empty(n, dtype=bool)
+        change[0] = True
+        change[1:] = gid_sorted[1:] != gid_sorted[:-1]
+        starts = np.flatnonzero(change)
+    else:
+        starts = np.empty(0, dtype=np.int64)
+    ends = np.append(starts[1:], n).astype(np.int64)
+
+    arrays = [pa.array(_ts_ns(intraday_df["timestamp"])[order], type=pa.int64())]
+    names = ["ts_ns"]
+    for c in _PRICE_COLS + ("volume",):
+        arrays.append(pa.array(np.ascontiguousarray(intraday_df[c].values[order])))
+        names.append(c)
+    table = pa.Table.from_arrays(arrays, names=names)
+    with pa.OSFile(pairs_path, "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    first = order[starts]
+    index = pd.DataFrame({
+        "date": keys_df["date"].values[first],
+        "ticker": keys_df["ticker"].values[first],
+        "kind": "",
+        "year": np.zeros(len(starts), dtype=np.int64),
+        "month": np.zeros(len(starts), dtype=np.int64),
+        "row_start": starts.astype(np.int64),
+        "row_end": ends,
+        "layout": "",
+    })
+    return index, n
+
+
+def release_grid_pack(pack_dir: str | None) -> None:
+    """Borra el pack del padre al terminar el sweep (los mmaps abiertos en workers
+    siguen siendo válidos hasta que estos mueren: semántica unlink de POSIX)."""
+    if not pack_dir:
+        return
+    with _OPEN_LOCK:
+        _OPEN_PACKS.pop(pack_dir, None)
+    shutil.rmtree(pack_dir, ignore_errors=True)
+
+
+class GridPack:
+    """Pack abierto en un proceso. Las columnas son vistas sobre el mmap."""
+
+    def __init__(self, pack_dir: str):
+        self.pack_dir = pack_dir
+        paths = _pack_paths(pack_dir)
+        self._ts = None
+        self._cols = {}
+        if os.path.exists(paths["pairs"]):  # ausente si TODOS los pares son ref slab
+            self._mmap = pa.memory_map(paths["pairs"], "r")
+            table = pa_ipc.open_file(self._mmap).read_all().combine_chunks()
+
+            def _col(name):
+                col = table.column(name)
+                if col.num_chunks == 0:
+                    return np.empty(0, dtype=col.type.to_pandas_dtype())
+                return col.chunk(0).to_numpy(zero_copy_only=True)
+
+            self._ts = _col("ts_ns")
+            self._cols = {c: _col(c) for c in _PRICE_COLS + ("volume",)}
+        index = pd.read_parquet(paths["index"])
+        self.keys = list(zip(index["date"].astype(str), index["ticker"].astype(str)))
+        self._key_index = {k: i for i, k in enumerate(self.keys)}
+        self._kinds = index["kind"].astype(str).tolist()
+        self.n_slab_refs = sum(1 for k in self._kinds if k)
+        self._years = index["year"].values.astype(np.int64)
+        self._months = index["month"].values.astype(np.int64)
+        self._starts = index["row_start"].values.astype(np.int64)
+        self._ends = index["row_end"].values.astype(np.int64)
+        self._layouts = index["layout"].astype(str).tolist()
+        with open(paths["qualifying"], "rb") as f:
+            self.qualifying_df = pickle.load(f)
+        # los pins viven lo que el pack: close() o al liberarse el objeto (el
+        # padre lo sigue usando en la red de seguridad tras release_grid_pack)
+        self._unpin = weakref.finalize(self, _unpin_slabs, self._pin_slabs())
+
+    def _pin_slabs(self) -> list:
+        """Fija los slabs de las refs con el layout del índice. Los que ya no
+        están en el proceso se quedan sin fijar: fallan al resolver."""
+        from app.db.slab_store import StaleSlabRef, get_month_layout, pin_slab
+        pinned = []
+        for kind, y, m, layout in sorted({(k, int(y), int(m), lay) for k, y, m, lay in zip(
+                self._kinds, self._years, self._months, self._layouts) if k}):
+            try:
+                slab = get_month_layout(kind, y, m, layout)
+            except StaleSlabRef:
+                continue
+            pin_slab(slab)
+            pinned.append(slab)
+        return pinned
+
+    def close(self) -> None:
+        """Suelta los slabs fijados (idempotente)."""
+        self._unpin()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _columns(self, i: int):
+        """(ts_ns, open, high, low, close, volume) del par i — vistas sin copia."""
+        s, e = int(self._starts[i]), int(self._ends[i])
+        kind = self._kinds[i]
+        if kind:
+            from app.db.slab_store import get_month_layout
+            slab = get_month_layout(kind, int(self._years[i]), int(self._months[i]), self._layouts[i])
+            a = slab.slice_native(s, e)
+            return a.ts_ns, a.open, a.high, a.low, a.close, a.volume
+        sl = slice(s, e)
+        c = self._cols
+        return self._ts[sl], c["open"][sl], c["high"][sl], c["low"][sl], c["close"][sl], c["volume"][sl]
+
+    def day_df(self, i: int) -> pd.DataFrame:
+        """day_df del par i con las columnas que consume run_backtest."""
+        ts, o, h, l, c, v = self._columns(i)
+        date, ticker = self.keys[i]
+        return pd.DataFrame({
+            "ticker": ticker,
+            "date": date,
+            "timestamp": ts.view("datetime64[ns]"),
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": v,
+        })
+
+    def indices_for(self, valid_keys) -> list[int]:
+        """Índices (en orden del pack) de los pares cuyo (date, ticker) está en
+        valid_keys — lookups en el índice clave→posición, sin recorrer el pack."""
+        return sorted(self._key_index[k] for k in valid_keys if k in self._key_index)
+
+    def iter_groups(self, indices=None):
+        """Generador con el contrato de day_group_iter: ((date, ticker), day_df).
+        Perezoso — solo un day_df vivo a la vez por punto del grid."""
+        for i in (range(len(self.keys)) if indices is None else indices):
+            yield self.keys[i], self.day_df(i)
+
+
+    def iter_slab_items(self, indices=None, strategy_def=None, qual_lookup=None):
+        """Items del pipeline slab de run_backtest (contrato de
+        slab_store.iter_slab_items): los pares ref salen como payload ("ref", ...)
+        y se resuelven contra el mmap del slab sin construir un day_df; las filas
+        propias (meses sin slab) pasan por day_df + legacy_pair_item, como el
+        fallback de iter_slab_items_with_fallback. Sin swing: los días
+        siguientes de un par no están en el pack."""
+        from app.db.slab_store import calendar_excluded, legacy_pair_item
+
+        rm = strategy_def.get("risk_management", {}) if strategy_def else {}
+        exclude_active = rm.get("exclude_days_active", False)
+        exclude_days = rm.get("exclude_days", []) if exclude_active else []
+        exclude_months = rm.get("exclude_months", []) if exclude_active else []
+        qual_lookup = qual_lookup or {}
+        for i in (range(len(self.keys)) if indices is None else indices):
+            date, ticker = self.keys[i]
+            kind = self._kinds[i]
+            if not kind:
+                item = legacy_pair_item(date, ticker, self.day_df(i), qual_lookup, strategy_def)
+                if item is not None:
+                    yield item
+                continue
+            if calendar_excluded(date, exclude_days, exclude_months):
+                continue
+            s, e = int(self._starts[i]), int(self._ends[i])
+            if e - s < 5:
+                continue
+            yield date, ticker, qual_lookup.get((ticker, date), {}), (
+                "ref", kind, int(self._years[i]), int(self._months[i]), s, e, self._layouts[i])
+
+
+def _unpin_slabs(slabs: list) -> None:
+    from app.db.slab_store import unpin_slab
+    for slab in slabs:
+        unpin_slab(slab)
+
+
+_OPEN_PACKS: dict = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def open_grid_pack(pack_dir: str) -> GridPack:
+    """GridPack cacheado por proceso (un mmap por worker, compartido entre chunks)."""
+    with _OPEN_LOCK:
+        hit = _OPEN_PACKS.get(pack_dir)
+    if hit is not None:
+        return hit
+    pack = GridPack(pack_dir)
+    with _OPEN_LOCK:
+        _OPEN_PACKS[pack_dir] = pack
+    return pack
@@ -0,0 +1,287 @@
+"""
+Curvas intradía "% change desde el open RTH" por par, precalculadas sobre el slab.
+
+processor_service.get_aggregate_time_series lanzaba una query a intraday_1m por
+(ticker, date) con ``CAST(timestamp AS DATE)`` y se quedaba con los 10 primeros
+pares. Aquí cada par se reduce UNA vez a un vector de 390 minutos (09:30–15:59):
+
+    curve[i] = (close(09:30 + i) − open(primera vela RTH)) / open × 100
+
+NaN donde no hay vela. Por mes se guarda una matriz (n_pairs × 390) alineada con
+el índice del slab (MonthSlab.pairs()), junto al propio slab:
+
+    <slab_dir>/open_curves.npy   float32 (o float16 con BTT_OPEN_CURVES_DTYPE)
+    <slab_dir>/open_curves.json  {manifest_mtime, n_pairs, dtype}
+
+Se construye en el daemon de replica_sync tras cada build/delta, o en el primer
+uso si falta o quedó vieja (el manifest cambió). La curva media / mediana /
+percentiles de cualquier dataset es entonces un gather + reducción numpy sobre
+todas sus filas, sin tope de pares. Los meses sin slab se resuelven con una query
+por bloque de hasta BTT_OPEN_CURVES_QUERY_PAIRS pares del mes (rango tipado de
+timestamp + pares en VALUES) y la misma reducción sobre las filas de todos los
+bloques.
+
+Best-effort: un fallo al persistir la matriz no impide devolver la curva.
+"""
+import json
+import logging
+import os
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("backtester.open_curves")
+
+RTH_START_MIN = 9 * 60 + 30
+RTH_MINUTES = 390
+_NS_PER_MIN = 60_000_000_000
+_FILES = ("open_curves.npy", "open_curves.json")
+
+# Pares por query del fallback sin slab: /filter no tiene LIMIT y cada par son
+# 2 parámetros en el VALUES.
+_QUERY_PAIRS = max(1, int(os.getenv("BTT_OPEN_CURVES_QUERY_PAIRS", "1000")))
+
+_CURVES: dict = {}
+_CURVES_LOCK = threading.Lock()
+
+
+def curves_dtype():
+    """dtype de almacenamiento: float32 por defecto; float16 divide el disco/page
+    cache a la mitad (~3 cifras significativas, de sobra para un % medio)."""
+    raw = os.getenv("BTT_OPEN_CURVES_DTYPE", "float32").strip().lower()
+    return np.float16 if raw in ("float16", "f16", "half") else np.float32
+
+
+def prebuild_enabled() -> bool:
+    return os.getenv("BTT_OPEN_CURVES_PREBUILD", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def minute_labels() -> list:
+    """'HH:MM' de cada columna de la matriz."""
+    return [f"{(RTH_START_MIN + i) // 60:02d}:{(RTH_START_MIN + i) % 60:02d}" for i in range(RTH_MINUTES)]
+
+
+def curves_from_arrays(pair_id, n_pairs: int, ts_ns, open_, close) -> np.ndarray:
+    """Matriz float32 (n_pairs × 390) desde filas planas.
+
+    ``pair_id`` asigna cada fila a su par (−1 = ignorar). Las filas de un par
+    deben venir ordenadas por timestamp (orden del slab): la primera vela RTH de
+    cada par fija el open de referencia, como hacía el path por par.
+    """
+    out = np.full((n_pairs, RTH_MINUTES), np.nan, dtype=np.float32)
+    if n_pairs == 0 or len(ts_ns) == 0:
+        return out
+    pair_id = np.asarray(pair_id, dtype=np.int64)
+    minute = (np.asarray(ts_ns, dtype=np.int64) // _NS_PER_MIN) % 1440 - RTH_START_MIN
+    rth = (pair_id >= 0) & (minute >= 0) & (minute < RTH_MINUTES)
+    if not rth.any():
+        return out
+    pid, minute = pair_id[rth], minute[rth]
+    o = np.asarray(open_)[rth].astype(np.float64)
+    c = np.asarray(close)[rth].astype(np.float64)
+
+    first_pid, first_at = np.unique(pid, return_index=True)
+    ref = np.full(n_pairs, np.nan)
+    ref[first_pid] = o[first_at]
+    base = ref[pid]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (c - base) / base * 100.0
+    pct[~(base > 0)] = np.nan
+    out[pid, minute] = pct
+    return out
+
+
+# ── por mes (slab) ───────────────────────────────────────────────────────────
+
+def _compute_month(slab) -> np.ndarray:
+    idx = slab.pairs()
+    n = len(idx)
+    starts = idx["row_start"].to_numpy(np.int64)
+    lengths = idx["row_end"].to_numpy(np.int64) - starts
+    pair_of_row = np.full(slab.n_rows, -1, dtype=np.int64)
+    if n:
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        pair_of_row[np.arange(int(lengths.sum())) + offsets] = np.repeat(np.arange(n), lengths)
+
+    out = np.full((n, RTH_MINUTES), np.nan, dtype=np.float32)
+    for base, (ts, open_, _h, _l, close, _v) in slab.segments():
+        pid = pair_of_row[base:base + len(ts)]
+        part = curves_from_arrays(pid, n, ts, open_, close)
+        filled = ~np.isnan(part)
+        out[filled] = part[filled]
+    return out
+
+
+def _curve_paths(slab) -> tuple:
+    d = slab._paths.get("dir") or os.path.dirname(slab._paths["manifest"])
+    return tuple(os.path.join(d, f) for f in _FILES)
+
+
+def _load_persisted(slab, n_pairs: int):
+    npy, meta = _curve_paths(slab)
+    try:
+        with open(meta) as f:
+            info = json.load(f)
+        if info.get("manifest_mtime") != slab.manifest_mtime or info.get("n_pairs") != n_pairs:
+            return None
+        mat = np.load(npy, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return mat if mat.shape == (n_pairs, RTH_MINUTES) else None
+
+
+def _persist(slab, matrix: np.ndarray) -> None:
+    npy, meta = _curve_paths(slab)
+    try:
+        tmp = f"{npy}.tmp.npy"
+        np.save(tmp, matrix)
+        os.replace(tmp, npy)
+        with open(f"{meta}.tmp", "w") as f:
+            json.dump({"manifest_mtime": slab.manifest_mtime, "n_pairs": int(matrix.shape[0]),
+                       "dtype": str(matrix.dtype)}, f)
+        os.replace(f"{meta}.tmp", meta)
+    except OSError as e:
+        logger.warning(f"[OPEN CURVES] no se pudo guardar {npy}: {e}")
+
+
+def month_curves(slab):
+    """(matriz n_pairs × 390, {(ticker, date): fila}) del mes. Cacheado por
+    proceso y por generación del manifest; persistido junto al slab."""
+    key = (slab.kind, slab.year, slab.month)
+    with _CURVES_LOCK:
+        hit = _CURVES.get(key)
+    if hit is not None and hit[0] == slab.manifest_mtime:
+        return hit[1], hit[2]
+
+    idx = slab.pairs()
+    rows = {(t, d): i for i, (t, d) in enumerate(zip(idx["ticker"], idx["date"]))}
+    matrix = _load_persisted(slab, len(idx))
+    if matrix is None:
+        matrix = _compute_month(slab).astype(curves_dtype(), copy=False)
+        _persist(slab, matrix)
+    with _CURVES_LOCK:
+        _CURVES[key] = (slab.manifest_mtime, matrix, rows)
+    return matrix, rows
+
+
+def build_month_curves(kind: str, year: int, month: int) -> int:
+    """Precalcula (si hace falta) y persiste las curvas de un slab publicado; nº
+    de pares. Abre el slab sin pasar por la caché de get_month (lo llama el
+    daemon justo tras publicar)."""
+    from app.db.slab_builder import slab_paths
+    from app.db.slab_store import MonthSlab, slab_exists
+    if not slab_exists(kind, year, month):
+        return 0
+    slab = MonthSlab(kind, year, month, slab_paths(kind, year, month))
+    matrix, _rows = month_curves(slab)
+    with _CURVES_LOCK:
+        _CURVES.pop((kind, year, month), None)  # que el proceso la recargue (mmap)
+    return int(matrix.shape[0])
+
+
+# ── fallback sin slab ────────────────────────────────────────────────────────
+
+def _query_month_curves(con, pairs: list) -> np.ndarray:
+    """Curvas de los pares de UN mes sin slab: una query con los pares en VALUES
+    y el rango [min día, max día] como predicado tipado (+ poda hive en GCS)."""
+    from app.services.query_planner import DatePlan, partition_predicate
+
+    days = sorted({d for _t, d in pairs})
+    plan = DatePlan.inclusive(days[0], days[-1])
+    clauses, params = plan.predicates("i.timestamp")
+    if os.getenv("DB_PROVIDER", "motherduck").lower() == "gcs":
+        part = partition_predicate(plan, "i.year", "i.month")
+        if part:
+            clauses.append(part)
+    values = ", ".join("(?, CAST(? AS DATE))" for _ in pairs)
+    pair_params = [x for t, d in pairs for x in (t, d)]
+    df = con.execute(
+        "SELECT p.ticker, CAST(p.d AS VARCHAR) AS date, i.timestamp, i.open, i.close "
+        f"FROM intraday_1m i JOIN (VALUES {values}) AS p(ticker, d) "
+        "ON i.ticker = p.ticker AND i.timestamp >= CAST(p.d AS TIMESTAMP) "
+        "AND i.timestamp < CAST(p.d AS TIMESTAMP) + INTERVAL 1 DAY "
+        f"WHERE {' AND '.join(clauses)}",
+        pair_params + params,
+    ).fetch_df()
+    if df.empty:
+        return np.empty((0, RTH_MINUTES), dtype=np.float32)
+    df["ts_ns"] = pd.to_datetime(df["timestamp"]).values.astype("datetime64[ns]").astype(np.int64)
+    df = df.sort_values(["ticker", "date", "ts_ns"], kind="stable")
+    codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([df["ticker"], df["date"]]))
+    return curves_from_arrays(codes, len(uniques), df["ts_ns"].to_numpy(),
+                              df["open"].to_numpy(), df["close"].to_numpy())
+
+
+def dataset_curves(pairs, con=None) -> np.ndarray:
+    """Matriz float32 (n × 390) con la curva de cada par (ticker, 'YYYY-MM-DD')
+    que tenga velas. Pares de meses con slab: gather sobre la matriz del mes;
+    meses sin slab: _query_month_curves por bloques de _QUERY_PAIRS pares
+    (``con`` o get_db_connection)."""
+    from app.db.slab_store import get_month_any_kind
+
+    by_month: dict = {}
+    for t, d in pairs:
+        d = str(d)[:10]
+        try:
+            key = (int(d[:4]), int(d[5:7]))
+        except ValueError:
+            continue
+        by_month.setdefault(key, []).append((str(t), d))
+
+    blocks = []
+    for (y, m), month_pairs in sorted(by_month.items()):
+        month_pairs = list(dict.fromkeys(month_pairs))
+        slab = get_month_any_kind(y, m)
+        if slab is not None:
+            matrix, rows = month_curves(slab)
+            sel = [rows[p] for p in month_pairs if p in rows]
+            if sel:
+                blocks.append(np.asarray(matrix[np.asarray(sel)], dtype=np.float32))
+            continue
+        if con is None:
+            from app.database import get_db_connection
+            con = get_db_connection()
+        for i in range(0, len(month_pairs), _QUERY_PAIRS):
+            try:
+                blocks.append(_query_month_curves(con, month_pairs[i:i + _QUERY_PAIRS]))
+            except Exception as e:
+                logger.warning(f"[OPEN CURVES] fallback {y}-{m:02d} (bloque {i // _QUERY_PAIRS}) falló: {e}")
+    if not blocks:
+        return np.empty((0, RTH_MINUTES), dtype=np.float32)
+    return np.concatenate(blocks)
+
+
+# ── reducción ────────────────────────────────────────────────────────────────
+
+def curve_stats(matrix: np.ndarray, percentiles=(25, 75)) -> dict:
+    """{count, mean, median, p<q>...} por minuto (NaN donde ningún par tiene vela)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    count = (~np.isnan(matrix)).sum(axis=0)
+    out = {"count": count}
+    if len(matrix):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # columnas todo-NaN
+            out["mean"] = np.nanmean(matrix, axis=0, dtype=np.float64)
+            qs = np.nanpercentile(matrix, [50, *percentiles], axis=0)
+    else:
+        out["mean"] = np.full(RTH_MINUTES, np.nan)
+        qs = np.full((1 + len(percentiles), RTH_MINUTES), np.nan)
+    out["median"] = qs[0]
+    for q, row in zip(percentiles, qs[1:]):
+        out[f"p{q}"] = row
+    return out
+
+
+def curve_points(stats: dict) -> list:
+    """[{time, value, median, p25, ...}] sólo para minutos con datos (value = media)."""
+    labels = minute_labels()
+    extra = [k for k in stats if k not in ("count", "mean")]
+    points = []
+    for i in np.flatnonzero(stats["count"] > 0):
+        p = {"time": labels[i], "value": float(stats["mean"][i])}
+        for k in extra:
+            p[k] = float(stats[k][i])
+        points.append(p)
+    return points
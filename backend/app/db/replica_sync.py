@@ -14,9 +14,26 @@ migrar = cambiar una env. GCS sigue siendo la fuente de verdad; el slab es cach
 
 Reglas de refresco (idempotente):
   - mes sin slab → se construye;
-  - el MES CORRIENTE se reconstruye siempre (sigue recibiendo datos);
+  - el MES CORRIENTE sigue recibiendo datos (catch-up escribe un parquet por día):
+    los ficheros nuevos se anexan como segmento delta (coste ∝ un día), con rebuild
+    completo solo si cambió un fichero ya consumido, y compactación periódica
+    (BTT_SLAB_MAX_DELTAS);
   - resto de meses con slab válido → se saltan.
 
+Con BTT_SLAB_COLD_ENABLED los meses fuera de la ventana caliente
+(BTT_SLAB_HOT_MONTHS, default 24 contando el corriente) pasan al tier frío
+comprimido (apply_cold_tier → slab_builder.freeze_month); se leen igual.
+
+Tras cada pasada el daemon regenera el catálogo global de pares si ya no cubre
+los meses publicados (BTT_SLAB_CATALOG, default on) y, con BTT_SLAB_YEAR_SLABS,
+los slabs anuales coalescidos de los años cerrados que hayan cambiado
+(refresh_coalesced).
+
+El daemon refresca también la réplica local de daily_metrics (app.db.daily_replica,
+BTT_DAILY_REPLICA_ENABLED) desde la misma fuente, el slab diario mmap de
+daily_metrics (refresh_daily_slab, BTT_DAILY_SLAB_ENABLED) y tras ellos el store
+de días de gap por ticker (app.db.gap_stats_store, BTT_GAP_STATS_ENABLED).
+
 Todo best-effort: nunca lanza, nunca tumba el proceso (patrón prewarm_gap_universe).
 """
 import datetime as _dt
@@ -56,8 +73,35 @@ def parse_years(spec: str) -> set[int]:
     return years
 
 
+def _local_file_tokens(folder: str) -> dict:
+    """{path: "size|mtime_ns"} de los parquet de una partición local."""
+    out = {}
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(".parquet"):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out[path] = f"{st.st_size}|{st.st_mtime_ns}"
+    return out
+
+
+def _gcs_file_tokens(conn, pattern: str) -> dict:
+    """{path: "size|last_modified"} de los objetos GCS que casan con `pattern`.
+    read_blob sin proyectar `content` sólo lista (no descarga); el token cambia
+    si un objeto se reescribe con el mismo nombre, como en _local_file_tokens."""
+    rows = conn.execute(
+        f"SELECT filename, size, last_modified FROM read_blob('{pattern}') ORDER BY filename"
+    ).fetchall()
+    return {f: f"{size}|{modified.isoformat() if modified is not None else ''}"
+            for f, size, modified in rows}
+
+
 def discover_months(source: str = None) -> list[dict]:
-    """Meses disponibles en la fuente. Devuelve [{kind, folder, year, month, glob}].
+    """Meses disponibles en la fuente. Devuelve [{kind, folder, year, month, glob, files}]
+    (files = {path: token} de los parquet del mes, para el append incremental).
     Con opt y raw para el mismo mes, gana opt (paridad con _select_intraday_glob_for_month)."""
     source = source if source is not None else REPLICA_SOURCE
     found: dict[tuple[int, int], dict] = {}
@@ -67,25 +111,25 @@ def discover_months(source: str = None) -> list[dict]:
         conn = get_connection()
         for kind, folder in _KINDS:
             try:
-                rows = conn.execute(
-                    f"SELECT file FROM glob('gs://{GCS_BUCKET}/cold_storage/{folder}/*/*/*.parquet')"
-                ).fetchall()
+                tokens = _gcs_file_tokens(conn, f"gs://{GCS_BUCKET}/cold_storage/{folder}/*/*/*.parquet")
             except Exception as e:
-                logger.warning(f"[REPLICA] glob GCS {folder} falló: {e}")
+                logger.warning(f"[REPLICA] listado GCS {folder} falló: {e}")
                 continue
-            for (f,) in rows:
+            for f, tok in tokens.items():
                 m = _HIVE_RE.search(f)
                 if not m:
                     continue
                 y, mm = int(m.group(1)), int(m.group(2))
                 key = (y, mm)
                 # _KINDS itera opt primero: si el mes ya está como opt, raw no lo pisa
-                if key in found and found[key]["kind"] == "opt":
+                if key in found and found[key]["kind"] != kind:
                     continue
-                found[key] = {
+                spec = found.setdefault(key, {
                     "kind": kind, "folder": folder, "year": y, "month": mm,
                     "glob": f"gs://{GCS_BUCKET}/cold_storage/{folder}/year={y}/month={mm}/*.parquet",
-                }
+                    "files": {},
+                })
+                spec["files"][f] = tok
     else:
         # Mirror local (migración): <root>/<folder>/year=Y/month=M/*.parquet
         for kind, folder in _KINDS:
@@ -106,21 +150,26 @@ def discover_months(source: str = None) -> list[dict]:
                     if key in found and found[key]["kind"] == "opt":
                         continue  # opt ya encontrado, no degradar a raw
                     found[key] = {"kind": kind, "folder": folder, "year": y, "month": mm,
-                                  "glob": os.path.join(full, "*.parquet")}
+                                  "glob": os.path.join(full, "*.parquet"),
+                                  "files": _local_file_tokens(full)}
 
     return [found[k] for k in sorted(found)]
 
 
 def run_sync_once(source: str = None, years: set[int] = None, now: _dt.date = None) -> dict:
-    """Una pasada de sync. Devuelve {built, skipped, failed, months}."""
-    from app.db.slab_builder import build_month_from_parquet_glob
+    """Una pasada de sync. Devuelve {built, appended, skipped, failed, months}.
+
+    Meses cerrados: se construyen una vez. Mes corriente: solo los ficheros
+    fuente nuevos se anexan como delta (sync_month_from_parquet_files); rebuild
+    completo si cambió un fichero ya consumido."""
+    from app.db.slab_builder import build_month_from_parquet_glob, sync_month_from_parquet_files
     from app.db.slab_store import slab_exists
 
     years = years if years is not None else parse_years(REPLICA_YEARS)
     now = now or _dt.date.today()
     months = [x for x in discover_months(source) if not years or x["year"] in years]
 
-    built = skipped = failed = 0
+    built = appended = skipped = failed = 0
     t0 = time.time()
     for mi, spec in enumerate(months, 1):
         y, m, kind = spec["year"], spec["month"], spec["kind"]
@@ -129,20 +178,116 @@ def run_sync_once(source: str = None, years: set[int] = None, now: _dt.date = No
             skipped += 1
             continue
         try:
-            res = build_month_from_parquet_glob(spec["glob"], kind, y, m)
-            if res is not None:
+            if is_current:
+                action = sync_month_from_parquet_files(spec["glob"], spec.get("files") or {}, kind, y, m)
+            else:
+                res = build_month_from_parquet_glob(spec["glob"], kind, y, m,
+                                                    source_files=spec.get("files"))
+                action = "built" if res is not None else "empty"
+            if action == "built":
                 built += 1
+            elif action in ("appended", "compacted"):
+                appended += 1
             else:
                 skipped += 1
         except Exception as e:
             failed += 1
             logger.warning(f"[REPLICA] build {kind} {y}-{m:02d} falló: {e}")
+            action = None
+        if action in ("built", "appended", "compacted"):
+            try:
+                from app.db import open_curves
+                if open_curves.prebuild_enabled():
+                    open_curves.build_month_curves(kind, y, m)
+            except Exception as e:  # se recalculan en el primer uso
+                logger.warning(f"[REPLICA] curvas open {kind} {y}-{m:02d} fallaron: {e}")
         if mi % 6 == 0:
             logger.info(f"[REPLICA] {mi}/{len(months)} meses ({built} nuevos, {round(time.time()-t0)}s)")
 
-    logger.info(f"[REPLICA] sync done: {built} construidos, {skipped} al día, "
+    logger.info(f"[REPLICA] sync done: {built} construidos, {appended} con delta, {skipped} al día, "
                 f"{failed} fallidos de {len(months)} meses ({round(time.time()-t0)}s)")
-    return {"built": built, "skipped": skipped, "failed": failed, "months": len(months)}
+    return {"built": built, "appended": appended, "skipped": skipped, "failed": failed,
+            "months": len(months)}
+
+
+def apply_cold_tier(now: _dt.date = None) -> int:
+    """Congela los meses publicados más antiguos que la ventana caliente.
+    Devuelve cuántos meses pasaron al tier frío. Nunca lanza."""
+    from app.db import slab_builder
+
+    if not slab_builder.slab_cold_enabled():
+        return 0
+    now = now or _dt.date.today()
+    current = now.year * 12 + now.month - 1
+    hot = slab_builder.slab_hot_months()
+    frozen = 0
+    for kind, _folder in _KINDS:
+        for y, m in slab_builder.published_months(kind):
+            if current - (y * 12 + m - 1) < hot:
+                continue
+            try:
+                manifest = slab_builder.read_manifest(slab_builder.slab_paths(kind, y, m))
+                if manifest is None or manifest.get("tier") == "cold":
+                    continue
+                if slab_builder.freeze_month(kind, y, m) is None:
+                    continue
+                frozen += 1
+            except Exception as e:
+                logger.warning(f"[REPLICA] tier frío {kind} {y}-{m:02d} falló: {e}")
+                continue
+            try:
+                from app.db import open_curves
+                if open_curves.prebuild_enabled():
+                    open_curves.build_month_curves(kind, y, m)
+            except Exception as e:  # se recalculan en el primer uso
+                logger.warning(f"[REPLICA] curvas open {kind} {y}-{m:02d} fallaron: {e}")
+    if frozen:
+        logger.info(f"[REPLICA] tier frío: {frozen} meses congelados (ventana caliente {hot} meses)")
+    return frozen
+
+
+def refresh_coalesced(now: _dt.date = None) -> dict:
+    """Catálogo global de pares + slabs anuales de años cerrados, sólo lo que
+    esté desfasado. Devuelve {catalog, year_slabs}. Nunca lanza."""
+    from app.db import slab_builder
+
+    now = now or _dt.date.today()
+    out = {"catalog": False, "year_slabs": 0}
+    if slab_builder.slab_year_slabs_enabled():
+        for kind, _folder in _KINDS:
+            years = sorted({y for (y, _m) in slab_builder.published_months(kind)})
+            for y in years:
+                if y >= now.year or not slab_builder.year_slab_stale(kind, y):
+                    continue  # el año corriente recibe deltas a diario: se queda mensual
+                try:
+                    if slab_builder.build_year_slab(kind, y) is not None:
+                        out["year_slabs"] += 1
+                except Exception as e:
+                    logger.warning(f"[REPLICA] slab anual {kind} {y} falló: {e}")
+    try:
+        if slab_builder.slab_catalog_enabled() and slab_builder.catalog_stale():
+            out["catalog"] = slab_builder.build_catalog() is not None
+    except Exception as e:
+        logger.warning(f"[REPLICA] catálogo de pares falló: {e}")
+    return out
+
+
+def refresh_daily_slab(source: str = None, years: set[int] = None) -> str:
+    """Reconstruye el slab diario si cambió el conjunto de parquet de daily_metrics.
+    Devuelve "built" | "unchanged" | "empty" | "failed". Nunca lanza."""
+    from app.db import daily_replica, slab_builder
+
+    try:
+        files = {p: tok for (y, _m), fs in daily_replica.discover_daily_files(source).items()
+                 if not years or y in years for p, tok in fs.items()}
+        if not files:
+            return "empty"
+        if not slab_builder.daily_slab_stale(files):
+            return "unchanged"
+        return "built" if slab_builder.build_daily_slab(files) is not None else "empty"
+    except Exception as e:
+        logger.warning(f"[REPLICA] slab diario falló: {e}")
+        return "failed"
 
 
 def warm_page_cache(max_bytes: int = 0) -> int:
@@ -156,7 +301,7 @@ def warm_page_cache(max_bytes: int = 0) -> int:
     slabs = []
     for dirpath, _dirs, names in os.walk(root):
         for n in names:
-            if n == "slab.arrow":
+            if n in ("slab.arrow", "slab.cold"):
                 slabs.append(os.path.join(dirpath, n))
     # recientes primero: los backtests suelen tocar los últimos años
     slabs.sort(reverse=True)
@@ -188,10 +333,30 @@ def start_replica_daemon() -> None:
         while True:
             try:
                 run_sync_once()
-                if PAGECACHE_WARM:
-                    warm_page_cache()
             except Exception as e:  # nunca tumbar el proceso
                 logger.warning(f"[REPLICA] pasada de sync falló: {e}")
+            apply_cold_tier()
+            refresh_coalesced()
+            try:
+                from app.db import daily_replica
+                if daily_replica.replica_enabled():
+                    daily_replica.sync_daily_replica(years=parse_years(REPLICA_YEARS))
+            except Exception as e:
+                logger.warning(f"[REPLICA] réplica daily_metrics falló: {e}")
+            from app.db.slab_builder import daily_slab_enabled
+            if daily_slab_enabled():
+                refresh_daily_slab(years=parse_years(REPLICA_YEARS))
+            try:
+                from app.db import gap_stats_store
+                if gap_stats_store.store_enabled():
+                    gap_stats_store.refresh_gap_stats()
+            except Exception as e:
+                logger.warning(f"[REPLICA] store de gap stats falló: {e}")
+            try:
+                if PAGECACHE_WARM:
+                    warm_page_cache()
+            except Exception as e:
+                logger.warning(f"[REPLICA] warm del page cache falló: {e}")
             time.sleep(max(1.0, REPLICA_INTERVAL_H) * 3600)
 
     threading.Thread(target=_loop, daemon=True, name="replica-sync").start()
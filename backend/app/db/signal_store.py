@@ -0,0 +1,230 @@
+"""
+Signal store — caché PERSISTENTE de señales entry/exit por par (bits empaquetados, mmap).
+
+Antes el caché de señales de los sweeps risk-only era un dict por proceso
+(_WORKER_SIGNAL_CACHE): cada worker re-traducía los mismos pares y un segundo
+sweep sobre la misma lógica arrancaba en frío. Ahora las señales se persisten:
+
+  {BTT_SIGNAL_CACHE_DIR}/v{SIGNAL_CACHE_VERSION}/{logic_hash}/
+      seg-{pid}-{uuid}.bin          entries|exits con np.packbits, concatenados
+      seg-{pid}-{uuid}.idx.parquet  (ticker, date, fp, offset, n_bars)
+
+  - logic_hash: hash de lo que determina las señales (bias + entry/exit logic ya
+    normalizados por compile_strategy_def) y de la huella del código que las
+    calcula (signal_code_fingerprint: fuente de strategy_engine + indicators),
+    así un deploy que toque indicadores o la traducción no sirve señales viejas.
+    El risk management NO entra: se re-parsea por punto en run_backtest.
+  - fp: huella del CONTENIDO del par (ts + OHLCV tal como los ve el motor +
+    daily_stats). Hace las veces de la huella del slab: un slab reconstruido con
+    otros datos, o un par servido por el fetch legacy, invalida/acierta solo.
+  - segmentos append-only: cada proceso acumula sus pares nuevos y los publica
+    en flush() (bin primero, índice después con os.replace → un lector nunca ve
+    un índice sin su bin). Los demás workers los ven en su siguiente refresh().
+
+Se usa como `_signal_cache` de run_backtest (keyed_by_content=True → la clave
+es (ticker, date, fp)). Solo guarda entries/exits: direction y re-entries salen
+siempre de la estrategia compilada del punto.
+"""
+import functools
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("backtester.signal_store")
+
+# Subir cuando cambie el formato de los segmentos en disco. Los cambios de
+# semántica de las señales ya los recoge signal_code_fingerprint().
+SIGNAL_CACHE_VERSION = 1
+# Módulos cuyo código determina entries/exits.
+_SIGNAL_CODE_MODULES = ("app.services.strategy_engine", "app.services.indicators")
+_STALE_LOGIC_SECONDS = 14 * 86400  # lógicas sin tocar > 14 días se purgan
+
+
+def signal_store_enabled() -> bool:
+    """Escape hatch: BTT_SIGNAL_CACHE_ENABLED=0 vuelve al dict por proceso."""
+    return os.getenv("BTT_SIGNAL_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def signal_store_root() -> str:
+    from app.db.gcs_cache import LOCAL_CACHE_DIR
+    base = os.getenv("BTT_SIGNAL_CACHE_DIR", os.path.join(LOCAL_CACHE_DIR, "signals"))
+    return os.path.join(base, f"v{SIGNAL_CACHE_VERSION}")
+
+
+@functools.lru_cache(maxsize=1)
+def signal_code_fingerprint() -> str:
+    """Hash de la fuente de _SIGNAL_CODE_MODULES (una vez por proceso): todos los
+    workers de un mismo deploy comparten huella y un deploy nuevo estrena claves."""
+    h = hashlib.sha1()
+    for name in _SIGNAL_CODE_MODULES:
+        h.update(name.encode())
+        try:
+            with open(importlib.util.find_spec(name).origin, "rb") as f:
+                h.update(f.read())
+        except (OSError, AttributeError, TypeError, ImportError) as e:
+            logger.warning(f"[SIGNAL STORE] sin fuente de {name} para la huella: {e}")
+    return h.hexdigest()[:12]
+
+
+def signal_logic_hash(strategy_def: dict) -> str:
+    """Hash estable de la parte de la estrategia que determina entries/exits
+    (+ la huella del código de señales)."""
+    import copy
+    from app.services.strategy_engine import compile_strategy_def
+    compiled = compile_strategy_def(copy.deepcopy(strategy_def or {}))
+    payload = json.dumps(
+        {"bias": compiled["bias"], "entry": compiled["entry_logic"], "exit": compiled["exit_logic"],
+         "code": signal_code_fingerprint()},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def pair_fingerprint(ts_ns, open_, high, low, close, volume, daily_stats) -> str:
+    """Huella del contenido de un par tal como entra a translate_strategy."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(np.ascontiguousarray(ts_ns, dtype=np.int64).tobytes())
+    for arr in (open_, high, low, close, volume):
+        h.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    h.update(repr(sorted((str(k), repr(v)) for k, v in (daily_stats or {}).items())).encode())
+    return h.hexdigest()
+
+
+def _prune_stale_logics(root: str) -> None:
+    """Best-effort: borra lógicas que nadie ha usado en _STALE_LOGIC_SECONDS."""
+    try:
+        now = time.time()
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isdir(path) and now - os.path.getmtime(path) > _STALE_LOGIC_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+    except OSError:
+        pass
+
+
+class SignalStore:
+    """Caché (ticker, date, fp) -> {"entries", "exits"} respaldado en disco.
+
+    Interfaz de dict mínima (in / [] / []=) para enchufarse como `_signal_cache`
+    de run_backtest. No es thread-safe entre hilos del mismo proceso (el grid
+    corre un punto a la vez por proceso)."""
+
+    keyed_by_content = True
+
+    def __init__(self, logic_hash: str, root: str | None = None):
+        self.logic_hash = logic_hash
+        self.dir = os.path.join(root or signal_store_root(), logic_hash)
+        os.makedirs(self.dir, exist_ok=True)
+        self._index = {}     # key -> (seg_name, offset, n_bars)
+        self._maps = {}      # seg_name -> np.memmap uint8
+        self._pending = {}   # key -> (n_bars, bytes) aún sin publicar
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Carga los segmentos publicados que aún no conocemos. Devuelve cuántos."""
+        added = 0
+        try:
+            names = sorted(n for n in os.listdir(self.dir) if n.endswith(".idx.parquet"))
+        except OSError:
+            return 0
+        for name in names:
+            seg = name[: -len(".idx.parquet")]
+            if seg in self._maps:
+                continue
+            try:
+                idx = pd.read_parquet(os.path.join(self.dir, name))
+                bin_path = os.path.join(self.dir, seg + ".bin")
+                mm = np.memmap(bin_path, dtype=np.uint8, mode="r") if os.path.getsize(bin_path) else np.zeros(0, np.uint8)
+            except Exception as e:
+                logger.warning(f"[SIGCACHE] segmento ilegible {seg}: {e}")
+                continue
+            self._maps[seg] = mm
+            for t, d, fp, off, n in zip(idx["ticker"], idx["date"], idx["fp"],
+                                        idx["offset"].to_numpy(), idx["n_bars"].to_numpy()):
+                self._index[(t, d, fp)] = (seg, int(off), int(n))
+            added += 1
+        return added
+
+    def __len__(self):
+        return len(self._index) + len(self._pending)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index or key in self._pending
+
+    def __getitem__(self, key) -> dict:
+        pend = self._pending.get(key)
+        if pend is not None:
+            n_bars, buf = pend
+            raw = np.frombuffer(buf, dtype=np.uint8)
+        else:
+            seg, off, n_bars = self._index[key]
+            nb = (n_bars + 7) // 8
+            raw = self._maps[seg][off: off + 2 * nb]
+        nb = (n_bars + 7) // 8
+        return {
+            "entries": np.unpackbits(raw[:nb], count=n_bars).astype(bool),
+            "exits": np.unpackbits(raw[nb: 2 * nb], count=n_bars).astype(bool),
+        }
+
+    def __setitem__(self, key, value: dict) -> None:
+        if key in self:
+            return
+        entries = np.asarray(value["entries"], dtype=bool)
+        exits = np.asarray(value["exits"], dtype=bool)
+        self._pending[key] = (len(entries), np.packbits(entries).tobytes() + np.packbits(exits).tobytes())
+
+    def flush(self) -> int:
+        """Publica los pares pendientes como un segmento nuevo. Best-effort: si
+        falla el disco se descartan (solo se pierde el ahorro, no la corrección)."""
+        if not self._pending:
+            return 0
+        seg = f"seg-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        bin_path = os.path.join(self.dir, seg + ".bin")
+        idx_path = os.path.join(self.dir, seg + ".idx.parquet")
+        rows, chunks, off = [], [], 0
+        for (t, d, fp), (n_bars, buf) in self._pending.items():
+            rows.append((t, d, fp, off, n_bars))
+            chunks.append(buf)
+            off += len(buf)
+        n = len(rows)
+        try:
+            with open(bin_path, "wb") as f:
+                f.write(b"".join(chunks))
+            tmp = idx_path + ".tmp"
+            pd.DataFrame(rows, columns=["ticker", "date", "fp", "offset", "n_bars"]).to_parquet(tmp, index=False)
+            os.replace(tmp, idx_path)
+            os.utime(self.dir)
+        except Exception as e:
+            logger.warning(f"[SIGCACHE] flush falló ({e}); {n} pares no persistidos")
+            self._pending.clear()
+            return 0
+        self._pending.clear()
+        self.refresh()
+        return n
+
+
+_OPEN_STORES: dict = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def open_signal_store(logic_hash: str) -> SignalStore:
+    """Store por proceso y lógica (los workers lo reutilizan entre chunks)."""
+    root = signal_store_root()
+    key = (root, logic_hash)
+    with _OPEN_LOCK:
+        store = _OPEN_STORES.get(key)
+        if store is None:
+            os.makedirs(root, exist_ok=True)
+            _prune_stale_logics(root)
+            store = SignalStore(logic_hash, root=root)
+            _OPEN_STORES[key] = store
+        return store
@@ -2,9 +2,10 @@
 Slab builder — construye el caché mensual columnar (PRD rendimiento-backtester §03.5).
 
 Un slab por (kind, year, month):
-  {BTT_SLAB_DIR}/v1/{kind}/{year}/{month:02d}/slab.arrow    Arrow IPC SIN compresión (mmap)
-  .../index.parquet                                          (ticker, date, row_start, row_end, n_rows)
-  .../manifest.json                                          metadatos/validez
+  {BTT_SLAB_DIR}/v{SCHEMA_VERSION}/{kind}/{year}/{month:02d}/slab.arrow  Arrow IPC SIN compresión (mmap)
+  .../index.parquet                                (ticker, date, row_start, row_end, n_rows)
+  .../manifest.json                                metadatos/validez
+  .../pairs-{uid}.npy + tickers-{uid}.npy          índice binario de pares (mmap)
 
 Garantías del slab (contrato):
   - Orden global estable (ticker, date, ts_ns) ascendente.
@@ -14,15 +15,81 @@ Garantías del slab (contrato):
   - Slices por par contiguos: [row_start, row_end) del índice.
   - Dtypes: ts_ns int64 · open/high/low/close float32 · volume int32 (paridad con el
     downcast del caché actual, gcs_cache._downcast_intraday).
+  - Columnas derivadas por par (v2, opcionales — manifest["derived"]): hod/lod y
+    pm_high/pm_low acumulados (float32, selección exacta de H/L), vwap acumulado
+    (float64, MISMA fórmula que indicators._vwap sobre el upcast) y minute (int16,
+    minuto del día). Independientes de la estrategia: la fase de señales las lee
+    en vez de recalcularlas por run (BTT_SLAB_DERIVED_COLS=0 las omite).
+
+Índice binario de pares (manifest["pair_index"]): los tickers del mes ordenados
+(bytes, su posición es el ticker id interno) y una tabla int64 (3, n_pairs)
+[clave, row_start, row_end] ordenada por clave = tid << 32 | día (ordinal desde
+1970). MonthSlab los abre con np.load(mmap_mode="r") — abrir un mes no construye
+ningún dict y el índice se comparte vía page cache entre workers — y resuelve
+cada par con dos búsquedas binarias. Cubre base + deltas; cada append lo
+reescribe con otro uid (los lectores con el anterior mapeado no se ven
+afectados) y borra el viejo tras publicar el manifest. BTT_SLAB_PAIR_INDEX=0
+no lo escribe (los lectores vuelven al dict desde index.parquet).
 
 La escritura es atómica: los tres ficheros se escriben como .tmp y se publican con
 os.replace, el manifest EN ÚLTIMO LUGAR (su presencia marca el slab como válido).
+
+Catálogo global de pares ({BTT_SLAB_DIR}/v{SCHEMA_VERSION}/catalog/): una sola
+tabla mmap de TODOS los pares (ticker, date) publicados, con el mismo formato
+que el índice binario del mes pero clave global y filas [clave, kind, row_start,
+row_end] (kind = posición en CATALOG_KINDS; por mes manda opt > raw, como
+get_month_any_kind). El manifest del catálogo guarda el mtime del manifest de
+cada mes que cubre: un mes reconstruido/anexado después no casa y sus lectores
+vuelven al índice del mes. build_catalog lo regenera entero (replica_sync, tras
+cada pasada con cambios).
+
+Slabs anuales coalescidos (BTT_SLAB_YEAR_SLABS, opcional):
+  {BTT_SLAB_DIR}/v{SCHEMA_VERSION}/{kind}/{year}/year.arrow (+ .index.parquet,
+  .manifest.json, índice binario)
+mismas filas que los meses del año pero en orden (ticker, date, ts_ns): los
+días de un ticker quedan contiguos a través de los meses, y una ventana swing
+multi-mes es un único rango. Sin columnas derivadas (son acumulados por día).
+Su manifest guarda el mtime de cada mes fuente (frescura exacta, como el
+catálogo).
+
+Tier frío (BTT_SLAB_COLD_ENABLED, replica_sync): los meses con más de
+BTT_SLAB_HOT_MONTHS meses de antigüedad se congelan (freeze_month) — las
+columnas base pasan a .../slab.cold con compresión ligera por columna
+(slab_codec), sin columnas derivadas, y slab.arrow se borra. El manifest lleva
+"tier": "cold" y el layout; índice de pares e index.parquet no cambian (mismos
+rangos de filas). MonthSlab decodifica por bloques al leer. thaw_month lo
+devuelve al tier caliente; cualquier rebuild del mes también.
+
+Slab diario (BTT_DAILY_SLAB_ENABLED, replica_sync): daily_metrics entero en
+{root}/v{N}/daily/ con el mismo layout (slab.arrow + index.parquet + índice
+binario + manifest). Filas ordenadas por (ticker, timestamp) — cada ticker es
+un run contiguo — con un par (ticker, día) por fila (keep-first), columnas tid /
+ts_ns / day y todas las columnas numéricas de la fuente. LEAD/LAG y ventanas
+"últimos N días" son aritmética de filas dentro del run (slab_store.DailySlab).
+
+Append incremental (mes corriente): en vez de reconstruir el mes entero en cada
+sync, los ficheros fuente nuevos (catch-up escribe uno por día) se añaden como
+segmentos delta:
+  .../delta-{seq:04d}-{uid}.arrow + .index.parquet   filas de pares NUEVOS
+El manifest lista los deltas (`deltas`, con su `row_base`) y los ficheros fuente
+ya consumidos (`source_files`, {path: token}). Las filas de un delta se numeran
+a continuación de las existentes → los rangos ya publicados no cambian. Un
+delta solo se acepta si sus pares (ticker, date) son disjuntos de los del slab
+(si no, rebuild completo: el dedup keep-first dejaría de ser exacto). Con
+BTT_SLAB_MAX_DELTAS deltas se compacta a un slab base (mismo contenido que un
+build completo).
+
+Layout (manifest["layout"]): uid nuevo en cada publicación completa (build,
+compactación, thaw, slab anual) — las filas se reordenan y los rangos cambian.
+Anexar un delta o congelar el mes lo conservan (los rangos publicados siguen
+valiendo). Los refs de slab_store lo llevan y se validan contra él al resolver.
 """
 import json
 import logging
 import os
 import threading
 import time
+import uuid
 
 import numpy as np
 import pandas as pd
@@ -31,7 +98,9 @@ import pyarrow.ipc as pa_ipc
 
 logger = logging.getLogger("backtester.slab")
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 2
+SLAB_INCREMENTAL = os.getenv("BTT_SLAB_INCREMENTAL", "true").strip().lower() in ("1", "true", "yes", "on")
+MAX_DELTAS = int(os.getenv("BTT_SLAB_MAX_DELTAS", "8"))
 
 _SLAB_SCHEMA = pa.schema([
     ("ts_ns", pa.int64()),
@@ -41,6 +110,45 @@ _SLAB_SCHEMA = pa.schema([
     ("close", pa.float32()),
     ("volume", pa.int32()),
 ])
+_DERIVED_FIELDS = (
+    ("hod", pa.float32()),
+    ("lod", pa.float32()),
+    ("pm_high", pa.float32()),
+    ("pm_low", pa.float32()),
+    ("vwap", pa.float64()),
+    ("minute", pa.int16()),
+)
+_SLAB_SCHEMA_DERIVED = pa.schema(list(_SLAB_SCHEMA) + [pa.field(n, t) for n, t in _DERIVED_FIELDS])
+DERIVED_COLUMNS = tuple(n for n, _ in _DERIVED_FIELDS)
+
+
+def slab_derived_enabled() -> bool:
+    return os.getenv("BTT_SLAB_DERIVED_COLS", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def slab_pair_index_enabled() -> bool:
+    return os.getenv("BTT_SLAB_PAIR_INDEX", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def slab_catalog_enabled() -> bool:
+    return os.getenv("BTT_SLAB_CATALOG", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def slab_year_slabs_enabled() -> bool:
+    return os.getenv("BTT_SLAB_YEAR_SLABS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def slab_cold_enabled() -> bool:
+    return os.getenv("BTT_SLAB_COLD_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def slab_hot_months() -> int:
+    """Meses (contando el corriente) que se quedan en el tier caliente."""
+    return max(1, int(os.getenv("BTT_SLAB_HOT_MONTHS", "24")))
+
+
+def daily_slab_enabled() -> bool:
+    return os.getenv("BTT_DAILY_SLAB_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
 
 
 def slab_root() -> str:
@@ -52,8 +160,32 @@ def slab_dir(kind: str, year: int, month: int) -> str:
     return os.path.join(slab_root(), f"v{SCHEMA_VERSION}", kind, str(year), f"{month:02d}")
 
 
-def slab_paths(kind: str, year: int, month: int) -> dict:
-    d = slab_dir(kind, year, month)
+def slab_paths(kind: str, year: int, month: int, out_root: str | None = None) -> dict:
+    if out_root is None:
+        d = slab_dir(kind, year, month)
+    else:
+        d = os.path.join(out_root, f"v{SCHEMA_VERSION}", kind, str(year), f"{month:02d}")
+    return {
+        "dir": d,
+        "slab": os.path.join(d, "slab.arrow"),
+        "index": os.path.join(d, "index.parquet"),
+        "manifest": os.path.join(d, "manifest.json"),
+        "cold": os.path.join(d, "slab.cold"),
+    }
+
+
+def year_slab_paths(kind: str, year: int, out_root: str | None = None) -> dict:
+    d = os.path.join(out_root or slab_root(), f"v{SCHEMA_VERSION}", kind, str(year))
+    return {
+        "dir": d,
+        "slab": os.path.join(d, "year.arrow"),
+        "index": os.path.join(d, "year.index.parquet"),
+        "manifest": os.path.join(d, "year.manifest.json"),
+    }
+
+
+def daily_slab_paths(out_root: str | None = None) -> dict:
+    d = os.path.join(out_root or slab_root(), f"v{SCHEMA_VERSION}", "daily")
     return {
         "dir": d,
         "slab": os.path.join(d, "slab.arrow"),
@@ -62,6 +194,47 @@ def slab_paths(kind: str, year: int, month: int) -> dict:
     }
 
 
+def catalog_paths(out_root: str | None = None) -> dict:
+    d = os.path.join(out_root or slab_root(), f"v{SCHEMA_VERSION}", "catalog")
+    return {"dir": d, "manifest": os.path.join(d, "manifest.json")}
+
+
+def manifest_mtime(paths: dict) -> int | None:
+    """st_mtime_ns del manifest: la misma marca con la que get_month detecta un
+    slab reescrito; catálogo y slabs anuales la usan como huella de cada mes."""
+    try:
+        return os.stat(paths["manifest"]).st_mtime_ns
+    except OSError:
+        return None
+
+
+def slab_published(paths: dict) -> bool:
+    """manifest + index + datos del tier que toque (slab.arrow o slab.cold)."""
+    return (os.path.exists(paths["manifest"]) and os.path.exists(paths["index"])
+            and (os.path.exists(paths["slab"]) or os.path.exists(paths["cold"])))
+
+
+def published_months(kind: str, out_root: str | None = None) -> list:
+    """[(year, month)] con slab publicado (manifest + slab + index) para `kind`."""
+    base = os.path.join(out_root or slab_root(), f"v{SCHEMA_VERSION}", kind)
+    out = []
+    try:
+        years = sorted(n for n in os.listdir(base) if n.isdigit() and len(n) == 4)
+    except OSError:
+        return out
+    for ydir in years:
+        try:
+            names = sorted(os.listdir(os.path.join(base, ydir)))
+        except OSError:
+            continue
+        for mdir in names:
+            if not (mdir.isdigit() and len(mdir) == 2):
+                continue
+            if slab_published(slab_paths(kind, int(ydir), int(mdir), out_root)):
+                out.append((int(ydir), int(mdir)))
+    return out
+
+
 def _normalize_month_df(df: pd.DataFrame) -> pd.DataFrame:
     """Orden estable + dedup con la semántica EXACTA del pipeline actual."""
     out = pd.DataFrame({
@@ -104,14 +277,152 @@ def _atomic_publish(tmp_path: str, final_path: str) -> None:
     os.replace(tmp_path, final_path)
 
 
+def delta_paths(paths: dict, name: str) -> dict:
+    return {
+        "slab": os.path.join(paths["dir"], f"{name}.arrow"),
+        "index": os.path.join(paths["dir"], f"{name}.index.parquet"),
+    }
+
+
+def pair_index_paths(paths: dict, meta: dict) -> dict:
+    return {
+        "pairs": os.path.join(paths["dir"], meta["pairs"]),
+        "tickers": os.path.join(paths["dir"], meta["tickers"]),
+    }
+
+
+def pair_keys(tids: np.ndarray, dates) -> np.ndarray:
+    """Clave int64 del índice binario: tid << 32 | día desde 1970."""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    return (np.asarray(tids, dtype=np.int64) << 32) + days
+
+
+def _write_pair_index(paths: dict, index: pd.DataFrame) -> dict:
+    """Escribe el índice binario de `index` (todos los pares del mes) con un uid
+    nuevo y devuelve su entrada de manifest. Los ficheros no cuentan hasta que
+    el manifest los referencia."""
+    enc = np.array([str(t).encode("utf-8") for t in index["ticker"]], dtype=np.bytes_)
+    tickers, tids = np.unique(enc, return_inverse=True)
+    keys = pair_keys(tids, index["date"].astype(str).str[:10].to_numpy())
+    order = np.argsort(keys, kind="stable")
+    table = np.stack([
+        keys[order],
+        index["row_start"].to_numpy(np.int64)[order],
+        index["row_end"].to_numpy(np.int64)[order],
+    ])
+    return _save_pair_index(paths, table, tickers)
+
+
+def _save_pair_index(paths: dict, table: np.ndarray, tickers: np.ndarray) -> dict:
+    """Publica (tabla ordenada por clave, tickers) con un uid nuevo en paths["dir"]."""
+    uid = uuid.uuid4().hex[:8]
+    meta = {"pairs": f"pairs-{uid}.npy", "tickers": f"tickers-{uid}.npy",
+            "n_pairs": int(table.shape[1]), "n_tickers": int(len(tickers))}
+    suffix = f".tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        for name, arr in (("pairs", table), ("tickers", tickers)):
+            final = pair_index_paths(paths, meta)[name]
+            with open(final + suffix, "wb") as f:
+                np.save(f, arr)
+            _atomic_publish(final + suffix, final)
+    except Exception:
+        _remove_pair_index(paths, meta)
+        raise
+    return meta
+
+
+def _remove_pair_index(paths: dict, meta: dict | None) -> None:
+    if not meta:
+        return
+    for p in pair_index_paths(paths, meta).values():
+        for cand in (p, p + f".tmp.{os.getpid()}.{threading.get_ident()}"):
+            try:
+                os.remove(cand)
+            except OSError:
+                pass
+
+
+def read_manifest(paths: dict) -> dict | None:
+    try:
+        with open(paths["manifest"]) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _derived_columns(norm: pd.DataFrame, index: pd.DataFrame) -> dict:
+    """Estructura de mercado por par, idéntica a la que _compute_signals_for_pair
+    calcula sobre los arrays float64 del slab (mismas fórmulas numpy, par a par:
+    los acumulados se reinician en cada (ticker, date))."""
+    from app.services.indicators import _vwap
+
+    n = len(norm)
+    minute = ((norm["ts_ns"].values // 60_000_000_000) % 1440).astype(np.int16)
+    H = norm["high"].values
+    L = norm["low"].values
+    C = norm["close"].values
+    V = norm["volume"].values
+    out = {
+        "hod": np.empty(n, dtype=np.float32), "lod": np.empty(n, dtype=np.float32),
+        "pm_high": np.empty(n, dtype=np.float32), "pm_low": np.empty(n, dtype=np.float32),
+        "vwap": np.empty(n, dtype=np.float64), "minute": minute,
+    }
+    pm_all = (minute >= 240) & (minute < 570)
+    for a, b in zip(index["row_start"].values, index["row_end"].values):
+        h, l = H[a:b], L[a:b]
+        out["hod"][a:b] = np.maximum.accumulate(h)
+        out["lod"][a:b] = np.minimum.accumulate(l)
+        pm = pm_all[a:b]
+        if pm.any():
+            out["pm_high"][a:b] = np.fmax.accumulate(np.where(pm, h, np.float32(np.nan)))
+            out["pm_low"][a:b] = np.fmin.accumulate(np.where(pm, l, np.float32(np.nan)))
+        else:
+            out["pm_high"][a:b] = np.nan
+            out["pm_low"][a:b] = np.nan
+        out["vwap"][a:b] = _vwap(h.astype(np.float64), l.astype(np.float64),
+                                 C[a:b].astype(np.float64), V[a:b].astype(np.float64))
+    return out
+
+
+def _slab_table(norm: pd.DataFrame, derived: dict | None = None) -> pa.Table:
+    arrays = [
+        pa.array(norm["ts_ns"].values, type=pa.int64()),
+        pa.array(norm["open"].values, type=pa.float32()),
+        pa.array(norm["high"].values, type=pa.float32()),
+        pa.array(norm["low"].values, type=pa.float32()),
+        pa.array(norm["close"].values, type=pa.float32()),
+        pa.array(norm["volume"].values, type=pa.int32()),
+    ]
+    if derived is None:
+        return pa.Table.from_arrays(arrays, schema=_SLAB_SCHEMA)
+    arrays += [pa.array(derived[name], type=t) for name, t in _DERIVED_FIELDS]
+    return pa.Table.from_arrays(arrays, schema=_SLAB_SCHEMA_DERIVED)
+
+
+def _write_slab_file(path: str, table: pa.Table) -> None:
+    # IPC file SIN compresión → memory-map zero-copy en lectura.
+    with pa.OSFile(path, "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    tmp = path + f".tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    _atomic_publish(tmp, path)
+
+
 def build_month_from_df(
     df: pd.DataFrame, kind: str, year: int, month: int,
     source_desc: str = "df", out_root: str | None = None,
+    source_files: dict | None = None,
 ) -> dict | None:
     """Construye el slab de un mes desde un DataFrame crudo (cualquier orden, con dups).
 
     Devuelve el manifest dict, o None si el mes queda vacío.
     Columnas requeridas del df: ticker, date, timestamp, open, high, low, close, volume.
+    `source_files` ({path: token}) habilita el append incremental posterior.
     """
     t0 = time.time()
     if df is None or df.empty:
@@ -121,56 +432,59 @@ def build_month_from_df(
     norm = _normalize_month_df(df)
     index = _build_index(norm)
 
-    paths = slab_paths(kind, year, month)
-    if out_root is not None:
-        d = os.path.join(out_root, f"v{SCHEMA_VERSION}", kind, str(year), f"{month:02d}")
-        paths = {"dir": d, "slab": os.path.join(d, "slab.arrow"),
-                 "index": os.path.join(d, "index.parquet"),
-                 "manifest": os.path.join(d, "manifest.json")}
+    paths = slab_paths(kind, year, month, out_root)
     os.makedirs(paths["dir"], exist_ok=True)
 
-    table = pa.Table.from_arrays(
-        [
-            pa.array(norm["ts_ns"].values, type=pa.int64()),
-            pa.array(norm["open"].values, type=pa.float32()),
-            pa.array(norm["high"].values, type=pa.float32()),
-            pa.array(norm["low"].values, type=pa.float32()),
-            pa.array(norm["close"].values, type=pa.float32()),
-            pa.array(norm["volume"].values, type=pa.int32()),
-        ],
-        schema=_SLAB_SCHEMA,
+    derived = slab_derived_enabled()
+    table = _slab_table(norm, _derived_columns(norm, index) if derived else None)
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "kind": kind, "year": int(year), "month": int(month),
+        "source": source_desc,
+        "n_rows": int(len(norm)), "n_pairs": int(len(index)),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duckdb_version": _duckdb_version(),
+        "derived": derived,
+        "deltas": [],
+    }
+    if source_files is not None:
+        manifest["source_files"] = dict(source_files)
+    _publish_slab(paths, table, index, manifest)
+    logger.info(
+        f"[SLAB] {kind} {year}-{month:02d}: {len(norm):,} filas, {len(index):,} pares "
+        f"({round(time.time()-t0, 2)}s)"
     )
+    return manifest
 
+
+def _publish_slab(paths: dict, table: pa.Table, index: pd.DataFrame, manifest: dict,
+                  pair_index: bool | None = None) -> None:
+    """Escribe slab + index.parquet (+ índice binario) como .tmp y los publica con
+    os.replace, el manifest EN ÚLTIMO LUGAR. Borra después los deltas e índice
+    binario del slab anterior (ya no los referencia ningún manifest).
+    `pair_index` fuerza el índice binario (None → BTT_SLAB_PAIR_INDEX).
+
+    Cada publicación estrena manifest["layout"]: las filas se han vuelto a
+    ordenar y los rangos emitidos contra el layout anterior ya no valen."""
+    previous = read_manifest(paths)
+    manifest["layout"] = uuid.uuid4().hex[:8]
     suffix = f".tmp.{os.getpid()}.{threading.get_ident()}"
     tmp_slab = paths["slab"] + suffix
     tmp_index = paths["index"] + suffix
     tmp_manifest = paths["manifest"] + suffix
+    written_index = None
     try:
-        # IPC file SIN compresión → memory-map zero-copy en lectura.
-        with pa.OSFile(tmp_slab, "wb") as sink:
-            with pa_ipc.new_file(sink, _SLAB_SCHEMA) as writer:
-                writer.write_table(table)
+        _write_slab_file(tmp_slab, table)
         index.to_parquet(tmp_index, index=False)
-
-        manifest = {
-            "schema_version": SCHEMA_VERSION,
-            "kind": kind, "year": int(year), "month": int(month),
-            "source": source_desc,
-            "n_rows": int(len(norm)), "n_pairs": int(len(index)),
-            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
-            "duckdb_version": _duckdb_version(),
-        }
+        if slab_pair_index_enabled() if pair_index is None else pair_index:
+            written_index = _write_pair_index(paths, index)
+            manifest["pair_index"] = written_index
         with open(tmp_manifest, "w") as f:
             json.dump(manifest, f)
 
         _atomic_publish(tmp_slab, paths["slab"])
         _atomic_publish(tmp_index, paths["index"])
         _atomic_publish(tmp_manifest, paths["manifest"])  # el manifest publica el slab
-        logger.info(
-            f"[SLAB] {kind} {year}-{month:02d}: {len(norm):,} filas, {len(index):,} pares "
-            f"({round(time.time()-t0, 2)}s)"
-        )
-        return manifest
     except Exception:
         for p in (tmp_slab, tmp_index, tmp_manifest):
             try:
@@ -178,8 +492,492 @@ def build_month_from_df(
                     os.remove(p)
             except OSError:
                 pass
+        _remove_pair_index(paths, written_index)
+        raise
+    _remove_deltas(paths, (previous or {}).get("deltas") or [])
+    _remove_pair_index(paths, (previous or {}).get("pair_index"))
+    if (previous or {}).get("tier") == "cold" and "cold" in paths:
+        try:
+            os.remove(paths["cold"])  # el rebuild devuelve el mes al tier caliente
+        except OSError:
+            pass
+
+
+def _remove_deltas(paths: dict, deltas: list) -> None:
+    for d in deltas:
+        for p in delta_paths(paths, d["name"]).values():
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def _month_index(paths: dict, manifest: dict) -> pd.DataFrame:
+    """Índice (ticker, date, row_start, row_end) de base + deltas publicados."""
+    parts = [pd.read_parquet(p, columns=["ticker", "date", "row_start", "row_end"])
+             for p in [paths["index"]] + [delta_paths(paths, d["name"])["index"]
+                                          for d in manifest.get("deltas") or []]]
+    return pd.concat(parts, ignore_index=True)
+
+
+def append_delta_from_df(
+    df: pd.DataFrame, kind: str, year: int, month: int,
+    source_files: dict | None = None, out_root: str | None = None,
+) -> dict | None:
+    """Añade `df` al slab publicado como segmento delta. Coste ∝ filas nuevas.
+
+    Devuelve el manifest actualizado, o None si no se puede anexar (no hay slab,
+    o el df trae pares que ya están en el slab) → el caller hace rebuild completo.
+    """
+    t0 = time.time()
+    paths = slab_paths(kind, year, month, out_root)
+    manifest = read_manifest(paths)
+    if (manifest is None or manifest.get("schema_version") != SCHEMA_VERSION
+            or manifest.get("tier") == "cold"):
+        return None
+    manifest = dict(manifest)
+    manifest.setdefault("deltas", [])
+    if source_files:
+        manifest["source_files"] = {**(manifest.get("source_files") or {}), **source_files}
+
+    norm = _normalize_month_df(df) if df is not None and not df.empty else None
+    if norm is None or norm.empty:
+        _write_manifest(paths["manifest"], manifest)
+        return manifest
+
+    index = _build_index(norm)
+    month_index = _month_index(paths, manifest)
+    existing = set(zip(month_index["ticker"], month_index["date"]))
+    if any(k in existing for k in zip(index["ticker"], index["date"])):
+        logger.info(f"[SLAB] {kind} {year}-{month:02d}: delta solapa pares existentes — rebuild")
+        return None
+
+    # el delta lleva las MISMAS columnas que la base (esquema uniforme por mes)
+    derived = _derived_columns(norm, index) if manifest.get("derived") else None
+    row_base = int(manifest["n_rows"])
+    index["row_start"] += row_base
+    index["row_end"] += row_base
+    name = f"delta-{len(manifest['deltas']) + 1:04d}-{uuid.uuid4().hex[:8]}"
+    dpaths = delta_paths(paths, name)
+    suffix = f".tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        _write_slab_file(dpaths["slab"] + suffix, _slab_table(norm, derived))
+        index.to_parquet(dpaths["index"] + suffix, index=False)
+        _atomic_publish(dpaths["slab"] + suffix, dpaths["slab"])
+        _atomic_publish(dpaths["index"] + suffix, dpaths["index"])
+        previous_pair_index = manifest.get("pair_index")
+        if previous_pair_index is not None or slab_pair_index_enabled():
+            manifest["pair_index"] = _write_pair_index(
+                paths, pd.concat([month_index, index[month_index.columns]], ignore_index=True))
+    except Exception:
+        for p in dpaths.values():
+            for cand in (p, p + suffix):
+                try:
+                    os.remove(cand)
+                except OSError:
+                    pass
         raise
 
+    manifest["deltas"] = manifest["deltas"] + [{
+        "name": name, "row_base": row_base,
+        "n_rows": int(len(norm)), "n_pairs": int(len(index)),
+    }]
+    manifest["n_rows"] = row_base + int(len(norm))
+    manifest["n_pairs"] = int(manifest["n_pairs"]) + int(len(index))
+    manifest["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    _write_manifest(paths["manifest"], manifest)  # el manifest publica el delta
+    _remove_pair_index(paths, previous_pair_index)
+    logger.info(f"[SLAB] {kind} {year}-{month:02d}: delta {name} +{len(norm):,} filas, "
+                f"+{len(index):,} pares ({round(time.time()-t0, 2)}s)")
+    return manifest
+
+
+def _read_segment_df(slab_path: str, index: pd.DataFrame) -> pd.DataFrame:
+    """Filas de un segmento con su ticker/date (del índice) en orden físico."""
+    with pa.memory_map(slab_path, "r") as source:
+        table = pa_ipc.open_file(source).read_all()
+    df = table.to_pandas()
+    index = index.sort_values("row_start")
+    n = (index["row_end"] - index["row_start"]).to_numpy()
+    df.insert(0, "ticker", np.repeat(index["ticker"].to_numpy(), n))
+    df.insert(1, "date", np.repeat(index["date"].to_numpy(), n))
+    return df
+
+
+def compact_month(kind: str, year: int, month: int, out_root: str | None = None) -> dict | None:
+    """Funde base + deltas en un slab base (mismo resultado que un build completo:
+    los pares son disjuntos y ya están deduplicados). None si no hay slab."""
+    paths = slab_paths(kind, year, month, out_root)
+    manifest = read_manifest(paths)
+    if manifest is None:
+        return None
+    if not manifest.get("deltas"):
+        return manifest
+    parts = [_read_segment_df(paths["slab"], pd.read_parquet(paths["index"]))]
+    for d in manifest["deltas"]:
+        dp = delta_paths(paths, d["name"])
+        parts.append(_read_segment_df(dp["slab"], pd.read_parquet(dp["index"])))
+    df = pd.concat(parts, ignore_index=True)
+    df["timestamp"] = df["ts_ns"].to_numpy().view("datetime64[ns]")
+    return build_month_from_df(
+        df, kind, year, month, source_desc=manifest.get("source", "compact"),
+        out_root=out_root, source_files=manifest.get("source_files"),
+    )
+
+
+_BASE_COLUMNS = tuple(f.name for f in _SLAB_SCHEMA)
+
+# Preferencia por mes del catálogo (la de get_month_any_kind); el código kind de
+# cada par es su posición aquí.
+CATALOG_KINDS = ("opt", "raw")
+
+
+def _read_base_columns(path: str) -> dict:
+    """Columnas base de un fichero slab/delta como arrays numpy sobre el mmap."""
+    with pa.memory_map(path, "r") as source:
+        table = pa_ipc.open_file(source).read_all().combine_chunks()
+    out = {}
+    for f in _SLAB_SCHEMA:
+        col = table.column(f.name)
+        out[f.name] = (col.chunk(0).to_numpy(zero_copy_only=True) if col.num_chunks
+                       else np.empty(0, dtype=f.type.to_pandas_dtype()))
+    return out
+
+
+def _month_base_columns(paths: dict, manifest: dict) -> dict:
+    """Columnas base del mes entero (base + deltas, o decodificado si es frío)."""
+    if manifest.get("tier") == "cold":
+        from app.db.slab_codec import COLUMN_CODECS, ColdColumns
+        cold = ColdColumns(paths["cold"], manifest["cold"], key=paths["cold"])
+        return {name: a for (name, _c, _d), a in zip(COLUMN_CODECS, cold.decode_all())}
+    segments = [paths["slab"]] + [delta_paths(paths, d["name"])["slab"]
+                                  for d in manifest.get("deltas") or []]
+    seg_cols = [_read_base_columns(p) for p in segments]
+    if len(seg_cols) == 1:
+        return seg_cols[0]
+    return {c: np.concatenate([sc[c] for sc in seg_cols]) for c in _BASE_COLUMNS}
+
+
+def freeze_month(kind: str, year: int, month: int, out_root: str | None = None) -> dict | None:
+    """Pasa un mes publicado al tier frío (slab_codec). Compacta antes si tiene
+    deltas. Devuelve el manifest (el mismo si ya era frío) o None si no hay
+    slab o el mes se reescribió mientras tanto."""
+    from app.db.slab_codec import DEFAULT_BLOCK_ROWS, write_cold_file
+
+    t0 = time.time()
+    paths = slab_paths(kind, year, month, out_root)
+    manifest = read_manifest(paths)
+    if manifest is None or manifest.get("tier") == "cold":
+        return manifest
+    if manifest.get("deltas"):
+        manifest = compact_month(kind, year, month, out_root)
+    before = manifest_mtime(paths)
+    cols = _read_base_columns(paths["slab"])
+    tmp = paths["cold"] + f".tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        layout = write_cold_file(tmp, cols, DEFAULT_BLOCK_ROWS)
+        if manifest_mtime(paths) != before:
+            os.remove(tmp)
+            return None
+        _atomic_publish(tmp, paths["cold"])
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    manifest = {**manifest, "tier": "cold", "derived": False, "deltas": [],
+                "cold": {**layout, "uid": uuid.uuid4().hex[:8]},
+                "frozen_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    _write_manifest(paths["manifest"], manifest)  # publica el tier frío
+    try:
+        hot_bytes = os.path.getsize(paths["slab"])
+        os.remove(paths["slab"])
+    except OSError:
+        hot_bytes = 0
+    logger.info(f"[SLAB] {kind} {year}-{month:02d} → frío: {hot_bytes / 1e6:.1f} MB → "
+                f"{layout['nbytes'] / 1e6:.1f} MB ({round(time.time()-t0, 2)}s)")
+    return manifest
+
+
+def thaw_month(kind: str, year: int, month: int, out_root: str | None = None) -> dict | None:
+    """Devuelve un mes frío al tier caliente (rebuild completo, con derivadas)."""
+    paths = slab_paths(kind, year, month, out_root)
+    manifest = read_manifest(paths)
+    if manifest is None or manifest.get("tier") != "cold":
+        return manifest
+    index = pd.read_parquet(paths["index"]).sort_values("row_start")
+    df = pd.DataFrame(_month_base_columns(paths, manifest))
+    n = (index["row_end"] - index["row_start"]).to_numpy()
+    df.insert(0, "ticker", np.repeat(index["ticker"].to_numpy(), n))
+    df.insert(1, "date", np.repeat(index["date"].to_numpy(), n))
+    df["timestamp"] = df["ts_ns"].to_numpy().view("datetime64[ns]")
+    out = build_month_from_df(df, kind, year, month, source_desc=manifest.get("source", "thaw"),
+                              out_root=out_root, source_files=manifest.get("source_files"))
+    if out is not None and manifest.get("source_fingerprint") is not None:
+        out["source_fingerprint"] = manifest["source_fingerprint"]
+        _write_manifest(paths["manifest"], out)
+    return out
+
+
+def _concat_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Índices de filas de los rangos [start, start+length) concatenados."""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+
+
+def build_year_slab(kind: str, year: int, out_root: str | None = None) -> dict | None:
+    """Coalesce los slabs mensuales publicados de `year` en un slab anual ordenado
+    (ticker, date, ts_ns). Copia las filas tal cual (ya deduplicadas; los pares de
+    meses distintos son disjuntos). None si el año no tiene meses con slab."""
+    t0 = time.time()
+    months, month_cols, parts = {}, [], []
+    for (y, m) in published_months(kind, out_root):
+        if y != year:
+            continue
+        paths = slab_paths(kind, y, m, out_root)
+        before = manifest_mtime(paths)
+        manifest = read_manifest(paths)
+        if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+            continue
+        cols = _month_base_columns(paths, manifest)
+        index = _month_index(paths, manifest)
+        if manifest_mtime(paths) != before:
+            raise RuntimeError(f"slab {kind} {y}-{m:02d} reescrito durante el coalescido anual")
+        month_cols.append(cols)
+        parts.append(index.assign(src=len(month_cols) - 1))
+        months[f"{m:02d}"] = before
+    if not parts:
+        return None
+
+    pairs = pd.concat(parts, ignore_index=True)
+    pairs["date"] = pairs["date"].astype(str).str[:10]
+    pairs = pairs.sort_values(["ticker", "date"], kind="stable").reset_index(drop=True)
+    lengths = (pairs["row_end"] - pairs["row_start"]).to_numpy(np.int64)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    n_rows = int(ends[-1]) if len(ends) else 0
+
+    out = {c: np.empty(n_rows, dtype=month_cols[0][c].dtype) for c in _BASE_COLUMNS}
+    src = pairs["src"].to_numpy()
+    src_starts = pairs["row_start"].to_numpy(np.int64)
+    for k, cols in enumerate(month_cols):
+        sel = src == k
+        s_idx = _concat_ranges(src_starts[sel], lengths[sel])
+        d_idx = _concat_ranges(starts[sel], lengths[sel])
+        for c in _BASE_COLUMNS:
+            out[c][d_idx] = cols[c][s_idx]
+
+    index = pd.DataFrame({
+        "ticker": pairs["ticker"].to_numpy(), "date": pairs["date"].to_numpy(),
+        "row_start": starts, "row_end": ends, "n_rows": lengths.astype(np.int32),
+    })
+    table = pa.Table.from_arrays([pa.array(out[f.name], type=f.type) for f in _SLAB_SCHEMA],
+                                 schema=_SLAB_SCHEMA)
+    paths = year_slab_paths(kind, year, out_root)
+    os.makedirs(paths["dir"], exist_ok=True)
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "kind": kind, "year": int(year), "scope": "year",
+        "months": months,
+        "n_rows": n_rows, "n_pairs": int(len(index)),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "derived": False,
+        "deltas": [],
+    }
+    _publish_slab(paths, table, index, manifest)
+    logger.info(f"[SLAB] {kind} {year} anual: {len(months)} meses, {n_rows:,} filas, "
+                f"{len(index):,} pares ({round(time.time()-t0, 2)}s)")
+    return manifest
+
+
+def year_slab_stale(kind: str, year: int, out_root: str | None = None) -> bool:
+    """True si falta el slab anual o algún mes publicado del año no casa con él."""
+    man = read_manifest(year_slab_paths(kind, year, out_root))
+    if man is None or man.get("schema_version") != SCHEMA_VERSION:
+        return True
+    current = {f"{m:02d}": manifest_mtime(slab_paths(kind, y, m, out_root))
+               for (y, m) in published_months(kind, out_root) if y == year}
+    return current != man.get("months")
+
+
+def _catalog_months(out_root: str | None = None) -> dict:
+    """{(year, month): kind} de los meses publicados, opt > raw."""
+    chosen = {}
+    for kind in CATALOG_KINDS:
+        for ym in published_months(kind, out_root):
+            chosen.setdefault(ym, kind)
+    return chosen
+
+
+def _month_pairs(paths: dict, manifest: dict):
+    """(ticker bytes, día desde 1970, row_start, row_end) de todos los pares del mes."""
+    meta = manifest.get("pair_index")
+    if meta:
+        p = pair_index_paths(paths, meta)
+        tickers, table = np.load(p["tickers"]), np.load(p["pairs"])
+        return tickers[table[0] >> 32], table[0] & 0xFFFFFFFF, table[1], table[2]
+    index = _month_index(paths, manifest)
+    enc = np.array([str(t).encode("utf-8") for t in index["ticker"]], dtype=np.bytes_)
+    days = np.asarray(index["date"].astype(str).str[:10].to_numpy(), dtype="datetime64[D]")
+    return (enc, days.astype(np.int64),
+            index["row_start"].to_numpy(np.int64), index["row_end"].to_numpy(np.int64))
+
+
+def build_catalog(out_root: str | None = None) -> dict | None:
+    """(Re)construye el catálogo global de pares desde los meses publicados.
+    Un mes ilegible o reescrito durante la lectura queda fuera (sus lectores
+    usan el índice del mes). None si no hay ningún mes."""
+    t0 = time.time()
+    parts, months = [], {}
+    for (y, m), kind in sorted(_catalog_months(out_root).items()):
+        paths = slab_paths(kind, y, m, out_root)
+        before = manifest_mtime(paths)
+        manifest = read_manifest(paths)
+        try:
+            enc, days, starts, ends = _month_pairs(paths, manifest or {})
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[SLAB] catálogo: {kind} {y}-{m:02d} ilegible ({e}), fuera del catálogo")
+            continue
+        if manifest is None or manifest_mtime(paths) != before:
+            continue
+        parts.append((enc, days, CATALOG_KINDS.index(kind), starts, ends))
+        months[f"{y}-{m:02d}"] = {"kind": kind, "mtime": before, "layout": manifest.get("layout")}
+    if not parts:
+        return None
+
+    tickers, gtids = np.unique(np.concatenate([p[0] for p in parts]), return_inverse=True)
+    keys = (gtids.astype(np.int64) << 32) + np.concatenate([p[1] for p in parts])
+    table = np.stack([
+        keys,
+        np.concatenate([np.full(len(p[0]), p[2], dtype=np.int64) for p in parts]),
+        np.concatenate([p[3] for p in parts]),
+        np.concatenate([p[4] for p in parts]),
+    ])
+    table = table[:, np.argsort(keys, kind="stable")]
+
+    paths = catalog_paths(out_root)
+    os.makedirs(paths["dir"], exist_ok=True)
+    previous = read_manifest(paths)
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "kinds": list(CATALOG_KINDS),
+        "months": months,
+        "n_pairs": int(table.shape[1]),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pair_index": _save_pair_index(paths, table, tickers),
+    }
+    _write_manifest(paths["manifest"], manifest)
+    _remove_pair_index(paths, (previous or {}).get("pair_index"))
+    logger.info(f"[SLAB] catálogo: {len(months)} meses, {table.shape[1]:,} pares, "
+                f"{len(tickers):,} tickers ({round(time.time()-t0, 2)}s)")
+    return manifest
+
+
+def catalog_stale(out_root: str | None = None) -> bool:
+    """True si falta el catálogo o no cubre exactamente los meses publicados."""
+    man = read_manifest(catalog_paths(out_root))
+    if man is None or man.get("schema_version") != SCHEMA_VERSION:
+        return True
+    current = {f"{y}-{m:02d}": (kind, manifest_mtime(slab_paths(kind, y, m, out_root)))
+               for (y, m), kind in _catalog_months(out_root).items()}
+    return current != {k: (v["kind"], v["mtime"]) for k, v in (man.get("months") or {}).items()}
+
+
+_DAY_NS = 86_400 * 1_000_000_000
+
+
+def _read_daily_source(files) -> pd.DataFrame:
+    """Filas crudas de daily_metrics (todas las columnas) de una lista de parquet."""
+    import duckdb
+    from app.db.connection import get_connection
+
+    files = sorted(files)
+    if any(f.startswith("gs://") or f.startswith("s3://") for f in files):
+        conn = get_connection()  # conexión con httpfs+credenciales
+    else:
+        conn = duckdb.connect()
+        conn.execute(f"SET threads={min(8, os.cpu_count() or 4)}")
+    src = "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in files) + "]"
+    return conn.execute(
+        f"SELECT * FROM read_parquet({src}, hive_partitioning=true, union_by_name=true)").fetchdf()
+
+
+def _daily_columns(df: pd.DataFrame, order: np.ndarray) -> tuple:
+    """({nombre: array} en el orden `order`, [columnas no numéricas descartadas]).
+    bool sin nulos → uint8; enteros → int64; resto numérico → float64 (NaN = nulo)."""
+    cols, skipped = {}, []
+    for name in df.columns:
+        if name in ("ticker", "timestamp", "date"):
+            continue
+        s = df[name]
+        if pd.api.types.is_bool_dtype(s) and not s.isna().any():
+            arr = s.to_numpy(np.uint8)
+        elif pd.api.types.is_integer_dtype(s) and not s.isna().any():
+            arr = s.to_numpy(np.int64)
+        elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            arr = pd.to_numeric(s, errors="coerce").to_numpy(np.float64, na_value=np.nan)
+        else:
+            skipped.append(name)
+            continue
+        cols[name] = arr[order]
+    return cols, skipped
+
+
+def build_daily_slab(source_files: dict, out_root: str | None = None) -> dict | None:
+    """Construye el slab diario desde los parquet de daily_metrics
+    (`source_files` = {path: token}, p.ej. de daily_replica.discover_daily_files).
+    Devuelve el manifest, o None si la fuente queda vacía."""
+    t0 = time.time()
+    df = _read_daily_source(list(source_files)) if source_files else None
+    if df is None or df.empty:
+        logger.info("[SLAB] daily: fuente vacía, no se construye")
+        return None
+
+    enc = np.array([str(t).encode("utf-8") for t in df["ticker"]], dtype=np.bytes_)
+    tickers, tids = np.unique(enc, return_inverse=True)
+    ts = pd.to_datetime(df["timestamp"]).to_numpy("datetime64[ns]").astype(np.int64)
+    day = ts // _DAY_NS
+    order = np.lexsort((ts, tids))  # estable: empates en orden fuente (keep-first)
+    keys = (tids[order].astype(np.int64) << 32) + day[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = keys[1:] != keys[:-1]
+    order = order[keep]
+
+    cols, skipped = _daily_columns(df, order)
+    n = len(order)
+    table = pa.table({"tid": tids[order].astype(np.int32), "ts_ns": ts[order],
+                      "day": day[order].astype(np.int32), **cols})
+    index = pd.DataFrame({
+        "ticker": np.char.decode(tickers[tids[order]], "utf-8"),
+        "date": day[order].astype("datetime64[D]").astype(str),
+        "row_start": np.arange(n, dtype=np.int64),
+        "row_end": np.arange(1, n + 1, dtype=np.int64),
+    })
+
+    paths = daily_slab_paths(out_root)
+    os.makedirs(paths["dir"], exist_ok=True)
+    manifest = {
+        "schema_version": SCHEMA_VERSION, "kind": "daily",
+        "source": f"daily_metrics:{len(source_files)} ficheros",
+        "n_rows": int(n), "n_pairs": int(n), "n_tickers": int(len(tickers)),
+        "columns": list(cols), "skipped_columns": skipped,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duckdb_version": _duckdb_version(),
+        "deltas": [],
+        "source_files": dict(source_files),
+    }
+    _publish_slab(paths, table, index, manifest, pair_index=True)
+    logger.info(f"[SLAB] daily: {n:,} filas, {len(tickers):,} tickers, "
+                f"{len(df) - n} duplicados descartados ({round(time.time()-t0, 2)}s)")
+    return manifest
+
+
+def daily_slab_stale(source_files: dict, out_root: str | None = None) -> bool:
+    """True si no hay slab diario o sus ficheros fuente no son `source_files`."""
+    manifest = read_manifest(daily_slab_paths(out_root))
+    return manifest is None or manifest.get("source_files") != dict(source_files)
+
 
 def _duckdb_version() -> str:
     try:
@@ -189,19 +987,13 @@ def _duckdb_version() -> str:
         return "-"
 
 
-def build_month_from_parquet_glob(
-    source_glob: str, kind: str, year: int, month: int,
-    hive_filter: bool = True, out_root: str | None = None,
-) -> dict | None:
-    """Construye el slab leyendo parquet vía DuckDB (GCS o disco local).
-
-    La MISMA función sirve para la fuente GCS de hoy y para la réplica local en el
-    hardware propio (migración del CTO): solo cambia el glob (gs://... → /data/...).
-    """
+def _read_parquet_source(source, year: int, month: int, hive_filter: bool = True) -> pd.DataFrame:
+    """Filas crudas del mes vía DuckDB. `source` es un glob o una lista de ficheros."""
     import duckdb
     from app.db.connection import get_connection
 
-    if source_glob.startswith("gs://") or source_glob.startswith("s3://"):
+    files = [source] if isinstance(source, str) else list(source)
+    if any(f.startswith("gs://") or f.startswith("s3://") for f in files):
         conn = get_connection()  # conexión con httpfs+credenciales
     else:
         conn = duckdb.connect()
@@ -211,16 +1003,68 @@ def build_month_from_parquet_glob(
     if hive_filter:
         where = (f"WHERE CAST(i.year AS INTEGER) = {int(year)} "
                  f"AND CAST(i.month AS INTEGER) = {int(month)}")
+    src = "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in files) + "]"
     sql = f"""
     SELECT i.ticker, i.date, i."timestamp", i.open, i.high, i.low, i."close", i.volume
-    FROM read_parquet('{source_glob}', hive_partitioning=true) i
+    FROM read_parquet({src}, hive_partitioning=true) i
     {where}
     """
+    return conn.execute(sql).fetchdf()
+
+
+def build_month_from_parquet_glob(
+    source_glob: str, kind: str, year: int, month: int,
+    hive_filter: bool = True, out_root: str | None = None,
+    source_files: dict | None = None,
+) -> dict | None:
+    """Construye el slab leyendo parquet vía DuckDB (GCS o disco local).
+
+    La MISMA función sirve para la fuente GCS de hoy y para la réplica local en el
+    hardware propio (migración del CTO): solo cambia el glob (gs://... → /data/...).
+    """
     t0 = time.time()
-    df = conn.execute(sql).fetchdf()
+    df = _read_parquet_source(source_glob, year, month, hive_filter)
     logger.info(f"[SLAB] fuente {kind} {year}-{month:02d}: {len(df):,} filas leídas "
                 f"({round(time.time()-t0, 1)}s) de {source_glob}")
-    return build_month_from_df(df, kind, year, month, source_desc=source_glob, out_root=out_root)
+    return build_month_from_df(df, kind, year, month, source_desc=source_glob,
+                               out_root=out_root, source_files=source_files)
+
+
+def sync_month_from_parquet_files(
+    source_glob: str, files: dict, kind: str, year: int, month: int,
+    hive_filter: bool = True, max_deltas: int | None = None,
+) -> str:
+    """Pone al día el slab de un mes cuya fuente crece por ficheros (mes corriente).
+
+    `files` = {path: token} de la fuente (token cambia si el fichero cambia).
+    Solo los ficheros NUEVOS se leen y se anexan como delta; si uno ya consumido
+    cambió o desapareció, o el delta solapa pares, rebuild completo desde el glob.
+    Devuelve "built" | "appended" | "compacted" | "unchanged" | "empty".
+    """
+    max_deltas = MAX_DELTAS if max_deltas is None else max_deltas
+    manifest = read_manifest(slab_paths(kind, year, month))
+    consumed = (manifest or {}).get("source_files")
+
+    def _rebuild():
+        man = build_month_from_parquet_glob(source_glob, kind, year, month,
+                                            hive_filter=hive_filter, source_files=files)
+        return "built" if man is not None else "empty"
+
+    if (not SLAB_INCREMENTAL or manifest is None or consumed is None
+            or manifest.get("schema_version") != SCHEMA_VERSION
+            or any(files.get(p) != tok for p, tok in consumed.items())):
+        return _rebuild()
+    new = {p: tok for p, tok in files.items() if p not in consumed}
+    if not new:
+        return "unchanged"
+    df = _read_parquet_source(sorted(new), year, month, hive_filter)
+    manifest = append_delta_from_df(df, kind, year, month, source_files=new)
+    if manifest is None:
+        return _rebuild()
+    if max_deltas and len(manifest.get("deltas") or []) >= max_deltas:
+        compact_month(kind, year, month)
+        return "compacted"
+    return "appended"
 
 
 def ticker_cache_fingerprint(kind: str, year: int, month: int) -> str | None:
@@ -280,10 +1124,7 @@ def build_month_from_ticker_cache(
                 with open(paths["manifest"]) as f:
                     man = json.load(f)
                 man["source_fingerprint"] = fingerprint
-                tmp = paths["manifest"] + f".tmp.{os.getpid()}"
-                with open(tmp, "w") as f:
-                    json.dump(man, f)
-                os.replace(tmp, paths["manifest"])
+                _write_manifest(paths["manifest"], man)
                 manifest = man
             except Exception as e:
                 logger.warning(f"[SLAB] no se pudo anexar fingerprint: {e}")
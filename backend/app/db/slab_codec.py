@@ -0,0 +1,246 @@
+"""
+Slab codec — compresión ligera por columna para el tier frío de slabs.
+
+Un mes frío guarda sus columnas base en `slab.cold` (layout en
+manifest["cold"]): las filas se parten en bloques de `block_rows` y cada
+columna es un stream de varints (LEB128) con una tabla uint64 de offsets por
+bloque. Las transformaciones arrancan de 0 en cada bloque, así que un bloque se
+decodifica solo:
+
+  ts_ns    int64    delta-of-delta + zigzag + varint (barras de 1m → ~1 byte)
+  precios  float32  delta sobre el patrón de bits (int32) + zigzag + varint:
+                    dentro de un mismo signo/exponente el patrón es monótono en
+                    el valor, un tick son unos pocos miles de ulps (~3 bytes)
+  volume   int32    zigzag + varint
+
+Sin pérdidas: la aritmética es entera con wrap-around, decode(encode(x)) es
+bit-idéntico. Las columnas derivadas no van al tier frío (se recalculan en
+señales, como con BTT_SLAB_DERIVED_COLS=0).
+
+Los bloques decodificados viven en una caché LRU por proceso acotada en bytes
+(BTT_SLAB_DECODE_CACHE_MB); los arrays cacheados son de sólo lectura, como las
+vistas del mmap del tier caliente.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from numba import njit
+
+# columna → (codec, dtype) en el orden de slab_builder._SLAB_SCHEMA
+COLUMN_CODECS = (
+    ("ts_ns", "dod", np.int64),
+    ("open", "fdelta", np.float32),
+    ("high", "fdelta", np.float32),
+    ("low", "fdelta", np.float32),
+    ("close", "fdelta", np.float32),
+    ("volume", "zz", np.int32),
+)
+DEFAULT_BLOCK_ROWS = int(os.getenv("BTT_SLAB_COLD_BLOCK_ROWS", "4096"))
+DECODE_CACHE_BYTES = int(float(os.getenv("BTT_SLAB_DECODE_CACHE_MB", "256")) * 1024 * 1024)
+
+
+@njit(cache=True)
+def _varint_sizes(u):
+    out = np.empty(len(u), dtype=np.int64)
+    for i in range(len(u)):
+        v = u[i]
+        n = 1
+        while v >= 128:
+            v >>= np.uint64(7)
+            n += 1
+        out[i] = n
+    return out
+
+
+@njit(cache=True)
+def _varint_write(u, pos, out):
+    for i in range(len(u)):
+        v = u[i]
+        p = pos[i]
+        while v >= 128:
+            out[p] = np.uint8((v & np.uint64(127)) | np.uint64(128))
+            v >>= np.uint64(7)
+            p += 1
+        out[p] = np.uint8(v)
+
+
+@njit(cache=True)
+def _varint_decode(buf, start, n, order):
+    """n varints desde buf[start] → unzigzag → `order` sumas prefijas (0/1/2)."""
+    out = np.empty(n, dtype=np.int64)
+    p = start
+    acc1 = np.int64(0)
+    acc2 = np.int64(0)
+    for i in range(n):
+        v = np.uint64(0)
+        shift = np.uint64(0)
+        while True:
+            b = np.uint64(buf[p])
+            p += 1
+            v |= (b & np.uint64(127)) << shift
+            if b < 128:
+                break
+            shift += np.uint64(7)
+        x = np.int64(v >> np.uint64(1)) ^ -np.int64(v & np.uint64(1))
+        if order >= 1:
+            acc1 += x
+            x = acc1
+        if order == 2:
+            acc2 += x
+            x = acc2
+        out[i] = x
+    return out
+
+
+def _block_diff(x: np.ndarray, block_rows: int) -> np.ndarray:
+    """Diferencias con estado 0 al inicio de cada bloque (wrap int64)."""
+    d = np.empty_like(x)
+    if len(x):
+        d[0] = x[0]
+        np.subtract(x[1:], x[:-1], out=d[1:])
+        d[::block_rows] = x[::block_rows]
+    return d
+
+
+def _zigzag(d: np.ndarray) -> np.ndarray:
+    return ((d << 1) ^ (d >> 63)).view(np.uint64)
+
+
+def encode_column(values: np.ndarray, codec: str, block_rows: int):
+    """(stream uint8, offsets uint64[n_blocks + 1]) de una columna."""
+    if codec == "fdelta":
+        x = np.ascontiguousarray(values, dtype=np.float32).view(np.int32).astype(np.int64)
+        x = _block_diff(x, block_rows)
+    elif codec == "dod":
+        x = _block_diff(_block_diff(np.asarray(values, dtype=np.int64), block_rows), block_rows)
+    else:
+        x = np.asarray(values).astype(np.int64)
+    u = _zigzag(x)
+    sizes = _varint_sizes(u)
+    ends = np.cumsum(sizes)
+    pos = ends - sizes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    _varint_write(u, pos, out)
+    offsets = np.append(pos[::block_rows], ends[-1] if len(ends) else 0).astype(np.uint64)
+    return out, offsets
+
+
+_PREFIX_ORDER = {"dod": 2, "fdelta": 1, "zz": 0}
+
+
+def decode_block(stream: np.ndarray, start: int, n: int, codec: str, dtype) -> np.ndarray:
+    x = _varint_decode(stream, start, n, _PREFIX_ORDER[codec])
+    if codec == "fdelta":
+        return x.astype(np.int32).view(np.float32)
+    return x if dtype == np.int64 else x.astype(dtype)
+
+
+def write_cold_file(path: str, columns: dict, block_rows: int = DEFAULT_BLOCK_ROWS) -> dict:
+    """Escribe `columns` (las de COLUMN_CODECS) en `path`; devuelve el layout
+    para el manifest. Offsets alineados a 8 bytes para verlos como uint64."""
+    n_rows = len(columns["ts_ns"])
+    layout = {"block_rows": int(block_rows), "n_rows": int(n_rows), "columns": {}}
+    pos = 0
+    with open(path, "wb") as f:
+        for name, codec, _dtype in COLUMN_CODECS:
+            stream, offsets = encode_column(columns[name], codec, block_rows)
+            pad = (-pos) % 8
+            f.write(b"\0" * pad)
+            pos += pad
+            f.write(offsets.tobytes())
+            f.write(stream.tobytes())
+            layout["columns"][name] = {"offsets_at": pos, "data_at": pos + offsets.nbytes,
+                                       "nbytes": int(stream.nbytes)}
+            pos += offsets.nbytes + stream.nbytes
+    layout["nbytes"] = pos
+    return layout
+
+
+# ── caché LRU de bloques decodificados (por proceso) ─────────────────────────
+_CACHE: OrderedDict = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_STATE = {"bytes": 0, "hits": 0, "misses": 0}
+
+
+def decode_cache_stats() -> dict:
+    with _CACHE_LOCK:
+        return {**_CACHE_STATE, "blocks": len(_CACHE), "budget": DECODE_CACHE_BYTES}
+
+
+def clear_decode_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _CACHE_STATE.update(bytes=0, hits=0, misses=0)
+
+
+class ColdColumns:
+    """Columnas base de un mes frío sobre el mmap de `slab.cold`; `rows()`
+    decodifica sólo los bloques que cubren el rango (vía la caché LRU)."""
+
+    def __init__(self, path: str, layout: dict, key: str):
+        self.key = key  # identifica el fichero en la caché (uid del freeze)
+        self.block_rows = int(layout["block_rows"])
+        self.n_rows = int(layout["n_rows"])
+        mm = np.memmap(path, dtype=np.uint8, mode="r") if layout["nbytes"] else np.empty(0, np.uint8)
+        self._cols = []
+        for name, codec, dtype in COLUMN_CODECS:
+            c = layout["columns"][name]
+            offsets = mm[c["offsets_at"]:c["data_at"]].view(np.uint64)
+            stream = mm[c["data_at"]:c["data_at"] + c["nbytes"]]
+            self._cols.append((codec, dtype, offsets, stream))
+
+    @property
+    def n_blocks(self) -> int:
+        return -(-self.n_rows // self.block_rows)
+
+    def _decode(self, b: int) -> tuple:
+        n = min(self.block_rows, self.n_rows - b * self.block_rows)
+        out = []
+        for codec, dtype, offsets, stream in self._cols:
+            a = decode_block(stream, int(offsets[b]), n, codec, dtype)
+            a.flags.writeable = False
+            out.append(a)
+        return tuple(out)
+
+    def block(self, b: int) -> tuple:
+        ck = (self.key, b)
+        with _CACHE_LOCK:
+            hit = _CACHE.get(ck)
+            if hit is not None:
+                _CACHE.move_to_end(ck)
+                _CACHE_STATE["hits"] += 1
+                return hit
+            _CACHE_STATE["misses"] += 1
+        arrays = self._decode(b)
+        size = sum(a.nbytes for a in arrays)
+        with _CACHE_LOCK:
+            if ck not in _CACHE:
+                _CACHE[ck] = arrays
+                _CACHE_STATE["bytes"] += size
+            while _CACHE_STATE["bytes"] > DECODE_CACHE_BYTES and len(_CACHE) > 1:
+                _k, old = _CACHE.popitem(last=False)
+                _CACHE_STATE["bytes"] -= sum(a.nbytes for a in old)
+        return arrays
+
+    def rows(self, row_start: int, row_end: int) -> tuple:
+        """(ts, open, high, low, close, volume) de [row_start, row_end): vistas
+        del bloque cacheado si el rango cae en uno, concatenación si cruza."""
+        if row_end <= row_start:
+            return tuple(np.empty(0, dtype=d) for _n, _c, d in COLUMN_CODECS)
+        br = self.block_rows
+        b0, b1 = row_start // br, (row_end - 1) // br
+        if b0 == b1:
+            off = b0 * br
+            return tuple(a[row_start - off:row_end - off] for a in self.block(b0))
+        blocks = [self.block(b) for b in range(b0, b1 + 1)]
+        lo, hi = row_start - b0 * br, row_end - b0 * br
+        return tuple(np.concatenate([blk[k] for blk in blocks])[lo:hi] for k in range(len(COLUMN_CODECS)))
+
+    def decode_all(self) -> tuple:
+        """Mes completo SIN pasar por la caché (barridos de open_curves, coalescido)."""
+        blocks = [self._decode(b) for b in range(self.n_blocks)]
+        if not blocks:
+            return tuple(np.empty(0, dtype=d) for _n, _c, d in COLUMN_CODECS)
+        return tuple(np.concatenate([blk[k] for blk in blocks]) for k in range(len(COLUMN_CODECS)))
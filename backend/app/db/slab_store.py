@@ -3,7 +3,18 @@ Slab store — lectura mmap zero-copy del caché mensual columnar (PRD §03.6).
 
 API:
   get_month(kind, y, m) -> MonthSlab | None
-  MonthSlab.slice(row_start, row_end) -> PairArrays (float64 upcast, ts int64)
+  MonthSlab.lookup(ticker, date) / lookup_many(tickers, dates) -> rangos del par
+  MonthSlab.slice(row_start, row_end[, dtype]) -> PairArrays (float64 upcast, ts int64;
+      dtype=float32 → OHLC como vistas del mmap, sin copia — motor float32)
+  MonthSlab.slice_native(row_start, row_end) -> PairArrays (vistas float32/int32, sin copia)
+  MonthSlab sobre un mes FRÍO (manifest["tier"] == "cold", slab_codec): misma
+      API; slice() decodifica sólo los bloques del rango (caché LRU acotada)
+  get_catalog() -> PairCatalog | None      catálogo global (ticker, date) → (kind, rango)
+  get_year(kind, y) -> MonthSlab | None     slab anual coalescido (ventanas swing multi-mes)
+  get_daily() -> DailySlab | None           daily_metrics mmap: filas por (ticker, día),
+      LEAD/LAG (shift_rows) y ventanas de N días (window) dentro del run del ticker
+  slab_pair_refs(qualifying_df, months) -> DataFrame de refs (par → rango del slab)
+  get_month_layout(kind, y, m, layout) -> MonthSlab del layout de un ref (StaleSlabRef si no)
   iter_slab_groups(qualifying_df, months, strategy_def, qual_lookup)
       -> yields (date, ticker, daily_stats, PairArrays)
 
@@ -11,36 +22,71 @@ API:
   - orden de emisión: mes cronológico; dentro del mes, (date, ticker) lexicográfico;
   - exclude_days / exclude_months (idéntico a backtest_signals._preprocess_pair);
   - swing_option: concatena el/los día(s) lead desde el slab del mes que toque,
-    re-ordena+dedup por ts (idéntico al concat+sort+dedup actual);
+    re-ordena+dedup por ts (idéntico al concat+sort+dedup actual). Con un slab
+    anual fresco donde base + leads son contiguos y crecientes en ts, la ventana
+    es un único rango de ese slab y viaja como ref ("span") sin materializar;
   - descarta pares con menos de 5 filas;
   - pares sin datos en el slab simplemente no se emiten (como el groupby actual).
+
+Refs y layout: los payload "ref"/"span" llevan el layout del slab contra el que
+se resolvieron (manifest["layout"]). Un rebuild/compactación reordena el mes y
+estrena layout; resolve_slab_item sirve el ref con el MonthSlab de ESE layout —
+el vigente, el fijado por el iterador que lo emitió o el sustituido que este
+proceso aún tiene mapeado — y si no lo hay lanza StaleSlabRef (nunca lee las
+barras de otro par).
 """
+import bisect
 import datetime as _dt
 import logging
 import os
+import re
 import threading
+import time
 
 import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.ipc as pa_ipc
 
-from app.db.slab_builder import slab_paths
+from numba import njit
+
+from app.db.slab_builder import (
+    CATALOG_KINDS, DERIVED_COLUMNS, catalog_paths, daily_slab_enabled, daily_slab_paths,
+    delta_paths, manifest_mtime, pair_index_paths, pair_keys, read_manifest, slab_paths,
+    slab_published, year_slab_paths,
+)
+from app.db.slab_codec import ColdColumns
 
 logger = logging.getLogger("backtester.slab")
 
 
+class StaleSlabRef(RuntimeError):
+    """Ref emitido contra un layout del slab que ya no está disponible en este
+    proceso (el mes se reconstruyó entre la emisión y la resolución)."""
+
+
 class PairArrays:
-    """Arrays de un par (ticker, día): vistas/upcasts listos para el motor."""
-    __slots__ = ("ts_ns", "open", "high", "low", "close", "volume")
+    """Arrays de un par (ticker, día): vistas/upcasts listos para el motor.
+
+    Derivadas (slab v2 con manifest["derived"]): vistas zero-copy sobre el mmap —
+    hod/lod/pm_high/pm_low float32, vwap float64, minute int16. None si el slab
+    no las trae o el par no es un rango contiguo (swing concatenado)."""
+    __slots__ = ("ts_ns", "open", "high", "low", "close", "volume",
+                 "hod", "lod", "pm_high", "pm_low", "vwap", "minute")
 
-    def __init__(self, ts_ns, open_, high, low, close, volume):
+    def __init__(self, ts_ns, open_, high, low, close, volume, derived=None):
         self.ts_ns = ts_ns          # int64[n]
         self.open = open_           # float64[n]
         self.high = high
         self.low = low
         self.close = close
         self.volume = volume        # float64[n]
+        (self.hod, self.lod, self.pm_high, self.pm_low, self.vwap, self.minute) = (
+            derived if derived is not None else (None,) * len(DERIVED_COLUMNS))
+
+    @property
+    def has_derived(self) -> bool:
+        return self.minute is not None
 
     def __len__(self):
         return len(self.ts_ns)
@@ -64,60 +110,289 @@ class PairArrays:
         })
 
 
+_COLS = ("ts_ns", "open", "high", "low", "close", "volume")
+
+
+def _open_segment(path: str):
+    """(mmap, cols, derived) de un fichero slab/delta. Columnas zero-copy sobre el
+    mmap; derived es None si el fichero no trae las columnas derivadas."""
+    mm = pa.memory_map(path, "r")
+    table = pa_ipc.open_file(mm).read_all().combine_chunks()
+
+    # to_numpy(zero_copy_only=True) garantiza que NO se materializa una copia:
+    # los arrays numpy referencian los buffers del mmap. Tras combine_chunks hay
+    # exactamente 1 chunk por columna (0 si el slab está vacío).
+    def _col(name):
+        col = table.column(name)
+        if col.num_chunks == 0:
+            return np.empty(0, dtype=np.int64 if name == "ts_ns" else np.float32)
+        return col.chunk(0).to_numpy(zero_copy_only=True)
+
+    cols = tuple(_col(c) for c in _COLS)
+    if not all(name in table.column_names for name in DERIVED_COLUMNS):
+        return mm, cols, None
+    return mm, cols, tuple(_col(c) for c in DERIVED_COLUMNS)
+
+
+_EPOCH_ORDINAL = _dt.date(1970, 1, 1).toordinal()
+
+
+class _PairIndex:
+    """Índice binario de pares del mes (ver slab_builder): tickers ordenados +
+    tabla [clave, row_start, row_end] ordenada por clave, ambos mmap (np.load
+    lee sólo la cabecera). Cada lookup = dos búsquedas binarias."""
+    _ROWS = 3
+
+    def __init__(self, paths: dict, meta: dict):
+        p = pair_index_paths(paths, meta)
+        self.tickers = np.load(p["tickers"], mmap_mode="r")
+        table = np.load(p["pairs"], mmap_mode="r")
+        if table.shape != (self._ROWS, int(meta["n_pairs"])):
+            raise ValueError(f"pair index {p['pairs']} con shape {table.shape}")
+        self.table = table
+        self.keys, self.starts, self.ends = table[0], table[-2], table[-1]
+
+    def lookup(self, ticker: str, date: str):
+        enc = ticker.encode("utf-8")
+        t = int(np.searchsorted(self.tickers, enc))
+        if t == len(self.tickers) or self.tickers[t] != enc:
+            return None
+        try:
+            day = _dt.date.fromisoformat(date).toordinal() - _EPOCH_ORDINAL
+        except (TypeError, ValueError):
+            return None
+        key = (t << 32) + day
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return int(self.starts[i]), int(self.ends[i])
+
+    def _find(self, tickers, dates):
+        """(hit, posición en la tabla) por par, vectorizado."""
+        enc = np.array([str(t).encode("utf-8") for t in tickers], dtype=np.bytes_)
+        if not len(enc) or not len(self.keys):
+            return np.zeros(len(enc), dtype=bool), np.zeros(len(enc), dtype=np.int64)
+        t = np.searchsorted(self.tickers, enc)
+        hit = (t < len(self.tickers)) & (self.tickers[np.minimum(t, len(self.tickers) - 1)] == enc)
+        keys = pair_keys(t, np.asarray(dates, dtype="datetime64[D]"))
+        i = np.searchsorted(self.keys, keys)
+        ic = np.minimum(i, len(self.keys) - 1)
+        hit &= (i < len(self.keys)) & (np.asarray(self.keys[ic]) == keys)
+        return hit, ic
+
+    def _ranges(self, hit, ic):
+        starts = np.full(len(hit), -1, dtype=np.int64)
+        ends = np.full(len(hit), -1, dtype=np.int64)
+        starts[hit] = self.starts[ic[hit]]
+        ends[hit] = self.ends[ic[hit]]
+        return starts, ends
+
+    def lookup_many(self, tickers, dates):
+        """(row_start, row_end) vectorizado; -1 donde el par no está."""
+        return self._ranges(*self._find(tickers, dates))
+
+
+class PairCatalog(_PairIndex):
+    """Catálogo global de pares (slab_builder.build_catalog): el índice binario
+    de todos los meses en una tabla [clave, kind, row_start, row_end].
+
+    Un mes sólo se resuelve por el catálogo si `covers(slab)`: el mes está en el
+    catálogo con el mismo kind y el mtime del manifest que tiene el MonthSlab
+    abierto — los rangos son exactamente los de ese slab. Si no, el lector usa
+    el índice del propio mes."""
+    _ROWS = 4
+
+    def __init__(self, paths: dict):
+        manifest = read_manifest(paths) or {}
+        self._paths = paths
+        self.manifest_mtime = manifest_mtime(paths)
+        super().__init__(paths, manifest["pair_index"])
+        self.kinds = tuple(manifest.get("kinds") or CATALOG_KINDS)
+        self.months = manifest.get("months") or {}
+
+    def covers(self, slab) -> bool:
+        ent = self.months.get(f"{slab.year}-{slab.month:02d}")
+        return ent is not None and ent["kind"] == slab.kind and ent["mtime"] == slab.manifest_mtime
+
+    def month_current(self, year: int, month: int) -> str | None:
+        """Kind del mes si su entrada sigue vigente (sin abrir el slab): contra el
+        MonthSlab ya abierto en este proceso si lo hay — el que usarán los
+        lectores —, si no contra el manifest en disco."""
+        ent = self.months.get(f"{year}-{month:02d}")
+        if ent is None:
+            return None
+        with _OPEN_LOCK:
+            opened = _OPEN_SLABS.get((ent["kind"], year, month))
+        mtime = (opened.manifest_mtime if opened is not None
+                 else manifest_mtime(slab_paths(ent["kind"], year, month)))
+        if mtime != ent["mtime"]:
+            return None
+        if ent["kind"] != CATALOG_KINDS[0] and slab_exists(CATALOG_KINDS[0], year, month):
+            return None  # apareció un opt después del catálogo: manda él
+        return ent["kind"]
+
+    def month_layout(self, year: int, month: int) -> str:
+        """Layout del mes con el que se construyó el catálogo (como MonthSlab.layout)."""
+        ent = self.months[f"{year}-{month:02d}"]
+        return ent.get("layout") or f"mtime:{ent['mtime']}"
+
+    def resolve(self, tickers, dates):
+        """(kind, row_start, row_end) por par; kind None / -1 donde no está."""
+        hit, ic = self._find(tickers, dates)
+        starts, ends = self._ranges(hit, ic)
+        codes = np.asarray(self.table[1])[ic[hit]].tolist()
+        kinds = [None] * len(hit)
+        for i, c in zip(np.flatnonzero(hit).tolist(), codes):
+            kinds[i] = self.kinds[c]
+        return kinds, starts, ends
+
+
 class MonthSlab:
     """Un mes mapeado en memoria. Las columnas float32/int32 viven en el page cache;
-    slice() copia SOLO el rango del par (upcast a float64 para el motor)."""
+    slice() copia SOLO el rango del par (upcast a float64 para el motor).
+
+    Base + deltas (append incremental): cada segmento es un fichero mmap propio y
+    las filas se numeran de forma continua (row_base del delta en el manifest);
+    un par nunca cruza segmentos.
+
+    Con índice binario de pares (manifest["pair_index"]) abrir el mes es O(1):
+    ni index.parquet ni dict de pares; pairs() lee los parquet sólo si se pide.
+
+    Mes frío: un único "segmento" comprimido (ColdColumns) sin derivadas; los
+    arrays salen de bloques decodificados y cacheados, de sólo lectura como
+    las vistas del mmap."""
 
     def __init__(self, kind: str, year: int, month: int, paths: dict):
         self.kind, self.year, self.month = kind, year, month
         self._paths = paths
-        self._mmap = pa.memory_map(paths["slab"], "r")
-        table = pa_ipc.open_file(self._mmap).read_all().combine_chunks()
+        manifest = read_manifest(paths) or {}
+        self.manifest = manifest
+        try:
+            self.manifest_mtime = os.stat(paths["manifest"]).st_mtime_ns
+        except OSError:
+            self.manifest_mtime = None
+        # manifests sin layout (anteriores): el mtime hace de generación
+        self.layout = manifest.get("layout") or f"mtime:{self.manifest_mtime}"
+        self._cold = None
+        self._bases = [0]
+        self._index_paths = [paths["index"]]
+        if manifest.get("tier") == "cold":
+            cold = manifest["cold"]
+            self._cold = ColdColumns(paths["cold"], cold,
+                                     key=f"{kind}/{year}/{month:02d}/{cold['uid']}")
+            self._mmap, self._mmaps, self._segments = None, [], []
+            self._n_rows = self._cold.n_rows
+        else:
+            self._open_hot(paths, manifest)
+        self._index_df = None
+        self._pair_map = None
+        self._pair_index = None
+        if manifest.get("pair_index"):
+            try:
+                self._pair_index = _PairIndex(paths, manifest["pair_index"])
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"[SLAB] índice binario de {kind} {year}-{month:02d} ilegible ({e}); "
+                               "uso index.parquet")
 
-        # to_numpy(zero_copy_only=True) garantiza que NO se materializa una copia:
-        # los arrays numpy referencian los buffers del mmap. Tras combine_chunks hay
-        # exactamente 1 chunk por columna (0 si el slab está vacío).
-        def _col(name):
-            col = table.column(name)
-            if col.num_chunks == 0:
-                return np.empty(0, dtype=np.int64 if name == "ts_ns" else np.float32)
-            return col.chunk(0).to_numpy(zero_copy_only=True)
-
-        self._ts = _col("ts_ns")
-        self._open = _col("open")
-        self._high = _col("high")
-        self._low = _col("low")
-        self._close = _col("close")
-        self._volume = _col("volume")
-        self._index_df = pd.read_parquet(paths["index"])
-        self._pair_map = {
-            (t, d): (int(s), int(e))
-            for t, d, s, e in zip(
-                self._index_df["ticker"], self._index_df["date"],
-                self._index_df["row_start"], self._index_df["row_end"],
-            )
-        }
+    @property
+    def cold(self) -> bool:
+        return self._cold is not None
+
+    def _open_hot(self, paths: dict, manifest: dict) -> None:
+        self._mmap, base_cols, base_derived = _open_segment(paths["slab"])
+        (self._ts, self._open, self._high, self._low, self._close, self._volume) = base_cols
+        self._segments = [(base_cols, base_derived)]
+        self._mmaps = [self._mmap]
+        for d in manifest.get("deltas") or []:
+            dp = delta_paths(paths, d["name"])
+            mm, cols, derived = _open_segment(dp["slab"])
+            self._mmaps.append(mm)
+            self._segments.append((cols, derived))
+            self._bases.append(int(d["row_base"]))
+            self._index_paths.append(dp["index"])
+        self._n_rows = self._bases[-1] + len(self._segments[-1][0][0])
+
+    def _segment(self, row_start: int, row_end: int):
+        """(columnas, derivadas | None, slice local) del segmento que contiene el rango."""
+        if self._cold is not None:
+            return self._cold.rows(row_start, row_end), None, slice(0, row_end - row_start)
+        if len(self._bases) == 1:
+            cols, derived = self._segments[0]
+            return cols, derived, slice(row_start, row_end)
+        k = bisect.bisect_right(self._bases, row_start) - 1
+        base = self._bases[k]
+        cols, derived = self._segments[k]
+        return cols, derived, slice(row_start - base, row_end - base)
 
     @property
     def n_rows(self) -> int:
-        return len(self._ts)
+        return self._n_rows
 
     def pairs(self) -> pd.DataFrame:
+        """Índice completo (ticker, date, row_start, row_end, n_rows) en orden
+        físico. Se lee de los index.parquet la primera vez que se pide."""
+        if self._index_df is None:
+            indexes = [pd.read_parquet(p) for p in self._index_paths]
+            self._index_df = indexes[0] if len(indexes) == 1 else pd.concat(indexes, ignore_index=True)
         return self._index_df
 
+    def segments(self):
+        """[(row_base, columnas nativas)] de base + deltas, para barridos del mes
+        completo (curvas de open_curves) sin pasar por slice() par a par. Un
+        mes frío se decodifica entero (sin pasar por la caché de bloques)."""
+        if self._cold is not None:
+            return [(0, self._cold.decode_all())]
+        return [(base, cols) for base, (cols, _d) in zip(self._bases, self._segments)]
+
+    def _dict_index(self) -> dict:
+        """Fallback sin índice binario (slabs previos / BTT_SLAB_PAIR_INDEX=0)."""
+        if self._pair_map is None:
+            idx = self.pairs()
+            self._pair_map = {
+                (t, d): (int(s), int(e))
+                for t, d, s, e in zip(idx["ticker"], idx["date"], idx["row_start"], idx["row_end"])
+            }
+        return self._pair_map
+
     def lookup(self, ticker: str, date: str):
         """(row_start, row_end) o None si el par no está en el mes."""
-        return self._pair_map.get((ticker, date))
+        if self._pair_index is not None:
+            return self._pair_index.lookup(ticker, date)
+        return self._dict_index().get((ticker, date))
+
+    def lookup_many(self, tickers, dates):
+        """Arrays (row_start, row_end) para pares (ticker, 'YYYY-MM-DD'); -1 = ausente."""
+        if self._pair_index is not None:
+            return self._pair_index.lookup_many(tickers, dates)
+        pm = self._dict_index()
+        rngs = [pm.get((t, d), (-1, -1)) for t, d in zip(tickers, dates)]
+        arr = np.array(rngs, dtype=np.int64).reshape(-1, 2)
+        return arr[:, 0].copy(), arr[:, 1].copy()
 
-    def slice(self, row_start: int, row_end: int) -> PairArrays:
-        s = slice(row_start, row_end)
+    def slice(self, row_start: int, row_end: int, dtype=np.float64) -> PairArrays:
+        """Arrays del par en `dtype`. float64 (default) = upcast con copia, el
+        contrato del motor legacy; float32 = OHLC como vistas de SÓLO LECTURA
+        sobre el mmap (sin copia) y volume int32→float32 (exacto < 2^24)."""
+        (ts, open_, high, low, close, volume), derived, s = self._segment(row_start, row_end)
         return PairArrays(
-            ts_ns=self._ts[s],  # int64: sin copia (vista)
-            open_=self._open[s].astype(np.float64),
-            high=self._high[s].astype(np.float64),
-            low=self._low[s].astype(np.float64),
-            close=self._close[s].astype(np.float64),
-            volume=self._volume[s].astype(np.float64),
+            ts_ns=ts[s],  # int64: sin copia (vista)
+            open_=open_[s].astype(dtype, copy=False),
+            high=high[s].astype(dtype, copy=False),
+            low=low[s].astype(dtype, copy=False),
+            close=close[s].astype(dtype, copy=False),
+            volume=volume[s].astype(dtype),
+            derived=tuple(a[s] for a in derived) if derived is not None else None,
+        )
+
+    def slice_native(self, row_start: int, row_end: int) -> PairArrays:
+        """Como slice() pero SIN upcast: vistas float32/int32 sobre el mmap (cero
+        copias). Para consumidores que rehacen un day_df con los dtypes del caché
+        (grid pack del optimizador)."""
+        (ts, open_, high, low, close, volume), derived, s = self._segment(row_start, row_end)
+        return PairArrays(
+            ts_ns=ts[s], open_=open_[s], high=high[s],
+            low=low[s], close=close[s], volume=volume[s],
+            derived=tuple(a[s] for a in derived) if derived is not None else None,
         )
 
     def slice_pair(self, ticker: str, date: str) -> PairArrays | None:
@@ -127,33 +402,304 @@ class MonthSlab:
         return self.slice(*rng)
 
 
+@njit(cache=True)
+def _window_reduce(values, tid, rows, n, how, include_current):
+    """Por fila: max (0) / min (1) / media (2) de `values` en las `n` filas
+    anteriores del mismo ticker (más la propia si include_current); NaN se ignora."""
+    out = np.empty(len(rows), dtype=np.float64)
+    for i in range(len(rows)):
+        out[i] = np.nan
+        r = rows[i]
+        if r < 0:
+            continue
+        end = r + 1 if include_current else r
+        t = tid[r]
+        acc = 0.0
+        cnt = 0
+        for j in range(max(end - n, 0), end):
+            if tid[j] != t:
+                continue
+            v = float(values[j])
+            if np.isnan(v):
+                continue
+            if cnt == 0:
+                acc = v
+            elif how == 0:
+                acc = max(acc, v)
+            elif how == 1:
+                acc = min(acc, v)
+            else:
+                acc += v
+            cnt += 1
+        if cnt:
+            out[i] = acc / cnt if how == 2 else acc
+    return out
+
+
+_WINDOW_HOW = {"max": 0, "min": 1, "mean": 2}
+
+
+class DailySlab:
+    """daily_metrics mapeado en memoria (slab_builder.build_daily_slab), compartido
+    por todos los consumidores del proceso en lugar de un DataFrame por petición.
+
+    Filas ordenadas por (ticker, timestamp): un run contiguo por ticker, una
+    fila por (ticker, día). Las posiciones de fila son la moneda de la API:
+    rows() resuelve pares, shift_rows() es LEAD (k > 0) / LAG (k < 0) — la misma
+    semántica que `LEAD(x, k) OVER (PARTITION BY ticker ORDER BY timestamp)` —
+    y window() agrega los N días anteriores sin salir del run.
+
+    El slab guarda las columnas crudas del parquet; las que la vista
+    daily_metrics recalcula (daily_replica._VIEW_SQL: pmh_gap_pct,
+    gap_at_open_pct) se recalculan igual al leerlas."""
+
+    def __init__(self, paths: dict):
+        manifest = read_manifest(paths) or {}
+        self._paths = paths
+        self.manifest = manifest
+        self.manifest_mtime = manifest_mtime(paths)
+        self._mmap = pa.memory_map(paths["slab"], "r")
+        table = pa_ipc.open_file(self._mmap).read_all().combine_chunks()
+        self._cols = {}
+        for field in table.schema:
+            col = table.column(field.name)
+            self._cols[field.name] = (col.chunk(0).to_numpy(zero_copy_only=True) if col.num_chunks
+                                      else np.empty(0, dtype=field.type.to_pandas_dtype()))
+        self._index = _PairIndex(paths, manifest["pair_index"])
+        self.tickers = self._index.tickers
+        self.tid, self.ts_ns, self.day = self._cols["tid"], self._cols["ts_ns"], self._cols["day"]
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.tid)
+
+    @property
+    def columns(self) -> tuple:
+        return tuple(self.manifest.get("columns") or ())
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista de sólo lectura de la columna completa (KeyError si no existe)."""
+        return self._cols[name]
+
+    @property
+    def last_date(self) -> str | None:
+        """Último día ('YYYY-MM-DD') con filas en el slab, o None si está vacío."""
+        if not self.n_rows:
+            return None
+        return str(np.datetime64(int(self.day.max()), "D"))
+
+    def has_ticker(self, ticker: str) -> bool:
+        enc = str(ticker).encode("utf-8")
+        t = int(np.searchsorted(self.tickers, enc))
+        return t < len(self.tickers) and self.tickers[t] == enc
+
+    def ticker_rows(self, ticker: str):
+        """(row_start, row_end) del run del ticker, o None."""
+        if not self.has_ticker(ticker):
+            return None
+        t = int(np.searchsorted(self.tickers, str(ticker).encode("utf-8")))
+        return int(np.searchsorted(self.tid, t, "left")), int(np.searchsorted(self.tid, t, "right"))
+
+    def row(self, ticker: str, date: str) -> int | None:
+        rng = self._index.lookup(ticker, str(date)[:10])
+        return None if rng is None else rng[0]
+
+    def rows(self, tickers, dates) -> np.ndarray:
+        """Fila por par (ticker, 'YYYY-MM-DD'); -1 donde el par no está."""
+        return self._index.lookup_many(tickers, [str(d)[:10] for d in dates])[0]
+
+    def shift_rows(self, rows, k: int) -> np.ndarray:
+        """Fila k posiciones después (k < 0: antes) dentro del mismo ticker; -1 si sale del run."""
+        rows = np.asarray(rows, dtype=np.int64)
+        tgt = rows + k
+        ok = (rows >= 0) & (tgt >= 0) & (tgt < self.n_rows)
+        ok[ok] = self.tid[tgt[ok]] == self.tid[rows[ok]]
+        return np.where(ok, tgt, -1)
+
+    def take(self, name: str, rows) -> np.ndarray:
+        """Valores de `name` en `rows` como float64 (NaN en -1). "timestamp" → datetime64[ns]."""
+        rows = np.asarray(rows, dtype=np.int64)
+        hit = rows >= 0
+        if name == "timestamp":
+            out = np.full(len(rows), np.datetime64("NaT"), dtype="datetime64[ns]")
+            out[hit] = self.ts_ns[rows[hit]].view("datetime64[ns]")
+            return out
+        out = np.full(len(rows), np.nan)
+        out[hit] = self._cols[name][rows[hit]]
+        return out
+
+    def window(self, name: str, rows, n: int, how: str = "max",
+               include_current: bool = False) -> np.ndarray:
+        """max/min/mean de `name` sobre las `n` filas previas del ticker (ventana
+        parcial al inicio del run, como iloc[max(0, pos - n):pos]); NaN si vacía."""
+        return _window_reduce(self._cols[name], self.tid, np.asarray(rows, dtype=np.int64),
+                              int(n), _WINDOW_HOW[how], include_current)
+
+    def _resolve(self, name: str, rows: np.ndarray) -> np.ndarray:
+        if name == "pmh_gap_pct" and "prev_close" in self._cols:
+            # (pm_high - prev_close) / NULLIF(prev_close, 0) * 100, como la vista
+            prev = self.take("prev_close", rows)
+            prev[prev == 0] = np.nan
+            return (self.take("pm_high", rows) - prev) / prev * 100
+        if name == "gap_at_open_pct":
+            return self.take("gap_pct", rows)
+        if name in self._cols:
+            return self.take(name, rows)
+        m = re.fullmatch(r"(lead|lag)_(.+)_(\d+)", name)
+        if m and (m.group(2) in self._cols or m.group(2) == "timestamp"
+                  or re.fullmatch(r"sma_\d+", m.group(2))):
+            k = int(m.group(3))
+            return self._resolve(m.group(2), self.shift_rows(rows, k if m.group(1) == "lead" else -k))
+        m = re.fullmatch(r"sma_(\d+)", name)
+        if m:  # AVG(rth_close) OVER (... ROWS BETWEEN P-1 PRECEDING AND CURRENT ROW)
+            return self.window("rth_close", rows, int(m.group(1)), how="mean", include_current=True)
+        return self.take(name, rows)
+
+    def frame(self, tickers, dates, columns) -> pd.DataFrame:
+        """DataFrame alineado con los pares pedidos con `columns`: columnas del
+        slab, "timestamp", sma_P y lead_/lag_{col}_{k} con los nombres del SQL
+        de qualifying (data_service) — p.ej. lag_rth_high_1, lead_sma_20_1."""
+        return self.frame_rows(self.rows(tickers, dates), columns)
+
+    def frame_rows(self, rows, columns) -> pd.DataFrame:
+        """Como frame() sobre filas ya resueltas con rows() (-1 → NaN)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return pd.DataFrame({c: self._resolve(c, rows) for c in columns})
+
+
 # ── caché de slabs abiertos por proceso (también en cada worker forkserver) ──
 _OPEN_SLABS: dict = {}
+_LAST_CHECK: dict = {}
+# MonthSlab sustituido por otro de layout distinto (rebuild): sigue mapeado para
+# resolver los refs ya emitidos contra él, hasta el siguiente rebuild del mes.
+_SUPERSEDED: dict = {}
+# (kind, year, month, layout) → [MonthSlab, n]: fijados por iteradores vivos.
+_PINNED: dict = {}
 _OPEN_LOCK = threading.Lock()
+_REFRESH_CHECK_S = float(os.getenv("BTT_SLAB_REFRESH_CHECK_S", "5"))
 
 
 def slab_exists(kind: str, year: int, month: int) -> bool:
-    p = slab_paths(kind, year, month)
-    return os.path.exists(p["manifest"]) and os.path.exists(p["slab"]) and os.path.exists(p["index"])
+    return slab_published(slab_paths(kind, year, month))
 
 
-def get_month(kind: str, year: int, month: int) -> MonthSlab | None:
-    """MonthSlab cacheado por proceso, o None si no hay slab válido publicado."""
-    key = (kind, year, month)
+def _cached_open(key, label: str, opener):
+    """Objeto mmap cacheado por proceso bajo `key` (MonthSlab, slab anual,
+    catálogo). Si su manifest cambió (delta anexado / rebuild) se reabre —
+    comprobado como mucho cada _REFRESH_CHECK_S para no hacer un stat por par.
+    `opener()` devuelve None si no hay nada publicado."""
     with _OPEN_LOCK:
         hit = _OPEN_SLABS.get(key)
+        checked = _LAST_CHECK.get(key, 0.0)
     if hit is not None:
-        return hit
-    if not slab_exists(kind, year, month):
-        return None
+        now = time.monotonic()
+        if now - checked < _REFRESH_CHECK_S:
+            return hit
+        with _OPEN_LOCK:
+            _LAST_CHECK[key] = now
+        try:
+            current = os.stat(hit._paths["manifest"]).st_mtime_ns
+        except OSError:
+            current = None
+        if current == hit.manifest_mtime:
+            return hit
     try:
-        slab = MonthSlab(kind, year, month, slab_paths(kind, year, month))
+        obj = opener()
     except Exception as e:
-        logger.warning(f"[SLAB] no se pudo abrir {kind} {year}-{month:02d}: {e}")
+        logger.warning(f"[SLAB] no se pudo abrir {label}: {e}")
+        return hit
+    if obj is None:
         return None
     with _OPEN_LOCK:
-        _OPEN_SLABS[key] = slab
-    return slab
+        _OPEN_SLABS[key] = obj
+        _LAST_CHECK[key] = time.monotonic()
+        if hit is not None and getattr(hit, "layout", None) != getattr(obj, "layout", None):
+            _SUPERSEDED[key] = hit
+    return obj
+
+
+def pin_slab(slab) -> None:
+    """Fija `slab` en este proceso: los refs emitidos contra su layout se siguen
+    resolviendo aunque el mes se reconstruya. Cada pin_slab lleva su unpin_slab."""
+    with _OPEN_LOCK:
+        ent = _PINNED.setdefault((slab.kind, slab.year, slab.month, slab.layout), [slab, 0])
+        ent[1] += 1
+
+
+def unpin_slab(slab) -> None:
+    key = (slab.kind, slab.year, slab.month, slab.layout)
+    with _OPEN_LOCK:
+        ent = _PINNED.get(key)
+        if ent is not None:
+            ent[1] -= 1
+            if ent[1] <= 0:
+                del _PINNED[key]
+
+
+def _slab_for_layout(current, key, layout: str, label: str):
+    """MonthSlab de `key` con ese layout: el vigente, uno fijado o el sustituido."""
+    if current is not None and current.layout == layout:
+        return current
+    with _OPEN_LOCK:
+        ent = _PINNED.get((*key, layout))
+        old = _SUPERSEDED.get(key)
+    if ent is not None:
+        return ent[0]
+    if old is not None and old.layout == layout:
+        return old
+    raise StaleSlabRef(f"{label}: layout {layout} ya no disponible (slab reconstruido)")
+
+
+def get_month_layout(kind: str, year: int, month: int, layout: str) -> MonthSlab:
+    """MonthSlab del mes con ese layout (vigente, fijado o sustituido en este
+    proceso); StaleSlabRef si ya no hay ninguno."""
+    return _slab_for_layout(get_month(kind, year, month), (kind, year, month), layout,
+                            f"slab {kind} {year}-{month:02d}")
+
+
+def get_month(kind: str, year: int, month: int) -> MonthSlab | None:
+    """MonthSlab cacheado por proceso, o None si no hay slab válido publicado."""
+    def _open():
+        if not slab_exists(kind, year, month):
+            return None
+        return MonthSlab(kind, year, month, slab_paths(kind, year, month))
+    return _cached_open((kind, year, month), f"{kind} {year}-{month:02d}", _open)
+
+
+def get_year(kind: str, year: int) -> MonthSlab | None:
+    """Slab anual coalescido (slab_builder.build_year_slab) como MonthSlab con
+    month=0; manifest["months"] = {mm: mtime del manifest del mes fuente}."""
+    def _open():
+        paths = year_slab_paths(kind, year)
+        if not (os.path.exists(paths["manifest"]) and os.path.exists(paths["slab"])):
+            return None
+        return MonthSlab(kind, year, 0, paths)
+    return _cached_open((kind, year, 0), f"{kind} {year} anual", _open)
+
+
+def get_catalog() -> PairCatalog | None:
+    """Catálogo global de pares, o None si no se ha construido."""
+    paths = catalog_paths()
+
+    def _open():
+        if not os.path.exists(paths["manifest"]):
+            return None
+        return PairCatalog(paths)
+    return _cached_open(("catalog", paths["dir"]), "catálogo de pares", _open)
+
+
+def get_daily() -> DailySlab | None:
+    """Slab diario compartido, o None si no está publicado o con
+    BTT_DAILY_SLAB_ENABLED=0 (los consumidores vuelven a DuckDB)."""
+    if not daily_slab_enabled():
+        return None
+    paths = daily_slab_paths()
+
+    def _open():
+        if not (os.path.exists(paths["manifest"]) and os.path.exists(paths["slab"])):
+            return None
+        return DailySlab(paths)
+    return _cached_open(("daily", paths["dir"]), "slab diario", _open)
 
 
 def get_month_any_kind(year: int, month: int) -> MonthSlab | None:
@@ -163,7 +709,8 @@ def get_month_any_kind(year: int, month: int) -> MonthSlab | None:
 
 def _merge_swing_arrays(base: PairArrays, extras: list) -> PairArrays:
     """Concat + orden estable por ts + dedup keep-first — réplica del
-    pd.concat + sort_values('timestamp') + drop_duplicates de _preprocess_pair."""
+    pd.concat + sort_values('timestamp') + drop_duplicates de _preprocess_pair.
+    Sin derivadas: los acumulados del slab son por día, no del frame swing."""
     ts = np.concatenate([base.ts_ns] + [e.ts_ns for e in extras])
     o = np.concatenate([base.open] + [e.open for e in extras])
     h = np.concatenate([base.high] + [e.high for e in extras])
@@ -180,15 +727,50 @@ def _merge_swing_arrays(base: PairArrays, extras: list) -> PairArrays:
                       low=l[keep], close=c[keep], volume=v[keep])
 
 
+def _year_span(slab: MonthSlab, ticker: str, date: str, leads: list):
+    """(slab anual, row_start, row_end) de la ventana swing, o None.
+
+    Sólo si el slab anual está al día con TODOS los meses implicados (mismo
+    kind, mismo mtime de manifest que los MonthSlab en uso) y los rangos base +
+    leads son consecutivos con ts estrictamente creciente en cada frontera:
+    entonces el concat + sort + dedup de _merge_swing_arrays es la identidad y
+    el rango reproduce sus arrays exactos."""
+    ys = get_year(slab.kind, slab.year)
+    if ys is None:
+        return None
+    months = ys.manifest.get("months") or {}
+    for s in [slab] + [lead[0] for lead in leads]:
+        if (s.kind, s.year) != (ys.kind, ys.year) or months.get(f"{s.month:02d}") != s.manifest_mtime:
+            return None
+    ranges = [ys.lookup(ticker, d) for d in [date] + [lead[1] for lead in leads]]
+    if any(r is None for r in ranges):
+        return None
+    ts = ys._ts
+    for a, b in zip(ranges, ranges[1:]):
+        if a[1] != b[0] or ts[a[1] - 1] >= ts[b[0]]:
+            return None
+    return ys, ranges[0][0], ranges[-1][1]
+
+
 def iter_slab_items(qualifying_df, months, strategy_def, qual_lookup):
     """Itera pares desde slabs. months = [(year, month), ...] cronológico.
 
     Yields (date: str, ticker: str, daily_stats: dict, payload) donde payload es:
-      ("ref", kind, year, month, row_start, row_end)  par = slice puro del slab
-        → IPC barato hacia workers: viajan índices, el worker abre su propio mmap;
+      ("ref", kind, year, month, row_start, row_end, layout)  par = slice puro
+        del slab → IPC barato hacia workers: viajan índices, el worker abre su
+        propio mmap;
+      ("span", kind, year, row_start, row_end, layout)  swing = rango contiguo
+        del slab anual (base + leads consecutivos) → también viaja como índices;
       ("arr", PairArrays)                             par con swing concatenado
         → los arrays viajan ya materializados (no son un rango contiguo).
 
+    Con catálogo global vigente para el mes (PairCatalog.covers) los pares se
+    resuelven contra él; si no, contra el índice del mes.
+
+    Los slabs con refs emitidos quedan fijados (pin_slab) mientras el iterador vive:
+    un consumidor en el mismo proceso los resuelve aunque el mes se reconstruya
+    entretanto.
+
     Los meses SIN slab no se emiten aquí — iter_slab_items_with_fallback añade el
     path legacy para esos meses.
     """
@@ -204,96 +786,112 @@ def iter_slab_items(qualifying_df, months, strategy_def, qual_lookup):
     apply_day = strategy_def.get("apply_day", "gap_day") if strategy_def else "gap_day"
 
     q_dates = pd.to_datetime(qualifying_df["date"])
+    catalog = get_catalog()
+    pinned = []
 
-    for (y, m) in months:
-        slab = get_month_any_kind(y, m)
-        if slab is None:
-            continue
-        mask = (q_dates.dt.year == y) & (q_dates.dt.month == m)
-        vp = qualifying_df.loc[mask, ["ticker", "date"]].drop_duplicates()
-        if vp.empty:
-            continue
-        vp = vp.copy()
-        vp["date"] = pd.to_datetime(vp["date"]).dt.strftime("%Y-%m-%d")
-        # Orden de emisión idéntico al groupby(["date","ticker"]) actual.
-        vp = vp.sort_values(["date", "ticker"])
-
-        for ticker, date in zip(vp["ticker"], vp["date"]):
-            ticker = str(ticker)
-            # exclusiones temporales (misma lógica que _preprocess_pair)
-            if exclude_days or exclude_months:
-                try:
-                    dt = _dt.datetime.strptime(date, "%Y-%m-%d")
-                    if dt.weekday() in exclude_days:
-                        continue
-                    if (dt.month - 1) in exclude_months:
-                        continue
-                except Exception as e:
-                    logger.warning(f"Error parsing date {date} for temporal exclusion: {e}")
-
-            rng = slab.lookup(ticker, date)
-            if rng is None:
-                continue  # el par no tiene datos este mes (como el groupby actual)
-
-            daily_stats = qual_lookup.get((ticker, date), {})
-
-            extras = []
-            if swing_active:
-                dates_to_fetch = []
-                if apply_day == "gap_day":
-                    if swing_target in ("gap_1_day", "gap_2_day"):
-                        t1 = daily_stats.get("lead_timestamp_1")
-                        if t1 is not None and not pd.isna(t1):
-                            dates_to_fetch.append(t1)
-                    if swing_target == "gap_2_day":
+    try:
+        for (y, m) in months:
+            slab = get_month_any_kind(y, m)
+            if slab is None:
+                continue
+            pin_slab(slab)
+            pinned.append(slab)
+            mask = (q_dates.dt.year == y) & (q_dates.dt.month == m)
+            vp = qualifying_df.loc[mask, ["ticker", "date"]].drop_duplicates()
+            if vp.empty:
+                continue
+            vp = vp.copy()
+            vp["date"] = pd.to_datetime(vp["date"]).dt.strftime("%Y-%m-%d")
+            # Orden de emisión idéntico al groupby(["date","ticker"]) actual.
+            vp = vp.sort_values(["date", "ticker"])
+            vp["ticker"] = vp["ticker"].astype(str)
+            index = catalog if catalog is not None and catalog.covers(slab) else slab
+            starts, ends = index.lookup_many(vp["ticker"].to_numpy(), vp["date"].to_numpy())
+
+            for ticker, date, r_start, r_end in zip(vp["ticker"], vp["date"], starts.tolist(), ends.tolist()):
+                if calendar_excluded(date, exclude_days, exclude_months):
+                    continue
+
+                if r_start < 0:
+                    continue  # el par no tiene datos este mes (como el groupby actual)
+                rng = (r_start, r_end)
+
+                daily_stats = qual_lookup.get((ticker, date), {})
+
+                leads = []
+                if swing_active:
+                    dates_to_fetch = []
+                    if apply_day == "gap_day":
+                        if swing_target in ("gap_1_day", "gap_2_day"):
+                            t1 = daily_stats.get("lead_timestamp_1")
+                            if t1 is not None and not pd.isna(t1):
+                                dates_to_fetch.append(t1)
+                        if swing_target == "gap_2_day":
+                            t2 = daily_stats.get("lead_timestamp_2")
+                            if t2 is not None and not pd.isna(t2):
+                                dates_to_fetch.append(t2)
+                    elif apply_day == "gap_1_day" and swing_target == "gap_2_day":
                         t2 = daily_stats.get("lead_timestamp_2")
                         if t2 is not None and not pd.isna(t2):
                             dates_to_fetch.append(t2)
-                elif apply_day == "gap_1_day" and swing_target == "gap_2_day":
-                    t2 = daily_stats.get("lead_timestamp_2")
-                    if t2 is not None and not pd.isna(t2):
-                        dates_to_fetch.append(t2)
-
-                for d_val in dates_to_fetch:
-                    d_str = format_date_str(d_val)
-                    if not d_str:
+
+                    for d_val in dates_to_fetch:
+                        d_str = format_date_str(d_val)
+                        if not d_str:
+                            continue
+                        sy, sm = int(d_str[:4]), int(d_str[5:7])
+                        s_slab = slab if (sy, sm) == (y, m) else get_month_any_kind(sy, sm)
+                        if s_slab is None:
+                            continue  # equivalente al cache-miss actual (no concat)
+                        s_rng = s_slab.lookup(ticker, d_str)
+                        if s_rng is not None and s_rng[1] > s_rng[0]:
+                            leads.append((s_slab, d_str, s_rng))
+
+                if leads:
+                    span = _year_span(slab, ticker, date, leads)
+                    if span is not None:
+                        ys, s_start, s_end = span
+                        if s_end - s_start < 5:
+                            continue
+                        if ys not in pinned:
+                            pin_slab(ys)
+                            pinned.append(ys)
+                        yield date, ticker, daily_stats, ("span", ys.kind, y, s_start, s_end, ys.layout)
                         continue
-                    sy, sm = int(d_str[:4]), int(d_str[5:7])
-                    s_slab = slab if (sy, sm) == (y, m) else get_month_any_kind(sy, sm)
-                    if s_slab is None:
-                        continue  # equivalente al cache-miss actual (no concat)
-                    extra = s_slab.slice_pair(ticker, d_str)
-                    if extra is not None and len(extra):
-                        extras.append(extra)
-
-            if extras:
-                arrs = _merge_swing_arrays(slab.slice(*rng), extras)
-                if len(arrs) < 5:
-                    continue
-                yield date, ticker, daily_stats, ("arr", arrs)
-            else:
-                if rng[1] - rng[0] < 5:
-                    continue
-                yield date, ticker, daily_stats, ("ref", slab.kind, y, m, rng[0], rng[1])
+                    arrs = _merge_swing_arrays(slab.slice(*rng), [s.slice(*r) for s, _d, r in leads])
+                    if len(arrs) < 5:
+                        continue
+                    yield date, ticker, daily_stats, ("arr", arrs)
+                else:
+                    if rng[1] - rng[0] < 5:
+                        continue
+                    yield date, ticker, daily_stats, ("ref", slab.kind, y, m, rng[0], rng[1], slab.layout)
+    finally:
+        for pinned_slab in pinned:
+            unpin_slab(pinned_slab)
 
 
-def resolve_slab_item(payload) -> PairArrays:
-    """Materializa el payload de iter_slab_items (en el padre o en un worker)."""
+def resolve_slab_item(payload, dtype=np.float64) -> PairArrays:
+    """Materializa el payload de iter_slab_items (en el padre o en un worker).
+    `dtype` aplica a los refs y spans; los "arr" (swing concatenado, fallback
+    legacy) ya vienen en float64 y se entregan tal cual. StaleSlabRef si el
+    layout del ref ya no está disponible en este proceso."""
     if payload[0] == "arr":
         return payload[1]
-    _, kind, y, m, s, e = payload
-    slab = get_month(kind, y, m)
-    if slab is None:
-        raise RuntimeError(f"slab {kind} {y}-{m:02d} no disponible al resolver ref")
-    return slab.slice(s, e)
+    if payload[0] == "span":
+        _, kind, y, s, e, layout = payload
+        ys = _slab_for_layout(get_year(kind, y), (kind, y, 0), layout, f"slab anual {kind} {y}")
+        return ys.slice(s, e, dtype)
+    _, kind, y, m, s, e, layout = payload
+    return get_month_layout(kind, y, m, layout).slice(s, e, dtype)
 
 
-def iter_slab_groups(qualifying_df, months, strategy_def, qual_lookup):
+def iter_slab_groups(qualifying_df, months, strategy_def, qual_lookup, dtype=np.float64):
     """Adaptador: como iter_slab_items pero materializando (date, ticker,
     daily_stats, PairArrays). Lo usan el bench y los tests."""
     for date, ticker, daily_stats, payload in iter_slab_items(
             qualifying_df, months, strategy_def, qual_lookup):
-        yield date, ticker, daily_stats, resolve_slab_item(payload)
+        yield date, ticker, daily_stats, resolve_slab_item(payload, dtype)
 
 
 def iter_slab_items_with_fallback(qualifying_df, strategy_def, qual_lookup,
@@ -330,23 +928,100 @@ def iter_slab_items_with_fallback(qualifying_df, strategy_def, qual_lookup,
         df_month = _fetch_and_cache_month(y, m, path, vp, batch_size=500, mi=1, n_months=1)
         if df_month is None or df_month.empty:
             continue
-        from app.services.backtest_signals import _preprocess_pair
         for (date, ticker), day_df in df_month.groupby(["date", "ticker"], observed=True):
-            pre = _preprocess_pair(date, ticker, day_df, qual_lookup, strategy_def,
-                                   swing_intraday_cache or {})
-            if pre is None:
-                continue
-            p_date, p_ticker, p_df, p_stats = pre
-            ts_ns = pd.to_datetime(p_df["timestamp"]).values.astype("datetime64[ns]").astype(np.int64)
-            arrs = PairArrays(
-                ts_ns=ts_ns,
-                open_=np.asarray(p_df["open"], dtype=np.float64),
-                high=np.asarray(p_df["high"], dtype=np.float64),
-                low=np.asarray(p_df["low"], dtype=np.float64),
-                close=np.asarray(p_df["close"], dtype=np.float64),
-                volume=np.asarray(p_df["volume"], dtype=np.float64),
-            )
-            yield p_date, p_ticker, p_stats, ("arr", arrs)
+            item = legacy_pair_item(date, ticker, day_df, qual_lookup, strategy_def,
+                                    swing_intraday_cache)
+            if item is not None:
+                yield item
+
+
+def calendar_excluded(date: str, exclude_days, exclude_months) -> bool:
+    """Exclusiones temporales de risk_management (misma lógica que _preprocess_pair)."""
+    if not (exclude_days or exclude_months):
+        return False
+    try:
+        dt = _dt.datetime.strptime(date, "%Y-%m-%d")
+        return dt.weekday() in exclude_days or (dt.month - 1) in exclude_months
+    except Exception as e:
+        logger.warning(f"Error parsing date {date} for temporal exclusion: {e}")
+        return False
+
+
+def legacy_pair_item(date_raw, ticker_raw, day_df, qual_lookup, strategy_def,
+                     swing_intraday_cache=None):
+    """Item ("arr", PairArrays) de un par servido como day_df (mes sin slab):
+    _preprocess_pair (exclusiones + swing + sort/dedup) y arrays float64.
+    None si el par se descarta."""
+    from app.services.backtest_signals import _preprocess_pair
+    pre = _preprocess_pair(date_raw, ticker_raw, day_df, qual_lookup, strategy_def,
+                           swing_intraday_cache or {})
+    if pre is None:
+        return None
+    p_date, p_ticker, p_df, p_stats = pre
+    ts_ns = pd.to_datetime(p_df["timestamp"]).values.astype("datetime64[ns]").astype(np.int64)
+    arrs = PairArrays(
+        ts_ns=ts_ns,
+        open_=np.asarray(p_df["open"], dtype=np.float64),
+        high=np.asarray(p_df["high"], dtype=np.float64),
+        low=np.asarray(p_df["low"], dtype=np.float64),
+        close=np.asarray(p_df["close"], dtype=np.float64),
+        volume=np.asarray(p_df["volume"], dtype=np.float64),
+    )
+    return p_date, p_ticker, p_stats, ("arr", arrs)
+
+
+def slab_pair_refs(qualifying_df, months) -> pd.DataFrame:
+    """Refs (date, ticker, kind, year, month, row_start, row_end, layout) de los
+    pares de qualifying presentes en los slabs de `months` — join vectorizado
+    contra el índice del mes, sin tocar los datos. `layout` es el del slab contra
+    el que valen los rangos (get_month_layout). Los meses sin slab no aportan
+    filas; los pares sin datos en el slab tampoco (como el merge+groupby legacy)."""
+    cols = ["date", "ticker", "kind", "year", "month", "row_start", "row_end", "layout"]
+    q_dates = pd.to_datetime(qualifying_df["date"])
+    parts = []
+    catalog = get_catalog()
+    if catalog is not None:
+        # Meses vigentes en el catálogo: un solo lookup vectorizado, sin abrir
+        # sus slabs; el resto sigue mes a mes.
+        current = [(y, m) for (y, m) in months if catalog.month_current(y, m) is not None]
+        if current:
+            mask = pd.Series(list(zip(q_dates.dt.year, q_dates.dt.month)),
+                             index=qualifying_df.index).isin(set(current))
+            vp = qualifying_df.loc[mask, ["ticker", "date"]].drop_duplicates().copy()
+            vp["ticker"] = vp["ticker"].astype(str)
+            vp["date"] = pd.to_datetime(vp["date"]).dt.strftime("%Y-%m-%d")
+            kinds, starts, ends = catalog.resolve(vp["ticker"].to_numpy(), vp["date"].to_numpy())
+            found = starts >= 0
+            if found.any():
+                hit = vp.loc[found].assign(row_start=starts[found], row_end=ends[found])
+                hit["kind"] = [k for k, f in zip(kinds, found) if f]
+                hit["year"] = hit["date"].str[:4].astype(int)
+                hit["month"] = hit["date"].str[5:7].astype(int)
+                layouts = {ym: catalog.month_layout(*ym) for ym in current}
+                hit["layout"] = [layouts[ym] for ym in zip(hit["year"], hit["month"])]
+                parts.append(hit[cols])
+            months = [ym for ym in months if ym not in set(current)]
+    for (y, m) in months:
+        slab = get_month_any_kind(y, m)
+        if slab is None:
+            continue
+        mask = (q_dates.dt.year == y) & (q_dates.dt.month == m)
+        vp = qualifying_df.loc[mask, ["ticker", "date"]].drop_duplicates().copy()
+        if vp.empty:
+            continue
+        vp["ticker"] = vp["ticker"].astype(str)
+        vp["date"] = pd.to_datetime(vp["date"]).dt.strftime("%Y-%m-%d")
+        starts, ends = slab.lookup_many(vp["ticker"].to_numpy(), vp["date"].to_numpy())
+        found = starts >= 0
+        if not found.any():
+            continue
+        hit = vp.loc[found].assign(row_start=starts[found], row_end=ends[found])
+        hit["kind"], hit["year"], hit["month"] = slab.kind, int(y), int(m)
+        hit["layout"] = slab.layout
+        parts.append(hit[cols])
+    if not parts:
+        return pd.DataFrame(columns=cols)
+    return pd.concat(parts, ignore_index=True)
 
 
 def months_spanned_by_qualifying(qualifying_df) -> list:
@@ -8,7 +8,7 @@ try:
 except ImportError:  # optional dep — the memory guard degrades to a no-op if absent
     psutil = None
 
-from fastapi import APIRouter, Header, HTTPException, Response, status
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
 from pydantic import BaseModel
 
 from app.services.data_service import fetch_day_candles
@@ -18,6 +18,7 @@ from app.services.backtest_orchestrator import (
     generate_mock_candles,
 )
 from app.services import backtest_jobs
+from app.services.trade_ledger import materialize_trades
 from app.services.montecarlo_service import run_montecarlo
 from app.services.what_if_service import run_what_if
 
@@ -156,7 +157,7 @@ def run_backtest_endpoint(
 
     # ── Retrocompat: X-Backtest-Sync: true → original blocking behaviour ──
     if x_backtest_sync and x_backtest_sync.strip().lower() == "true":
-        return run_backtest_orchestrator(req)
+        return materialize_trades(run_backtest_orchestrator(req))
 
     # ── Default: async job (202 + job_id) ──
     backtest_jobs.cleanup_old_results()
@@ -194,9 +195,8 @@ def get_backtest_job(job_id: str):
     }
 
 
-@router.get("/backtest/{job_id}/result")
-def get_backtest_job_result(job_id: str):
-    """Completed result WITHOUT equity_curves (served per-day via /equity)."""
+def _check_job_done(job_id: str):
+    """Terminal job states → HTTP errors; a running payload, or None when done."""
     state = backtest_jobs.get_job_state(job_id)
     if state is not None and state.get("status") in ("running", None):
         return {"status": "running", "percent": state.get("percent", 0.0)}
@@ -204,6 +204,15 @@ def get_backtest_job_result(job_id: str):
         raise HTTPException(status_code=500, detail=state.get("error") or "Backtest failed")
     if state is not None and state.get("status") == "cancelled":
         raise HTTPException(status_code=400, detail="Backtest cancelado")
+    return None
+
+
+@router.get("/backtest/{job_id}/result")
+def get_backtest_job_result(job_id: str):
+    """Completed result WITHOUT equity_curves (served per-day via /equity)."""
+    running = _check_job_done(job_id)
+    if running is not None:
+        return running
 
     result = backtest_jobs.load_job_result_light(job_id)
     if result is None:
@@ -211,6 +220,108 @@ def get_backtest_job_result(job_id: str):
     return result
 
 
+def _trade_filters(ticker, date, date_from, date_to, direction, exit_reason, status_):
+    return {"ticker": ticker, "date": date, "date_from": date_from, "date_to": date_to,
+            "direction": direction, "exit_reason": exit_reason, "status": status_}
+
+
+@router.get("/backtest/{job_id}/summary")
+def get_backtest_job_summary(job_id: str):
+    """First screen: aggregate metrics, global series and trade breakdowns
+    (no trades / day_results — those are paged via /trades and /days)."""
+    running = _check_job_done(job_id)
+    if running is not None:
+        return running
+    summary = backtest_jobs.job_result_summary(job_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return summary
+
+
+@router.get("/backtest/{job_id}/trades")
+def get_backtest_job_trades(
+    job_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    sort: str | None = None,
+    order: str = "asc",
+    ticker: str | None = None,
+    date: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    direction: str | None = None,
+    exit_reason: str | None = None,
+    status_: str | None = Query(default=None, alias="status"),
+):
+    """One sorted/filtered page of the trade ledger."""
+    running = _check_job_done(job_id)
+    if running is not None:
+        return running
+    try:
+        page = backtest_jobs.query_job_trades(
+            job_id, offset=offset, limit=limit, sort=sort, order=order,
+            **_trade_filters(ticker, date, date_from, date_to, direction, exit_reason, status_),
+        )
+    except backtest_jobs.ResultQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return page
+
+
+@router.get("/backtest/{job_id}/days")
+def get_backtest_job_days(
+    job_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    sort: str | None = None,
+    order: str = "asc",
+    ticker: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+):
+    """One sorted/filtered page of day_results."""
+    running = _check_job_done(job_id)
+    if running is not None:
+        return running
+    try:
+        page = backtest_jobs.query_job_days(
+            job_id, offset=offset, limit=limit, sort=sort, order=order,
+            ticker=ticker, date_from=date_from, date_to=date_to,
+        )
+    except backtest_jobs.ResultQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return page
+
+
+@router.get("/backtest/{job_id}/{table}.arrow")
+def get_backtest_job_table_arrow(
+    job_id: str,
+    table: str,
+    sort: str | None = None,
+    order: str = "asc",
+    ticker: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+):
+    """trades / days / global as an Arrow IPC stream (columnar, no JSON)."""
+    running = _check_job_done(job_id)
+    if running is not None:
+        raise HTTPException(status_code=409, detail="Backtest still running")
+    try:
+        blob = backtest_jobs.job_table_ipc(
+            job_id, table, sort=sort, order=order,
+            ticker=ticker, date_from=date_from, date_to=date_to,
+        )
+    except backtest_jobs.ResultQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return Response(content=blob, media_type="application/vnd.apache.arrow.stream")
+
+
 @router.get("/backtest/{job_id}/equity/{date}")
 def get_backtest_job_equity(job_id: str, date: str, ticker: str | None = None):
     """Equity curve for a single day, loaded on demand."""
@@ -1,8 +1,13 @@
+import os
+
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import Optional, List
 from pydantic import BaseModel
 from app.database import get_db_connection
 from app.auth import get_current_user_id, scope_clause
+from app.services.query_planner import (
+    DatePlan, daily_metrics_source, partition_predicate, rule_predicate,
+)
 # Lazy imports for memory optimization
 # from app.ingestion import ingest_history
 # from app.processor import get_dashboard_stats, get_aggregate_time_series
@@ -72,6 +77,9 @@ METRIC_MAP = {
     "Return M60 to Close %": "return_m60_to_close",
 }
 
+# /filter sólo acepta operadores SQL literales (no los alias de la UI)
+_FILTER_RULE_OPS = {"=", "!=", ">", ">=", "<", "<="}
+
 @router.post("/filter")
 def filter_daily_metrics(filters: FilterRequest):
     """
@@ -83,9 +91,17 @@ def filter_daily_metrics(filters: FilterRequest):
     
     con = None
     try:
+        try:
+            plan = DatePlan.inclusive(filters.date_from, filters.date_to)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         con = get_db_connection(read_only=True)
-        # Derive date from timestamp since daily_metrics has no date column
-        query = "SELECT *, CAST(timestamp AS VARCHAR)[:10] as date FROM daily_metrics WHERE 1=1"
+        # Derive date from timestamp since daily_metrics has no date column.
+        # Fechas como predicados tipados + meses explícitos (query_planner): el
+        # lake sólo lee las particiones de la ventana.
+        source = daily_metrics_source(con, plan)
+        query = f"SELECT *, CAST(timestamp AS VARCHAR)[:10] as date FROM {source} WHERE 1=1"
         params = []
         
         # 1. Handle Basic Filters (legacy support)
@@ -105,13 +121,14 @@ def filter_daily_metrics(filters: FilterRequest):
             query += " AND rth_volume >= ?"
             params.append(filters.min_rth_volume)
             
-        if filters.date_from:
-            query += " AND CAST(timestamp AS VARCHAR)[:10] >= ?"
-            params.append(filters.date_from)
-            
-        if filters.date_to:
-            query += " AND CAST(timestamp AS VARCHAR)[:10] <= ?"
-            params.append(filters.date_to)
+        date_clauses, date_params = plan.predicates("timestamp")
+        for clause in date_clauses:
+            query += f" AND {clause}"
+        params.extend(date_params)
+        if os.getenv("DB_PROVIDER", "motherduck").lower() == "gcs":
+            part = partition_predicate(plan)
+            if part:
+                query += f" AND {part}"
 
         # 1.1 Handle Extended Filters
         if filters.min_m15_ret_pct is not None:
@@ -152,25 +169,20 @@ def filter_daily_metrics(filters: FilterRequest):
                 if not col:
                     continue
                     
-                op = rule.operator
-                if op not in ["=", "!=", ">", ">=", "<", "<="]:
-                    continue
-                    
                 if rule.valueType == "static":
-                    try:
-                        val = float(rule.value)
-                        query += f" AND {col} {op} ?"
-                        params.append(val)
-                    except ValueError:
-                        if rule.value:
-                            query += f" AND {col} {op} ?"
-                            params.append(rule.value)
+                    pred = rule_predicate(col, rule.operator, rule.value,
+                                          allowed_ops=_FILTER_RULE_OPS)
                 elif rule.valueType == "variable":
                     target_col = METRIC_MAP.get(rule.value)
-                    if target_col:
-                        query += f" AND {col} {op} {target_col}"
-            
-        query += " ORDER BY CAST(timestamp AS VARCHAR)[:10] DESC"
+                    pred = rule_predicate(col, rule.operator, None, value_column=target_col,
+                                          allowed_ops=_FILTER_RULE_OPS) if target_col else None
+                else:
+                    pred = None
+                if pred:
+                    query += f" AND {pred[0]}"
+                    params.extend(pred[1])
+
+        query += " ORDER BY date_trunc('day', timestamp) DESC"
         
         df = con.execute(query, params).fetch_df()
         
@@ -181,8 +193,8 @@ def filter_daily_metrics(filters: FilterRequest):
         records = df.to_dict(orient="records")
         stats = get_dashboard_stats(df)
         
-        # Aggregate series for the chart (Limit to top results for performance)
-        ticker_date_pairs = df[['ticker', 'date']].head(50).to_dict(orient="records")
+        # Aggregate series for the chart (all pairs — curvas precalculadas en open_curves)
+        ticker_date_pairs = df[['ticker', 'date']].to_dict(orient="records")
         aggregate_series = get_aggregate_time_series(ticker_date_pairs)
         
         return {
@@ -190,6 +202,8 @@ def filter_daily_metrics(filters: FilterRequest):
             "stats": stats,
             "aggregate_series": aggregate_series
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Filter API Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -223,6 +223,13 @@ def _populate_dataset_pairs(query_id: str, filters: dict):
 
 @router.post("/", response_model=SavedQuery)
 def create_saved_query(query: SavedQuery, user_id: Optional[str] = Depends(get_current_user_id)):
+    # Fechas/reglas inválidas → 400 aquí, no un dataset en "error" desde el background
+    from app.services.query_service import build_screener_query
+    try:
+        build_screener_query(query.filters, limit=1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Phase A — check for existing query with same filters
     existing_id = None
     existing_name = None
@@ -4,11 +4,11 @@ import asyncio
 import logging
 import math
 import threading
-import time
 from datetime import datetime, timedelta
 
+from app.services import single_flight
+from app.services.live_screener_feed import live_screener_feed
 from app.services.live_screener_service import (
-    live_screener_service,
     VALID_TABS,
     TAB_GAINERS,
 )
@@ -53,6 +53,12 @@ def get_screener_daily(limit: int = 100):
             if now < expiry:
                 return cached_data
 
+    # N pestañas al abrir mercado con la caché expirada → un solo cálculo.
+    return single_flight.group("screener.daily").do(limit, lambda: _compute_screener_daily(limit))
+
+
+def _compute_screener_daily(limit: int):
+    now = datetime.now()
     con = None
     try:
         con = get_db_connection(read_only=True)
@@ -210,49 +216,43 @@ def get_screener_daily(limit: int = 100):
 # public API (api_public). The page itself is Admin-gated (LockedFeature).
 @router.websocket("/live")
 async def screener_live(websocket: WebSocket):
-    """Stream the top movers for the subscribed tab once per second.
+    """Stream the top movers of the subscribed tab as a versioned delta feed.
 
     Client → server: {"action": "subscribe", "tab": "RTH Gainers"}
-    Server → client: {"tab", "timestamp", "session", "ws_connected", "records": [...]}
+                     {"action": "resync"}   (version gap → fresh snapshot)
+    Server → client: a "snapshot" frame, then "delta" frames (inserts, updates,
+    removes, reorder) — see app.services.live_screener_feed for the format.
     """
     await websocket.accept()
-    state = {"tab": TAB_GAINERS}
-    tab_changed = asyncio.Event()
+    live_screener_feed.ensure_running()
+    sub = live_screener_feed.subscribe(TAB_GAINERS)
 
     async def receiver():
-        # Listen for tab switches; on any error, unblock the sender so it can
-        # notice the disconnect and tear down cleanly.
+        # Listen for tab switches / resync requests; on any error, close the
+        # subscription so the sender notices the disconnect and tears down.
         try:
             while True:
                 msg = await websocket.receive_json()
-                if isinstance(msg, dict) and msg.get("action") == "subscribe":
-                    tab = msg.get("tab")
-                    if tab in VALID_TABS:
-                        state["tab"] = tab
-                        tab_changed.set()
+                if not isinstance(msg, dict):
+                    continue
+                if msg.get("action") == "subscribe" and msg.get("tab") in VALID_TABS:
+                    live_screener_feed.switch(sub, msg["tab"])
+                elif msg.get("action") == "resync":
+                    sub.resync()
         except Exception:
-            tab_changed.set()
+            sub.close()
 
     recv_task = asyncio.create_task(receiver())
     try:
         while True:
-            tab = state["tab"]
-            await websocket.send_json({
-                "tab": tab,
-                "timestamp": int(time.time()),
-                "session": live_screener_service.session,
-                "ws_connected": live_screener_service.ws_connected,
-                "records": live_screener_service.get_top(tab),
-            })
-            # Re-emit every second, or immediately when the client switches tab.
-            try:
-                await asyncio.wait_for(tab_changed.wait(), timeout=1.0)
-                tab_changed.clear()
-            except asyncio.TimeoutError:
-                pass
+            frame = await sub.next_frame()
+            if frame is None:
+                break
+            await websocket.send_text(frame)  # pre-serialized, shared per tab
     except WebSocketDisconnect:
         pass
     except Exception as e:  # noqa: BLE001
         logger.debug("[LIVE] ws client error: %s", e)
     finally:
+        live_screener_feed.unsubscribe(sub)
         recv_task.cancel()
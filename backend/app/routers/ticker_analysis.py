@@ -10,7 +10,7 @@ from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from app.database import get_db_connection
 from app.redis_client import get_redis
-from app.services import massive_service, edgar_service, finviz_service
+from app.services import massive_service, edgar_service, finviz_service, single_flight
 
 router = APIRouter(
     prefix="/api/ticker-analysis",
@@ -237,14 +237,26 @@ def _swr_cache(ticker: str, endpoint: str, ttl: timedelta, fetch_fn,
             _BG_EXECUTOR.submit(_fetch_bg)
         return dict(_GAP_STATS_PLACEHOLDER)
     else:
-        # Primera visita síncrona: con fuentes API el frío es < 1,5 s.
-        t0 = time.time()
-        payload = fetch_fn()
-        valid = _is_valid(payload)
-        if valid:
-            _store(payload)
-        _log_fetch(endpoint, ticker, t0, valid, "first-sync")
-        return payload
+        # Primera visita síncrona: con fuentes API el frío es < 1,5 s. Single-
+        # flight: N pestañas con el mismo ticker frío → un solo fetch.
+        def _first_sync():
+            t0 = time.time()
+            payload = fetch_fn()
+            valid = _is_valid(payload)
+            if valid:
+                _store(payload)
+            _log_fetch(endpoint, ticker, t0, valid, "first-sync")
+            return payload
+
+        def _recheck():
+            hit = _read()
+            if hit is None:
+                return None
+            parsed = _json.loads(hit[0]) if isinstance(hit[0], str) else hit[0]
+            return parsed if _is_valid(parsed) else None
+
+        return single_flight.group("ticker_analysis.swr").do(
+            (ticker, endpoint), _first_sync, recheck=_recheck)
 
 def safe_float(val):
     try:
@@ -480,7 +492,8 @@ def compute_price_change_chart(ticker: str, dates: list) -> list:
             dm_clauses.append(f"(year = {y} AND month = {m} AND CAST(timestamp AS DATE) IN ({date_list_str}))")
         dm_filter = " OR ".join(dm_clauses)
         
-        if provider == "gcs":
+        from app.db.daily_replica import is_attached
+        if provider == "gcs" and not is_attached(con):
             bucket = os.getenv("GCS_BUCKET", "strategybuilderbbdd")
             dm_paths = [f"gs://{bucket}/cold_storage/daily_metrics/year={y}/month={m}/*.parquet" for y, m in ym_dates.keys()]
             dm_query = f"""
@@ -505,56 +518,155 @@ def compute_price_change_chart(ticker: str, dates: list) -> list:
     return compute_price_change_chart_from_df(df, rth_opens, dates)
 
 
+def _empty_gap_stats(source: str) -> dict:
+    return {
+        "source": source,
+        "gap_days_count": 0,
+        "high_rth_spike_avg": None,
+        "low_rth_spike_avg": None,
+        "pm_fade_avg": None,
+        "rthh_fade_avg": None,
+        "neg_close_freq": None,
+        "close_above_pmh_freq": None,
+        "close_below_vwap_freq": None,
+        "price_change_chart": []
+    }
+
+
+def _runner_stats(sub_df: pd.DataFrame, chart_data: list) -> dict:
+    """Spikes/fades/frecuencias de las filas de un offset (day 0/+1/+2)."""
+    has_rth = all(col in sub_df.columns for col in ['rth_open', 'rth_high', 'rth_low', 'rth_close'])
+    if has_rth:
+        o = sub_df['rth_open']
+        h = sub_df['rth_high']
+        l = sub_df['rth_low']
+        c = sub_df['rth_close']
+    else:
+        o = sub_df['open']
+        h = sub_df['high']
+        l = sub_df['low']
+        c = sub_df['close']
+
+    high_spike = (h - o) / o * 100
+    low_spike = (o - l) / o * 100
+    rthh_fade = (h - c) / h * 100
+    neg_close = (c < o).astype(float) * 100
+
+    mid_point = (h + l) / 2.0
+    close_below_vwap = (c < mid_point).astype(float) * 100
+
+    pm_fade = None
+    close_above_pmh = None
+
+    if 'pm_high' in sub_df.columns:
+        pm_h = sub_df['pm_high']
+        pm_fade = (pm_h - o) / pm_h * 100
+        pm_fade = pm_fade.mask(pm_h <= 0, None)
+
+        close_above_pmh = (c > pm_h).astype(float) * 100
+        close_above_pmh = close_above_pmh.mask(pm_h <= 0, None)
+
+    def safe_mean(s):
+        if s is None or s.empty:
+            return None
+        val = s.mean()
+        return float(val) if not pd.isna(val) else None
+
+    return {
+        "source": "database" if has_rth else "massive",
+        "gap_days_count": len(sub_df),
+        "high_rth_spike_avg": safe_mean(high_spike),
+        "low_rth_spike_avg": safe_mean(low_spike),
+        "pm_fade_avg": safe_mean(pm_fade),
+        "rthh_fade_avg": safe_mean(rthh_fade),
+        "neg_close_freq": safe_mean(neg_close),
+        "close_above_pmh_freq": safe_mean(close_above_pmh),
+        "close_below_vwap_freq": safe_mean(close_below_vwap),
+        "price_change_chart": chart_data
+    }
+
+
+# Fechas más recientes por offset que alimentan el chart 15-min (ver abajo).
+CHART_MAX_DATES = 24
+
+
+def _gap_stats_from_store(ticker: str, include_chart: bool) -> dict | None:
+    """Runner stats desde el store precalculado (app.db.gap_stats_store): una
+    lectura por ticker, sin hot cache ni intradía. None → cálculo por petición
+    (store desactivado/ausente, ticker sin gaps, o chart pedido con caminos sin
+    slab)."""
+    from app.db import gap_stats_store
+
+    rows = gap_stats_store.read_gap_days(ticker)
+    if rows is None:
+        return None
+    results = {}
+    for offset in [0, 1, 2]:
+        key = f"gap_stats{'' if offset == 0 else f'_plus_{offset}'}"
+        sub_df = rows[rows["day_offset"] == offset]
+        if sub_df.empty:
+            results[key] = _empty_gap_stats("database")
+            continue
+        chart_data = []
+        if include_chart:
+            recent = sub_df.tail(CHART_MAX_DATES)
+            if recent["path_n"].isna().any():
+                return None
+            chart_data = gap_stats_store.chart_from_paths(recent["path_sum"].tolist(),
+                                                          recent["path_n"].tolist())
+        results[key] = _runner_stats(sub_df, chart_data)
+    sub0 = rows[rows["day_offset"] == 0]
+    results["gap_dates"] = pd.to_datetime(sub0["gap_date"]).dt.strftime('%Y-%m-%d').tolist()
+    return results
+
+
 def get_gap_stats_all_days(ticker: str, include_chart: bool = True) -> dict:
     """Runner stats por offset. Con include_chart=False se salta la lectura
     intradía de GCS (la parte de 30-80 s en fríos): los promedios/frecuencias
     salen íntegros del hot cache diario en RAM en <1 s. El chart 15-min
-    (price_change_chart) queda [] y lo aporta la pasada completa."""
+    (price_change_chart) queda [] y lo aporta la pasada completa.
+
+    Con el store de gap days (BTT_GAP_STATS_ENABLED) todo sale de una lectura
+    por ticker; lo de abajo queda como fallback."""
     ticker = ticker.upper()
+    stored = _gap_stats_from_store(ticker, include_chart)
+    if stored is not None:
+        return stored
     df = pd.DataFrame()
 
     # NO abrir la conexión aquí: get_db_connection() es thread-local y, en un
     # thread NUEVO del executor de background + modo GCS, establecerla cuesta
     # ~7 s (attach de las views de parquet de GCS + credenciales). Como casi
     # todos los tickers del screener están en el hot cache diario en RAM, la
-    # conexión se abre PEREZOSAMENTE, solo si hace falta el fallback a
-    # daily_metrics. (Era EL cuello de los runner stats: ~7 s por click frío.)
+    # conexión se abre PEREZOSAMENTE, solo si el ticker tiene runner days y
+    # hay que leer su historia de daily_metrics. (Era EL cuello de los runner
+    # stats: ~7 s por click frío.)
     provider = os.getenv("DB_PROVIDER", "motherduck").lower()
     
-    # 1. Try to query database daily_metrics using in-memory cache directly
+    # 1. Hot cache diario en RAM: sólo decide si el ticker tiene runner days.
+    # Guarda únicamente filas con gap >= 10, así que los offsets +1/+2 NO son
+    # sus filas siguientes: con gaps se lee la historia diaria completa del
+    # ticker abajo (misma semántica que _SOURCE_SQL del store de gap days).
     try:
         from app.services.cache_service import get_hot_daily_cache
         cache_df = get_hot_daily_cache()
         if cache_df is not None and not cache_df.empty:
-            df = cache_df[cache_df['ticker'] == ticker].copy()
-            if df.empty:
-                # Fallback to check if ticker has gap days at all in hot cache to exit early
-                ticker_cache = cache_df[(cache_df['ticker'] == ticker) & (cache_df['pmh_gap_pct'] >= 20.0)]
-                if ticker_cache.empty:
-                    empty_stats = {
-                        "source": "database",
-                        "gap_days_count": 0,
-                        "high_rth_spike_avg": None,
-                        "low_rth_spike_avg": None,
-                        "pm_fade_avg": None,
-                        "rthh_fade_avg": None,
-                        "neg_close_freq": None,
-                        "close_above_pmh_freq": None,
-                        "close_below_vwap_freq": None,
-                        "price_change_chart": []
-                    }
-                    return {
-                        "gap_stats": empty_stats,
-                        "gap_stats_plus_1": empty_stats,
-                        "gap_stats_plus_2": empty_stats
-                    }
+            hot = cache_df[cache_df['ticker'] == ticker]
+            if hot.empty or ('pmh_gap_pct' in hot.columns and not (hot['pmh_gap_pct'] >= 20.0).any()):
+                empty_stats = _empty_gap_stats("database")
+                return {
+                    "gap_stats": empty_stats,
+                    "gap_stats_plus_1": empty_stats,
+                    "gap_stats_plus_2": empty_stats,
+                    "gap_dates": [],
+                }
     except Exception as e:
         print(f"Error querying optimized daily_metrics from hot cache for {ticker}: {e}")
         
-    # Fallback to unpruned database query if empty or error occurred
+    # Historia diaria completa del ticker (los offsets +1/+2 son sus filas siguientes)
     if df.empty:
         try:
-            con = get_db_connection()  # lazy: solo si el hot cache no cubrió el ticker
+            con = get_db_connection()  # lazy: solo si el ticker tiene runner days
             query = "SELECT * FROM daily_metrics WHERE ticker = ? ORDER BY timestamp ASC"
             df = con.execute(query, [ticker]).fetchdf()
         except Exception as e:
@@ -616,8 +728,7 @@ def get_gap_stats_all_days(ticker: str, include_chart: bool = True) -> dict:
     # las N fechas MÁS RECIENTES por offset: es un promedio, 24 muestras bastan,
     # y evita pedir/parsear cientos de fechas (MULN: 159 fechas / 127k barras
     # con iterrows = ~3 s; con 24 baja a ~1 s). Cambia solo cuántas fechas
-    # alimentan el chart, no las estadísticas.
-    CHART_MAX_DATES = 24
+    # alimentan el chart, no las estadísticas (CHART_MAX_DATES).
     recent_gap_indices = gap_indices
     recent_target_dates_map = {}
 
@@ -713,76 +824,17 @@ def get_gap_stats_all_days(ticker: str, include_chart: bool = True) -> dict:
         o_data = offset_data[offset]
         sub_df = o_data["sub_df"]
         recent_target_dates = recent_target_dates_map[offset]
-        
+        key = f"gap_stats{'' if offset == 0 else f'_plus_{offset}'}"
+
         if sub_df.empty:
-            results[f"gap_stats{'' if offset == 0 else f'_plus_{offset}'}"] = {
-                "source": "database" if 'pmh_gap_pct' in df.columns else "massive",
-                "gap_days_count": 0,
-                "high_rth_spike_avg": None,
-                "low_rth_spike_avg": None,
-                "pm_fade_avg": None,
-                "rthh_fade_avg": None,
-                "neg_close_freq": None,
-                "close_above_pmh_freq": None,
-                "close_below_vwap_freq": None,
-                "price_change_chart": []
-            }
+            results[key] = _empty_gap_stats("database" if 'pmh_gap_pct' in df.columns else "massive")
             continue
-            
-        has_rth = all(col in sub_df.columns for col in ['rth_open', 'rth_high', 'rth_low', 'rth_close'])
-        if has_rth:
-            o = sub_df['rth_open']
-            h = sub_df['rth_high']
-            l = sub_df['rth_low']
-            c = sub_df['rth_close']
-        else:
-            o = sub_df['open']
-            h = sub_df['high']
-            l = sub_df['low']
-            c = sub_df['close']
-            
-        high_spike = (h - o) / o * 100
-        low_spike = (o - l) / o * 100
-        rthh_fade = (h - c) / h * 100
-        neg_close = (c < o).astype(float) * 100
-        
-        mid_point = (h + l) / 2.0
-        close_below_vwap = (c < mid_point).astype(float) * 100
-        
-        pm_fade = None
-        close_above_pmh = None
-        
-        if 'pm_high' in sub_df.columns:
-            pm_h = sub_df['pm_high']
-            pm_fade = (pm_h - o) / pm_h * 100
-            pm_fade = pm_fade.mask(pm_h <= 0, None)
-            
-            close_above_pmh = (c > pm_h).astype(float) * 100
-            close_above_pmh = close_above_pmh.mask(pm_h <= 0, None)
-            
+
         chart_data = (
             compute_price_change_chart_from_df(intraday_df, rth_opens_map, recent_target_dates)
             if include_chart else []
         )
-            
-        def safe_mean(s):
-            if s is None or s.empty:
-                return None
-            val = s.mean()
-            return float(val) if not pd.isna(val) else None
-
-        results[f"gap_stats{'' if offset == 0 else f'_plus_{offset}'}"] = {
-            "source": "database" if has_rth else "massive",
-            "gap_days_count": len(sub_df),
-            "high_rth_spike_avg": safe_mean(high_spike),
-            "low_rth_spike_avg": safe_mean(low_spike),
-            "pm_fade_avg": safe_mean(pm_fade),
-            "rthh_fade_avg": safe_mean(rthh_fade),
-            "neg_close_freq": safe_mean(neg_close),
-            "close_above_pmh_freq": safe_mean(close_above_pmh),
-            "close_below_vwap_freq": safe_mean(close_below_vwap),
-            "price_change_chart": chart_data
-        }
+        results[key] = _runner_stats(sub_df, chart_data)
 
     # gap_dates = TODAS las fechas de gap (offset 0), independiente del recorte
     # del chart, para no cambiar el dato que consume TickerAnalysis ni la
@@ -2025,12 +2077,16 @@ def _fetch_form345_rows(cik: str, filing: dict) -> list:
     with _form345_rows_lock:
         if accession in _form345_rows_cache:
             return _form345_rows_cache[accession]
-    xml_text = edgar_service.fetch_ownership_xml(cik, accession, filing.get("primary_document"))
-    rows = parse_form345_xml(xml_text) if xml_text else []
-    if xml_text:
-        with _form345_rows_lock:
-            _form345_rows_cache[accession] = rows
-    return rows
+
+    def _fetch():
+        xml_text = edgar_service.fetch_ownership_xml(cik, accession, filing.get("primary_document"))
+        rows = parse_form345_xml(xml_text) if xml_text else []
+        if xml_text:
+            with _form345_rows_lock:
+                _form345_rows_cache[accession] = rows
+        return rows
+
+    return single_flight.group("ticker_analysis.form345").do(accession, _fetch)
 
 
 def get_insider_activity(ticker: str, max_filings: int = 12) -> list:
@@ -16,16 +16,30 @@ Two concerns, deliberately split so the heavy payload never touches Redis:
    read when a day is actually clicked:
      - ``{job_id}.result`` → the full result WITHOUT ``equity_curves``
      - ``{job_id}.equity`` → ``{"TICKER|DATE": [equity points]}``
-   Serialized with msgpack when available (more compact), falling back to JSON.
-   Files older than the TTL are swept at the start of every new run.
+     - ``{job_id}.trades.arrow`` → the trade ledger (Arrow IPC, columnar);
+       dicts are only built on load.
+     - ``{job_id}.days.arrow`` → ``day_results`` as an Arrow table.
+     - ``{job_id}.global.arrow`` → global equity / drawdown / equity net of
+       expenses (one row per day).
+   The small part is serialized with msgpack when available (more compact),
+   falling back to JSON. Files older than the TTL are swept at the start of
+   every new run.
+
+3. **Result queries** (``query_job_trades`` / ``query_job_days`` /
+   ``job_result_summary`` / ``job_table_ipc``): sorted + filtered pages, an
+   Arrow IPC stream and server-side breakdowns read straight from the Arrow
+   tables, so the UI never has to download the full ledger to render the
+   first screen. ``load_job_result_light`` still rebuilds the legacy payload.
 """
 
 import json
+import logging
 import os
 import time
 import uuid
 
 from app.redis_client import get_redis
+from app.services.trade_ledger import TradeLedger
 
 # msgpack is optional: if it isn't installed we fall back to JSON so the feature
 # works even before the image is rebuilt with the new dependency.
@@ -35,6 +49,8 @@ except Exception:  # pragma: no cover
     msgpack = None
 
 
+logger = logging.getLogger("backtester.backtest_jobs")
+
 JOB_TTL_S = int(os.getenv("BACKTEST_JOB_TTL", "3600"))
 RESULTS_DIR = os.getenv("BTT_JOB_RESULTS_DIR", "/tmp/btt_job_results")
 
@@ -52,6 +68,8 @@ _MEM_DATASET: dict = {}
 def _default(o):
     # Last-resort coercion for anything sanitize_floats() didn't already flatten
     # (e.g. a stray numpy scalar). Booleans/ints/floats/str/None pass through.
+    if isinstance(o, TradeLedger):
+        return o.to_dicts()
     try:
         return o.item()  # numpy scalar → python scalar
     except Exception:
@@ -83,6 +101,34 @@ def _equity_path(job_id: str) -> str:
     return os.path.join(RESULTS_DIR, f"{job_id}.equity")
 
 
+def _trades_path(job_id: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{job_id}.trades.arrow")
+
+
+def _days_path(job_id: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{job_id}.days.arrow")
+
+
+def _global_path(job_id: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{job_id}.global.arrow")
+
+
+def _write_table(path: str, table) -> None:
+    import pyarrow as pa
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path: str):
+    """Arrow table from an IPC file (mmap), or None if absent."""
+    if not os.path.exists(path):
+        return None
+    import pyarrow as pa
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
 # ──────────────────────────────────────────────────────────────────────────
 # Job id / state
 # ──────────────────────────────────────────────────────────────────────────
@@ -196,6 +242,27 @@ def save_job_result(job_id: str, result: dict):
             continue
 
     light = {k: v for k, v in result.items() if k != "equity_curves"}
+    trades = light.get("trades")
+    if not isinstance(trades, TradeLedger) and isinstance(trades, list):
+        try:
+            trades = TradeLedger.from_dicts(trades).sanitized()
+        except Exception as e:
+            logger.warning(f"[JOB] {job_id}: trades no convertibles a Arrow ({e}); quedan en .result")
+            trades = None
+    if isinstance(trades, TradeLedger):
+        # columnar: el ledger va a su propio fichero Arrow, sin pasar por dicts
+        _write_table(_trades_path(job_id), trades.to_arrow())
+        light["trades"] = None
+
+    days_table = _day_results_table(light.get("day_results"))
+    if days_table is not None:
+        _write_table(_days_path(job_id), days_table)
+        light["day_results"] = None
+    global_table = _global_series_table(light)
+    if global_table is not None:
+        _write_table(_global_path(job_id), global_table)
+        for key in _GLOBAL_SERIES:
+            light[key] = None
 
     with open(_result_path(job_id), "wb") as f:
         f.write(_dumps(light))
@@ -219,9 +286,301 @@ def load_job_result_light(job_id: str):
         light = _loads(f.read())
     if isinstance(light, dict):
         light["equity_curves"] = []  # explicit: lazy-loaded per day
+        if light.get("trades") is None:
+            ledger = load_job_trades(job_id)
+            light["trades"] = ledger.sanitized().to_dicts() if ledger is not None else []
+        if light.get("day_results") is None:
+            days = _read_table(_days_path(job_id))
+            light["day_results"] = days.to_pylist() if days is not None else []
+        _restore_global_series(job_id, light)
     return light
 
 
+def load_job_trades(job_id: str):
+    """Trade ledger persisted columnar for a job (TradeLedger), or None."""
+    table = _read_table(_trades_path(job_id))
+    return TradeLedger.from_arrow(table) if table is not None else None
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Arrow tables: day_results + global series
+# ──────────────────────────────────────────────────────────────────────────
+# Series globales [{"time", "value"}] que comparten eje temporal (1 fila/día).
+_GLOBAL_SERIES = ("global_equity", "global_drawdown", "global_equity_expenses")
+
+
+# Tipos fijos de las stats por día (_extract_day_stats_from_values): sin ellos
+# la inferencia deja en float64 una columna int si algún día trae 0.0, o en
+# int64 una float si el primer día sin trades trae 0.
+_DAY_FIELD_TYPES = {"ticker": "string", "date": "string", "total_trades": "int64"}
+_DAY_FLOAT_FIELDS = (
+    "total_return_pct", "max_drawdown_pct", "win_rate_pct", "profit_factor", "sharpe_ratio",
+    "sortino_ratio", "expectancy", "best_trade_pct", "worst_trade_pct", "init_value",
+    "end_value", "gap_pct",
+)
+
+
+def _day_results_table(day_results):
+    """day_results → Arrow table, or None to keep them inline in .result.
+
+    Columnas = unión de claves de todas las filas (no sólo la primera, que es
+    lo que mira ``pa.Table.from_pylist``), con tipo fijo para las stats
+    conocidas; el resto se infiere sobre la columna entera. Si alguna fila no
+    trae todas las claves se quedan inline: al volver saldría con la clave a
+    None, no idéntica al dict original. Los 0 enteros de días sin trades en
+    columnas float vuelven como 0.0 — inocuo para JSON."""
+    if not isinstance(day_results, list):
+        return None
+    import pyarrow as pa
+    keys: dict = {}
+    for row in day_results:
+        if not isinstance(row, dict):
+            return None
+        keys.update(dict.fromkeys(row))
+    if any(len(row) != len(keys) for row in day_results):
+        logger.warning("[JOB] day_results con claves heterogéneas; quedan en .result")
+        return None
+    try:
+        arrays = []
+        for k in keys:
+            values = [row[k] for row in day_results]
+            if k in _DAY_FIELD_TYPES:
+                arrays.append(pa.array(values, type=getattr(pa, _DAY_FIELD_TYPES[k])()))
+            elif k in _DAY_FLOAT_FIELDS:
+                arrays.append(pa.array(values, type=pa.float64()))
+            else:
+                arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=list(keys))
+    except Exception as e:
+        logger.warning(f"[JOB] day_results no convertibles a Arrow ({e}); quedan en .result")
+        return None
+
+
+def _global_series_table(light: dict):
+    import pyarrow as pa
+    series = {k: light.get(k) for k in _GLOBAL_SERIES}
+    if not all(isinstance(v, list) for v in series.values()):
+        return None
+    base = series["global_equity"]
+    times = [p.get("time") for p in base]
+    for points in series.values():
+        if len(points) != len(base) or any(p.get("time") != t for p, t in zip(points, times)):
+            return None
+    try:
+        return pa.table({
+            "time": pa.array(times, type=pa.int64()),
+            **{k: pa.array([p.get("value") for p in v], type=pa.float64()) for k, v in series.items()},
+        })
+    except Exception:
+        return None
+
+
+def _restore_global_series(job_id: str, payload: dict) -> None:
+    """Rellena las series globales que save_job_result sacó a .global.arrow."""
+    if not any(k in payload and payload[k] is None for k in _GLOBAL_SERIES):
+        return
+    table = _read_table(_global_path(job_id))
+    times = table.column("time").to_pylist() if table is not None else []
+    for k in _GLOBAL_SERIES:
+        values = table.column(k).to_pylist() if table is not None else []
+        payload[k] = [{"time": t, "value": v} for t, v in zip(times, values)]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Result queries (pages / Arrow stream / aggregates)
+# ──────────────────────────────────────────────────────────────────────────
+MAX_PAGE_LIMIT = int(os.getenv("BACKTEST_RESULT_MAX_PAGE", "1000"))
+
+
+class ResultQueryError(ValueError):
+    """Parámetros de consulta inválidos (columna de orden/filtro desconocida)."""
+
+
+def _job_trades_table(job_id: str):
+    table = _read_table(_trades_path(job_id))
+    if table is not None:
+        return table
+    # jobs anteriores al formato columnar: los trades siguen inline en .result
+    light = _read_light(job_id)
+    if light is None or not isinstance(light.get("trades"), list):
+        return None
+    return TradeLedger.from_dicts(light["trades"]).to_arrow()
+
+
+def _job_days_table(job_id: str):
+    table = _read_table(_days_path(job_id))
+    if table is not None:
+        return table
+    light = _read_light(job_id)
+    if light is None or not isinstance(light.get("day_results"), list):
+        return None
+    return _day_results_table(light["day_results"])
+
+
+def _read_light(job_id: str):
+    path = _result_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        light = _loads(f.read())
+    return light if isinstance(light, dict) else None
+
+
+def _filter_table(table, filters: dict):
+    """Filtros de igualdad (valor o lista de valores) + rango date_from/date_to."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    mask = None
+    for key, value in (filters or {}).items():
+        if value is None or value == [] or value == "":
+            continue
+        if key in ("date_from", "date_to"):
+            col = "date"
+        else:
+            col = key
+        if col not in table.column_names:
+            raise ResultQueryError(f"Unknown filter column: {key}")
+        column = table.column(col)
+        try:
+            if key == "date_from":
+                cond = pc.greater_equal(column, str(value))
+            elif key == "date_to":
+                cond = pc.less_equal(column, str(value))
+            elif isinstance(value, (list, tuple, set)):
+                cond = pc.is_in(column, value_set=pa.array(list(value)).cast(column.type))
+            else:
+                cond = pc.equal(column, pa.scalar(value).cast(column.type))
+        except pa.ArrowException as e:
+            raise ResultQueryError(f"Invalid filter {key}={value!r}: {e}") from e
+        cond = pc.fill_null(cond, False)
+        mask = cond if mask is None else pc.and_(mask, cond)
+    return table if mask is None else table.filter(mask)
+
+
+def _sort_table(table, sort: str | None, order: str = "asc"):
+    """Orden estable por una columna (empates conservan el orden original)."""
+    if not sort:
+        return table
+    if sort not in table.column_names:
+        raise ResultQueryError(f"Unknown sort column: {sort}")
+    if order not in ("asc", "desc"):
+        raise ResultQueryError(f"Invalid sort order: {order}")
+    import pyarrow.compute as pc
+    # nulos al final (default de Arrow) en ambos sentidos
+    idx = pc.sort_indices(table, sort_keys=[(sort, "ascending" if order == "asc" else "descending")])
+    return table.take(idx)
+
+
+def _page(table, offset: int, limit: int):
+    offset = max(0, int(offset or 0))
+    limit = max(1, min(int(limit or MAX_PAGE_LIMIT), MAX_PAGE_LIMIT))
+    return table.slice(offset, limit), offset, limit
+
+
+def _page_payload(items, total, offset, limit, sort, order) -> dict:
+    return {
+        "items": items,
+        "page": {
+            "offset": offset, "limit": limit, "returned": len(items), "total": total,
+            "next_offset": offset + len(items) if offset + len(items) < total else None,
+            "sort": sort, "order": order,
+        },
+    }
+
+
+def query_job_trades(job_id: str, offset: int = 0, limit: int = 100,
+                     sort: str | None = None, order: str = "asc", **filters):
+    """Página de trades (dicts idénticos a /result) ordenada y filtrada, o None."""
+    table = _job_trades_table(job_id)
+    if table is None:
+        return None
+    table = _sort_table(_filter_table(table, filters), sort, order)
+    page, offset, limit = _page(table, offset, limit)
+    items = TradeLedger.from_arrow(page).sanitized().to_dicts()
+    return _page_payload(items, table.num_rows, offset, limit, sort, order)
+
+
+def query_job_days(job_id: str, offset: int = 0, limit: int = 100,
+                   sort: str | None = None, order: str = "asc", **filters):
+    """Página de day_results ordenada y filtrada, o None."""
+    table = _job_days_table(job_id)
+    if table is None:
+        return None
+    table = _sort_table(_filter_table(table, filters), sort, order)
+    page, offset, limit = _page(table, offset, limit)
+    return _page_payload(page.to_pylist(), table.num_rows, offset, limit, sort, order)
+
+
+def job_table_ipc(job_id: str, name: str, sort: str | None = None, order: str = "asc",
+                  **filters) -> bytes | None:
+    """Tabla completa (filtrada/ordenada) como Arrow IPC stream."""
+    import pyarrow as pa
+    if name == "trades":
+        table = _job_trades_table(job_id)
+    elif name == "days":
+        table = _job_days_table(job_id)
+    elif name == "global":
+        table = _read_table(_global_path(job_id))
+    else:
+        raise ResultQueryError(f"Unknown table: {name}")
+    if table is None:
+        return None
+    table = _sort_table(_filter_table(table, filters), sort, order)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _breakdown(table, key: str) -> list[dict]:
+    """Trades / pnl / ganadores agrupados por clave (orden de clave), con
+    group_by de Arrow sobre la tabla: sin pasar el ledger a numpy ni a dicts."""
+    if table.num_rows == 0:
+        return []
+    grouped = (table.group_by(key)
+               .aggregate([("pnl", "count"), ("pnl", "sum"), ("win", "sum")])
+               .sort_by([(key, "ascending")]))
+    return [
+        {"key": k, "trades": int(c), "pnl": round(float(p or 0.0), 2), "wins": int(w or 0)}
+        for k, c, p, w in zip(*(grouped.column(n).to_pylist()
+                                for n in (key, "pnl_count", "pnl_sum", "win_sum")))
+    ]
+
+
+_BREAKDOWN_KEYS = ("exit_reason", "direction", "entry_hour", "entry_weekday", "ticker")
+
+
+def job_result_summary(job_id: str):
+    """Todo lo que necesita la primera pantalla sin trades ni day_results:
+    métricas agregadas, series globales, conteos y desgloses de trades por
+    exit_reason / direction / hora / día de la semana / ticker."""
+    light = _read_light(job_id)
+    if light is None:
+        return None
+    summary = {k: v for k, v in light.items() if k not in ("trades", "day_results")}
+    summary["equity_curves"] = []
+    _restore_global_series(job_id, summary)
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    table = _job_trades_table(job_id)
+    if table is None:
+        table = TradeLedger().to_arrow()
+    # sólo las columnas de los desgloses; pnl NaN cuenta como 0 y no gana
+    pnl = pc.cast(table.column("pnl"), pa.float64())
+    pnl = pc.if_else(pc.is_nan(pnl), 0.0, pnl)
+    slim = pa.table({**{k: table.column(k) for k in _BREAKDOWN_KEYS},
+                     "pnl": pnl, "win": pc.cast(pc.greater(pnl, 0.0), pa.int64())})
+    days = _job_days_table(job_id)
+    summary["counts"] = {
+        "trades": table.num_rows,
+        "days": days.num_rows if days is not None else 0,
+        "tickers": pc.count_distinct(table.column("ticker")).as_py() if table.num_rows else 0,
+    }
+    summary["breakdowns"] = {name: _breakdown(slim, name) for name in _BREAKDOWN_KEYS}
+    return summary
+
+
 def load_job_equity(job_id: str, date: str, ticker: str | None = None):
     """Return the equity points for one day, or None if absent."""
     path = _equity_path(job_id)
@@ -15,6 +15,7 @@ from app.services.data_service import (
     _resolve_filters,
 )
 from app.services.backtest_service import run_backtest
+from app.services.trade_ledger import TradeLedger
 
 logger = logging.getLogger("backtester.orchestrator")
 
@@ -81,6 +82,9 @@ def generate_mock_candles(ticker: str, date: str) -> dict:
 
 def sanitize_floats(obj):
     import math
+    if isinstance(obj, TradeLedger):
+        # sigue columnar: NaN/inf → None al materializar (frontera HTTP)
+        return obj.sanitized()
     if isinstance(obj, dict):
         return {k: sanitize_floats(v) for k, v in obj.items()}
     elif isinstance(obj, list):
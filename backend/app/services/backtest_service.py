@@ -21,6 +21,7 @@ from app.services.strategy_engine import translate_strategy, _parse_risk_managem
 # Dispatcher (PRD rendimiento-backtester 03.9): portfolio_sim.py queda intacto como
 # especificación/fallback; BACKTEST_NUMBA_SIM=1 activa el kernel Numba equivalente.
 from app.services.sim_dispatch import simulate
+from app.services.trade_ledger import TradeLedger, enrich_trade_columns, trade_column
 from app.backtester.engine import find_elapsed_time_minutes, find_elapsed_time_condition
 
 logger = logging.getLogger("backtester.engine")
@@ -87,6 +88,7 @@ def run_backtest(
     monthly_expenses: float = 0.0,
     _signal_cache: dict | None = None,
     progress_callback=None,
+    day_slab_items=None,
 ) -> dict:
     if strategy_def:
         rm = strategy_def.get("risk_management", {})
@@ -96,11 +98,12 @@ def run_backtest(
     t_total = time.time()
 
     # ── Modo slab (PRD rendimiento-backtester): stream desde slabs locales ──
-    # Solo para run_backtest directo (el optimizer pasa _signal_cache). Con flag
-    # OFF todo lo de abajo se comporta EXACTAMENTE igual que siempre.
+    # Solo sin _signal_cache (el pipeline slab no lo usa). Con flag OFF todo lo
+    # de abajo se comporta EXACTAMENTE igual que siempre. `day_slab_items` (el
+    # optimizer: refs del grid pack) sustituye a iter_slab_items_with_fallback.
     from app.services import backtest_signals as _bsig
     _slab_mode = (
-        _bsig.slab_stream_enabled()
+        (_bsig.slab_stream_enabled() or day_slab_items is not None)
         and _signal_cache is None
         and qualifying_df is not None and not qualifying_df.empty
     )
@@ -115,16 +118,22 @@ def run_backtest(
         logger.info("[PREFETCH SKIP] strategy does not use 'High/Low of last X days' — skipping daily_metrics prefetch")
     elif qualifying_df is not None and not qualifying_df.empty:
         try:
-            tickers = list(qualifying_df["ticker"].unique())
             from app.services.indicators import prefetch_daily_ohlc
-            prefetch_daily_ohlc(tickers)
+            if "date" in qualifying_df.columns:
+                pairs = qualifying_df[["ticker", "date"]].drop_duplicates()
+                prefetch_daily_ohlc(list(pairs["ticker"]), list(pairs["date"]))
+            else:
+                prefetch_daily_ohlc(list(qualifying_df["ticker"].unique()))
         except Exception as e:
             logger.warning(f"Failed to prefetch daily metrics from qualifying_df: {e}")
     elif intraday_df is not None and not intraday_df.empty:
         try:
-            tickers = list(intraday_df["ticker"].unique())
             from app.services.indicators import prefetch_daily_ohlc
-            prefetch_daily_ohlc(tickers)
+            if "date" in intraday_df.columns:
+                pairs = intraday_df[["ticker", "date"]].drop_duplicates()
+                prefetch_daily_ohlc(list(pairs["ticker"]), list(pairs["date"]))
+            else:
+                prefetch_daily_ohlc(list(intraday_df["ticker"].unique()))
         except Exception as e:
             logger.warning(f"Failed to prefetch daily metrics from intraday_df: {e}")
 
@@ -271,7 +280,10 @@ def run_backtest(
     }
 
     # --- Choose data source: streaming iterator or monolithic DataFrame ---
-    if day_group_iter is not None:
+    if _slab_mode and day_slab_items is not None:
+        group_source = iter(())
+        n_groups = n_groups_hint
+    elif day_group_iter is not None:
         group_source = day_group_iter
         n_groups = n_groups_hint
         logger.info(f"[INIT] streaming mode, ~{n_groups} groups expected")
@@ -283,7 +295,8 @@ def run_backtest(
     else:
         return empty_result
 
-    all_trades: list[dict] = []
+    # trades por par como TradeLedger (columnar); se concatenan al final
+    trade_chunks: list[TradeLedger] = []
     all_equity: list[dict] = []
     day_results: list[dict] = []
     days_with_entries = 0
@@ -308,12 +321,16 @@ def run_backtest(
             "custom_start_time": custom_start_time,
             "custom_end_time": custom_end_time,
             "swing_active": swing_active_global,
+            "dtype": _bsig.engine_dtype(),
         }
         _n_workers = _bsig.get_parallel_workers()
         logger.info(f"[SLAB] señales con {_n_workers} worker(s)")
-        items = iter_slab_items_with_fallback(
-            _qualifying_for_slab, strategy_def, qual_lookup, swing_intraday_cache,
-        )
+        if day_slab_items is not None:
+            items = day_slab_items
+        else:
+            items = iter_slab_items_with_fallback(
+                _qualifying_for_slab, strategy_def, qual_lookup, swing_intraday_cache,
+            )
         with PhaseTimer("signals", workers=_n_workers, mode="slab") as _pt_sig:
             signals_sorted = _bsig.run_slab_signals(
                 items, _ctx, _n_workers,
@@ -330,7 +347,8 @@ def run_backtest(
             "elapsed_limit": elapsed_limit, "elapsed_operator": elapsed_operator,
         }
         with PhaseTimer("simulate", mode="slab") as _pt_sim:
-            all_trades, all_equity, day_results = _bsig.simulate_and_accumulate(signals_sorted, _params)
+            _trades, all_equity, day_results = _bsig.simulate_and_accumulate(signals_sorted, _params)
+            trade_chunks.append(_trades)
             _pt_sim.pairs = len(signals_sorted)
         days_with_entries = len(day_results)
         scanned = len(signals_sorted)
@@ -378,7 +396,8 @@ def run_backtest(
             "elapsed_limit": elapsed_limit, "elapsed_operator": elapsed_operator,
         }
         with PhaseTimer("simulate") as _pt_sim:
-            all_trades, all_equity, day_results = _bsig.simulate_and_accumulate(signals_sorted, _params)
+            _trades, all_equity, day_results = _bsig.simulate_and_accumulate(signals_sorted, _params)
+            trade_chunks.append(_trades)
             _pt_sim.pairs = len(signals_sorted)
         days_with_entries = len(day_results)
         logger.info(
@@ -466,79 +485,24 @@ def run_backtest(
         # Base cash for this sim run is initial + accumulated global PnL
         compounding_cash = init_cash + global_realized_pnl
         
-        # Compute market structure levels on the full day_df
-        high_series = day_df["high"]
-        low_series = day_df["low"]
-        hod_vals = high_series.cummax().values.astype(np.float64)
-        lod_vals = low_series.cummin().values.astype(np.float64)
-        
-        # Premarket High/Low
-        ts_series = pd.to_datetime(day_df["timestamp"])
-        pm_mask = (ts_series.dt.hour * 60 + ts_series.dt.minute >= 4 * 60) & (ts_series.dt.hour * 60 + ts_series.dt.minute < 9 * 60 + 30)
-        # PM High/Low ACUMULADOS hasta cada barra (causal). El valor final del día
-        # broadcast a todas las barras introducía lookahead en entradas premarket
-        # (condiciones PMH/PML y stops de estructura anclados a un máximo futuro).
-        # NaN antes de la primera barra PM; tras las 09:30 vale el PM completo.
-        # MISMA fórmula numpy que en backtest_signals._compute_signals_for_pair
-        # (paridad bit a bit secuencial↔paralelo).
-        pm_mask_np = pm_mask.values if hasattr(pm_mask, "values") else np.asarray(pm_mask)
-        _h64 = day_df["high"].values.astype(np.float64)
-        _l64 = day_df["low"].values.astype(np.float64)
-        if pm_mask_np.any():
-            pm_highs_vals = np.fmax.accumulate(np.where(pm_mask_np, _h64, np.nan))
-            pm_lows_vals = np.fmin.accumulate(np.where(pm_mask_np, _l64, np.nan))
-        else:
-            pm_highs_vals = np.full(len(day_df), np.nan, dtype=np.float64)
-            pm_lows_vals = np.full(len(day_df), np.nan, dtype=np.float64)
-        
-        # Previous Max / Previous Min (running high/low shifted by 1 bar)
-        prev_highs_vals = pd.Series(hod_vals).shift(1).fillna(high_series.iloc[0] if len(high_series) > 0 else 0.0).values.astype(np.float64)
-        prev_lows_vals = pd.Series(lod_vals).shift(1).fillna(low_series.iloc[0] if len(low_series) > 0 else 0.0).values.astype(np.float64)
-
-        # Yesterday's Close from daily_stats (from qualifying_df)
-        prev_close_val = daily_stats.get("prev_close")
-        if prev_close_val is None or pd.isna(prev_close_val):
-            prev_close_val = day_df["close"].iloc[0] if len(day_df) > 0 else np.nan
-        prev_closes_vals = np.full(len(day_df), prev_close_val, dtype=np.float64)
-
-        # Yesterday's Open from daily_stats (from qualifying_df)
-        yest_open_val = daily_stats.get("yesterday_open", daily_stats.get("lag_rth_open_1"))
-        if yest_open_val is None or pd.isna(yest_open_val):
-            yest_open_val = day_df["open"].iloc[0] if len(day_df) > 0 else np.nan
-        yest_opens_vals = np.full(len(day_df), yest_open_val, dtype=np.float64)
-
-        arrays = {
-            "ticker": np.full(len(day_df), ticker, dtype=object),
-            "open": day_df["open"].values.astype(np.float64),
-            "high": day_df["high"].values.astype(np.float64),
-            "low": day_df["low"].values.astype(np.float64),
-            "close": day_df["close"].values.astype(np.float64),
-            "volume": day_df["volume"].values,
-            "timestamp": day_df["timestamp"].values,
-            "hod": hod_vals,
-            "lod": lod_vals,
-            "pm_high": pm_highs_vals,
-            "pm_low": pm_lows_vals,
-            "prev_high": prev_highs_vals,
-            "prev_low": prev_lows_vals,
-            "prev_close": prev_closes_vals,
-            "yesterday_open": yest_opens_vals,
-        }
+        arrays = _build_pair_arrays(day_df, ticker, daily_stats)
         del day_df
 
         mini_df = pd.DataFrame(arrays)
 
         # --- Signal computation (with optional cache for risk-only optimization) ---
-        cache_key = (ticker, date)
+        cache_key = _signal_cache_key(_signal_cache, ticker, date, arrays, daily_stats)
 
         if _signal_cache is not None and cache_key in _signal_cache:
-            # Reuse cached entry/exit signals, only re-parse risk management
+            # Reuse cached entry/exit signals, only re-parse risk management.
+            # direction/re-entries salen del punto actual (los sweeps risk-only
+            # pueden barrer max_reentries; el caché solo fija entries/exits).
             cached = _signal_cache[cache_key]
             entries_arr = cached["entries"]
             exits_arr = cached["exits"]
-            sig_direction = cached["direction"]
-            sig_accept_reentries = cached["accept_reentries"]
-            sig_max_reentries = cached.get("max_reentries", -1)
+            sig_direction = compiled_strategy["direction"]
+            sig_accept_reentries = compiled_strategy["accept_reentries"]
+            sig_max_reentries = compiled_strategy["max_reentries"]
 
             if not np.any(entries_arr):
                 del mini_df
@@ -594,66 +558,17 @@ def run_backtest(
         # This ensures that the simulator's "last candle" (n-1) IS the session
         # boundary, so EOD exits happen at the end of the selected session.
         if market_sessions and "all" not in market_sessions:
-            session_mask = _get_market_sessions_mask(
-                mini_df["timestamp"], market_sessions, custom_start_time, custom_end_time
+            trimmed = _trim_to_sessions(
+                mini_df, entries_arr, exits_arr, market_sessions, custom_start_time, custom_end_time,
             )
-            # Apply mask to mini_df and update arrays
-            mini_df = mini_df[session_mask].reset_index(drop=True)
-            if len(mini_df) < 2:
+            if trimmed is None:
                 del mini_df
                 continue
-            # Rebuild arrays from trimmed DataFrame
-            arrays = {
-                "open": mini_df["open"].values.astype(np.float64),
-                "high": mini_df["high"].values.astype(np.float64),
-                "low": mini_df["low"].values.astype(np.float64),
-                "close": mini_df["close"].values.astype(np.float64),
-                "volume": mini_df["volume"].values,
-                "timestamp": mini_df["timestamp"].values,
-                "hod": mini_df["hod"].values.astype(np.float64),
-                "lod": mini_df["lod"].values.astype(np.float64),
-                "pm_high": mini_df["pm_high"].values.astype(np.float64),
-                "pm_low": mini_df["pm_low"].values.astype(np.float64),
-                "prev_high": mini_df["prev_high"].values.astype(np.float64),
-                "prev_low": mini_df["prev_low"].values.astype(np.float64),
-            }
-            
-            # Apply mask to signals
-            session_mask_np = session_mask.values if hasattr(session_mask, "values") else np.asarray(session_mask)
-            entries_arr = entries_arr[session_mask_np]
-            exits_arr = exits_arr[session_mask_np]
+            mini_df, arrays, entries_arr, exits_arr = trimmed
 
         # --- Apply candle_delay shift on trimmed/untrimmed numpy arrays ---
         if compiled_strategy:
-            entry_candle_delay = compiled_strategy.get("entry_candle_delay")
-            if entry_candle_delay is not None:
-                try:
-                    delay_val = int(entry_candle_delay)
-                    if delay_val > 1:
-                        lowest_tf_mins = get_lowest_timeframe_mins(compiled_strategy.get("entry_logic", {}))
-                        shift_bars = (delay_val - 1) * lowest_tf_mins
-                        if shift_bars > 0 and len(entries_arr) > 0:
-                            if len(entries_arr) > shift_bars:
-                                entries_arr = np.concatenate([np.zeros(shift_bars, dtype=bool), entries_arr[:-shift_bars]])
-                            else:
-                                entries_arr = np.zeros_like(entries_arr)
-                except (ValueError, TypeError):
-                    pass
-
-            exit_candle_delay = compiled_strategy.get("exit_candle_delay")
-            if exit_candle_delay is not None:
-                try:
-                    delay_val = int(exit_candle_delay)
-                    if delay_val > 1:
-                        lowest_tf_mins = get_lowest_timeframe_mins(compiled_strategy.get("exit_logic", {}))
-                        shift_bars = (delay_val - 1) * lowest_tf_mins
-                        if shift_bars > 0 and len(exits_arr) > 0:
-                            if len(exits_arr) > shift_bars:
-                                exits_arr = np.concatenate([np.zeros(shift_bars, dtype=bool), exits_arr[:-shift_bars]])
-                            else:
-                                exits_arr = np.zeros_like(exits_arr)
-                except (ValueError, TypeError):
-                    pass
+            entries_arr, exits_arr = _apply_candle_delays(compiled_strategy, entries_arr, exits_arr)
 
         # If we have no entries, skip simulation
         if not np.any(entries_arr):
@@ -733,8 +648,8 @@ def run_backtest(
             continue
 
         # Track today's PnL to roll over into tomorrow's compounding base
-        for t in raw_trades:
-            daily_pnl += t["pnl"]
+        for pnl in trade_column(raw_trades, "pnl").tolist():
+            daily_pnl += pnl
 
         # Avoid pd.to_datetime parsing if array is already datetime kind natively
         ts_arr = arrays["timestamp"]
@@ -753,9 +668,9 @@ def run_backtest(
         else:
             risk_unit_dollar = risk_r
 
-        trades_records = _enrich_trades(
-            raw_trades, timestamps, ticker, date, strategy_def, risk_unit_dollar,
-            gap_pct=daily_stats.get("gap_pct"),
+        trades_records = enrich_trade_columns(
+            raw_trades, timestamps, ts_epoch, ticker, date, risk_unit_dollar,
+            daily_stats.get("gap_pct"),
         )
 
         equity = _extract_equity_from_values(eq_vals, timestamps)
@@ -763,7 +678,7 @@ def run_backtest(
         stats = _extract_day_stats_from_values(eq_vals, ticker, date, trades_records, daily_stats.get("gap_pct"))
 
         all_equity.append({"ticker": ticker, "date": date, "equity": equity})
-        all_trades.extend(trades_records)
+        trade_chunks.append(trades_records)
         day_results.append(stats)
         days_with_entries += 1
 
@@ -795,6 +710,9 @@ def run_backtest(
         f"({round(time.time()-t1, 2)}s)"
     )
 
+    all_trades = TradeLedger.concat(trade_chunks)
+    del trade_chunks
+
     t4 = time.time()
     # Logic: global_eq is pure trades, global_eq_exp is trades - monthly_expenses
     global_eq, global_dd, global_eq_exp = _compute_global_equity_and_drawdown(
@@ -823,11 +741,394 @@ def run_backtest(
     }
 
 
+def run_backtest_risk_batch(
+    qualifying_df: pd.DataFrame,
+    strategy_defs: list[dict],
+    init_cash: float = 10000.0,
+    risk_r: float = 100.0,
+    risk_type: str = "FIXED",
+    fixed_ratio_delta: float = 500.0,
+    size_by_sl: bool = False,
+    fees: float = 0.0,
+    fee_type: str = "PERCENT",
+    slippage: float = 0.0,
+    market_sessions: list[str] | None = None,
+    custom_start_time: str | None = None,
+    custom_end_time: str | None = None,
+    locates_cost: float = 0.0,
+    locate_type: str = "FLAT",
+    look_ahead_prevention: bool = False,
+    day_group_iter=None,
+    monthly_expenses: float = 0.0,
+    _signal_cache: dict | None = None,
+) -> list[dict]:
+    """K puntos de un sweep risk-only (mismas señales, distinto risk_management)
+    en UNA pasada por los pares: arrays y señales del par se preparan una vez y
+    las K configs de riesgo se simulan con una sola llamada a simulate_jit_batch,
+    cada una con su propio cash compuesto. El resultado del punto k es el de
+    run_backtest(strategy_def=strategy_defs[k], ...) por el loop secuencial con
+    BACKTEST_NUMBA_SIM=1 (mismo orden de pares y de sumas → bit-idéntico).
+
+    Solo se construye lo que el ranking del sweep consume (aggregate_metrics,
+    day_results, trades y equity global; sin curvas de equity por par) y
+    `result(k)` del kernel se materializa solo para las configs con trades en el
+    par. El llamador garantiza que los puntos comparten todo lo que da forma a
+    los pares: sin swing, mismas exclusiones de días/meses y misma dirección.
+    """
+    from app.services.backtest_signals import _hard_stop_params, _preprocess_pair
+
+    n_points = len(strategy_defs)
+    base_def = strategy_defs[0]
+    if _uses_daily_lookback_indicator(base_def) and qualifying_df is not None and not qualifying_df.empty:
+        try:
+            from app.services.indicators import prefetch_daily_ohlc
+            pairs = qualifying_df[["ticker", "date"]].drop_duplicates()
+            prefetch_daily_ohlc(list(pairs["ticker"]), list(pairs["date"]))
+        except Exception as e:
+            logger.warning(f"Failed to prefetch daily metrics from qualifying_df: {e}")
+
+    qual_lookup = _build_qualifying_lookup(qualifying_df)
+    compiled = [compile_strategy_def(d) for d in strategy_defs]
+    exit_logic = base_def.get("exit_logic", {})
+    root_condition = exit_logic.get("root_condition", {}) if exit_logic else {}
+    elapsed_limit, elapsed_operator = find_elapsed_time_condition(root_condition)
+
+    # Parte fija de la config de riesgo de cada punto (el cash se pone por par)
+    point_configs = []
+    for point_def, point_compiled in zip(strategy_defs, compiled):
+        rm = point_def.get("risk_management", {})
+        point_size_by_sl = size_by_sl
+        if rm.get("size_by_sl") is not None:
+            point_size_by_sl = size_by_sl or rm.get("size_by_sl", False)
+        point_configs.append({
+            "risk_r": risk_r, "risk_type": risk_type,
+            "fixed_ratio_delta": fixed_ratio_delta, "size_by_sl": point_size_by_sl,
+            "fees": fees, "fee_type": fee_type, "slippage": slippage,
+            "locates_cost": locates_cost, "locate_type": locate_type,
+            "look_ahead_prevention": look_ahead_prevention,
+            "accumulate": point_compiled["accept_reentries"],
+            "max_reentries": point_compiled["max_reentries"],
+            "elapsed_limit": elapsed_limit, "elapsed_operator": elapsed_operator,
+            **_hard_stop_params(point_def),
+        })
+
+    trade_chunks: list[list[TradeLedger]] = [[] for _ in range(n_points)]
+    day_results: list[list[dict]] = [[] for _ in range(n_points)]
+    global_realized_pnl = [0.0] * n_points
+    daily_pnl = [0.0] * n_points
+    current_date = None
+
+    for (date_raw, ticker_raw), day_df in day_group_iter:
+        pair = _preprocess_pair(date_raw, ticker_raw, day_df, qual_lookup, base_def, {})
+        if pair is None:
+            continue
+        date, ticker, day_df, daily_stats = pair
+
+        if current_date is None:
+            current_date = date
+        elif date != current_date:
+            for k in range(n_points):
+                global_realized_pnl[k] += daily_pnl[k]
+                daily_pnl[k] = 0.0
+            current_date = date
+
+        arrays = _build_pair_arrays(day_df, ticker, daily_stats)
+        del day_df
+        mini_df = pd.DataFrame(arrays)
+
+        cache_key = _signal_cache_key(_signal_cache, ticker, date, arrays, daily_stats)
+        if _signal_cache is not None and cache_key in _signal_cache:
+            cached = _signal_cache[cache_key]
+            entries_arr = cached["entries"]
+            exits_arr = cached["exits"]
+        else:
+            try:
+                signals = translate_strategy(mini_df, base_def, daily_stats, compiled=compiled[0])
+            except Exception:
+                continue
+            if not signals["entries"].any():
+                continue
+            entries_arr = signals["entries"].values if hasattr(signals["entries"], "values") else np.asarray(signals["entries"])
+            exits_arr = signals["exits"].values if hasattr(signals["exits"], "values") else np.asarray(signals["exits"])
+            if _signal_cache is not None:
+                _signal_cache[cache_key] = {
+                    "entries": entries_arr.copy(),
+                    "exits": exits_arr.copy(),
+                    "direction": signals["direction"],
+                    "accept_reentries": signals.get("accept_reentries", False),
+                    "max_reentries": signals.get("max_reentries", -1),
+                }
+        if not np.any(entries_arr):
+            continue
+
+        # Risk management de cada punto sobre el día completo (antes del recorte)
+        point_risks = [
+            _parse_risk_management(d.get("risk_management", {}), mini_df, daily_stats, {})
+            for d in strategy_defs
+        ]
+
+        if market_sessions and "all" not in market_sessions:
+            trimmed = _trim_to_sessions(
+                mini_df, entries_arr, exits_arr, market_sessions, custom_start_time, custom_end_time,
+            )
+            if trimmed is None:
+                continue
+            mini_df, arrays, entries_arr, exits_arr = trimmed
+        del mini_df
+        entries_arr, exits_arr = _apply_candle_delays(compiled[0], entries_arr, exits_arr)
+        if not np.any(entries_arr):
+            continue
+
+        ts_arr = arrays["timestamp"]
+        if getattr(ts_arr.dtype, "kind", "") in ("M", "m"):
+            timestamps_arr = ts_arr.astype("datetime64[ns]").astype(np.int64)
+        else:
+            timestamps_arr = pd.to_datetime(ts_arr).values.astype("datetime64[ns]").astype(np.int64)
+
+        configs = []
+        for k in range(n_points):
+            sl_stop, sl_trail, tp_stop, tp_time_limit, trail_pct, partial_tps = point_risks[k]
+            configs.append({
+                **point_configs[k],
+                "init_cash": init_cash + global_realized_pnl[k],
+                "sl_stop": sl_stop, "sl_trail": sl_trail, "tp_stop": tp_stop,
+                "tp_time_limit": tp_time_limit, "trail_pct": trail_pct,
+                "partial_take_profits": partial_tps,
+            })
+        market = {
+            "close": arrays["close"], "open_": arrays["open"],
+            "high": arrays["high"], "low": arrays["low"],
+            "entries": entries_arr, "exits": exits_arr,
+            "hods": arrays.get("hod"), "lods": arrays.get("lod"),
+            "pm_highs": arrays.get("pm_high"), "pm_lows": arrays.get("pm_low"),
+            "prev_highs": arrays.get("prev_high"), "prev_lows": arrays.get("prev_low"),
+            "timestamps": timestamps_arr,
+        }
+        results = _simulate_risk_configs(market, compiled[0]["direction"], configs, ticker, date)
+
+        timestamps = ts_epoch = None
+        gap_pct = daily_stats.get("gap_pct")
+        for k, sim_result in enumerate(results):
+            if sim_result is None or not sim_result["trades"]:
+                continue
+            raw_trades = sim_result["trades"]
+            for pnl in trade_column(raw_trades, "pnl").tolist():
+                daily_pnl[k] += pnl
+
+            if timestamps is None:
+                if getattr(ts_arr.dtype, "kind", "") in ("M", "m"):
+                    timestamps = pd.Series(ts_arr)
+                    ts_epoch = ts_arr.astype("datetime64[s]").astype("int64")
+                else:
+                    timestamps = pd.Series(pd.to_datetime(ts_arr))
+                    ts_epoch = timestamps.values.astype("datetime64[s]").astype("int64")
+
+            if risk_type == "PERCENT":
+                risk_unit_dollar = configs[k]["init_cash"] * (risk_r / 100.0)
+            else:
+                risk_unit_dollar = risk_r
+            trades_records = enrich_trade_columns(
+                raw_trades, timestamps, ts_epoch, ticker, date, risk_unit_dollar, gap_pct,
+            )
+            trade_chunks[k].append(trades_records)
+            day_results[k].append(
+                _extract_day_stats_from_values(sim_result["equity"], ticker, date, trades_records, gap_pct)
+            )
+
+    out = []
+    for k in range(n_points):
+        all_trades = TradeLedger.concat(trade_chunks[k])
+        global_eq, global_dd, global_eq_exp = _compute_global_equity_and_drawdown(
+            all_trades, init_cash, monthly_expenses
+        )
+        aggregate = _aggregate_metrics(
+            day_results[k], all_trades, global_eq, global_dd, init_cash, risk_r, monthly_expenses
+        )
+        out.append({
+            "aggregate_metrics": aggregate,
+            "day_results": day_results[k],
+            "trades": all_trades,
+            "global_equity": global_eq,
+            "global_equity_expenses": global_eq_exp,
+            "global_drawdown": global_dd,
+        })
+    return out
+
+
+def _simulate_risk_configs(market: dict, direction: str, configs: list[dict], ticker: str, date: str) -> list:
+    """Resultado de simulate por config de riesgo sobre un mismo par (None si no
+    hay trades o la simulación falla). Una sola llamada al kernel batch; si esta
+    falla, cada config se simula por separado como en el loop secuencial."""
+    from app.services.sim_dispatch import simulate_jit_batch
+
+    try:
+        batch = simulate_jit_batch(configs=configs, direction=direction, **market)
+    except Exception as exc:
+        logger.warning(f"[STREAM] risk batch {ticker} {date} failed ({exc}); simulating configs one by one")
+    else:
+        return [batch.result(k) if batch.n_trades[k] else None for k in range(len(batch))]
+
+    results = []
+    for cfg in configs:
+        try:
+            results.append(simulate(direction=direction, **market, **cfg))
+        except Exception as exc:
+            logger.warning(f"[STREAM] day {ticker} {date} failed: {exc}")
+            results.append(None)
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
+def _build_pair_arrays(day_df: pd.DataFrame, ticker: str, daily_stats: dict) -> dict:
+    """Arrays del par (precios + estructura de mercado + prev_close/yesterday_open)
+    sobre el day_df completo, antes de señales y del recorte de sesión."""
+    # Compute market structure levels on the full day_df
+    high_series = day_df["high"]
+    low_series = day_df["low"]
+    hod_vals = high_series.cummax().values.astype(np.float64)
+    lod_vals = low_series.cummin().values.astype(np.float64)
+
+    # Premarket High/Low
+    ts_series = pd.to_datetime(day_df["timestamp"])
+    pm_mask = (ts_series.dt.hour * 60 + ts_series.dt.minute >= 4 * 60) & (ts_series.dt.hour * 60 + ts_series.dt.minute < 9 * 60 + 30)
+    # PM High/Low ACUMULADOS hasta cada barra (causal). El valor final del día
+    # broadcast a todas las barras introducía lookahead en entradas premarket
+    # (condiciones PMH/PML y stops de estructura anclados a un máximo futuro).
+    # NaN antes de la primera barra PM; tras las 09:30 vale el PM completo.
+    # MISMA fórmula numpy que en backtest_signals._compute_signals_for_pair
+    # (paridad bit a bit secuencial↔paralelo).
+    pm_mask_np = pm_mask.values if hasattr(pm_mask, "values") else np.asarray(pm_mask)
+    _h64 = day_df["high"].values.astype(np.float64)
+    _l64 = day_df["low"].values.astype(np.float64)
+    if pm_mask_np.any():
+        pm_highs_vals = np.fmax.accumulate(np.where(pm_mask_np, _h64, np.nan))
+        pm_lows_vals = np.fmin.accumulate(np.where(pm_mask_np, _l64, np.nan))
+    else:
+        pm_highs_vals = np.full(len(day_df), np.nan, dtype=np.float64)
+        pm_lows_vals = np.full(len(day_df), np.nan, dtype=np.float64)
+
+    # Previous Max / Previous Min (running high/low shifted by 1 bar)
+    prev_highs_vals = pd.Series(hod_vals).shift(1).fillna(high_series.iloc[0] if len(high_series) > 0 else 0.0).values.astype(np.float64)
+    prev_lows_vals = pd.Series(lod_vals).shift(1).fillna(low_series.iloc[0] if len(low_series) > 0 else 0.0).values.astype(np.float64)
+
+    # Yesterday's Close from daily_stats (from qualifying_df)
+    prev_close_val = daily_stats.get("prev_close")
+    if prev_close_val is None or pd.isna(prev_close_val):
+        prev_close_val = day_df["close"].iloc[0] if len(day_df) > 0 else np.nan
+    prev_closes_vals = np.full(len(day_df), prev_close_val, dtype=np.float64)
+
+    # Yesterday's Open from daily_stats (from qualifying_df)
+    yest_open_val = daily_stats.get("yesterday_open", daily_stats.get("lag_rth_open_1"))
+    if yest_open_val is None or pd.isna(yest_open_val):
+        yest_open_val = day_df["open"].iloc[0] if len(day_df) > 0 else np.nan
+    yest_opens_vals = np.full(len(day_df), yest_open_val, dtype=np.float64)
+
+    arrays = {
+        "ticker": np.full(len(day_df), ticker, dtype=object),
+        "open": day_df["open"].values.astype(np.float64),
+        "high": day_df["high"].values.astype(np.float64),
+        "low": day_df["low"].values.astype(np.float64),
+        "close": day_df["close"].values.astype(np.float64),
+        "volume": day_df["volume"].values,
+        "timestamp": day_df["timestamp"].values,
+        "hod": hod_vals,
+        "lod": lod_vals,
+        "pm_high": pm_highs_vals,
+        "pm_low": pm_lows_vals,
+        "prev_high": prev_highs_vals,
+        "prev_low": prev_lows_vals,
+        "prev_close": prev_closes_vals,
+        "yesterday_open": yest_opens_vals,
+    }
+    return arrays
+
+
+def _signal_cache_key(signal_cache, ticker: str, date: str, arrays: dict, daily_stats: dict):
+    """Clave del caché de señales risk-only para el par."""
+    cache_key = (ticker, date)
+    if signal_cache is not None and getattr(signal_cache, "keyed_by_content", False):
+        # Caché persistente (signal_store): la clave incluye la huella del
+        # contenido del par para no servir señales de datos distintos.
+        from app.db.signal_store import pair_fingerprint
+        cache_key = (ticker, date, pair_fingerprint(
+            arrays["timestamp"].astype("datetime64[ns]").view(np.int64),
+            arrays["open"], arrays["high"], arrays["low"], arrays["close"],
+            arrays["volume"], daily_stats,
+        ))
+    return cache_key
+
+
+def _trim_to_sessions(mini_df, entries_arr, exits_arr, market_sessions, custom_start_time, custom_end_time):
+    """Recorta mini_df, arrays y señales a la ventana de sesión elegida.
+    Devuelve (mini_df, arrays, entries, exits), o None si quedan < 2 barras."""
+    session_mask = _get_market_sessions_mask(
+        mini_df["timestamp"], market_sessions, custom_start_time, custom_end_time
+    )
+    # Apply mask to mini_df and update arrays
+    mini_df = mini_df[session_mask].reset_index(drop=True)
+    if len(mini_df) < 2:
+        return None
+    # Rebuild arrays from trimmed DataFrame
+    arrays = {
+        "open": mini_df["open"].values.astype(np.float64),
+        "high": mini_df["high"].values.astype(np.float64),
+        "low": mini_df["low"].values.astype(np.float64),
+        "close": mini_df["close"].values.astype(np.float64),
+        "volume": mini_df["volume"].values,
+        "timestamp": mini_df["timestamp"].values,
+        "hod": mini_df["hod"].values.astype(np.float64),
+        "lod": mini_df["lod"].values.astype(np.float64),
+        "pm_high": mini_df["pm_high"].values.astype(np.float64),
+        "pm_low": mini_df["pm_low"].values.astype(np.float64),
+        "prev_high": mini_df["prev_high"].values.astype(np.float64),
+        "prev_low": mini_df["prev_low"].values.astype(np.float64),
+    }
+
+    # Apply mask to signals
+    session_mask_np = session_mask.values if hasattr(session_mask, "values") else np.asarray(session_mask)
+    entries_arr = entries_arr[session_mask_np]
+    exits_arr = exits_arr[session_mask_np]
+    return mini_df, arrays, entries_arr, exits_arr
+
+
+def _apply_candle_delays(compiled_strategy: dict, entries_arr, exits_arr):
+    """Desplaza entries/exits según entry/exit_candle_delay de la estrategia."""
+    entry_candle_delay = compiled_strategy.get("entry_candle_delay")
+    if entry_candle_delay is not None:
+        try:
+            delay_val = int(entry_candle_delay)
+            if delay_val > 1:
+                lowest_tf_mins = get_lowest_timeframe_mins(compiled_strategy.get("entry_logic", {}))
+                shift_bars = (delay_val - 1) * lowest_tf_mins
+                if shift_bars > 0 and len(entries_arr) > 0:
+                    if len(entries_arr) > shift_bars:
+                        entries_arr = np.concatenate([np.zeros(shift_bars, dtype=bool), entries_arr[:-shift_bars]])
+                    else:
+                        entries_arr = np.zeros_like(entries_arr)
+        except (ValueError, TypeError):
+            pass
+
+    exit_candle_delay = compiled_strategy.get("exit_candle_delay")
+    if exit_candle_delay is not None:
+        try:
+            delay_val = int(exit_candle_delay)
+            if delay_val > 1:
+                lowest_tf_mins = get_lowest_timeframe_mins(compiled_strategy.get("exit_logic", {}))
+                shift_bars = (delay_val - 1) * lowest_tf_mins
+                if shift_bars > 0 and len(exits_arr) > 0:
+                    if len(exits_arr) > shift_bars:
+                        exits_arr = np.concatenate([np.zeros(shift_bars, dtype=bool), exits_arr[:-shift_bars]])
+                    else:
+                        exits_arr = np.zeros_like(exits_arr)
+        except (ValueError, TypeError):
+            pass
+    return entries_arr, exits_arr
+
+
 def format_date_str(val):
     if val is None or pd.isna(val):
         return None
@@ -1006,6 +1307,29 @@ def _extract_equity_from_values(eq_vals: np.ndarray, timestamps: pd.Series) -> l
 # Global equity & drawdown
 # ---------------------------------------------------------------------------
 
+def _daily_pnl_by_date(trades) -> tuple[list[str], np.ndarray]:
+    """(fechas ordenadas, PnL por fecha) de un TradeLedger o lista de dicts.
+
+    bincount suma los pesos en orden de entrada empezando en 0.0 → mismos
+    floats que el `daily[d] = daily.get(d, 0.0) + pnl` trade a trade."""
+    dates = trade_column(trades, "date", "")
+    pnls = trade_column(trades, "pnl", 0.0).astype(np.float64)
+    keep = np.fromiter((bool(d) for d in dates), dtype=bool, count=len(dates))
+    if not keep.any():
+        return [], np.array([])
+    uniq, inv = np.unique(dates[keep].astype(str), return_inverse=True)
+    sums = np.bincount(inv, weights=pnls[keep], minlength=len(uniq))
+    return uniq.tolist(), sums
+
+
+def _date_epochs(dates: list[str]) -> np.ndarray:
+    """int(pd.Timestamp(d, tz="UTC").timestamp()) por fecha, vectorizado."""
+    try:
+        return (pd.to_datetime(pd.Index(dates), utc=True).asi8 // 1_000_000_000).astype(np.int64)
+    except (ValueError, TypeError):
+        return np.array([int(pd.Timestamp(d, tz="UTC").timestamp()) for d in dates], dtype=np.int64)
+
+
 def _compute_global_equity_and_drawdown(
     all_trades: list[dict],
     init_cash: float,
@@ -1016,38 +1340,24 @@ def _compute_global_equity_and_drawdown(
     Logic: start at init_cash, group trades by date, sum daily P&L,
     accumulate.  equity[day] = equity[prev_day] + sum(pnl of trades on day).
     """
-    if not all_trades:
+    if not len(all_trades):
         return [], [], []
 
     # Group trade P&L by date
-    daily_pnl: dict[str, float] = {}
-    for trade in all_trades:
-        date_str = trade.get("date", "")
-        if not date_str:
-            continue
-        daily_pnl[date_str] = daily_pnl.get(date_str, 0.0) + trade.get("pnl", 0.0)
+    sorted_dates, day_sums = _daily_pnl_by_date(all_trades)
 
-    if not daily_pnl:
+    if not sorted_dates:
         return [], [], []
 
-    # Sort by date
-    sorted_dates = sorted(daily_pnl.keys())
-
     # Construction: Point 0 = init_cash before any trades
-    # Point i = end of day i
-    equity_values = [init_cash]
-    cumulative = init_cash
-    for d in sorted_dates:
-        cumulative += daily_pnl[d]
-        equity_values.append(cumulative)
-
-    values = np.array(equity_values, dtype=np.float64)
+    # Point i = end of day i (cumsum secuencial == el += del loop original)
+    values = np.cumsum(np.concatenate(([init_cash], day_sums)).astype(np.float64))
+    equity_values = values.tolist()
 
     # Use first date to infer a 'start' time (day before first trade)
     first_dt = pd.Timestamp(sorted_dates[0], tz="UTC")
     start_ts = int((first_dt - pd.Timedelta(days=1)).timestamp())
-    times = [start_ts] + [int(pd.Timestamp(d, tz="UTC").timestamp()) for d in sorted_dates]
-    times_arr = np.array(times, dtype=np.int64)
+    times_arr = np.concatenate(([start_ts], _date_epochs(sorted_dates))).astype(np.int64)
 
     running_max = np.maximum.accumulate(values)
     dd_pct = np.where(running_max > 0, (values / running_max - 1) * 100, 0.0)
@@ -1116,7 +1426,7 @@ def _extract_day_stats_from_values(
         max_dd = float(np.min(dd_pct))
 
         n_trades = len(trades_records)
-        pnls = np.array([t["pnl"] for t in trades_records]) if trades_records else np.array([])
+        pnls = trade_column(trades_records, "pnl") if n_trades else np.array([])
         wins = pnls[pnls > 0] if len(pnls) else np.array([])
         losses = pnls[pnls <= 0] if len(pnls) else np.array([])
 
@@ -1126,7 +1436,7 @@ def _extract_day_stats_from_values(
         profit_factor = (sum_wins / sum_losses) if sum_losses > 0 else 0.0
         expectancy = float(pnls.mean()) if len(pnls) else 0.0
 
-        rets_pct = np.array([t["return_pct"] for t in trades_records]) if trades_records else np.array([])
+        rets_pct = trade_column(trades_records, "return_pct") if n_trades else np.array([])
         best_trade = float(rets_pct.max()) if len(rets_pct) else 0.0
         worst_trade = float(rets_pct.min()) if len(rets_pct) else 0.0
 
@@ -1164,6 +1474,21 @@ def _extract_day_stats_from_values(
 # Aggregate metrics
 # ---------------------------------------------------------------------------
 
+def _seq_sum(values: np.ndarray) -> float:
+    """Suma en orden (como sum() de Python): np.sum es pairwise y difiere en el
+    último bit; el último elemento de cumsum es la suma secuencial exacta."""
+    return float(np.cumsum(values)[-1]) if len(values) else 0
+
+
+def _max_run(mask: np.ndarray) -> int:
+    """Longitud de la racha más larga de True."""
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[0::2]).max())
+
+
 def _aggregate_metrics(
     day_results: list[dict],
     trades: list[dict],
@@ -1184,13 +1509,17 @@ def _aggregate_metrics(
         "avg_r_per_day": 0,
         "avg_r_ui": 0.0,
     }
-    if not day_results and not trades:
+    n_trades = len(trades)
+    if not day_results and not n_trades:
         return empty
 
-    if not day_results and trades:
-        unique_dates = {t.get("date", "")[:10] for t in trades if t.get("date")}
+    # Trades en columnas (TradeLedger o lista de dicts): PnL por fecha una sola vez
+    sorted_trade_dates, day_pnl_sums = _daily_pnl_by_date(trades) if n_trades else ([], np.array([]))
+
+    if not day_results and n_trades:
+        unique_dates = {d[:10] for d in sorted_trade_dates}
         total_days = len(unique_dates)
-        total_trades = len(trades)
+        total_trades = n_trades
     else:
         total_days = len(day_results)
         total_trades = sum(d.get("total_trades", 0) for d in day_results)
@@ -1198,10 +1527,10 @@ def _aggregate_metrics(
     # Re-calculate total expenses for the net profit metric
     # (Since total_expenses was previously removed from loop)
     # We find number of unique months in trades
-    all_months = sorted(list(set(t.get("date", "")[:7] for t in trades if t.get("date"))))
+    all_months = sorted({d[:7] for d in sorted_trade_dates})
     total_expenses = len(all_months) * monthly_expenses
     
-    pnls = np.array([t.get("pnl", 0) for t in trades]) if trades else np.array([])
+    pnls = trade_column(trades, "pnl", 0) if n_trades else np.array([])
     total_pnl_trades = float(pnls.sum()) if len(pnls) else 0.0
     total_pnl_net = total_pnl_trades - total_expenses
     winning_trades = int((pnls > 0).sum()) if len(pnls) else 0
@@ -1219,16 +1548,12 @@ def _aggregate_metrics(
     sortino_ratio = 0.0
     avg_return_per_day_pct = 0.0
 
-    if total_days > 0 and trades:
+    if total_days > 0 and n_trades:
         try:
             # Reconstruct daily PnL timeline
-            daily_pnls: dict[str, float] = {}
-            for t in trades:
-                d = t.get("date", "")
-                if d:
-                    daily_pnls[d] = daily_pnls.get(d, 0.0) + t.get("pnl", 0.0)
+            daily_pnls = dict(zip(sorted_trade_dates, day_pnl_sums.tolist()))
             
-            sorted_dates = sorted(daily_pnls.keys())
+            sorted_dates = sorted_trade_dates
             first_date = pd.to_datetime(sorted_dates[0])
             last_date = pd.to_datetime(sorted_dates[-1])
             
@@ -1273,9 +1598,9 @@ def _aggregate_metrics(
     # The absolute Max DD is the worst between global closed-equity DD and any intraday DD
     final_max_dd = min(global_max_dd, worst_day_dd)
 
-    # True Global Profit Factor
-    gross_profit = sum(t["pnl"] for t in trades if t["pnl"] > 0)
-    gross_loss = abs(sum(t["pnl"] for t in trades if t["pnl"] < 0))
+    # True Global Profit Factor (cumsum = suma secuencial, como el sum() original)
+    gross_profit = _seq_sum(pnls[pnls > 0]) if len(pnls) else 0
+    gross_loss = abs(_seq_sum(pnls[pnls < 0])) if len(pnls) else 0
     avg_pf = float(gross_profit / gross_loss) if gross_loss > 0 else 0.0
 
     avg_pnl = float(pnls.mean()) if len(pnls) else 0
@@ -1320,27 +1645,28 @@ def _aggregate_metrics(
     avg_r_ui = (annualized_return_pct / ulcer_index) if ulcer_index > 0 else 0.0
 
     # MAE (Maximum Adverse Excursion) — worst case across all trades. Note that MAE is a positive %
-    maes = np.array([t.get("mae", 0) for t in trades]) if trades else np.array([])
+    maes = trade_column(trades, "mae", 0) if n_trades else np.array([])
     max_mae = float(maes.max()) if len(maes) else 0
 
     # Max profit run per day
     returns = np.array([d.get("total_return_pct", 0) or 0 for d in day_results])
     max_profit_pct = float(returns.max()) if len(returns) else 0
 
-    # Consecutive wins/losses
-    max_cons_wins = 0
-    max_cons_losses = 0
-    curr_wins = 0
-    curr_losses = 0
-    for p in pnls:
-        if p > 0:
-            curr_wins += 1
-            curr_losses = 0
-            max_cons_wins = max(max_cons_wins, curr_wins)
+    # Consecutive wins/losses (rachas de pnl > 0 / resto)
+    is_win = pnls > 0 if len(pnls) else np.zeros(0, dtype=bool)
+    max_cons_wins = _max_run(is_win)
+    max_cons_losses = _max_run(~is_win)
+
+    # Sum of R per trade (None → 0.0), secuencial como el sum() original
+    if n_trades:
+        r_mult = trade_column(trades, "r_multiple", None)
+        if isinstance(trades, TradeLedger):
+            r_mult = np.where(trades.nulls("r_multiple"), 0.0, r_mult)
         else:
-            curr_losses += 1
-            curr_wins = 0
-            max_cons_losses = max(max_cons_losses, curr_losses)
+            r_mult = np.array([v or 0.0 for v in r_mult.tolist()], dtype=np.float64)
+        sum_r = _seq_sum(np.where(r_mult == 0.0, 0.0, r_mult))
+    else:
+        sum_r = 0
 
     return {
         "total_days": total_days,
@@ -1367,7 +1693,7 @@ def _aggregate_metrics(
         "payoff_ratio": round(payoff_ratio, 4),
         "total_expenses": round(total_expenses, 2),
         "total_pnl_net": round(total_pnl_net, 2),
-        "avg_r_per_day": round(sum(t.get("r_multiple") or 0.0 for t in trades) / total_days, 4) if total_days > 0 else 0,
+        "avg_r_per_day": round(sum_r / total_days, 4) if total_days > 0 else 0,
         "avg_r_ui": round(avg_r_ui, 4),
     }
 
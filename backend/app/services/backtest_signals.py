@@ -9,9 +9,10 @@ Este módulo extrae, SIN cambiar la lógica, las dos mitades del loop de
     -> `_compute_signals_for_pair`
 
   - Mitad B (SERIAL, líneas 349-358 + 554-672 del original): simulate + acumulación
-    con compounding. Es barata pero secuencial (el día N se dimensiona con el PnL
+    con compounding. Secuencial entre días (el día N se dimensiona con el PnL
     realizado de los días previos) → se ejecuta en orden de (date, ticker).
-    -> `_simulate_and_accumulate`
+    -> `simulate_and_accumulate` (opt-in BACKTEST_PARALLEL_SIM: pares en
+       paralelo + reconciliación del compounding, bit-idéntico al serial)
 
 El orquestador `run_parallel_signals` calca el patrón fork+COW de
 `optimization_service.py` (materializar en el padre antes del fork, chunking,
@@ -31,6 +32,7 @@ import numpy as np
 import pandas as pd
 
 from app.services.strategy_engine import translate_strategy, translate_strategy_native, get_lowest_timeframe_mins
+from app.services.trade_ledger import TradeLedger, enrich_trade_columns, trade_column
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +76,25 @@ def n2a_native_enabled() -> bool:
     return os.getenv("BTT_N2A_NATIVE_ENABLED", "0").strip().lower() in ("1", "true", "yes", "on")
 
 
+def float32_engine_enabled() -> bool:
+    """Motor float32 slab → señales → simulador (BTT_FLOAT32_ENGINE) — default OFF.
+
+    Los refs del slab se resuelven como vistas float32 del mmap (sin upcast) y el
+    dtype se conserva por el fast-path N2a (indicadores nativos) y el kernel
+    Numba: mitad de ancho de banda/working set en BROAD. Acumuladores internos
+    en float64; las salidas por barra en float32. NO es bit-idéntico al float64:
+    validar la tolerancia con app.services.float32_parity antes de activarlo. Los
+    caminos que no lo soportan (motor clásico de señales, simulador Python) suben
+    a float64 en su frontera y se comportan exactamente como sin el flag.
+    """
+    return os.getenv("BTT_FLOAT32_ENGINE", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_dtype():
+    """dtype de los arrays de precio del motor según BTT_FLOAT32_ENGINE."""
+    return np.float32 if float32_engine_enabled() else np.float64
+
+
 def fork_available() -> bool:
     return "fork" in multiprocessing.get_all_start_methods()
 
@@ -110,10 +131,11 @@ def _compute_signals_for_pair(
 
     Slab path (PRD rendimiento-backtester §03.7): si `pair_arrays` viene informado
     (slab_store.PairArrays), los arrays llegan ya limpios (orden+dedup del builder)
-    y `day_df` se ignora — cero pandas en la entrada."""
+    y `day_df` se ignora — cero pandas en la entrada. Si llegan en float32 (motor
+    float32) el fast-path N2a conserva ese dtype; el clásico sube a float64."""
 
     if pair_arrays is not None:
-        # ═══ SLAB PATH: arrays ya ordenados/dedup, float64, ts int64 ═══
+        # ═══ SLAB PATH: arrays ya ordenados/dedup, float64 (o float32), ts int64 ═══
         ts_int64 = pair_arrays.ts_ns
         ts_col = pair_arrays.timestamps_dt64()  # vista datetime64[ns], zero-copy
         C = pair_arrays.close
@@ -139,24 +161,43 @@ def _compute_signals_for_pair(
         V = np.asarray(day_df["volume"], dtype=np.float64)
 
     abs_min_np = ts_int64 // 60_000_000_000  # nanoseconds -> minutes since epoch
-    minutes_np = abs_min_np % 1440  # -> minutes since midnight
     n_bars = len(C)
+    derived = pair_arrays is not None and pair_arrays.has_derived
 
-    # --- Market structure (numpy puro, sin pandas .shift/.loc) ---
-    hod = np.maximum.accumulate(H)
-    lod = np.minimum.accumulate(L)
-
-    # PM High/Low ACUMULADOS hasta cada barra (causal). El valor final del día
-    # broadcast a todas las barras introducía lookahead en entradas premarket.
-    # NaN antes de la primera barra PM; tras las 09:30 vale el PM completo.
-    # MISMA fórmula numpy que en backtest_service (paridad bit a bit seq↔par).
-    pm_mask = (minutes_np >= 240) & (minutes_np < 570)
-    if pm_mask.any():
-        pm_high_run = np.fmax.accumulate(np.where(pm_mask, H, np.nan))
-        pm_low_run = np.fmin.accumulate(np.where(pm_mask, L, np.nan))
+    indicator_plan = compiled_strategy.get("_indicator_plan") if compiled_strategy else None
+    use_native = n2a_native_enabled() and indicator_plan is not None and not indicator_plan.get("has_special")
+    if C.dtype == np.float32 and not use_native:
+        # Motor float32 sin fast-path nativo: el clásico (LA especificación)
+        # recibe float64 — mismo resultado que sin BTT_FLOAT32_ENGINE.
+        C, O, H, L, V = (a.astype(np.float64) for a in (C, O, H, L, V))
+    fdt = C.dtype  # float64, o float32 en el motor float32 nativo
+
+    if derived:
+        # Slab v2: estructura precomputada por el builder (mismas fórmulas; los
+        # float32 son selecciones exactas de H/L → el upcast es bit-idéntico).
+        minutes_np = pair_arrays.minute.astype(np.int64)
+        hod = pair_arrays.hod.astype(fdt)
+        lod = pair_arrays.lod.astype(fdt)
+        pm_high_run = pair_arrays.pm_high.astype(fdt)
+        pm_low_run = pair_arrays.pm_low.astype(fdt)
     else:
-        pm_high_run = np.full(n_bars, np.nan, dtype=np.float64)
-        pm_low_run = np.full(n_bars, np.nan, dtype=np.float64)
+        minutes_np = abs_min_np % 1440  # -> minutes since midnight
+
+        # --- Market structure (numpy puro, sin pandas .shift/.loc) ---
+        hod = np.maximum.accumulate(H)
+        lod = np.minimum.accumulate(L)
+
+        # PM High/Low ACUMULADOS hasta cada barra (causal). El valor final del día
+        # broadcast a todas las barras introducía lookahead en entradas premarket.
+        # NaN antes de la primera barra PM; tras las 09:30 vale el PM completo.
+        # MISMA fórmula numpy que en backtest_service (paridad bit a bit seq↔par).
+        pm_mask = (minutes_np >= 240) & (minutes_np < 570)
+        if pm_mask.any():
+            pm_high_run = np.fmax.accumulate(np.where(pm_mask, H, np.nan))
+            pm_low_run = np.fmin.accumulate(np.where(pm_mask, L, np.nan))
+        else:
+            pm_high_run = np.full(n_bars, np.nan, dtype=fdt)
+            pm_low_run = np.full(n_bars, np.nan, dtype=fdt)
 
     prev_h = np.empty_like(hod); prev_h[0] = H[0]; prev_h[1:] = hod[:-1]
     prev_l = np.empty_like(lod); prev_l[0] = L[0]; prev_l[1:] = lod[:-1]
@@ -168,9 +209,7 @@ def _compute_signals_for_pair(
     if yest_open_val is None or pd.isna(yest_open_val):
         yest_open_val = float(O[0]) if n_bars > 0 else np.nan
 
-    indicator_plan = compiled_strategy.get("_indicator_plan") if compiled_strategy else None
-
-    if n2a_native_enabled() and indicator_plan is not None and not indicator_plan.get("has_special"):
+    if use_native:
         # ═══ N2a FAST PATH: numpy arrays nativos, sin DataFrames ═══
         arrays_native = {
             "open": O, "high": H, "low": L, "close": C, "volume": V,
@@ -181,6 +220,8 @@ def _compute_signals_for_pair(
             "pm_low": pm_low_run,
             "prev_high": prev_h, "prev_low": prev_l,
         }
+        if derived:
+            arrays_native["vwap"] = pair_arrays.vwap  # VWAP 1m acumulado del slab
         try:
             signals = translate_strategy_native(
                 arrays_native, compiled_strategy,
@@ -714,12 +755,12 @@ def _signal_chunk_slab(chunk):
     """Worker slab: item = (date, ticker, daily_stats, payload). Los payload "ref"
     viajan como índices y se resuelven aquí contra el mmap del worker (forkserver
     no hereda memmaps; slab_store cachea el MonthSlab por proceso)."""
-    from app.db.slab_store import resolve_slab_item
+    from app.db.slab_store import StaleSlabRef, resolve_slab_item
     ctx = _PIPE_CTX
     out = []
     for (date, ticker, daily_stats, payload) in chunk:
         try:
-            arrs = resolve_slab_item(payload)
+            arrs = resolve_slab_item(payload, ctx.get("dtype", np.float64))
             res = _compute_signals_for_pair(
                 date, ticker, None, daily_stats,
                 ctx["strategy_def"], ctx["compiled_strategy"],
@@ -727,6 +768,8 @@ def _signal_chunk_slab(chunk):
                 ctx["custom_end_time"], ctx["swing_active"],
                 pair_arrays=arrs,
             )
+        except StaleSlabRef:
+            raise  # el mes se reconstruyó: falla el job, no se descarta el par
         except Exception as e:
             logger.warning(f"[SLAB] signal gen failed {ticker} {date}: {e}")
             res = None
@@ -740,7 +783,7 @@ def run_slab_signals(items_iter, ctx, n_workers, progress_callback=None,
     workers>1 → pool forkserver persistente con backpressure (mismo patrón que
     run_pipelined_signals). Devuelve señales ordenadas por (date, ticker)."""
     global _PIPE_CTX
-    from app.db.slab_store import resolve_slab_item
+    from app.db.slab_store import StaleSlabRef, resolve_slab_item
 
     total = total_hint if (total_hint and total_hint > 0) else None
     signals = []
@@ -754,7 +797,7 @@ def run_slab_signals(items_iter, ctx, n_workers, progress_callback=None,
         for (date, ticker, daily_stats, payload) in items_iter:
             processed += 1
             try:
-                arrs = resolve_slab_item(payload)
+                arrs = resolve_slab_item(payload, ctx.get("dtype", np.float64))
                 res = _compute_signals_for_pair(
                     date, ticker, None, daily_stats,
                     ctx["strategy_def"], ctx["compiled_strategy"],
@@ -762,6 +805,8 @@ def run_slab_signals(items_iter, ctx, n_workers, progress_callback=None,
                     ctx["custom_end_time"], ctx["swing_active"],
                     pair_arrays=arrs,
                 )
+            except StaleSlabRef:
+                raise
             except Exception as e:
                 logger.warning(f"[SLAB] signal gen failed {ticker} {date}: {e}")
                 res = None
@@ -835,7 +880,9 @@ def run_slab_signals(items_iter, ctx, n_workers, progress_callback=None,
 
 def _enrich_trades_arr(raw_trades, ts_dt64, ts_epoch, ticker, date, risk_unit_dollar, gap_pct):
     """Réplica exacta de backtest_service._enrich_trades sobre ndarrays (sin
-    pd.Series/.iloc por trade). Produce dicts IDÉNTICOS (test de equivalencia)."""
+    pd.Series/.iloc por trade). Produce dicts IDÉNTICOS (test de equivalencia).
+    El pipeline usa ya trade_ledger.enrich_trade_columns (columnar); esta queda
+    como referencia por trade."""
     if not raw_trades:
         return []
     max_idx = len(ts_dt64) - 1
@@ -897,165 +944,293 @@ def _extract_equity_arr(eq_vals, ts_epoch):
         return []
 
 
-def simulate_and_accumulate(signals_sorted, params):
-    """Procesa las señales en orden de (date, ticker) ejecutando simulate +
-    acumulación con compounding. Devuelve (all_trades, all_equity, day_results).
+def _hard_stop_params(strategy_def):
+    """Parse hard stop configuration (554-561). Constante para todo el run."""
+    risk = strategy_def.get("risk_management", {}) if strategy_def else {}
+    use_hs = risk.get("use_hard_stop", True)
+    hs = risk.get("hard_stop", {}) if use_hs else {}
+    return {
+        "hs_type": hs.get("type"),
+        "hs_value": hs.get("value"),
+        "hs_operator": hs.get("operator", ">="),
+        "hs_offset_pct": float(hs.get("offset_pct", 0.0)),
+    }
 
-    `params` es un dict con: init_cash, risk_r, risk_type, fixed_ratio_delta,
-    size_by_sl, fees, fee_type, slippage, locates_cost, locate_type,
-    look_ahead_prevention, strategy_def, elapsed_limit, elapsed_operator.
+
+def _simulate_pair(sig, compounding_cash, params, hs_params, pnl_only=False):
+    """simulate + enriquecimiento de UN par con el cash base de su día.
+
+    Devuelve (trade_pnls, trades_records, equity_entry, stats), o None si simulate
+    falla o el par no produce trades (el loop serial los salta igual). Con
+    pnl_only=True solo simula y devuelve (trade_pnls, None, None, None).
+    Los pares de un mismo día son independientes entre sí: el único estado que
+    cruza pares es el cash base, constante dentro del día.
     """
     from app.services.backtest_service import (
         simulate, _extract_day_stats_from_values,
     )
 
-    init_cash = params["init_cash"]
+    date = sig["date"]
+    ticker = sig["ticker"]
+    arrays = sig["arrays"]
     risk_r = params["risk_r"]
     risk_type = params["risk_type"]
-    fixed_ratio_delta = params["fixed_ratio_delta"]
-    size_by_sl = params["size_by_sl"]
-    fees = params["fees"]
-    fee_type = params["fee_type"]
-    slippage = params["slippage"]
-    locates_cost = params["locates_cost"]
-    locate_type = params["locate_type"]
-    look_ahead_prevention = params["look_ahead_prevention"]
-    strategy_def = params["strategy_def"]
-    elapsed_limit = params["elapsed_limit"]
-    elapsed_operator = params["elapsed_operator"]
-
-    all_trades: list[dict] = []
-    all_equity: list[dict] = []
-    day_results: list[dict] = []
 
-    global_realized_pnl = 0.0
-    current_date = None
-    daily_pnl = 0.0
+    try:
+        sim_result = simulate(
+            close=arrays["close"],
+            open_=arrays["open"],
+            high=arrays["high"],
+            low=arrays["low"],
+            entries=sig["entries_arr"],
+            exits=sig["exits_arr"],
+            direction=sig["sig_direction"],
+            init_cash=compounding_cash,
+            risk_r=risk_r,
+            risk_type=risk_type,
+            fixed_ratio_delta=params["fixed_ratio_delta"],
+            size_by_sl=params["size_by_sl"],
+            fees=params["fees"],
+            fee_type=params["fee_type"],
+            slippage=params["slippage"],
+            locates_cost=params["locates_cost"],
+            locate_type=params["locate_type"],
+            look_ahead_prevention=params["look_ahead_prevention"],
+            sl_stop=sig["sig_sl_stop"],
+            sl_trail=sig["sig_sl_trail"],
+            tp_stop=sig["sig_tp_stop"],
+            tp_time_limit=sig["sig_tp_time_limit"],
+            trail_pct=sig["sig_trail_pct"],
+            accumulate=sig["sig_accept_reentries"],
+            max_reentries=sig["sig_max_reentries"],
+            partial_take_profits=sig["sig_partial_tps"],
+            hods=arrays.get("hod"),
+            lods=arrays.get("lod"),
+            pm_highs=arrays.get("pm_high"),
+            pm_lows=arrays.get("pm_low"),
+            prev_highs=arrays.get("prev_high"),
+            prev_lows=arrays.get("prev_low"),
+            timestamps=sig["timestamps_arr"],
+            elapsed_limit=params["elapsed_limit"],
+            elapsed_operator=params["elapsed_operator"],
+            **hs_params,
+        )
+    except Exception as exc:
+        logger.warning(f"[STREAM] day {ticker} {date} failed: {exc}")
+        return None
 
-    for sig in signals_sorted:
-        date = sig["date"]
-        ticker = sig["ticker"]
-        arrays = sig["arrays"]
-        entries_arr = sig["entries_arr"]
-        exits_arr = sig["exits_arr"]
-        timestamps_arr = sig["timestamps_arr"]
-        sig_direction = sig["sig_direction"]
-        sig_accept_reentries = sig["sig_accept_reentries"]
-        sig_max_reentries = sig["sig_max_reentries"]
-        sig_sl_stop = sig["sig_sl_stop"]
-        sig_sl_trail = sig["sig_sl_trail"]
-        sig_tp_stop = sig["sig_tp_stop"]
-        sig_tp_time_limit = sig["sig_tp_time_limit"]
-        sig_trail_pct = sig["sig_trail_pct"]
-        sig_partial_tps = sig["sig_partial_tps"]
-        gap_pct = sig["gap_pct"]
+    eq_vals = sim_result["equity"]
+    raw_trades = sim_result["trades"]
 
-        # When moving to a new day, add the previous day's PnL to the global pool (349-355)
-        if current_date is None:
-            current_date = date
-        elif date != current_date:
-            global_realized_pnl += daily_pnl
-            daily_pnl = 0.0
-            current_date = date
+    if not raw_trades:
+        return None
 
-        # Base cash for this sim run is initial + accumulated global PnL (357-358)
-        compounding_cash = init_cash + global_realized_pnl
+    # Today's PnL rolls into tomorrow's compounding base (627-629); se devuelven
+    # los pnl por trade para que el llamador los sume en el MISMO orden.
+    trade_pnls = trade_column(raw_trades, "pnl").tolist()
+    if pnl_only:
+        return trade_pnls, None, None, None
 
-        # Parse hard stop configuration (554-561)
-        risk = strategy_def.get("risk_management", {}) if strategy_def else {}
-        use_hs = risk.get("use_hard_stop", True)
-        hs = risk.get("hard_stop", {}) if use_hs else {}
-        hs_type = hs.get("type")
-        hs_value = hs.get("value")
-        hs_operator = hs.get("operator", ">=")
-        hs_offset_pct = float(hs.get("offset_pct", 0.0))
+    # Avoid pd.to_datetime parsing if array is already datetime kind natively (631-638)
+    # (sin pd.Series por par: ndarrays directos — mismos valores, mismos dicts)
+    ts_arr = arrays["timestamp"]
+    if getattr(ts_arr.dtype, "kind", "") in ("M", "m"):
+        ts_dt64 = ts_arr
+    else:
+        ts_dt64 = pd.to_datetime(ts_arr).values
+    ts_epoch = ts_dt64.astype("datetime64[s]").astype("int64")
+
+    # --- Calculate Risk Unit for "R" reporting (640-646) ---
+    if risk_type == "FIXED":
+        risk_unit_dollar = risk_r
+    elif risk_type == "PERCENT":
+        risk_unit_dollar = compounding_cash * (risk_r / 100.0)
+    else:
+        risk_unit_dollar = risk_r
 
-        try:
-            sim_result = simulate(
-                close=arrays["close"],
-                open_=arrays["open"],
-                high=arrays["high"],
-                low=arrays["low"],
-                entries=entries_arr,
-                exits=exits_arr,
-                direction=sig_direction,
-                init_cash=compounding_cash,
-                risk_r=risk_r,
-                risk_type=risk_type,
-                fixed_ratio_delta=fixed_ratio_delta,
-                size_by_sl=size_by_sl,
-                fees=fees,
-                fee_type=fee_type,
-                slippage=slippage,
-                locates_cost=locates_cost,
-                locate_type=locate_type,
-                look_ahead_prevention=look_ahead_prevention,
-                sl_stop=sig_sl_stop,
-                sl_trail=sig_sl_trail,
-                tp_stop=sig_tp_stop,
-                tp_time_limit=sig_tp_time_limit,
-                trail_pct=sig_trail_pct,
-                accumulate=sig_accept_reentries,
-                max_reentries=sig_max_reentries,
-                partial_take_profits=sig_partial_tps,
-                hs_type=hs_type,
-                hs_value=hs_value,
-                hs_operator=hs_operator,
-                hs_offset_pct=hs_offset_pct,
-                hods=arrays.get("hod"),
-                lods=arrays.get("lod"),
-                pm_highs=arrays.get("pm_high"),
-                pm_lows=arrays.get("pm_low"),
-                prev_highs=arrays.get("prev_high"),
-                prev_lows=arrays.get("prev_low"),
-                timestamps=timestamps_arr,
-                elapsed_limit=elapsed_limit,
-                elapsed_operator=elapsed_operator,
-            )
-        except Exception as exc:
-            logger.warning(f"[STREAM] day {ticker} {date} failed: {exc}")
-            continue
+    gap_pct = sig["gap_pct"]
+    trades_records = enrich_trade_columns(
+        raw_trades, ts_dt64, ts_epoch, ticker, date, risk_unit_dollar, gap_pct,
+    )
 
-        eq_vals = sim_result["equity"]
-        raw_trades = sim_result["trades"]
+    equity = _extract_equity_arr(eq_vals, ts_epoch)
 
-        if not raw_trades:
-            continue
+    stats = _extract_day_stats_from_values(eq_vals, ticker, date, trades_records, gap_pct)
 
-        # Track today's PnL to roll over into tomorrow's compounding base (627-629)
-        for t in raw_trades:
-            daily_pnl += t["pnl"]
+    return trade_pnls, trades_records, {"ticker": ticker, "date": date, "equity": equity}, stats
 
-        # Avoid pd.to_datetime parsing if array is already datetime kind natively (631-638)
-        # (sin pd.Series por par: ndarrays directos — mismos valores, mismos dicts)
-        ts_arr = arrays["timestamp"]
-        if getattr(ts_arr.dtype, "kind", "") in ("M", "m"):
-            ts_dt64 = ts_arr
-        else:
-            ts_dt64 = pd.to_datetime(ts_arr).values
-        ts_epoch = ts_dt64.astype("datetime64[s]").astype("int64")
-
-        # --- Calculate Risk Unit for "R" reporting (640-646) ---
-        if risk_type == "FIXED":
-            risk_unit_dollar = risk_r
-        elif risk_type == "PERCENT":
-            risk_unit_dollar = compounding_cash * (risk_r / 100.0)
-        else:
-            risk_unit_dollar = risk_r
 
-        trades_records = _enrich_trades_arr(
-            raw_trades, ts_dt64, ts_epoch, ticker, date, risk_unit_dollar, gap_pct,
-        )
+def _day_ranges(signals_sorted):
+    """[(start, end)] de los bloques contiguos con la misma fecha."""
+    ranges = []
+    start = 0
+    for i in range(1, len(signals_sorted) + 1):
+        if i == len(signals_sorted) or signals_sorted[i]["date"] != signals_sorted[start]["date"]:
+            ranges.append((start, i))
+            start = i
+    return ranges
+
 
-        equity = _extract_equity_arr(eq_vals, ts_epoch)
+def _day_pnl(outcomes, a, b):
+    """PnL del día sumado trade a trade en orden (date, ticker) — mismo orden de
+    sumas en coma flotante que el loop serial → cash bit-idéntico."""
+    daily_pnl = 0.0
+    for i in range(a, b):
+        out = outcomes[i]
+        if out is not None:
+            for p in out[0]:
+                daily_pnl += p
+    return daily_pnl
 
-        stats = _extract_day_stats_from_values(eq_vals, ticker, date, trades_records, gap_pct)
 
-        all_equity.append({"ticker": ticker, "date": date, "equity": equity})
-        all_trades.extend(trades_records)
+def _collect(outcomes):
+    trade_chunks: list[TradeLedger] = []
+    all_equity: list[dict] = []
+    day_results: list[dict] = []
+    for out in outcomes:
+        if out is None:
+            continue
+        _, trades_records, equity, stats = out
+        all_equity.append(equity)
+        trade_chunks.append(trades_records)
         day_results.append(stats)
+    return TradeLedger.concat(trade_chunks), all_equity, day_results
+
+
+def parallel_sim_enabled() -> bool:
+    """Gate de la mitad B en paralelo (BACKTEST_PARALLEL_SIM=1) — default OFF.
+
+    Usa los mismos BACKTEST_PARALLEL_WORKERS que la fase de señales y requiere
+    fork. Resultados bit-idénticos al serial (la reconciliación lo verifica y,
+    si no cuadra, termina en serie desde el primer día discrepante).
+    """
+    return os.getenv("BACKTEST_PARALLEL_SIM", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def simulate_and_accumulate(signals_sorted, params):
+    """Procesa las señales en orden de (date, ticker) ejecutando simulate +
+    acumulación con compounding. Devuelve (trades: TradeLedger, all_equity, day_results).
+
+    `params` es un dict con: init_cash, risk_r, risk_type, fixed_ratio_delta,
+    size_by_sl, fees, fee_type, slippage, locates_cost, locate_type,
+    look_ahead_prevention, strategy_def, elapsed_limit, elapsed_operator.
+    """
+    n_workers = get_parallel_workers()
+    if parallel_sim_enabled() and n_workers > 1 and fork_available() and len(signals_sorted) > 1:
+        try:
+            return _simulate_parallel(signals_sorted, params, n_workers)
+        except Exception as e:
+            logger.warning(f"[PARALLEL-SIM] fallo en el pool ({e}); simulate en serie")
+    return _collect(_simulate_serial(signals_sorted, params))
 
-    # Final sweep of daily_pnl if the last day generated trades (671-672)
-    global_realized_pnl += daily_pnl
 
-    return all_trades, all_equity, day_results
+def _simulate_serial(signals_sorted, params, outcomes=None, start_day=0, days=None):
+    """Loop serial: cada día se dimensiona con el PnL realizado de los previos.
+
+    Con `outcomes`/`start_day` retoma desde un día dado reutilizando los
+    resultados (ya exactos) de los días anteriores."""
+    hs_params = _hard_stop_params(params["strategy_def"])
+    init_cash = params["init_cash"]
+    days = days if days is not None else _day_ranges(signals_sorted)
+    if outcomes is None:
+        outcomes = [None] * len(signals_sorted)
+
+    global_realized_pnl = 0.0
+    for d, (a, b) in enumerate(days):
+        # Base cash for this sim run is initial + accumulated global PnL (357-358)
+        compounding_cash = init_cash + global_realized_pnl
+        if d >= start_day:
+            for i in range(a, b):
+                outcomes[i] = _simulate_pair(signals_sorted[i], compounding_cash, params, hs_params)
+        # When moving to a new day, add the previous day's PnL to the global pool (349-355)
+        global_realized_pnl += _day_pnl(outcomes, a, b)
+    return outcomes
+
+
+# ---------------------------------------------------------------------------
+# Mitad B en paralelo (BACKTEST_PARALLEL_SIM) + reconciliación del compounding
+# ---------------------------------------------------------------------------
+# El único estado que cruza pares es el cash base del día (init_cash + PnL
+# realizado de los días previos), constante dentro del día:
+#   - FIXED / FIXED_RATIO: el tamaño no depende del cash salvo el tope por cash
+#     disponible. Sonda en paralelo de TODOS los pares con init_cash → PnL por
+#     trade → camino de cash especulado por día; segunda pasada en paralelo con
+#     ese cash. Si el tope no mordió, la especulación es exacta.
+#   - PERCENT (y cualquier otro): olas por día — los pares de un día en
+#     paralelo con su cash exacto; el cash del día siguiente sale de la ola.
+# La reconciliación recorre los días en orden recomputando el cash con las sumas
+# trade a trade del serial; en el primer día cuyo cash usado no coincide BIT A
+# BIT, los días restantes se recalculan en serie → tol-0 garantizado.
+
+_SIM_CTX: dict = {}
+_CASH_INVARIANT_RISK = ("FIXED", "FIXED_RATIO")
+
+
+def _sim_chunk(tasks, pnl_only):
+    """Worker: [(idx, cash)] → [(idx, outcome)] leyendo señales del ctx heredado."""
+    ctx = _SIM_CTX
+    signals, params, hs_params = ctx["signals"], ctx["params"], ctx["hs_params"]
+    return [
+        (i, _simulate_pair(signals[i], cash, params, hs_params, pnl_only=pnl_only))
+        for i, cash in tasks
+    ]
+
+
+def _run_sim_tasks(pool, tasks, n_workers, outcomes, pnl_only=False):
+    chunk_size = max(1, math.ceil(len(tasks) / (n_workers * 4)))
+    futures = [
+        pool.submit(_sim_chunk, tasks[k: k + chunk_size], pnl_only)
+        for k in range(0, len(tasks), chunk_size)
+    ]
+    for future in as_completed(futures):
+        for i, out in future.result():
+            outcomes[i] = out
+
+
+def _simulate_parallel(signals_sorted, params, n_workers):
+    global _SIM_CTX
+    init_cash = params["init_cash"]
+    hs_params = _hard_stop_params(params["strategy_def"])
+    days = _day_ranges(signals_sorted)
+    n = len(signals_sorted)
+    outcomes = [None] * n
+    cash_used = [None] * len(days)
+
+    _SIM_CTX = {"signals": signals_sorted, "params": params, "hs_params": hs_params}
+    mp_ctx = multiprocessing.get_context("fork")
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_ctx) as pool:
+            if params["risk_type"] in _CASH_INVARIANT_RISK:
+                probe = [None] * n
+                _run_sim_tasks(pool, [(i, init_cash) for i in range(n)], n_workers, probe, pnl_only=True)
+                global_realized_pnl = 0.0
+                for d, (a, b) in enumerate(days):
+                    cash_used[d] = init_cash + global_realized_pnl
+                    global_realized_pnl += _day_pnl(probe, a, b)
+                tasks = [(i, cash_used[d]) for d, (a, b) in enumerate(days) for i in range(a, b)]
+                _run_sim_tasks(pool, tasks, n_workers, outcomes)
+            else:
+                global_realized_pnl = 0.0
+                for d, (a, b) in enumerate(days):
+                    cash_used[d] = init_cash + global_realized_pnl
+                    if b - a == 1:
+                        # día de un solo par: sin IPC
+                        outcomes[a] = _simulate_pair(signals_sorted[a], cash_used[d], params, hs_params)
+                    else:
+                        _run_sim_tasks(pool, [(i, cash_used[d]) for i in range(a, b)], n_workers, outcomes)
+                    global_realized_pnl += _day_pnl(outcomes, a, b)
+    finally:
+        _SIM_CTX = {}
+
+    # Reconciliación: el cash de cada día debe ser el que habría visto el serial.
+    global_realized_pnl = 0.0
+    for d, (a, b) in enumerate(days):
+        if cash_used[d] != init_cash + global_realized_pnl:
+            logger.info(
+                f"[PARALLEL-SIM] especulación de cash fallida en {signals_sorted[a]['date']} "
+                f"({len(days) - d}/{len(days)} días en serie)"
+            )
+            _simulate_serial(signals_sorted, params, outcomes=outcomes, start_day=d, days=days)
+            break
+        global_realized_pnl += _day_pnl(outcomes, a, b)
+    return _collect(outcomes)
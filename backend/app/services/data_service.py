@@ -13,6 +13,7 @@ import io
 import json
 import logging
 import os
+import re
 import time
 
 import numpy as np
@@ -599,6 +600,71 @@ def _deserialize_qualifying_df(payload: str) -> pd.DataFrame:
     return pd.read_feather(io.BytesIO(base64.b64decode(payload)))
 
 
+# LAG / LEAD sources of the qualifying query's Stage 2 (offsets 1 and 2).
+_QUALIFYING_LAG_COLS = ("rth_open", "rth_close", "rth_high", "rth_low", "rth_volume", "pm_high")
+_QUALIFYING_LEAD_COLS = _QUALIFYING_LAG_COLS + ("open", "pm_low", "gap_pct", "pm_volume", "timestamp")
+
+
+def _qualifying_window_columns(sma_periods) -> list[str]:
+    """Names of the window columns the qualifying SQL adds on top of daily_metrics:
+    lag_*/lead_*_{1,2}, lead_timestamp_{1,2} and, per SMA period P, sma_P and
+    its lag/lead."""
+    cols = [f"lag_{c}_{k}" for k in (1, 2) for c in _QUALIFYING_LAG_COLS]
+    cols += [f"lead_{c}_{k}" for k in (1, 2) for c in _QUALIFYING_LEAD_COLS]
+    for P in sorted(sma_periods):
+        cols.append(f"sma_{P}")
+        cols += [f"{d}_sma_{P}_{k}" for d in ("lag", "lead") for k in (1, 2)]
+    return cols
+
+
+def _slab_window_frame(tickers, dates, columns, last_date=None) -> pd.DataFrame | None:
+    """`columns` (see _qualifying_window_columns) for the (ticker, date) pairs,
+    read from the shared daily slab instead of window functions over the whole
+    daily_metrics table.
+
+    Returns None — the caller keeps its SQL/pandas path — when the slab is
+    disabled or unpublished, when it ends before `last_date` (a LEAD at its edge
+    would be NULL where daily_metrics already has the next day), when any pair
+    is missing from it or when a column is not in it. Never raises.
+    """
+    try:
+        from app.db.slab_store import get_daily
+        daily = get_daily()
+        if daily is None:
+            return None
+        if last_date is not None and (daily.last_date or "") < str(last_date)[:10]:
+            return None
+        rows = daily.rows(list(tickers), list(dates))
+        if (rows < 0).any():
+            return None
+        return daily.frame_rows(rows, columns)
+    except Exception as e:
+        logger.warning(f"[SLAB] qualifying window columns from daily slab failed: {e}")
+        return None
+
+
+def _qualifying_from_daily_slab(con, where_clause: str, sma_periods) -> pd.DataFrame | None:
+    """Local qualifying rows with their window columns taken from the daily slab,
+    or None when the slab cannot serve them (see _slab_window_frame)."""
+    from app.db.slab_store import get_daily
+    if get_daily() is None:
+        return None
+    base = con.execute(f"""
+        SELECT *, CAST("timestamp" AS DATE) AS date
+        FROM daily_metrics
+        WHERE {where_clause}
+    """).fetchdf()
+    last_date = con.execute('SELECT MAX(CAST("timestamp" AS DATE)) FROM daily_metrics').fetchone()[0]
+    windows = _slab_window_frame(base["ticker"], base["date"],
+                                 _qualifying_window_columns(sma_periods), last_date)
+    if windows is None:
+        return None
+    windows.index = base.index
+    date = base.pop("date")
+    logger.info(f"[SLAB] qualifying window columns from daily slab: {len(base)} rows")
+    return pd.concat([base, windows], axis=1).assign(date=date)
+
+
 def fetch_qualifying_data(
     dataset_id: str,
     req_start_date: str | None = None,
@@ -696,7 +762,8 @@ def _fetch_qualifying_data_uncached(
     Fetch qualifying rows from daily_metrics via hot cache RAM or direct GCS query.
 
     Uses hot cache when gap >= 10% and apply_day is gap_day and no preconditions;
-    otherwise falls back to GCS.
+    otherwise falls back to GCS. On the local and hot-cache paths the LEAD/LAG/SMA
+    columns come from the daily slab when it covers the qualifying rows.
     """
     import os
     provider = os.getenv("DB_PROVIDER", "motherduck").lower()
@@ -785,22 +852,29 @@ def _fetch_qualifying_data_uncached(
 
             stage_2_sql_cols = ", ".join(stage_2_cols)
 
-            subquery = f"""
-            (
-                WITH raw_daily AS (
-                    SELECT {stage_1_sql_cols}
-                    FROM daily_metrics
-                )
-                SELECT {stage_2_sql_cols}
-                FROM raw_daily
-            ) i
-            """
-            sql = f"""
-            SELECT *, CAST("timestamp" AS DATE) AS date
-            FROM {subquery}
-            WHERE {where_clause}
-            """
-            df = con.execute(sql).fetchdf()
+            # Daily slab: filter daily_metrics without windows and read the
+            # LEAD/LAG/SMA columns of the qualifying rows from shared memory.
+            # Rules that reference a window column keep the SQL.
+            df = None
+            if not re.search(r"\b(lag|lead|sma)_", where_clause):
+                df = _qualifying_from_daily_slab(con, where_clause, sma_periods)
+            if df is None:
+                subquery = f"""
+                (
+                    WITH raw_daily AS (
+                        SELECT {stage_1_sql_cols}
+                        FROM daily_metrics
+                    )
+                    SELECT {stage_2_sql_cols}
+                    FROM raw_daily
+                ) i
+                """
+                sql = f"""
+                SELECT *, CAST("timestamp" AS DATE) AS date
+                FROM {subquery}
+                WHERE {where_clause}
+                """
+                df = con.execute(sql).fetchdf()
             if not df.empty:
                 df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
 
@@ -899,6 +973,20 @@ def _fetch_qualifying_data_uncached(
                 # Compute LEAD/LAG columns if they don't exist in the hot cache
                 # The hot_cache_daily_gaps.parquet doesn't have these columns pre-computed,
                 # but they are needed for gap_1_day/gap_2_day apply_day and for the swing option.
+                if 'lead_timestamp_1' not in result.columns and not result.empty:
+                    # Daily slab first: LEAD/LAG over the full daily history. The
+                    # shift below only sees the hot rows (gap days), so its
+                    # "next day" is the next gap day of the ticker.
+                    windows = _slab_window_frame(
+                        result['ticker'],
+                        pd.to_datetime(result['timestamp']).dt.strftime('%Y-%m-%d'),
+                        _qualifying_window_columns(()),
+                        last_date=pd.to_datetime(hot_df['timestamp']).max(),
+                    )
+                    if windows is not None:
+                        windows.index = result.index
+                        result = pd.concat([result, windows], axis=1)
+                        print(f"[HOT CACHE] LEAD/LAG columns from the daily slab")
                 if 'lead_timestamp_1' not in result.columns and not result.empty:
                     result = result.sort_values(['ticker', 'timestamp']).copy()
                     grp = result.groupby('ticker')
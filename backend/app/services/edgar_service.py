@@ -23,6 +23,8 @@ import warnings
 import requests
 from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 
+from app.services import single_flight
+
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
 logger = logging.getLogger("edgar")
@@ -81,18 +83,22 @@ def _get_submissions_recent(cik: str) -> dict:
         hit = _SUBMISSIONS_CACHE.get(cik)
         if hit and hit[1] > now:
             return hit[0]
-    try:
-        r = requests.get(
-            f"https://data.sec.gov/submissions/CIK{cik}.json",
-            headers=SEC_HEADERS, timeout=12,
-        )
-        recent = r.json().get("filings", {}).get("recent", {})
-    except Exception as e:
-        logger.warning("[EDGAR] submissions falló para CIK %s: %s", cik, e)
-        return {}
-    with _SUBMISSIONS_LOCK:
-        _SUBMISSIONS_CACHE[cik] = (recent, now + _SUBMISSIONS_TTL)
-    return recent
+
+    def _fetch():
+        try:
+            r = requests.get(
+                f"https://data.sec.gov/submissions/CIK{cik}.json",
+                headers=SEC_HEADERS, timeout=12,
+            )
+            recent = r.json().get("filings", {}).get("recent", {})
+        except Exception as e:
+            logger.warning("[EDGAR] submissions falló para CIK %s: %s", cik, e)
+            return {}
+        with _SUBMISSIONS_LOCK:
+            _SUBMISSIONS_CACHE[cik] = (recent, now + _SUBMISSIONS_TTL)
+        return recent
+
+    return single_flight.group("edgar.submissions").do(cik, _fetch)
 
 
 def _rows_from_recent(recent: dict, limit: int, keep) -> list:
@@ -171,38 +177,41 @@ def get_xbrl_concept_history(cik: str, concepts=CASH_CONCEPTS, limit: int = 24)
         if hit and hit[1] > now:
             return hit[0]
 
-    history: list = []
-    for concept in concepts:
-        try:
-            r = requests.get(
-                f"https://data.sec.gov/api/xbrl/companyconcept/CIK{cik}/us-gaap/{concept}.json",
-                headers=SEC_HEADERS, timeout=10,
-            )
-            if r.status_code != 200:
-                continue
-            facts = (r.json().get("units") or {}).get("USD") or []
-        except Exception as e:
-            logger.warning("[EDGAR] companyconcept %s falló para CIK %s: %s", concept, cik, e)
-            continue
-        by_end: dict = {}
-        for f in facts:
-            end = f.get("end")
-            if not end or f.get("val") is None:
+    def _fetch():
+        history: list = []
+        for concept in concepts:
+            try:
+                r = requests.get(
+                    f"https://data.sec.gov/api/xbrl/companyconcept/CIK{cik}/us-gaap/{concept}.json",
+                    headers=SEC_HEADERS, timeout=10,
+                )
+                if r.status_code != 200:
+                    continue
+                facts = (r.json().get("units") or {}).get("USD") or []
+            except Exception as e:
+                logger.warning("[EDGAR] companyconcept %s falló para CIK %s: %s", concept, cik, e)
                 continue
-            prev = by_end.get(end)
-            if prev is None or (f.get("filed") or "") >= (prev.get("filed") or ""):
-                by_end[end] = f
-        if by_end:
-            rows = sorted(by_end.values(), key=lambda f: f["end"])[-limit:]
-            history = [
-                {"date": f["end"], "value": float(f["val"]), "form": f.get("form")}
-                for f in rows
-            ]
-            break
+            by_end: dict = {}
+            for f in facts:
+                end = f.get("end")
+                if not end or f.get("val") is None:
+                    continue
+                prev = by_end.get(end)
+                if prev is None or (f.get("filed") or "") >= (prev.get("filed") or ""):
+                    by_end[end] = f
+            if by_end:
+                rows = sorted(by_end.values(), key=lambda f: f["end"])[-limit:]
+                history = [
+                    {"date": f["end"], "value": float(f["val"]), "form": f.get("form")}
+                    for f in rows
+                ]
+                break
 
-    with _XBRL_LOCK:
-        _XBRL_CACHE[key] = (history, now + _XBRL_TTL)
-    return history
+        with _XBRL_LOCK:
+            _XBRL_CACHE[key] = (history, now + _XBRL_TTL)
+        return history
+
+    return single_flight.group("edgar.xbrl").do((key, limit), _fetch)
 
 
 def _doc_url(cik: str, accession: str, primary_document: str) -> str:
@@ -274,16 +283,20 @@ def fetch_document_text(cik: str, accession: str, primary_document: str,
         hit = _DOC_CACHE.get(key)
         if hit and hit[1] > now:
             return hit[0]
-    try:
-        url = _doc_url(cik, accession, primary_document)
-        r = requests.get(url, headers=SEC_HEADERS, timeout=20)
-        text = html_to_text(r.text)[:max_chars]
-    except Exception as e:
-        logger.warning("[EDGAR] fetch doc falló %s: %s", key, e)
-        return None
-    with _DOC_CACHE_LOCK:
-        _DOC_CACHE[key] = (text, now + _DOC_TTL)
-    return text
+
+    def _fetch():
+        try:
+            url = _doc_url(cik, accession, primary_document)
+            r = requests.get(url, headers=SEC_HEADERS, timeout=20)
+            text = html_to_text(r.text)[:max_chars]
+        except Exception as e:
+            logger.warning("[EDGAR] fetch doc falló %s: %s", key, e)
+            return None
+        with _DOC_CACHE_LOCK:
+            _DOC_CACHE[key] = (text, now + _DOC_TTL)
+        return text
+
+    return single_flight.group("edgar.doc").do((key, max_chars), _fetch)
 
 
 def extract_section(text: str, keys, end_keys=None, max_chars: int = 24_000,
@@ -0,0 +1,126 @@
+"""
+Paridad del motor float32 (BTT_FLOAT32_ENGINE) contra el float64 legacy.
+
+El motor float32 NO es bit-idéntico: los precios viajan como float32 (vistas
+del slab), los indicadores nativos redondean su salida a float32 y una
+comparación en el filo (Close == VWAP ± 1 ulp) puede decidir distinto. El
+simulador, en cambio, es exacto sobre los mismos float32 (carga float32,
+aritmética float64). Este módulo cuantifica la diferencia a nivel de TRADE:
+
+  compare_trades(ref, cand)     empareja trades por (ticker, date, entry_idx, n)
+                                 y reporta ausentes / sobrantes / campos que
+                                 difieren más allá de la tolerancia
+  run_backtest_parity(**kw)     corre run_backtest dos veces (flag OFF / ON)
+                                 sobre las mismas entradas y compara
+  format_report(report)         resumen legible (lo imprime el script)
+
+Lo usan scripts/parity_float32.py y tests/test_float32_engine.py.
+"""
+import math
+import os
+import time
+from collections import defaultdict
+
+# Campos que deben coincidir exactamente / dentro de tolerancia relativa.
+EXACT_FIELDS = ("exit_idx", "direction", "exit_reason")
+FLOAT_FIELDS = ("entry_price", "exit_price", "size", "pnl", "return_pct", "mae", "mfe", "stop_loss")
+
+
+def _keyed(trades) -> dict:
+    """{(ticker, date, entry_idx, n): trade}; `n` distingue los parciales que
+    comparten entrada (orden de emisión del simulador)."""
+    seen = defaultdict(int)
+    out = {}
+    for t in trades:
+        base = (str(t["ticker"]), str(t["date"]), int(t["entry_idx"]))
+        out[base + (seen[base],)] = t
+        seen[base] += 1
+    return out
+
+
+def _rel(a, b) -> float:
+    if a is None or b is None:
+        return 0.0 if a is b else math.inf
+    a, b = float(a), float(b)
+    if a == b:
+        return 0.0
+    return abs(a - b) / max(abs(a), abs(b), 1e-12)
+
+
+def compare_trades(ref, cand, rtol: float = 1e-6) -> dict:
+    """Informe de divergencias entre dos secuencias de trades (dicts o
+    TradeLedger). `rtol` es la tolerancia relativa de los campos float."""
+    a, b = _keyed(ref), _keyed(cand)
+    missing = sorted(k for k in a if k not in b)
+    extra = sorted(k for k in b if k not in a)
+    divergent = []
+    max_rel = {f: 0.0 for f in FLOAT_FIELDS}
+    for key in sorted(k for k in a if k in b):
+        ta, tb = a[key], b[key]
+        for f in EXACT_FIELDS:
+            if ta.get(f) != tb.get(f):
+                divergent.append({"key": key, "field": f, "ref": ta.get(f), "cand": tb.get(f)})
+        for f in FLOAT_FIELDS:
+            r = _rel(ta.get(f), tb.get(f))
+            max_rel[f] = max(max_rel[f], r)
+            if r > rtol:
+                divergent.append({"key": key, "field": f, "ref": ta.get(f), "cand": tb.get(f), "rel": r})
+    pnl_ref = math.fsum(float(t["pnl"]) for t in a.values())
+    pnl_cand = math.fsum(float(t["pnl"]) for t in b.values())
+    return {
+        "n_ref": len(a), "n_cand": len(b),
+        "matched": len(a) - len(missing),
+        "missing": missing, "extra": extra, "divergent": divergent,
+        "max_rel": max_rel,
+        "pnl_ref": round(pnl_ref, 4), "pnl_cand": round(pnl_cand, 4),
+        "pnl_diff": round(pnl_cand - pnl_ref, 4),
+        "ok": not missing and not extra and not divergent,
+    }
+
+
+def run_backtest_parity(rtol: float = 1e-6, **run_kwargs) -> dict:
+    """run_backtest(**run_kwargs) con BTT_FLOAT32_ENGINE=0 y =1; el resto del
+    entorno (slab stream, N2a nativo, kernel Numba) lo fija el llamador. Los
+    iteradores de `run_kwargs` se consumen: en modo slab pasar iter(())."""
+    from app.services.backtest_service import run_backtest
+
+    prev = os.environ.get("BTT_FLOAT32_ENGINE")
+    results, seconds = {}, {}
+    try:
+        for label, flag in (("f64", "0"), ("f32", "1")):
+            os.environ["BTT_FLOAT32_ENGINE"] = flag
+            kw = dict(run_kwargs)
+            if "qualifying_df" in kw:
+                kw["qualifying_df"] = kw["qualifying_df"].copy()
+            t0 = time.perf_counter()
+            results[label] = run_backtest(**kw)
+            seconds[label] = round(time.perf_counter() - t0, 3)
+    finally:
+        if prev is None:
+            os.environ.pop("BTT_FLOAT32_ENGINE", None)
+        else:
+            os.environ["BTT_FLOAT32_ENGINE"] = prev
+    report = compare_trades(results["f64"]["trades"], results["f32"]["trades"], rtol=rtol)
+    report["seconds"] = seconds
+    return report
+
+
+def format_report(report: dict, limit: int = 20) -> str:
+    lines = [
+        f"trades  f64={report['n_ref']}  f32={report['n_cand']}  emparejados={report['matched']}",
+        f"pnl     f64={report['pnl_ref']}  f32={report['pnl_cand']}  diff={report['pnl_diff']}",
+        "max_rel " + "  ".join(f"{f}={v:.2e}" for f, v in report["max_rel"].items()),
+    ]
+    if "seconds" in report:
+        lines.append("tiempo  " + "  ".join(f"{k}={v}s" for k, v in report["seconds"].items()))
+    for name in ("missing", "extra"):
+        keys = report[name]
+        if keys:
+            lines.append(f"{name} ({len(keys)}): " + ", ".join(map(str, keys[:limit])))
+    div = report["divergent"]
+    if div:
+        lines.append(f"divergent ({len(div)}):")
+        for d in div[:limit]:
+            lines.append(f"  {d['key']} {d['field']}: {d['ref']} -> {d['cand']}")
+    lines.append("OK" if report["ok"] else "DIVERGE")
+    return "\n".join(lines)
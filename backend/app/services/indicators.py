@@ -35,7 +35,17 @@ def _safe_float(val) -> float:
 # DataFrame indexed by date string with rth_high / rth_low columns.
 _ticker_daily_ohlc_cache = {}
 
-def prefetch_daily_ohlc(tickers: list[str]):
+
+def _daily_slab():
+    """Shared mmapped daily_metrics store (BTT_DAILY_SLAB_ENABLED), or None."""
+    try:
+        from app.db.slab_store import get_daily
+        return get_daily()
+    except Exception:
+        return None
+
+
+def prefetch_daily_ohlc(tickers: list[str], dates: list[str] | None = None):
     """
     Prefetches daily historical metrics for the given tickers and stores them in
     the process-global per-ticker cache _ticker_daily_ohlc_cache. This avoids
@@ -53,13 +63,29 @@ def prefetch_daily_ohlc(tickers: list[str]):
         later run with different tickers reused a frame holding only the first
         run's tickers). Per-ticker accumulation is correct across runs because
         `tickers_to_fetch` already excludes anything cached.
+
+    `dates` (parallel to `tickers`) are the days the backtest will look back
+    from. A ticker is left to the daily slab only when the slab holds every one
+    of its requested days; a slab that is older than the run still gets the
+    ticker prefetched, so the per-row fallback never turns into a per-ticker
+    query. Without `dates` nothing is skipped on slab presence.
     """
     global _ticker_daily_ohlc_cache
     if not tickers:
         return
 
     # Only fetch tickers that are not already cached
-    tickers_to_fetch = [t for t in tickers if t and t not in _ticker_daily_ohlc_cache]
+    tickers_to_fetch = [t for t in dict.fromkeys(tickers)
+                        if t and t not in _ticker_daily_ohlc_cache]
+    # Tickers whose requested days are all in the daily slab are served from shared memory
+    daily = _daily_slab() if dates is not None else None
+    if daily is not None and tickers_to_fetch:
+        try:
+            rows = daily.rows(tickers, dates)
+            missing = {t for t, r in zip(tickers, rows) if r < 0}
+            tickers_to_fetch = [t for t in tickers_to_fetch if t in missing]
+        except Exception:
+            pass
     if not tickers_to_fetch:
         return
 
@@ -103,16 +129,31 @@ def prefetch_daily_ohlc(tickers: list[str]):
 # ---------------------------------------------------------------------------
 # Numba-accelerated indicator implementations
 # ---------------------------------------------------------------------------
+#
+# Float32 engine (BTT_FLOAT32_ENGINE): when every price input is float32 the
+# wrappers feed the cores float32 arrays as-is (no upcast copy; numba compiles a
+# float32 specialization), the cores keep their float64 accumulators/outputs and
+# the wrapper rounds the result to float32 once. With float64 inputs `dt` is
+# float64 and every `.astype(dt, copy=False)` is a no-op: bit-identical.
+
+def _engine_dtype(*arrays) -> type:
+    """np.float32 if all inputs are float32 (float32 engine), else np.float64."""
+    if arrays and all(getattr(a, "dtype", None) == np.float32 for a in arrays):
+        return np.float32
+    return np.float64
+
 
 def _sma(values: np.ndarray, window: int) -> np.ndarray:
     """SMA via cumsum — already vectorized, no loop needed."""
+    dt = _engine_dtype(values)
     out = np.full(len(values), np.nan)
     if len(values) < window:
-        return out
-    cs = np.cumsum(values)
+        return out.astype(dt, copy=False)
+    # float32: the running sum must accumulate in float64 (cumsum drift)
+    cs = np.cumsum(values, dtype=np.float64) if dt is np.float32 else np.cumsum(values)
     out[window - 1] = cs[window - 1] / window
     out[window:] = (cs[window:] - cs[:-window]) / window
-    return out
+    return out.astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -135,7 +176,8 @@ def _ema_core(values, window):
 
 
 def _ema(values: np.ndarray, window: int) -> np.ndarray:
-    return _ema_core(np.ascontiguousarray(values, dtype=np.float64), window)
+    dt = _engine_dtype(values)
+    return _ema_core(np.ascontiguousarray(values, dtype=dt), window).astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -187,18 +229,21 @@ def _rsi_core(close, window):
 
 
 def _rsi(close: np.ndarray, window: int) -> np.ndarray:
-    return _rsi_core(np.ascontiguousarray(close, dtype=np.float64), window)
+    dt = _engine_dtype(close)
+    return _rsi_core(np.ascontiguousarray(close, dtype=dt), window).astype(dt, copy=False)
 
 
 def _macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
     """Returns (macd_line, signal_line, histogram). Uses Numba-accelerated EMA."""
-    c = np.ascontiguousarray(close, dtype=np.float64)
+    dt = _engine_dtype(close)
+    c = np.ascontiguousarray(close, dtype=dt)
     ema_fast = _ema_core(c, fast)
     ema_slow = _ema_core(c, slow)
     macd_line = ema_fast - ema_slow
     signal_line = _ema_core(macd_line, signal)
     histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
+    return (macd_line.astype(dt, copy=False), signal_line.astype(dt, copy=False),
+            histogram.astype(dt, copy=False))
 
 
 @njit(cache=True)
@@ -233,20 +278,25 @@ def _atr_core(high, low, close, window):
 
 
 def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    dt = _engine_dtype(high, low, close)
     return _atr_core(
-        np.ascontiguousarray(high, dtype=np.float64),
-        np.ascontiguousarray(low, dtype=np.float64),
-        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(high, dtype=dt),
+        np.ascontiguousarray(low, dtype=dt),
+        np.ascontiguousarray(close, dtype=dt),
         window,
-    )
+    ).astype(dt, copy=False)
 
 
 def _vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    dt = _engine_dtype(high, low, close, volume)
+    if dt is np.float32:
+        # cumulative price×volume sums need float64 headroom
+        high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (high, low, close, volume))
     typical = (high + low + close) / 3.0
     cum_tp_vol = np.cumsum(typical * volume)
     cum_vol = np.cumsum(volume)
     with np.errstate(divide="ignore", invalid="ignore"):
-        return np.where(cum_vol != 0, cum_tp_vol / cum_vol, np.nan)
+        return np.where(cum_vol != 0, cum_tp_vol / cum_vol, np.nan).astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -464,14 +514,15 @@ def _stochastic_k(high, low, close, k_period):
 def _stochastic(high: np.ndarray, low: np.ndarray, close: np.ndarray,
                 k_period: int = 14, d_period: int = 3) -> tuple:
     """Returns (%K, %D)."""
+    dt = _engine_dtype(high, low, close)
     k = _stochastic_k(
-        np.ascontiguousarray(high, dtype=np.float64),
-        np.ascontiguousarray(low, dtype=np.float64),
-        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(high, dtype=dt),
+        np.ascontiguousarray(low, dtype=dt),
+        np.ascontiguousarray(close, dtype=dt),
         k_period,
     )
     d = _sma(k, d_period)
-    return k, d
+    return k.astype(dt, copy=False), d.astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -495,12 +546,13 @@ def _rolling_std_core(values, period):
 
 def _bollinger_bands(close: np.ndarray, period: int = 20, std_dev: float = 2.0) -> tuple:
     """Returns (upper, middle, lower)."""
-    c = np.ascontiguousarray(close, dtype=np.float64)
+    dt = _engine_dtype(close)
+    c = np.ascontiguousarray(close, dtype=dt)
     middle = _sma(c, period)
     rolling_std = _rolling_std_core(c, period)
     upper = middle + std_dev * rolling_std
     lower = middle - std_dev * rolling_std
-    return upper, middle, lower
+    return upper.astype(dt, copy=False), middle, lower.astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -541,24 +593,25 @@ def _cci_core(high, low, close, period):
 
 
 def _cci(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 20) -> np.ndarray:
+    dt = _engine_dtype(high, low, close)
     return _cci_core(
-        np.ascontiguousarray(high, dtype=np.float64),
-        np.ascontiguousarray(low, dtype=np.float64),
-        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(high, dtype=dt),
+        np.ascontiguousarray(low, dtype=dt),
+        np.ascontiguousarray(close, dtype=dt),
         period,
-    )
+    ).astype(dt, copy=False)
 
 
 def _roc(close: np.ndarray, period: int = 12) -> np.ndarray:
     out = np.full(len(close), np.nan)
     out[period:] = (close[period:] - close[:-period]) / close[:-period] * 100
-    return out
+    return out.astype(_engine_dtype(close), copy=False)
 
 
 def _momentum(close: np.ndarray, period: int = 10) -> np.ndarray:
     out = np.full(len(close), np.nan)
     out[period:] = close[period:] - close[:-period]
-    return out
+    return out.astype(_engine_dtype(close), copy=False)
 
 
 @njit(cache=True)
@@ -576,10 +629,11 @@ def _obv_core(close, volume):
 
 
 def _obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    dt = _engine_dtype(close, volume)
     return _obv_core(
-        np.ascontiguousarray(close, dtype=np.float64),
-        np.ascontiguousarray(volume, dtype=np.float64),
-    )
+        np.ascontiguousarray(close, dtype=dt),
+        np.ascontiguousarray(volume, dtype=dt),
+    ).astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -608,15 +662,16 @@ def _dmi_loops(high, low, close):
 
 def _dmi(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> tuple:
     """Returns (+DI, -DI)."""
-    h = np.ascontiguousarray(high, dtype=np.float64)
-    l = np.ascontiguousarray(low, dtype=np.float64)
-    c = np.ascontiguousarray(close, dtype=np.float64)
+    dt = _engine_dtype(high, low, close)
+    h = np.ascontiguousarray(high, dtype=dt)
+    l = np.ascontiguousarray(low, dtype=dt)
+    c = np.ascontiguousarray(close, dtype=dt)
     plus_dm, minus_dm, tr = _dmi_loops(h, l, c)
 
     atr = _ema_core(tr, period)
     plus_di = _ema_core(plus_dm, period) / np.where(atr != 0, atr, np.nan) * 100
     minus_di = _ema_core(minus_dm, period) / np.where(atr != 0, atr, np.nan) * 100
-    return plus_di, minus_di
+    return plus_di.astype(dt, copy=False), minus_di.astype(dt, copy=False)
 
 
 @njit(cache=True)
@@ -649,12 +704,14 @@ def _heikin_ashi_core(open_, high, low, close):
 
 def _heikin_ashi(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> tuple:
     """Returns (ha_open, ha_high, ha_low, ha_close)."""
-    return _heikin_ashi_core(
-        np.ascontiguousarray(open_, dtype=np.float64),
-        np.ascontiguousarray(high, dtype=np.float64),
-        np.ascontiguousarray(low, dtype=np.float64),
-        np.ascontiguousarray(close, dtype=np.float64),
+    dt = _engine_dtype(open_, high, low, close)
+    out = _heikin_ashi_core(
+        np.ascontiguousarray(open_, dtype=dt),
+        np.ascontiguousarray(high, dtype=dt),
+        np.ascontiguousarray(low, dtype=dt),
+        np.ascontiguousarray(close, dtype=dt),
     )
+    return tuple(a.astype(dt, copy=False) for a in out)
 
 
 @njit(cache=True)
@@ -685,7 +742,8 @@ def _linear_regression_core(close, period):
 
 
 def _linear_regression(close: np.ndarray, period: int = 14) -> np.ndarray:
-    return _linear_regression_core(np.ascontiguousarray(close, dtype=np.float64), period)
+    dt = _engine_dtype(close)
+    return _linear_regression_core(np.ascontiguousarray(close, dtype=dt), period).astype(dt, copy=False)
 
 
 def _pivot_points(daily_stats: dict) -> dict:
@@ -1193,7 +1251,17 @@ def _compute_raw(
             return pd.Series(np.nan, index=close.index)
             
         lookback = days_lookback or period or 5
-        
+        is_high = name in ("High of last X days", "Max of last X days")
+
+        # Daily slab: row arithmetic inside the ticker's run, no per-ticker frame.
+        # A pair missing from the slab (built before that day) uses the query path.
+        daily = _daily_slab()
+        row = daily.row(ticker, target_date_str) if daily is not None else None
+        if row is not None:
+            val = daily.window("rth_high" if is_high else "rth_low", [row], int(lookback),
+                               how="max" if is_high else "min")[0]
+            return pd.Series(_safe_float(val), index=close.index)
+
         global _ticker_daily_ohlc_cache
         if ticker not in _ticker_daily_ohlc_cache:
             from app.database import get_db_connection
@@ -1222,7 +1290,7 @@ def _compute_raw(
         if start_pos >= pos:
             return pd.Series(np.nan, index=close.index)
             
-        if name in ("High of last X days", "Max of last X days"):
+        if is_high:
             val = df_daily["rth_high"].iloc[start_pos:pos].max()
         else:
             val = df_daily["rth_low"].iloc[start_pos:pos].min()
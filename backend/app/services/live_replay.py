@@ -0,0 +1,173 @@
+"""
+Live replay — grabar y reproducir el stream de Massive para el live screener.
+
+Formato de grabación (JSONL, opcionalmente .gz): una línea por frame WS tal
+cual llegó del socket, con su offset en segundos desde el primer frame:
+
+    {"t": 0.0132, "raw": "[{\"ev\":\"A\",\"sym\":\"AAPL\",...}, ...]"}
+
+  * ``Recorder``: lo engancha el consumidor real cuando LIVE_SCREENER_RECORD
+    apunta a un fichero, para capturar aperturas reales.
+  * ``synthetic_frames``: stream sintético reproducible (seed) de
+    second-aggregates con el mismo shape que Massive (av/v/o/h/l/c/vw/s/e).
+  * ``ReplayServer``: servidor WS local que habla el subconjunto del protocolo
+    Massive que usa el consumidor (auth → subscribe → frames) y emite una
+    grabación con un speed-up configurable (0 = tan rápido como se pueda).
+    El consumidor REAL (`_consume_massive_ws`) se conecta a él vía WS_URL,
+    así que se ejercita el camino de ingest de producción, no una réplica.
+
+Lo usan scripts/bench_live_screener.py y los tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import random
+import time
+from datetime import datetime
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("btt.live_replay")
+
+Frame = Tuple[float, str]  # (offset en segundos, texto del frame)
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Recorder:
+    """Añade frames a una grabación JSONL. Best-effort: un fallo de disco
+    desactiva la grabación, nunca corta el stream."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh: Optional[IO[str]] = _open(path, "a")
+        self._t0: Optional[float] = None
+
+    def write(self, raw: Any) -> None:
+        if self._fh is None:
+            return
+        now = time.monotonic()
+        if self._t0 is None:
+            self._t0 = now
+        text = raw.decode("utf-8", "replace") if isinstance(raw, (bytes, bytearray)) else str(raw)
+        try:
+            self._fh.write(json.dumps({"t": round(now - self._t0, 4), "raw": text}) + "\n")
+        except OSError as e:
+            logger.warning("[REPLAY] grabación %s desactivada: %s", self.path, e)
+            self.close()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except OSError:
+                pass
+            self._fh = None
+
+
+def write_recording(path: str, frames: Iterable[Frame]) -> int:
+    n = 0
+    with _open(path, "w") as fh:
+        for t, raw in frames:
+            fh.write(json.dumps({"t": round(t, 4), "raw": raw}) + "\n")
+            n += 1
+    return n
+
+
+def read_recording(path: str) -> Iterator[Frame]:
+    with _open(path, "r") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                rec = json.loads(line)
+                yield float(rec["t"]), rec["raw"]
+
+
+def synthetic_symbols(n: int) -> List[str]:
+    return [f"S{i:05d}" for i in range(n)]
+
+
+def synthetic_frames(n_symbols: int = 5000, seconds: int = 60, events_per_s: int = 5000,
+                     batch: int = 500, start_ms: Optional[int] = None, seed: int = 7) -> Iterator[Frame]:
+    """Second-aggregates sintéticos: `events_per_s` eventos por segundo sobre
+    `n_symbols` símbolos (prev_close 10.0, paseo aleatorio), agrupados en
+    frames de `batch` eventos. Por defecto arranca un lunes a las 09:30 ET."""
+    from app.services.live_screener_service import ET
+
+    rng = random.Random(seed)
+    syms = synthetic_symbols(n_symbols)
+    price = {s: 10.0 for s in syms}
+    vol = {s: 0 for s in syms}
+    if start_ms is None:
+        start_ms = int(datetime(2024, 1, 8, 9, 30, tzinfo=ET).timestamp() * 1000)
+    for sec in range(seconds):
+        s_ms = start_ms + sec * 1000
+        events = []
+        for _ in range(events_per_s):
+            sym = syms[rng.randrange(n_symbols)]
+            o = price[sym]
+            c = max(0.5, o * (1 + rng.gauss(0, 0.004)))
+            v = rng.randrange(100, 20_000)
+            price[sym] = c
+            vol[sym] += v
+            events.append({
+                "ev": "A", "sym": sym, "v": v, "av": vol[sym],
+                "o": round(o, 4), "c": round(c, 4), "h": round(max(o, c), 4), "l": round(min(o, c), 4),
+                "vw": round((o + c) / 2, 4), "s": s_ms, "e": s_ms + 1000,
+            })
+        for k in range(0, len(events), batch):
+            yield sec + k / max(len(events), 1), json.dumps(events[k:k + batch], separators=(",", ":"))
+
+
+class ReplayServer:
+    """Servidor WS local con el handshake de Massive que emite `frames`.
+
+    speedup > 1 comprime el tiempo de la grabación; 0 = sin esperas. Cada
+    conexión recibe la grabación completa desde el principio."""
+
+    def __init__(self, frames: Iterable[Frame], speedup: float = 1.0,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        self.frames: List[Frame] = list(frames)
+        self.speedup = speedup
+        self.host, self.port = host, port
+        self.sent_frames = 0
+        self.done = asyncio.Event()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> "ReplayServer":
+        import websockets
+
+        self._server = await websockets.serve(self._handle, self.host, self.port, max_size=2**22)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, ws) -> None:
+        await ws.recv()  # auth
+        await ws.send(json.dumps([{"ev": "status", "status": "auth_success"}]))
+        await ws.recv()  # subscribe
+        await ws.send(json.dumps([{"ev": "status", "status": "success", "message": "subscribed to: A.*"}]))
+        t0 = time.monotonic()
+        for t, raw in self.frames:
+            if self.speedup > 0:
+                wait = t0 + t / self.speedup - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            await ws.send(raw)
+            self.sent_frames += 1
+        self.done.set()
+        await ws.wait_closed()
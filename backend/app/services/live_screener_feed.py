@@ -0,0 +1,243 @@
+"""
+Live screener feed — versioned delta push for the `/api/screener/live` WebSocket.
+
+Until now every connected client got the full top-50 JSON of its tab once per
+second, re-serialized per client: the cost scaled as clients × rows × ticks.
+Here one channel per tab diffs the leaderboard ONCE per tick and fans the
+result out as a pre-serialized frame (the same `str` object for every
+subscriber of that tab):
+
+  * snapshot  {"type": "snapshot", "tab", "version", "timestamp", "session",
+               "ws_connected", "records": [...]}
+  * delta     {"type": "delta", "tab", "version", "base", "timestamp", "session",
+               "ws_connected", "insert": [rows], "update": [{"ticker", changed
+               fields...}], "remove": [tickers], "order": [tickers]}
+
+A delta applies only on top of `base` (= the previous version); `insert`,
+`update`, `remove` and `order` are omitted when empty, and `order` is present
+only when the ticker sequence changed. A tick with no change sends nothing, so
+bandwidth and CPU follow the changes, not the table size.
+
+Backpressure: each subscriber buffers at most LIVE_SCREENER_MAX_PENDING frames.
+A client too slow to drain them drops its intermediate deltas and is resynced
+from the channel's current snapshot (serialized once per version and shared).
+The client may also ask for a resync ({"action": "resync"}) when it sees a
+version gap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from app.services.live_screener_service import VALID_TABS, live_screener_service
+
+logger = logging.getLogger("btt.live_screener_feed")
+
+PUSH_SECONDS = float(os.getenv("LIVE_SCREENER_PUSH_S", "1.0"))
+MAX_PENDING = int(os.getenv("LIVE_SCREENER_MAX_PENDING", "8"))
+
+
+def _dumps(obj: Dict[str, Any]) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def diff_rows(prev: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Row-level diff between two leaderboards (keyed by ticker). Empty parts
+    are left out, so an unchanged board diffs to {}."""
+    before = {r["ticker"]: r for r in prev}
+    after = {r["ticker"]: r for r in rows}
+    out: Dict[str, list] = {}
+    insert = [r for r in rows if r["ticker"] not in before]
+    update = []
+    for r in rows:
+        old = before.get(r["ticker"])
+        if old is None:
+            continue
+        changed = {k: v for k, v in r.items() if old.get(k) != v}
+        if changed:
+            changed["ticker"] = r["ticker"]
+            update.append(changed)
+    remove = [tk for tk in before if tk not in after]
+    order = [r["ticker"] for r in rows]
+    if insert:
+        out["insert"] = insert
+    if update:
+        out["update"] = update
+    if remove:
+        out["remove"] = remove
+    if order != [r["ticker"] for r in prev]:
+        out["order"] = order
+    return out
+
+
+def apply_delta(rows: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Client-side application of a delta (reference for the frontend + tests)."""
+    by_tk = {r["ticker"]: dict(r) for r in rows}
+    order = [r["ticker"] for r in rows]
+    for tk in delta.get("remove", ()):
+        by_tk.pop(tk, None)
+    for r in delta.get("insert", ()):
+        by_tk[r["ticker"]] = dict(r)
+    for u in delta.get("update", ()):
+        by_tk[u["ticker"]].update(u)
+    order = delta.get("order", order)
+    return [by_tk[tk] for tk in order]
+
+
+class Subscriber:
+    """One WebSocket client: a bounded frame buffer + resync flag."""
+
+    def __init__(self, feed: "LiveScreenerFeed", tab: str, max_pending: int = MAX_PENDING) -> None:
+        self._feed = feed
+        self.tab = tab
+        self.max_pending = max_pending
+        self.dropped = 0            # times this client fell behind and was resynced
+        self.closed = False
+        self._pending: Deque[str] = deque()
+        self._resync = True         # first frame is always a snapshot
+        self._wake = asyncio.Event()
+
+    def push(self, frame: str) -> None:
+        if self._resync:
+            return                  # a snapshot is coming anyway
+        if len(self._pending) >= self.max_pending:
+            self._pending.clear()
+            self._resync = True
+            self.dropped += 1
+        else:
+            self._pending.append(frame)
+        self._wake.set()
+
+    def resync(self) -> None:
+        self._pending.clear()
+        self._resync = True
+        self._wake.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake.set()
+
+    async def next_frame(self) -> Optional[str]:
+        """Next frame to send (None once closed)."""
+        while not self.closed:
+            if self._resync:
+                self._resync = False
+                self._pending.clear()
+                return self._feed.snapshot_frame(self.tab)
+            if self._pending:
+                return self._pending.popleft()
+            self._wake.clear()
+            await self._wake.wait()
+        return None
+
+
+class _Channel:
+    """Leaderboard state of one tab: last rows, version and the shared frames."""
+
+    def __init__(self, tab: str) -> None:
+        self.tab = tab
+        self.version = 0
+        self.rows: List[Dict[str, Any]] = []
+        self.meta: Dict[str, Any] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self._snapshot: Optional[str] = None   # serialized once per version
+
+    def advance(self, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> Optional[str]:
+        """Move to `rows`; returns the delta frame, or None when nothing changed."""
+        changes = diff_rows(self.rows, rows)
+        if self.version and not changes and meta == self.meta:
+            return None
+        base, self.version = self.version, self.version + 1
+        self.rows, self.meta, self._snapshot = rows, meta, None
+        if not base:
+            return None             # first state: only snapshots exist yet
+        return _dumps({"type": "delta", "tab": self.tab, "version": self.version, "base": base,
+                       "timestamp": int(time.time()), **meta, **changes})
+
+    def snapshot_frame(self) -> str:
+        if self._snapshot is None:
+            self._snapshot = _dumps({"type": "snapshot", "tab": self.tab, "version": self.version,
+                                     "timestamp": int(time.time()), **self.meta,
+                                     "records": self.rows})
+        return self._snapshot
+
+
+class LiveScreenerFeed:
+    """Per-tab channels + the once-per-tick diff/fan-out loop."""
+
+    def __init__(self, top: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+                 meta: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+        self._top = top or live_screener_service.get_top
+        self._meta = meta or (lambda: {"session": live_screener_service.session,
+                                       "ws_connected": live_screener_service.ws_connected})
+        self._channels: Dict[str, _Channel] = {tab: _Channel(tab) for tab in VALID_TABS}
+        self._task: Optional[asyncio.Task] = None
+
+    # ── subscriptions ────────────────────────────────────────────────────────
+    def subscribe(self, tab: str, max_pending: int = MAX_PENDING) -> Subscriber:
+        sub = Subscriber(self, tab, max_pending)
+        self._join(sub, tab)
+        return sub
+
+    def switch(self, sub: Subscriber, tab: str) -> None:
+        """Move `sub` to another tab; its next frame is that tab's snapshot."""
+        if tab not in self._channels:
+            return
+        self._channels[sub.tab].subscribers.discard(sub)
+        sub.tab = tab
+        self._join(sub, tab)
+        sub.resync()
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        sub.close()
+        self._channels[sub.tab].subscribers.discard(sub)
+
+    def _join(self, sub: Subscriber, tab: str) -> None:
+        ch = self._channels[tab]
+        if not ch.subscribers:
+            self._advance(ch)       # idle channel: bring it up to date first
+        ch.subscribers.add(sub)
+
+    def snapshot_frame(self, tab: str) -> str:
+        return self._channels[tab].snapshot_frame()
+
+    # ── tick ─────────────────────────────────────────────────────────────────
+    def _advance(self, ch: _Channel) -> None:
+        frame = ch.advance(self._top(ch.tab), self._meta())
+        if frame is None:
+            return
+        for sub in ch.subscribers:
+            sub.push(frame)
+
+    def tick(self) -> None:
+        """Diff every watched tab once and fan the delta out to its subscribers."""
+        for ch in self._channels.values():
+            if ch.subscribers:
+                try:
+                    self._advance(ch)
+                except Exception as e:  # noqa: BLE001
+                    logger.debug("[LIVE] feed tick error (%s): %s", ch.tab, e)
+
+    def ensure_running(self) -> None:
+        """Start the tick loop on the running event loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(PUSH_SECONDS)
+                self.tick()
+            except asyncio.CancelledError:  # pragma: no cover
+                break
+
+
+# Module-level singleton used by the router.
+live_screener_feed = LiveScreenerFeed()
@@ -8,10 +8,15 @@ Responsibilities (all in-process, no DB writes on the hot path):
     reference API (refreshed daily); ETFs, warrants, units, rights, preferred,
     OTC, etc. are excluded, so they never reach the leaderboard.
   * Keep that state fresh by consuming Massive's second-aggregate stream
-    (`A.*`) over `wss://socket.massive.com`. Each message is O(1): update last
-    price, session high/low, accumulated volume and the RTH open.
-  * On demand, `get_top(tab)` applies the official trading formulas (§3.2 of the
-    PRD), filters (US + change >= ±15% for gainers/losers) and returns the top 50.
+    (`A.*`) over `wss://socket.massive.com`. The state lives in NumPy columns
+    (one slot per symbol, see live_state_arrays) and each WS frame is applied
+    as one vectorized batch under a single lock acquisition: last price,
+    session high/low, accumulated volume and the RTH open.
+  * Keep one ranking per tab (an order-statistic list sorted by the tab metric)
+    in step with every state change, so `get_top(tab)` reads the head of its
+    ranking in O(K) and applies the official trading formulas (§3.2 of the
+    PRD) only to the top 50 rows it returns — never a scan + sort of the whole
+    universe under the ingest lock.
 When the market is closed (or the WS can't connect / the account isn't live),
 the REST snapshot poller keeps the map warm so the UI always has something to
 show. This module is internal to the app backend — it is deliberately NOT part
@@ -27,12 +32,15 @@ import os
 import ssl
 import threading
 import time
+from bisect import bisect_left, insort
 from dataclasses import dataclass, field
 from datetime import datetime, time as dtime, timedelta
 from typing import Any, Dict, List, Optional, Set, Tuple
+from collections.abc import MutableMapping
 from zoneinfo import ZoneInfo
 
 import httpx
+import numpy as np
 
 try:  # websockets is provided by uvicorn[standard]; guard so import never breaks boot
     import websockets
@@ -43,6 +51,8 @@ from dotenv import load_dotenv
 
 load_dotenv()  # make MASSIVE_* available regardless of import order
 
+from app.services.live_state_arrays import FIELDS, OPTIONAL_FIELDS, LiveStateArrays  # noqa: E402
+
 logger = logging.getLogger("btt.live_screener")
 
 # ─── Config ──────────────────────────────────────────────────────────────────
@@ -114,6 +124,151 @@ class TickerLiveState:
     updated_at: float = field(default_factory=time.time)
 
 
+def _rank_keys(change: Optional[float], pre: Optional[float],
+               after: Optional[float]) -> Dict[str, Optional[float]]:
+    """Sort key in each tab's ranking (ascending = better) from the UNROUNDED
+    tab percentages, or None when the row does not qualify. Mirrors the
+    filters of `_metrics` + the old full-scan get_top: same rounding, same
+    outlier gate, same per-tab eligibility. `change` None = no usable row."""
+    keys: Dict[str, Optional[float]] = dict.fromkeys(VALID_TABS)
+    if change is None:
+        return keys
+    chg = round(change, 2)
+    after = round(after, 2) if after is not None else None
+    pre = round(pre, 2) if pre is not None else None
+    # Outlier gate: any tab metric past MAX_CHANGE_PCT is data corruption.
+    if any(v is not None and abs(v) > MAX_CHANGE_PCT for v in (chg, pre, after)):
+        return keys
+    keys[TAB_GAINERS] = -chg if chg > 0 else None    # any advance, biggest first
+    keys[TAB_LOSERS] = chg if chg < 0 else None      # any decline, biggest drop first
+    keys[TAB_PRE] = -pre if pre is not None else None
+    keys[TAB_AFT] = -after if after is not None else None
+    return keys
+
+
+def _nn(v: float) -> Optional[float]:
+    """NaN (array 'unknown') → None."""
+    return None if v != v else v
+
+
+class _Ranking:
+    """Order-statistic list for one tab: (sort_key, ticker) pairs kept sorted
+    with bisect, plus ticker → key so an update is one remove + one insort.
+    Ties break on the ticker, so the order is deterministic."""
+
+    __slots__ = ("_keys", "_order")
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, float] = {}
+        self._order: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, ticker: str, key: Optional[float]) -> None:
+        old = self._keys.get(ticker)
+        if old == key:
+            return
+        if old is not None:
+            del self._order[bisect_left(self._order, (old, ticker))]
+        if key is None:
+            self._keys.pop(ticker, None)
+        else:
+            self._keys[ticker] = key
+            insort(self._order, (key, ticker))
+
+    def head(self, n: int) -> List[str]:
+        return [tk for _, tk in self._order[:n]]
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._order.clear()
+
+
+class _LiveRow:
+    """Attribute view of one slot of the live arrays — same fields as
+    TickerLiveState, so the scalar paths (REST snapshot, tests) read and write
+    it like the old per-ticker object."""
+
+    __slots__ = ("_a", "_i")
+
+    def __init__(self, arrays: LiveStateArrays, slot: int) -> None:
+        self._a = arrays
+        self._i = slot
+
+    @property
+    def ticker(self) -> str:
+        return self._a.tickers[self._i]
+
+    @property
+    def name(self) -> str:
+        return self._a.names[self._i]
+
+    @name.setter
+    def name(self, v: str) -> None:
+        self._a.names[self._i] = v
+
+    @property
+    def exchange(self) -> str:
+        return self._a.exchanges[self._i]
+
+    @exchange.setter
+    def exchange(self, v: str) -> None:
+        self._a.exchanges[self._i] = v
+
+
+def _column_property(field_name: str, optional: bool) -> property:
+    def get(self: _LiveRow) -> Optional[float]:
+        v = float(self._a.cols[field_name][self._i])
+        return _nn(v) if optional else v
+
+    def set_(self: _LiveRow, v: Optional[float]) -> None:
+        self._a.cols[field_name][self._i] = float("nan") if v is None else v
+
+    return property(get, set_)
+
+
+for _field in FIELDS:
+    setattr(_LiveRow, _field, _column_property(_field, _field in OPTIONAL_FIELDS))
+
+
+class _StateMap(MutableMapping):
+    """ticker → _LiveRow over the live arrays. Assigning a TickerLiveState
+    copies it into the ticker's slot and re-ranks it; deleting frees the slot
+    and drops it from the rankings."""
+
+    def __init__(self, arrays: LiveStateArrays, rankings: Dict[str, "_Ranking"], rerank) -> None:
+        self._arrays = arrays
+        self._rankings = rankings
+        self._rerank = rerank
+
+    def __getitem__(self, ticker: str) -> _LiveRow:
+        return _LiveRow(self._arrays, self._arrays.slot[ticker])
+
+    def __setitem__(self, ticker: str, st: TickerLiveState) -> None:
+        a = self._arrays
+        i = a.alloc(ticker)
+        a.names[i], a.exchanges[i] = st.name, st.exchange
+        for f in FIELDS:
+            v = getattr(st, f)
+            a.cols[f][i] = float("nan") if v is None else v
+        self._rerank(np.array([i]))
+
+    def __delitem__(self, ticker: str) -> None:
+        self._arrays.free(ticker)
+        for ranking in self._rankings.values():
+            ranking.update(ticker, None)
+
+    def __contains__(self, ticker: object) -> bool:
+        return ticker in self._arrays.slot
+
+    def __iter__(self):
+        return iter(list(self._arrays.slot))
+
+    def __len__(self) -> int:
+        return len(self._arrays.slot)
+
+
 def current_session(now_et: Optional[datetime] = None) -> str:
     """Return the active US market session: 'pre' | 'rth' | 'after' | 'closed'."""
     dt = now_et or datetime.now(ET)
@@ -133,7 +288,11 @@ class LiveScreenerService:
     """Singleton holding live per-ticker state and the Massive WS consumer."""
 
     def __init__(self) -> None:
-        self._states: Dict[str, TickerLiveState] = {}
+        # Struct-of-arrays state (one slot per symbol) + one ranking per tab,
+        # updated on every state change (see _rerank_slots).
+        self._arrays = LiveStateArrays()
+        self._rankings: Dict[str, _Ranking] = {tab: _Ranking() for tab in VALID_TABS}
+        self._states: MutableMapping = _StateMap(self._arrays, self._rankings, self._rerank_slots)
         self._allowlist: Set[str] = set()  # authoritative CS+ADRC universe
         self._lock = threading.RLock()
         self._ws_connected = False
@@ -318,16 +477,15 @@ class LiveScreenerService:
             resp.raise_for_status()
             payload = resp.json()
         tickers = payload.get("tickers") or []
-        updated = 0
+        touched: List[int] = []
         with self._lock:
             for t in tickers:
                 sym = str(t.get("ticker", ""))
                 if not sym or sym not in self._allowlist:
                     continue  # allow-list gate: only CS + ADRC
-                st = self._states.get(sym)
-                if st is None:
-                    st = TickerLiveState(ticker=sym)
-                    self._states[sym] = st
+                if sym not in self._states:
+                    self._states[sym] = TickerLiveState(ticker=sym)
+                st = self._states[sym]
                 day = t.get("day") or {}
                 prev = t.get("prevDay") or {}
                 last = t.get("lastTrade") or {}
@@ -345,8 +503,9 @@ class LiveScreenerService:
                 if st.day_open is None:
                     st.day_open = _f(day.get("o"))
                 st.updated_at = time.time()
-                updated += 1
-        logger.info("[LIVE] snapshot refresh applied to %d tickers", updated)
+                touched.append(self._arrays.slot[sym])
+            self._rerank_slots(np.array(touched, dtype=np.int64))
+        logger.info("[LIVE] snapshot refresh applied to %d tickers", len(touched))
 
     async def _poll_snapshot_loop(self) -> None:
         """Keep the map warm via REST while the WS is down in active sessions.
@@ -393,18 +552,13 @@ class LiveScreenerService:
 
     def _capture_rth_close(self) -> None:
         with self._lock:
-            for st in self._states.values():
-                if st.last_price is not None:
-                    st.rth_close = st.last_price
+            self._rerank_slots(self._arrays.capture_rth_close())
 
     def _init_after_window(self) -> None:
         """Start a fresh after-hours accumulator (volume/high/low). Called on the
         rth→after transition; day-level metrics are left untouched."""
         with self._lock:
-            for st in self._states.values():
-                st.after_volume = 0.0
-                st.after_high = None
-                st.after_low = None
+            self._arrays.init_after_window()
 
     def _reset_day(self) -> None:
         """New trading day: clear all day-level + per-session accumulators,
@@ -412,19 +566,10 @@ class LiveScreenerService:
         fresh snapshot. Day metrics are NEVER reset on an intra-day session
         change — only here, once per day (closed → active)."""
         with self._lock:
-            for st in self._states.values():
-                st.prev_close = st.rth_close if st.rth_close is not None else None
-                st.rth_close = None
-                st.day_open = None
-                st.day_high = None
-                st.day_low = None
-                st.day_volume = 0.0
-                st.after_volume = 0.0
-                st.after_high = None
-                st.after_low = None
-                st.pre_volume = 0.0
-                st.pre_high = None
-                st.last_price = None
+            self._arrays.reset_day()
+            # No last_price → nothing qualifies until the snapshot re-anchors.
+            for ranking in self._rankings.values():
+                ranking.clear()
             self._top_cache.clear()
         try:
             self._refresh_from_snapshot()
@@ -461,6 +606,13 @@ class LiveScreenerService:
                 ssl_ctx = ssl.create_default_context(cafile=certifi.where())
             except Exception:  # noqa: BLE001
                 ssl_ctx = ssl.create_default_context()
+        # Optional capture of the raw frames for offline replay (see live_replay).
+        recorder = None
+        record_path = os.getenv("LIVE_SCREENER_RECORD", "").strip()
+        if record_path:
+            from app.services.live_replay import Recorder
+            recorder = Recorder(record_path)
+            logger.info("[LIVE] recording WS frames to %s", record_path)
         backoff = 1.0
         while not self._stop:
             connected_at: Optional[float] = None
@@ -473,6 +625,8 @@ class LiveScreenerService:
                     connected_at = time.monotonic()
                     logger.info("[LIVE] Massive WS connected, subscribed A.*")
                     async for raw in ws:
+                        if recorder is not None:
+                            recorder.write(raw)
                         self._handle_ws_message(raw)
             except asyncio.CancelledError:  # pragma: no cover
                 break
@@ -487,6 +641,8 @@ class LiveScreenerService:
                 await asyncio.sleep(backoff)
                 backoff = min(backoff * 2, 60.0)
         self._ws_connected = False
+        if recorder is not None:
+            recorder.close()
 
     def _handle_ws_message(self, raw: Any) -> None:
         try:
@@ -494,108 +650,98 @@ class LiveScreenerService:
         except (TypeError, ValueError):
             return
         events = data if isinstance(data, list) else [data]
-        for ev in events:
-            if not isinstance(ev, dict):
-                continue
-            etype = ev.get("ev")
-            if etype in ("A", "AM"):
-                self._apply_aggregate(ev)
-            # ignore status / other events
+        # Aggregates of the whole frame go in as one batch; status / other events are ignored.
+        self._apply_aggregates([ev for ev in events if isinstance(ev, dict) and ev.get("ev") in ("A", "AM")])
 
     def _apply_aggregate(self, ev: Dict[str, Any]) -> None:
-        sym = str(ev.get("sym", ""))
-        if not sym:
-            return
-        if self._session == "closed":
+        self._apply_aggregates([ev])
+
+    def _apply_aggregates(self, events: List[Dict[str, Any]]) -> None:
+        """Apply a batch of second-aggregates (one WS frame) in arrival order.
+        Parsing and session classification happen outside the lock; the array
+        update + re-rank of the touched symbols run under it, once per batch."""
+        if not events or self._session == "closed":
             return
-        ts_raw = ev.get("s") or ev.get("e") or ev.get("t")
-        in_after = _ts_in_after(ts_raw) if ts_raw is not None else (self._session == "after")
-        in_pre = _ts_in_pre(ts_raw) if ts_raw is not None else (self._session == "pre")
+        syms = [str(ev.get("sym", "")) for ev in events]
+        cols = {k: np.array([_fnan(ev.get(k)) for ev in events], dtype=np.float64)
+                for k in ("c", "vw", "o", "h", "l", "av", "v")}
+        windows = _batch_windows([ev.get("s") or ev.get("e") or ev.get("t") for ev in events], self._session)
         with self._lock:
-            if sym not in self._allowlist:
-                # Defensive allow-list gate (PRD §05.3): only CS + ADRC pass.
+            # Defensive allow-list gate (PRD §05.3): only CS + ADRC pass.
+            keep = [j for j, sym in enumerate(syms) if sym and sym in self._allowlist]
+            if not keep:
                 return
-            st = self._states.get(sym)
-            if st is None:
-                st = TickerLiveState(ticker=sym)
-                self._states[sym] = st
-            price = _f(ev.get("c")) or _f(ev.get("vw")) or st.last_price
-            if price is not None:
-                st.last_price = price
-            # Day-level high/low (max/min across the whole trading day).
-            hi, lo = _f(ev.get("h")), _f(ev.get("l"))
-            if hi is not None:
-                st.day_high = hi if st.day_high is None else max(st.day_high, hi)
-            if lo is not None:
-                st.day_low = lo if st.day_low is None else min(st.day_low, lo)
-            # Day volume: Polygon's second-aggregate carries the accumulated daily
-            # volume in `av` (NOT `a`, which is an avg price). Fall back to summing
-            # the per-bar `v`.
-            av = _f(ev.get("av"))
-            v = _f(ev.get("v"))
-            if av is not None:
-                st.day_volume = av
-            elif v is not None:
-                st.day_volume += v
-            # Capture the RTH open the first time we see a bar inside regular hours.
-            if st.day_open is None and ts_raw is not None and _ts_in_rth(ts_raw):
-                st.day_open = _f(ev.get("o")) or price
-            # Per-session accumulators: only the window this bar belongs to, so the
-            # Premarket/Aftermarket tabs reflect what is moving NOW.
-            if in_after and v is not None:
-                st.after_volume += v
-                if hi is not None:
-                    st.after_high = hi if st.after_high is None else max(st.after_high, hi)
-                if lo is not None:
-                    st.after_low = lo if st.after_low is None else min(st.after_low, lo)
-            elif in_pre and v is not None:
-                st.pre_volume += v
-                if hi is not None:
-                    st.pre_high = hi if st.pre_high is None else max(st.pre_high, hi)
-            st.updated_at = time.time()
+            for j in keep:
+                if syms[j] not in self._states:
+                    self._states[syms[j]] = TickerLiveState(ticker=syms[j])
+            slots = np.array([self._arrays.slot[syms[j]] for j in keep], dtype=np.int64)
+            win = [windows[j] for j in keep]
+            self._arrays.apply_aggregates(
+                slots, {k: c[keep] for k, c in cols.items()},
+                in_rth=np.array([w == "rth" for w in win], dtype=bool),
+                in_pre=np.array([w == "pre" for w in win], dtype=bool),
+                in_after=np.array([w == "after" for w in win], dtype=bool),
+                now=time.time(),
+            )
+            self._rerank_slots(np.unique(slots))
+
+    def _rerank_slots(self, slots: np.ndarray) -> None:
+        """Move `slots` to their place in every tab ranking, from the derived
+        columns computed vectorized for just those slots. Caller holds the
+        lock; O(log N) search + a memmove per tab and slot, no sort."""
+        if not len(slots):
+            return
+        d = self._arrays.derived(slots)
+        tickers = self._arrays.tickers
+        for i, ok, chg, pre, after in zip(slots.tolist(), d["valid"].tolist(), d["change_pct"].tolist(),
+                                          d["pre_pct"].tolist(), d["after_pct"].tolist()):
+            keys = _rank_keys(chg if ok else None, _nn(pre), _nn(after))
+            for tab, key in keys.items():
+                self._rankings[tab].update(tickers[i], key)
 
     # ── leaderboard ──────────────────────────────────────────────────────────
     def _metrics(self, st: TickerLiveState) -> Optional[Dict[str, Any]]:
+        """Scalar formulas for one state (reference for the vectorized _rows)."""
         prev = st.prev_close
         price = st.last_price
         if not prev or prev <= 0 or price is None:
             return None
-        day_change_pct = (price / prev - 1.0) * 100.0
-        day_high = st.day_high if st.day_high is not None else price
-        gap_pct = ((st.day_open / prev - 1.0) * 100.0) if st.day_open else 0.0
-        return_pct = ((price / st.day_open - 1.0) * 100.0) if st.day_open else 0.0
         # Aftermarket move measured from the frozen RTH close (day.c). None when
         # rth_close is unknown (e.g. backend booted inside after-hours) so the
         # Aftermarket tab drops it instead of falling back to the day change.
-        after_pct = ((price / st.rth_close - 1.0) * 100.0) if st.rth_close and st.rth_close > 0 else None
-        pre_pct = ((st.pre_high / prev - 1.0) * 100.0) if st.pre_high else None
         avg_vol = st.avg_vol_20d
-        rvol = (st.day_volume / avg_vol) if (avg_vol and avg_vol > 0) else 1.0
-        return {
-            "ticker": st.ticker,
-            "name": st.name,
-            "price": round(price, 4),
-            "prev_close": round(prev, 4),
-            "day_change_pct": round(day_change_pct, 2),
-            "change_pct": round(day_change_pct, 2),   # alias kept for the current frontend
-            "gap_pct": round(gap_pct, 2),
-            "return_pct": round(return_pct, 2),
-            "after_pct": round(after_pct, 2) if after_pct is not None else None,
-            "after_volume": round(st.after_volume, 0) if st.after_volume else None,
-            "after_high": round(st.after_high, 4) if st.after_high is not None else None,
-            "pre_pct": round(pre_pct, 2) if pre_pct is not None else None,
-            "pre_volume": round(st.pre_volume, 0) if st.pre_volume else None,
-            "pre_high": round(st.pre_high, 4) if st.pre_high is not None else None,
-            "volume": round(st.day_volume, 0),        # day volume (alias for the frontend)
-            "day_volume": round(st.day_volume, 0),
-            "high": round(day_high, 4),
-            "low": round(st.day_low, 4) if st.day_low is not None else None,
-            "rvol": round(rvol, 2),
-        }
+        return _format_row(
+            st, price, prev,
+            change=(price / prev - 1.0) * 100.0,
+            gap=((st.day_open / prev - 1.0) * 100.0) if st.day_open else 0.0,
+            ret=((price / st.day_open - 1.0) * 100.0) if st.day_open else 0.0,
+            after=((price / st.rth_close - 1.0) * 100.0) if st.rth_close and st.rth_close > 0 else None,
+            pre=((st.pre_high / prev - 1.0) * 100.0) if st.pre_high else None,
+            rvol=(st.day_volume / avg_vol) if (avg_vol and avg_vol > 0) else 1.0,
+        )
+
+    def _rows(self, slots: List[int]) -> List[Dict[str, Any]]:
+        """Leaderboard rows for `slots`: derived columns computed vectorized,
+        then formatted exactly like _metrics. Caller holds the lock."""
+        idx = np.array(slots, dtype=np.int64)
+        d = {k: v.tolist() for k, v in self._arrays.derived(idx).items()}
+        rows: List[Dict[str, Any]] = []
+        for j, i in enumerate(slots):
+            if not d["valid"][j]:
+                continue
+            st = self._states[self._arrays.tickers[i]]
+            rows.append(_format_row(
+                st, st.last_price, st.prev_close,
+                change=d["change_pct"][j], gap=d["gap_pct"][j], ret=d["return_pct"][j],
+                after=_nn(d["after_pct"][j]), pre=_nn(d["pre_pct"][j]), rvol=d["rvol"][j],
+            ))
+        return rows
 
     def get_top(self, tab: str, limit: int = TOP_N) -> List[Dict[str, Any]]:
-        """Top movers for a tab. Cached for up to TOP_CACHE_TTL to avoid
-        recomputing per connected client."""
+        """Top movers for a tab: the head of its ranking, which the ingest path
+        keeps sorted (see _rerank_slots), so this is O(limit) — only the
+        returned rows get their metrics built. Cached for up to TOP_CACHE_TTL
+        to avoid rebuilding per connected client."""
         if tab not in VALID_TABS:
             return []
         cached = self._top_cache.get(tab)
@@ -604,50 +750,65 @@ class LiveScreenerService:
             return cached[1]
 
         with self._lock:
-            states = list(self._states.values())
-
-        rows: List[Dict[str, Any]] = []
-        for st in states:
-            m = self._metrics(st)            # no volume gate: rank purely by the tab metric
-            if m is None:
-                continue
-            # Outlier gate: any tab metric past MAX_CHANGE_PCT is data corruption.
-            if any(
-                v is not None and abs(v) > MAX_CHANGE_PCT
-                for v in (m["change_pct"], m.get("pre_pct"), m.get("after_pct"))
-            ):
-                continue
-            chg = m["change_pct"]
-            if tab == TAB_LOSERS:
-                if chg < 0:                  # any decline ranks as a loser
-                    rows.append(m)
-            elif tab == TAB_GAINERS:
-                if chg > 0:                  # any advance ranks as a gainer
-                    rows.append(m)
-            elif tab == TAB_PRE:
-                # Premarket ranks by the pre-market peak; needs the pre datum.
-                if m.get("pre_pct") is not None:
-                    rows.append(m)
-            elif tab == TAB_AFT:
-                # Aftermarket ranks by the after-hours move from the RTH close;
-                # needs rth_close (otherwise there is no after datum to rank on).
-                if m.get("after_pct") is not None:
-                    rows.append(m)
-
-        # Sort by the metric that defines each tab; losers ascending (biggest drop first).
-        if tab == TAB_LOSERS:
-            rows.sort(key=lambda r: r["change_pct"])
-        elif tab == TAB_PRE:
-            rows.sort(key=lambda r: (r.get("pre_pct") if r.get("pre_pct") is not None else r["change_pct"]), reverse=True)
-        elif tab == TAB_AFT:
-            rows.sort(key=lambda r: (r.get("after_pct") if r.get("after_pct") is not None else 0.0), reverse=True)
-        else:  # TAB_GAINERS
-            rows.sort(key=lambda r: r["change_pct"], reverse=True)
-        rows = rows[:limit]
+            slots = [self._arrays.slot[tk] for tk in self._rankings[tab].head(limit)]
+            rows = self._rows(slots)
         self._top_cache[tab] = (now, rows)
         return rows
 
 
+def _format_row(st: Any, price: float, prev: float, *, change: float, gap: float, ret: float,
+                after: Optional[float], pre: Optional[float], rvol: float) -> Dict[str, Any]:
+    """Leaderboard row from the (unrounded) tab metrics + the raw state fields."""
+    day_high = st.day_high if st.day_high is not None else price
+    return {
+        "ticker": st.ticker,
+        "name": st.name,
+        "price": round(price, 4),
+        "prev_close": round(prev, 4),
+        "day_change_pct": round(change, 2),
+        "change_pct": round(change, 2),   # alias kept for the current frontend
+        "gap_pct": round(gap, 2),
+        "return_pct": round(ret, 2),
+        "after_pct": round(after, 2) if after is not None else None,
+        "after_volume": round(st.after_volume, 0) if st.after_volume else None,
+        "after_high": round(st.after_high, 4) if st.after_high is not None else None,
+        "pre_pct": round(pre, 2) if pre is not None else None,
+        "pre_volume": round(st.pre_volume, 0) if st.pre_volume else None,
+        "pre_high": round(st.pre_high, 4) if st.pre_high is not None else None,
+        "volume": round(st.day_volume, 0),        # day volume (alias for the frontend)
+        "day_volume": round(st.day_volume, 0),
+        "high": round(day_high, 4),
+        "low": round(st.day_low, 4) if st.day_low is not None else None,
+        "rvol": round(rvol, 2),
+    }
+
+
+def _fnan(v: Any) -> float:
+    """_f with NaN for "missing" (array representation)."""
+    f = _f(v)
+    return float("nan") if f is None else f
+
+
+def _batch_windows(ts_values: List[Any], session: str) -> List[Optional[str]]:
+    """Market window of each bar of a batch: from its timestamp (classified
+    once per distinct minute — the windows are minute-aligned), or the current
+    session for bars without one."""
+    by_minute: Dict[int, Optional[str]] = {}
+    out: List[Optional[str]] = []
+    for ts in ts_values:
+        if ts is None:
+            out.append(session if session in ("pre", "after") else None)
+            continue
+        f = _f(ts)
+        if f is None:
+            out.append(None)
+            continue
+        minute = int(f // 60000)
+        if minute not in by_minute:
+            by_minute[minute] = _ts_window(f)
+        out.append(by_minute[minute])
+    return out
+
 def _seconds_until_et(target: dtime) -> float:
     """Seconds from now until the next occurrence of `target` time in ET."""
     now = datetime.now(ET)
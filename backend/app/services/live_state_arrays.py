@@ -0,0 +1,209 @@
+"""
+Struct-of-arrays live state for the screener (one slot per symbol).
+
+`TickerLiveState` used to be one Python object per symbol, mutated field by
+field for every second-aggregate. Here every field is a preallocated NumPy
+column and a symbol maps to a slot index, so:
+
+  * a whole WS frame (Massive batches hundreds of `A` events per message) is
+    applied with a handful of vectorized ops — fmax/fmin/add `.at` scatters
+    that keep the exact sequential semantics of the per-event code, including
+    several events for the same symbol inside one frame;
+  * derived columns (change / gap / return / after / pre %, RVol) are computed
+    vectorized for any set of slots (the touched ones for re-ranking, the top K
+    for the leaderboard);
+  * day/session resets are single column writes instead of a loop over objects.
+
+NaN means "unknown" (the old `None`); the volume accumulators start at 0.0.
+Not thread-safe by itself: the service serializes writers with its lock.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+CAPACITY = int(os.getenv("LIVE_SCREENER_CAPACITY", "16384"))  # grows ×2 when full
+
+# Optional prices/levels (NaN = None) and zero-based accumulators.
+OPTIONAL_FIELDS = (
+    "prev_close", "rth_close", "day_open", "day_high", "day_low", "last_price",
+    "avg_vol_20d", "after_high", "after_low", "pre_high",
+)
+SUM_FIELDS = ("day_volume", "after_volume", "pre_volume", "updated_at")
+FIELDS = OPTIONAL_FIELDS + SUM_FIELDS
+
+_NAN = float("nan")
+
+
+def _first_positions(slots: np.ndarray, mask: np.ndarray, capacity: int) -> np.ndarray:
+    """Per slot, the index of its FIRST event where `mask` holds (-1 = none)."""
+    n = len(slots)
+    first = np.full(capacity, n, dtype=np.int64)
+    idx = np.flatnonzero(mask)
+    np.minimum.at(first, slots[idx], idx)
+    first[first == n] = -1
+    return first
+
+
+def _last_positions(slots: np.ndarray, mask: np.ndarray, capacity: int) -> np.ndarray:
+    """Per slot, the index of its LAST event where `mask` holds (-1 = none)."""
+    last = np.full(capacity, -1, dtype=np.int64)
+    idx = np.flatnonzero(mask)
+    np.maximum.at(last, slots[idx], idx)
+    return last
+
+
+class LiveStateArrays:
+    """Preallocated per-field columns + symbol → slot index."""
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        capacity = max(1, capacity)
+        self.slot: Dict[str, int] = {}
+        self.tickers: List[Optional[str]] = [None] * capacity
+        self.names: List[str] = [""] * capacity
+        self.exchanges: List[str] = [""] * capacity
+        self.cols: Dict[str, np.ndarray] = {
+            f: np.full(capacity, _NAN if f in OPTIONAL_FIELDS else 0.0) for f in FIELDS
+        }
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.tickers)
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    # ── slots ────────────────────────────────────────────────────────────────
+    def alloc(self, ticker: str) -> int:
+        """Slot of `ticker`, allocating (and growing the columns) if new."""
+        i = self.slot.get(ticker)
+        if i is not None:
+            return i
+        if not self._free:
+            self._grow()
+        i = self._free.pop()
+        self.slot[ticker] = i
+        self.tickers[i] = ticker
+        return i
+
+    def free(self, ticker: str) -> None:
+        i = self.slot.pop(ticker)
+        self.tickers[i] = None
+        self.names[i] = self.exchanges[i] = ""
+        for f, col in self.cols.items():
+            col[i] = _NAN if f in OPTIONAL_FIELDS else 0.0
+        self._free.append(i)
+
+    def active(self) -> np.ndarray:
+        return np.fromiter(self.slot.values(), dtype=np.int64, count=len(self.slot))
+
+    def _grow(self) -> None:
+        old = self.capacity
+        new = old * 2
+        for f, col in self.cols.items():
+            grown = np.full(new, _NAN if f in OPTIONAL_FIELDS else 0.0)
+            grown[:old] = col
+            self.cols[f] = grown
+        self.tickers.extend([None] * old)
+        self.names.extend([""] * old)
+        self.exchanges.extend([""] * old)
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    # ── bulk writes ──────────────────────────────────────────────────────────
+    def apply_aggregates(self, slots: np.ndarray, ev: Dict[str, np.ndarray],
+                         in_rth: np.ndarray, in_pre: np.ndarray, in_after: np.ndarray,
+                         now: float) -> None:
+        """Apply a batch of second-aggregates in arrival order.
+
+        `ev` holds float columns c, vw, o, h, l, av, v (NaN = missing) aligned
+        with `slots`; the window masks say which session each bar belongs to.
+        The result equals applying the events one by one."""
+        cols, cap = self.cols, self.capacity
+        c, vw, o, h, lo, av, v = (ev[k] for k in ("c", "vw", "o", "h", "l", "av", "v"))
+        # Price: `c`, else `vw` (a 0.0 counts as missing, as in the scalar path).
+        price = np.where(np.nan_to_num(c) != 0, c, np.where(np.nan_to_num(vw) != 0, vw, _NAN))
+
+        # RTH open: the first in-RTH bar of a slot that still has no open.
+        # Computed before last_price moves (its fallback is the prior price).
+        opening = np.where(np.nan_to_num(o) != 0, o, price)
+        opening = np.where(np.isnan(opening), cols["last_price"][slots], opening)
+        first = _first_positions(slots, in_rth & ~np.isnan(opening), cap)
+        tgt = np.flatnonzero((first >= 0) & np.isnan(cols["day_open"]))
+        cols["day_open"][tgt] = opening[first[tgt]]
+
+        has_px = ~np.isnan(price)
+        cols["last_price"][slots[has_px]] = price[has_px]   # repeated slots: last wins
+        np.fmax.at(cols["day_high"], slots, h)               # fmax/fmin skip NaN
+        np.fmin.at(cols["day_low"], slots, lo)
+
+        # Day volume: the last `av` (accumulated) resets it; bar `v` after it adds.
+        has_av = ~np.isnan(av)
+        last_av = _last_positions(slots, has_av, cap)
+        tgt = np.flatnonzero(last_av >= 0)
+        cols["day_volume"][tgt] = av[last_av[tgt]]
+        adds = ~has_av & ~np.isnan(v) & (np.arange(len(slots)) > last_av[slots])
+        np.add.at(cols["day_volume"], slots[adds], v[adds])
+
+        # Per-session accumulators, only for bars that carry a volume.
+        has_v = ~np.isnan(v)
+        aft = in_after & has_v
+        np.add.at(cols["after_volume"], slots[aft], v[aft])
+        np.fmax.at(cols["after_high"], slots[aft], h[aft])
+        np.fmin.at(cols["after_low"], slots[aft], lo[aft])
+        pre = in_pre & ~in_after & has_v
+        np.add.at(cols["pre_volume"], slots[pre], v[pre])
+        np.fmax.at(cols["pre_high"], slots[pre], h[pre])
+
+        cols["updated_at"][slots] = now
+
+    def capture_rth_close(self) -> np.ndarray:
+        """rth_close ← last_price where known; returns the slots that changed."""
+        last = self.cols["last_price"]
+        changed = np.flatnonzero(~np.isnan(last))
+        self.cols["rth_close"][changed] = last[changed]
+        return changed
+
+    def init_after_window(self) -> None:
+        self.cols["after_volume"][:] = 0.0
+        self.cols["after_high"][:] = _NAN
+        self.cols["after_low"][:] = _NAN
+
+    def reset_day(self) -> None:
+        """New trading day: rth_close → prev_close (NaN if unknown), the rest cleared."""
+        c = self.cols
+        c["prev_close"][:] = c["rth_close"]
+        for f in ("rth_close", "day_open", "day_high", "day_low", "after_high", "after_low",
+                  "pre_high", "last_price"):
+            c[f][:] = _NAN
+        for f in ("day_volume", "after_volume", "pre_volume"):
+            c[f][:] = 0.0
+
+    # ── derived columns ──────────────────────────────────────────────────────
+    def derived(self, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized trading formulas (§3.2 of the PRD) for `slots`, unrounded.
+
+        NaN where a metric is undefined; `valid` marks rows with a usable
+        prev_close and last price (the rest never rank)."""
+        c = self.cols
+        prev, price = c["prev_close"][slots], c["last_price"][slots]
+        day_open, rth_close = c["day_open"][slots], c["rth_close"][slots]
+        pre_high, avg_vol = c["pre_high"][slots], c["avg_vol_20d"][slots]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valid = (prev > 0) & ~np.isnan(price)
+            has_open = np.nan_to_num(day_open) != 0
+            change = np.where(valid, (price / prev - 1.0) * 100.0, _NAN)
+            gap = np.where(has_open, (day_open / prev - 1.0) * 100.0, 0.0)
+            ret = np.where(has_open, (price / day_open - 1.0) * 100.0, 0.0)
+            after = np.where(rth_close > 0, (price / rth_close - 1.0) * 100.0, _NAN)
+            pre = np.where(np.nan_to_num(pre_high) != 0, (pre_high / prev - 1.0) * 100.0, _NAN)
+            rvol = np.where(avg_vol > 0, c["day_volume"][slots] / avg_vol, 1.0)
+        return {"valid": valid, "change_pct": change, "gap_pct": gap, "return_pct": ret,
+                "after_pct": after, "pre_pct": pre, "rvol": rvol}
+
+    def columns(self, slots: np.ndarray, fields: Iterable[str]) -> Dict[str, list]:
+        """Raw columns for `slots` as Python lists (NaN kept)."""
+        return {f: self.cols[f][slots].tolist() for f in fields}
@@ -0,0 +1,341 @@
+"""
+Market Analysis columnar — el mismo payload que market_analysis_service, calculado
+sobre columnas NumPy del frame (hot cache o resultado SQL) en vez de listas de dicts.
+
+Equivalencias con la versión por records (la de referencia, testeada contra los
+ejemplos de los PRDs en test_market_analysis.py):
+
+  · safe_float / _num_or_none  → _safe (NaN/±inf → 0) / máscara np.isfinite
+  · merge_derived              → join por (ticker, fecha) contra un índice del
+                                 derivado ma_daily cacheado por identidad del frame
+  · apply_quality_filters      → máscaras en el mismo orden (primer motivo cuenta);
+                                 reverse split (d−5, d] ≡ (ticker, ed+k) con k∈[0,5)
+  · compute_kpis / compute_fade_windows → reducciones enmascaradas
+  · map_recent_gaps            → columnas → records sólo para la tabla de salida
+
+Los índices de splits / tickers válidos / derivado se construyen una vez por objeto
+de cache (cache_service devuelve el mismo DataFrame hasta su TTL).
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_analysis_service import (
+    BLACK_SWAN_SPIKE_MAX_PCT,
+    QUALITY_GAP_MAX_PCT,
+    QUALITY_PMH_GAP_MAX_PCT,
+    REVERSE_SPLIT_LOOKBACK_DAYS,
+    _FADE_FRANJAS,
+)
+
+_DERIVED_COLS = ("m0_return_pct", "m90_return_pct", "max_spike_5m_pct")
+
+_INDEX_LOCK = threading.Lock()
+_INDEX_CACHE: Dict[str, Tuple[Any, Any]] = {}
+
+
+def columnar_enabled() -> bool:
+    return os.getenv("MA_COLUMNAR", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _cached(name: str, source, build):
+    """Índice derivado de `source` cacheado mientras cache_service devuelva el mismo objeto."""
+    if source is None:
+        return None
+    with _INDEX_LOCK:
+        hit = _INDEX_CACHE.get(name)
+        if hit is not None and hit[0] is source:
+            return hit[1]
+    value = build(source)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[name] = (source, value)
+    return value
+
+
+# ── columnas ─────────────────────────────────────────────────────────────────
+
+def _num(frame: pd.DataFrame, col: str) -> np.ndarray:
+    """Columna numérica float64; ausente o no numérica → NaN (≡ r.get(col) → None)."""
+    if col not in frame.columns:
+        return np.full(len(frame), np.nan)
+    s = frame[col]
+    if not pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        s = pd.to_numeric(s, errors="coerce")
+    return s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _safe(a: np.ndarray) -> np.ndarray:
+    """Equivalente vectorial de safe_float: NaN/±inf → 0."""
+    return np.where(np.isfinite(a), a, 0.0)
+
+
+def _mean(a: np.ndarray) -> float:
+    return float(a.sum() / a.size)
+
+
+def _tickers(frame: pd.DataFrame) -> np.ndarray:
+    if "ticker" not in frame.columns:
+        return np.full(len(frame), "", dtype=object)
+    return frame["ticker"].fillna("").astype(str).str.upper().to_numpy(dtype=object)
+
+
+def _days(frame: pd.DataFrame) -> np.ndarray:
+    """Fecha (datetime64[D]) de cada fila a partir de str(timestamp)[:10]; inválida → NaT."""
+    if "timestamp" not in frame.columns:
+        return np.full(len(frame), np.datetime64("NaT"), dtype="datetime64[D]")
+    ts = frame["timestamp"]
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        if getattr(ts.dt, "tz", None) is not None:
+            ts = ts.dt.tz_localize(None)
+        return ts.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    parsed = pd.to_datetime(ts.astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+def _keys(tickers: np.ndarray, days: np.ndarray) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays([tickers, days.astype("datetime64[ns]")])
+
+
+# ── índices de referencia (cacheados) ────────────────────────────────────────
+
+def _build_split_index(splits_df: pd.DataFrame):
+    """(same_day, reverse_window) como MultiIndex (ticker, día)."""
+    if splits_df is None or splits_df.empty or "ticker" not in splits_df or "execution_date" not in splits_df:
+        return None
+    tk = splits_df["ticker"].fillna("").astype(str).str.upper().to_numpy(dtype=object)
+    ed = pd.to_datetime(splits_df["execution_date"].astype(str).str[:10], format="%Y-%m-%d",
+                        errors="coerce").to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    ok = (tk != "") & ~np.isnat(ed)
+    same_day = _keys(tk[ok], ed[ok]).unique()
+    if "split_from" in splits_df and "split_to" in splits_df:
+        sf = pd.to_numeric(splits_df["split_from"], errors="coerce").to_numpy(dtype=np.float64)
+        st = pd.to_numeric(splits_df["split_to"], errors="coerce").to_numpy(dtype=np.float64)
+        rev = ok & (st < sf)
+    else:
+        rev = np.zeros(len(tk), dtype=bool)
+    # d ∈ (ed−5, ed] visto desde el record ⇔ d ∈ {ed, ed+1, …, ed+4}
+    k = np.arange(REVERSE_SPLIT_LOOKBACK_DAYS)
+    rtk = np.repeat(tk[rev], len(k))
+    rdays = (ed[rev][:, None] + k[None, :].astype("timedelta64[D]")).ravel()
+    reverse = _keys(rtk, rdays).unique()
+    return same_day, reverse
+
+
+def _build_valid_tickers(tickers_df: pd.DataFrame):
+    if tickers_df is None or tickers_df.empty:
+        return None
+    return pd.Index(tickers_df["ticker"].astype(str).str.upper().unique())
+
+
+def _build_derived_index(derived_df: pd.DataFrame):
+    """(MultiIndex único (ticker, día), {col: valores}) — último gana, como el dict legacy."""
+    if derived_df is None or derived_df.empty:
+        return None
+    tk = derived_df["ticker"].astype(str).str.upper().to_numpy(dtype=object)
+    days = pd.to_datetime(derived_df["date"].astype(str).str[:10], format="%Y-%m-%d",
+                          errors="coerce").to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    idx = _keys(tk, days)
+    keep = ~idx.duplicated(keep="last")
+    cols = {c: (pd.to_numeric(derived_df[c], errors="coerce").to_numpy(dtype=np.float64)[keep]
+                if c in derived_df else None) for c in _DERIVED_COLS}
+    return idx[keep], cols
+
+
+# ── pipeline ─────────────────────────────────────────────────────────────────
+
+class GapFrame:
+    """Columnas de un universo de gappers (un periodo) ya seleccionado."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+        self.n = len(self.frame)
+        self.tickers = _tickers(self.frame)
+        self.days = _days(self.frame)
+        self._cols: Dict[str, np.ndarray] = {}
+
+    def col(self, name: str) -> np.ndarray:
+        if name not in self._cols:
+            self._cols[name] = _num(self.frame, name)
+        return self._cols[name]
+
+    def take(self, mask: np.ndarray) -> "GapFrame":
+        out = GapFrame.__new__(GapFrame)
+        out.frame = self.frame.loc[mask].reset_index(drop=True)
+        out.n = int(mask.sum())
+        out.tickers = self.tickers[mask]
+        out.days = self.days[mask]
+        out._cols = {k: v[mask] for k, v in self._cols.items()}
+        return out
+
+    # merge_derived
+    def join_derived(self, derived_df: Optional[pd.DataFrame]) -> None:
+        built = _cached("derived", derived_df, _build_derived_index)
+        if built is None or not self.n:
+            return
+        idx, values = built
+        pos = idx.get_indexer(_keys(self.tickers, self.days))
+        hit = pos >= 0
+        if not hit.any():
+            return
+        for c, vals in values.items():
+            if vals is None:
+                continue
+            cur = self.col(c).copy()
+            cur[hit] = vals[pos[hit]]
+            self._cols[c] = cur
+
+
+def quality_mask(
+    g: GapFrame,
+    *,
+    splits_df: Optional[pd.DataFrame] = None,
+    tickers_df: Optional[pd.DataFrame] = None,
+    black_swan_available: bool = False,
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Máscara de filas que sobreviven a apply_quality_filters + contadores idénticos."""
+    alive = np.ones(g.n, dtype=bool)
+    counters = {
+        "excluded_ticker_type": 0,
+        "excluded_gap_gt_400": 0,
+        "excluded_pmh_gap_gt_400": 0,
+        "excluded_same_day_split": 0,
+        "excluded_reverse_split": 0,
+        "excluded_black_swan": 0 if black_swan_available else None,
+    }
+
+    def _drop(name, cond):
+        hit = alive & cond
+        counters[name] = int(hit.sum())
+        alive[hit] = False
+
+    valid = _cached("valid_tickers", tickers_df, _build_valid_tickers)
+    if valid is not None:
+        _drop("excluded_ticker_type", ~pd.Index(g.tickers).isin(valid))
+    _drop("excluded_gap_gt_400", _safe(g.col("gap_pct")) > QUALITY_GAP_MAX_PCT)
+    _drop("excluded_pmh_gap_gt_400", _safe(g.col("pmh_gap_pct")) > QUALITY_PMH_GAP_MAX_PCT)
+
+    split_idx = _cached("splits", splits_df, _build_split_index)
+    if split_idx is not None and g.n:
+        same_day, reverse = split_idx
+        keys = _keys(g.tickers, g.days)
+        has_day = ~np.isnat(g.days)
+        _drop("excluded_same_day_split", has_day & keys.isin(same_day))
+        _drop("excluded_reverse_split", has_day & keys.isin(reverse))
+
+    if black_swan_available:
+        spike = g.col("max_spike_5m_pct")
+        _drop("excluded_black_swan", np.isfinite(spike) & (spike > BLACK_SWAN_SPIKE_MAX_PCT))
+    return alive, counters
+
+
+def _close_red(g: GapFrame) -> np.ndarray:
+    ro, rc = _safe(g.col("rth_open")), _safe(g.col("rth_close"))
+    both = (ro > 0) & (rc > 0)
+    return np.where(both, rc < ro, _safe(g.col("day_return_pct")) < 0)
+
+
+def compute_kpis(g: GapFrame, fade_threshold: float = 50.0) -> Dict[str, Any]:
+    """Columnar de market_analysis_service.compute_kpis."""
+    n = g.n
+    gaps = _safe(g.col("gap_pct"))
+    pmh = _safe(g.col("pm_high"))
+    pmh_gap = _safe(g.col("pmh_gap_pct"))
+    pmh_gaps = pmh_gap[pmh > 0]
+    pm_count = int((pmh_gap > 0).sum())
+    close_red_n = int(_close_red(g).sum())
+    fu = (gaps >= fade_threshold) & (pmh > 0)
+    fades = (pmh[fu] - _safe(g.col("close_1559"))[fu]) / pmh[fu] * 100
+    return {
+        "gappers_count": {"value": float(n)},
+        "gappers_count_pm": {"value": float(pm_count)},
+        "avg_gap_pct": {"value": round(_mean(gaps), 4) if n else None},
+        "pm_high_gap_pct": {"value": round(_mean(pmh_gaps), 4) if pmh_gaps.size else None},
+        "close_red_pct": {"value": round(close_red_n / n * 100, 4) if n else None},
+        "close_lt_vwap_pct": {"value": None},  # v1.2 (day_vwap)
+        "avg_fade_from_pmh": {"value": round(_mean(fades), 4) if fades.size else None},
+    }
+
+
+def _fade_summary(fades: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+    if not fades.size:
+        return None, None
+    return round(_mean(fades), 4), round(int((fades > 0).sum()) / fades.size * 100, 4)
+
+
+def compute_fade_windows(g: GapFrame) -> Dict[str, Any]:
+    """Columnar de market_analysis_service.compute_fade_windows."""
+    ro = _safe(g.col("rth_open"))
+    close = _safe(g.col("close_1559"))
+    rth = []
+    for franja, col in _FADE_FRANJAS:
+        m = g.col(col)
+        seen = np.isfinite(m)
+        if g.n and not seen.any():
+            rth.append({"franja": franja, "avg_fade_pct": None, "pct_favorable": None,
+                        "n": 0, "pending_backfill": True})
+            continue
+        with np.errstate(invalid="ignore"):
+            entrada = ro * (1 + m / 100.0)
+            ok = seen & (ro > 0) & (entrada > 0)
+        fades = (entrada[ok] - close[ok]) / entrada[ok] * 100
+        avg, fav = _fade_summary(fades)
+        rth.append({"franja": franja, "avg_fade_pct": avg, "pct_favorable": fav, "n": int(fades.size)})
+
+    pmh = _safe(g.col("pm_high"))
+    ok = pmh > 0
+    pm_fades = (pmh[ok] - close[ok]) / pmh[ok] * 100
+    avg, fav = _fade_summary(pm_fades)
+    return {"rth": rth, "pm": {"avg_fade_pct": avg, "pct_favorable": fav, "n": int(pm_fades.size)}}
+
+
+def map_recent_gaps(g: GapFrame) -> list:
+    """Columnar de market_analysis_service.map_recent_gaps (las 9 columnas de MA-06)."""
+    if not g.n:
+        return []
+    f = g.frame
+    tickers = f["ticker"].tolist() if "ticker" in f.columns else [""] * g.n
+    if "timestamp" in f.columns:
+        dates = [str(t)[:10] for t in f["timestamp"].tolist()]
+    else:
+        dates = ["None"] * g.n
+    cols = {
+        "gap_at_open_pct": "gap_pct", "open": "rth_open", "vol_rth": "rth_volume",
+        "vol_pm": "pm_volume", "hod": "rth_high", "pmh": "pm_high",
+    }
+    values = {k: _safe(g.col(c)).tolist() for k, c in cols.items()}
+    red = _close_red(g).tolist()
+    return [
+        {"ticker": tickers[i], "date": dates[i],
+         **{k: values[k][i] for k in cols}, "close_red": red[i]}
+        for i in range(g.n)
+    ]
+
+
+def analyze_period(
+    frame: pd.DataFrame,
+    *,
+    fade_threshold: float,
+    splits_df=None,
+    tickers_df=None,
+    derived_df=None,
+    full: bool = True,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Un periodo: derivado + calidad + KPIs (+ fade windows y records si full).
+    Devuelve (payload, quality_filters)."""
+    g = GapFrame(frame)
+    g.join_derived(derived_df)
+    keep, quality = quality_mask(g, splits_df=splits_df, tickers_df=tickers_df,
+                                 black_swan_available=derived_df is not None and not derived_df.empty)
+    if not keep.all():
+        g = g.take(keep)
+    payload = {"kpis": compute_kpis(g, fade_threshold=fade_threshold)}
+    if full:
+        payload = {
+            "records": map_recent_gaps(g),
+            "kpis": payload["kpis"],
+            "fade_windows": compute_fade_windows(g),
+        }
+    return payload, quality
@@ -33,9 +33,12 @@ day_return_pct, prev_close, timestamp, ticker, m30_return_pct, m60_return_pct, p
 """
 from __future__ import annotations
 
+import json
 import math
 from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from app.services import single_flight
+
 
 # ── helpers ──────────────────────────────────────────────────────────────────
 
@@ -542,9 +545,14 @@ def _resolve_period_dates(latest, filters):
 
 
 def _hot_records(df, filters, limit):
+    """_hot_frame → lista de dicts (camino por records)."""
+    return _hot_frame(df, filters, limit).to_dict("records")
+
+
+def _hot_frame(df, filters, limit):
     """
     Filtra el hot cache (DataFrame en RAM con gap_pct>=10 y todas las columnas de daily_metrics)
-    en pandas → lista de dicts. Sirve el caso común (gap alto) en <100ms sin tocar GCS.
+    en pandas → DataFrame. Sirve el caso común (gap alto) en <100ms sin tocar GCS.
     Nota: el hot path no aplica el filtro de tipo de ticker (CS/ADRC/OS) — igual que el /screener
     original, prioriza latencia; el cold path (GCS) sí lo aplica vía build_screener_query.
     """
@@ -588,8 +596,7 @@ def _hot_records(df, filters, limit):
     tk = filters.get("ticker")
     if tk:
         r = r[r["ticker"].astype(str) == str(tk).upper()]
-    r = r.sort_values(["timestamp", "gap_pct"], ascending=[False, False]).head(limit)
-    return r.to_dict("records")
+    return r.sort_values(["timestamp", "gap_pct"], ascending=[False, False]).head(limit)
 
 
 def _fetch_records(con, filters, limit):
@@ -600,33 +607,55 @@ def _fetch_records(con, filters, limit):
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
-def _load_quality_inputs():
-    """(splits_records, valid_tickers, derived_map) desde los caches de referencia.
-    Cada pieza es fail-open (None) si su fuente no está disponible: el análisis
-    sale igualmente y quality_filters refleja qué se pudo evaluar."""
-    splits = None
+def _fetch_frame(con, filters, limit):
+    from app.services.query_service import build_screener_query
+    rec_query, sql_p, _, _, _, _ = build_screener_query(filters, limit=limit)
+    return con.execute(rec_query, sql_p).fetch_df()
+
+
+def _load_quality_frames():
+    """(splits_df, tickers_df, derived_df) de los caches de referencia, tal cual
+    (el camino columnar indexa cada uno una vez por objeto de cache). Cada pieza
+    es fail-open (None) si su fuente no está disponible o viene vacía."""
+    splits_df = tickers_df = derived_df = None
     try:
         from app.services.cache_service import get_effective_splits_df
         df = get_effective_splits_df()
         if df is not None and not df.empty:
-            splits = df.to_dict("records")
+            splits_df = df
     except Exception as e:
         print(f"[WARN] MA sin splits para filtros de calidad: {e}")
 
-    valid = None
     try:
         from app.services.cache_service import get_tickers_df
         tdf = get_tickers_df()
         if tdf is not None and not tdf.empty:
-            valid = set(tdf["ticker"].astype(str).str.upper())
+            tickers_df = tdf
     except Exception as e:
         print(f"[WARN] MA sin tabla de tickers para paridad de tipos: {e}")
 
-    derived_map = None
     try:
         from app.services.cache_service import get_ma_derived_df
         ddf = get_ma_derived_df()
         if ddf is not None and not ddf.empty:
+            derived_df = ddf
+    except Exception as e:
+        print(f"[WARN] MA sin derivado ma_daily: {e}")
+
+    return splits_df, tickers_df, derived_df
+
+
+def _load_quality_inputs():
+    """(splits_records, valid_tickers, derived_map) desde los caches de referencia.
+    Cada pieza es fail-open (None) si su fuente no está disponible: el análisis
+    sale igualmente y quality_filters refleja qué se pudo evaluar."""
+    splits_df, tdf, ddf = _load_quality_frames()
+    splits = splits_df.to_dict("records") if splits_df is not None else None
+    valid = set(tdf["ticker"].astype(str).str.upper()) if tdf is not None else None
+
+    derived_map = None
+    try:
+        if ddf is not None:
             derived_map = {
                 (str(t).upper(), str(d)): {
                     "m0_return_pct": m0, "m90_return_pct": m90, "max_spike_5m_pct": spike,
@@ -642,7 +671,18 @@ def _load_quality_inputs():
     return splits, valid, derived_map
 
 
+def _flight_key(filters: Dict[str, Any]) -> str:
+    return json.dumps(filters, sort_keys=True, default=str)
+
+
 def get_market_analysis(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Single-flight sobre _get_market_analysis: peticiones concurrentes con los
+    mismos filtros comparten un único cálculo (y su resultado)."""
+    return single_flight.group("market_analysis").do(
+        _flight_key(filters), lambda: _get_market_analysis(filters))
+
+
+def _get_market_analysis(filters: Dict[str, Any]) -> Dict[str, Any]:
     """
     Orquestación con BD (router fino → lógica aquí). Resuelve periodo, trae records del
     periodo actual y del anterior equivalente (vía build_screener_query), calcula el payload
@@ -691,6 +731,32 @@ def get_market_analysis(filters: Dict[str, Any]) -> Dict[str, Any]:
         cur_filters = {**base, "start_date": str(start), "end_date": str(end_excl)}
         prev_filters = {**base, "start_date": str(prev_start), "end_date": str(start)}
 
+        from app.services.market_analysis_columnar import analyze_period, columnar_enabled
+        if columnar_enabled():
+            # Mismo payload sobre columnas NumPy (market_analysis_columnar): sin
+            # to_dict por periodo ni derived_map/split index reconstruidos por request.
+            if use_hot:
+                cur_frame = _hot_frame(hot_df, cur_filters, limit)
+                prev_frame = _hot_frame(hot_df, prev_filters, limit)
+                source = "hot_cache"
+            else:
+                if con is None:
+                    con = get_db_connection(read_only=True)
+                cur_frame = _fetch_frame(con, cur_filters, limit)
+                prev_frame = _fetch_frame(con, prev_filters, limit)
+                source = os.getenv("DB_PROVIDER", "motherduck").lower()
+            splits_df, tickers_df, derived_df = _load_quality_frames()
+            refs = dict(fade_threshold=fade_threshold, splits_df=splits_df,
+                        tickers_df=tickers_df, derived_df=derived_df)
+            payload, quality = analyze_period(cur_frame, full=True, **refs)
+            prev_kpis = analyze_period(prev_frame, full=False, **refs)[0]["kpis"]
+            for key in _DELTA_KPIS:
+                payload["kpis"][key]["prev"] = prev_kpis[key]["value"]
+            payload["quality_filters"] = quality
+            payload["source"] = source
+            payload["period"] = {"start": str(start), "end": str(end_label)}
+            return payload
+
         if use_hot:
             cur_records = _hot_records(hot_df, cur_filters, limit)
             prev_records = _hot_records(hot_df, prev_filters, limit)
@@ -877,6 +943,12 @@ def compute_gaps_by_sector(
 
 
 def get_gaps_by_sector(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Single-flight sobre _get_gaps_by_sector (ver get_market_analysis)."""
+    return single_flight.group("market_analysis.sectors").do(
+        _flight_key(filters), lambda: _get_gaps_by_sector(filters))
+
+
+def _get_gaps_by_sector(filters: Dict[str, Any]) -> Dict[str, Any]:
     """
     Orquestación con BD (router fino → aquí). Ventana 5d/30d/90d (independiente del
     selector global de la página, como lo era Time Distribution), gappers con
@@ -29,6 +29,7 @@ from app.db.gcs_cache import (
     get_connection,
     INTRADAY_BATCH_SIZE,
 )
+from app.db.slab_store import StaleSlabRef
 from app.services.backtest_service import run_backtest
 from app.redis_client import get_redis
 
@@ -199,8 +200,9 @@ def pop_result(task_id: str):
 # a sweep is running (one optimization at a time per process).
 _GRID_CTX = {}
 
-# Per-process signal cache for risk-only sweeps. Each forked worker fills its
-# own copy across the chunks it processes; stays empty in the parent.
+# Per-process signal cache for risk-only sweeps when the persistent signal
+# store is off (BTT_SIGNAL_CACHE_ENABLED=0). Each forked worker fills its own
+# copy across the chunks it processes; stays empty in the parent.
 _WORKER_SIGNAL_CACHE = {}
 
 # Performance metrics we can optimise for
@@ -488,27 +490,99 @@ def _set_nested_value(obj, path: str, value):
         current[last_key] = value
 
 
-def _run_grid_point(idx: int, ctx: dict, signal_cache: dict | None):
-    """Run one grid point. Returns (idx, metric_val_or_nan, detail_dict)."""
-    point = ctx["grid_points"][idx]
+def _point_strategy_def(ctx: dict, idx: int) -> dict:
+    """Strategy definition of grid point `idx` (deep copy of the base def)."""
     param_configs = ctx["param_configs"]
+    modified_def = copy.deepcopy(ctx["base_def"])
+    for dim, val in enumerate(ctx["grid_points"][idx]):
+        _set_nested_value(modified_def, param_configs[dim]["path"], val)
+    return modified_def
+
+
+def _point_qualifying(ctx: dict, point_def: dict):
+    """(qualifying_df, valid_keys) of a grid point. If optimizing preconditions
+    they are re-evaluated for this point and valid_keys holds its (date, ticker)
+    pairs; otherwise valid_keys is None (every pair)."""
     qualifying_df = ctx["qualifying_df"]
+    if not ctx["opt_preconds"]:
+        return qualifying_df, None
+    point_preconditions = point_def.get("postgap_preconditions", [])
+    point_qualifying_df = _evaluate_postgap_preconditions(qualifying_df, point_preconditions)
+    valid_keys = set(zip(point_qualifying_df["date"].astype(str), point_qualifying_df["ticker"]))
+    return point_qualifying_df, valid_keys
+
+
+def _point_groups(ctx: dict, valid_keys: set | None):
+    """(group_iter, n_groups) over the day groups in `valid_keys` (all if None)."""
+    grid_pack = ctx.get("grid_pack")
+    if grid_pack is not None:
+        # Dataset compartido (mmap): los day_df se reconstruyen perezosamente.
+        pack_idx = grid_pack.indices_for(valid_keys) if valid_keys is not None else None
+        return grid_pack.iter_groups(pack_idx), (len(pack_idx) if pack_idx is not None else len(grid_pack))
     precomputed_groups = ctx["precomputed_groups"]
-    backtest_params = ctx["backtest_params"]
+    if valid_keys is not None:
+        precomputed_groups = [g for g in precomputed_groups if (str(g[0][0])[:10], g[0][1]) in valid_keys]
+    return iter(precomputed_groups), len(precomputed_groups)
+
+
+def _point_summary(ctx: dict, bt_result: dict):
+    """(metric_val_or_nan, detail_dict) of a backtest result for the grid."""
+    agg = bt_result.get("aggregate_metrics", {})
+    metric_val = agg.get(ctx["metric_key"], 0)
+    detail = {
+        "sharpe": agg.get("avg_sharpe", 0),
+        "total_return": agg.get("total_return_pct", 0),
+        "max_drawdown": agg.get("max_drawdown_pct", 0),
+        "profit_factor": agg.get("avg_profit_factor", 0),
+        "win_rate": agg.get("win_rate_pct", 0),
+        "expectancy": agg.get("expectancy", 0),
+        "total_trades": agg.get("total_trades", 0),
+        "dd_return": agg.get("dd_return_ratio", 0),
+        "avg_r_ui": agg.get("avg_r_ui", 0),
+    }
+    return (float(metric_val) if metric_val is not None else np.nan), detail
+
+
+def _ctx_qual_lookup(ctx: dict) -> dict:
+    """(ticker, date) -> daily stats of the sweep's qualifying_df, built once per ctx."""
+    from app.services.backtest_service import _build_qualifying_lookup
+
+    qual_lookup = ctx.get("_qual_lookup")
+    if qual_lookup is None:
+        qual_lookup = ctx["_qual_lookup"] = _build_qualifying_lookup(ctx["qualifying_df"])
+    return qual_lookup
 
-    modified_def = copy.deepcopy(ctx["base_def"])
-    for dim, val in enumerate(point):
-        _set_nested_value(modified_def, param_configs[dim]["path"], val)
 
-    # If optimizing preconditions, we must re-evaluate them for this point
-    if ctx["opt_preconds"]:
-        point_preconditions = modified_def.get("postgap_preconditions", [])
-        point_qualifying_df = _evaluate_postgap_preconditions(qualifying_df, point_preconditions)
-        valid_keys = set(zip(point_qualifying_df["date"].astype(str), point_qualifying_df["ticker"]))
-        point_groups = [g for g in precomputed_groups if (str(g[0][0])[:10], g[0][1]) in valid_keys]
+def _point_slab_items(ctx: dict, valid_keys: set | None, point_def: dict, signal_cache):
+    """(slab_items, n_pairs) for run_backtest's slab pipeline when the grid
+    pack serves pairs by slab ref: their bars are resolved against the slab
+    mmap with no per-pair day_df (only the pack's own rows — months without a
+    slab — go through a DataFrame). None → day_group_iter as before: pack
+    without refs, a point carrying a signal cache (the slab pipeline does not
+    use it) or an active swing (the following days are not in the pack)."""
+    grid_pack = ctx.get("grid_pack")
+    if grid_pack is None or not grid_pack.n_slab_refs or signal_cache is not None:
+        return None
+    swing_opt = (point_def.get("risk_management") or {}).get("swing_option", {})
+    if isinstance(swing_opt, dict) and swing_opt.get("active", False):
+        return None
+    pack_idx = grid_pack.indices_for(valid_keys) if valid_keys is not None else None
+    items = grid_pack.iter_slab_items(pack_idx, point_def, _ctx_qual_lookup(ctx))
+    return items, (len(pack_idx) if pack_idx is not None else len(grid_pack))
+
+
+def _run_grid_point(idx: int, ctx: dict, signal_cache: dict | None):
+    """Run one grid point. Returns (idx, metric_val_or_nan, detail_dict)."""
+    backtest_params = ctx["backtest_params"]
+
+    modified_def = _point_strategy_def(ctx, idx)
+    point_qualifying_df, valid_keys = _point_qualifying(ctx, modified_def)
+    group_iter = slab_items = None
+    slab_source = _point_slab_items(ctx, valid_keys, modified_def, signal_cache)
+    if slab_source is not None:
+        slab_items, n_groups = slab_source
     else:
-        point_qualifying_df = qualifying_df
-        point_groups = precomputed_groups
+        group_iter, n_groups = _point_groups(ctx, valid_keys)
 
     try:
         bt_result = run_backtest(
@@ -526,40 +600,258 @@ def _run_grid_point(idx: int, ctx: dict, signal_cache: dict | None):
             custom_end_time=backtest_params.get("custom_end_time"),
             locates_cost=backtest_params.get("locates_cost", 0),
             look_ahead_prevention=backtest_params.get("look_ahead_prevention", False),
-            day_group_iter=iter(point_groups),
-            n_groups_hint=len(point_groups),
+            day_group_iter=group_iter,
+            n_groups_hint=n_groups,
             _signal_cache=signal_cache,
+            day_slab_items=slab_items,
         )
-        agg = bt_result.get("aggregate_metrics", {})
-        metric_val = agg.get(ctx["metric_key"], 0)
-        detail = {
-            "sharpe": agg.get("avg_sharpe", 0),
-            "total_return": agg.get("total_return_pct", 0),
-            "max_drawdown": agg.get("max_drawdown_pct", 0),
-            "profit_factor": agg.get("avg_profit_factor", 0),
-            "win_rate": agg.get("win_rate_pct", 0),
-            "expectancy": agg.get("expectancy", 0),
-            "total_trades": agg.get("total_trades", 0),
-            "dd_return": agg.get("dd_return_ratio", 0),
-            "avg_r_ui": agg.get("avg_r_ui", 0),
-        }
-        return idx, (float(metric_val) if metric_val is not None else np.nan), detail
+        return (idx, *_point_summary(ctx, bt_result))
+    except StaleSlabRef:
+        raise  # slab reconstruido bajo el pack: no es un NaN del punto
     except Exception as e:
         logger.warning(f"[OPT] Point {idx} failed: {e}")
         return idx, np.nan, {}
 
 
+def _signal_batch_size() -> int:
+    """Puntos del grid que se procesan juntos por par (env OPT_SIGNAL_BATCH,
+    default 16; 0/1 desactiva): señales evaluadas juntas en barridos de
+    indicadores, configs de riesgo simuladas juntas en barridos risk-only. Acota
+    la RAM por bloque (K × pares × barras × 2 bytes de señales, K ledgers)."""
+    try:
+        return max(0, int(os.getenv("OPT_SIGNAL_BATCH", "16")))
+    except (TypeError, ValueError):
+        return 16
+
+
+def _build_batch_signal_caches(ctx: dict, idx_list: list[int]) -> list[dict] | None:
+    """Señales de un bloque de puntos de un barrido de indicadores en UNA pasada
+    por los pares: translate_strategy_native_batch computa cada indicador
+    distinto una sola vez por par y evalúa las K variantes sobre ese pool.
+
+    Devuelve un `_signal_cache` de run_backtest por punto (mismo contrato que el
+    caché risk-only: entries/exits/direction/reentries por (ticker, date); el
+    risk management se re-parsea por punto dentro de run_backtest). None si el
+    bloque no es batcheable → cada punto traduce por su cuenta como siempre:
+    N2a apagado, sweep risk-only (ya cachea), swing activo (el par se concatena
+    con días siguientes dentro de run_backtest) o algún plan con has_special.
+    Los pares que fallen aquí NO entran en el caché y run_backtest los traduce
+    por el path clásico.
+    """
+    from app.services.backtest_signals import n2a_native_enabled
+    from app.services.strategy_engine import compile_strategy_def, translate_strategy_native_batch
+
+    if ctx.get("is_risk_only") or len(idx_list) < 2 or not n2a_native_enabled():
+        return None
+    compiled_list = []
+    point_keys = []
+    for idx in idx_list:
+        point_def = _point_strategy_def(ctx, idx)
+        swing_opt = (point_def.get("risk_management") or {}).get("swing_option", {})
+        if isinstance(swing_opt, dict) and swing_opt.get("active", False):
+            return None
+        compiled = compile_strategy_def(point_def)
+        if compiled["_indicator_plan"].get("has_special"):
+            return None
+        compiled_list.append(compiled)
+        point_keys.append(_point_qualifying(ctx, point_def)[1])
+
+    qual_lookup = _ctx_qual_lookup(ctx)
+    # Con precondiciones optimizadas sólo los pares que algún punto del bloque
+    # va a correr; cada punto guarda sólo los suyos.
+    union_keys = None if any(k is None for k in point_keys) else set().union(*point_keys)
+    group_iter, _ = _point_groups(ctx, union_keys)
+
+    caches = [{} for _ in idx_list]
+    no_entries = np.zeros(0, dtype=bool)
+    for (date_raw, ticker_raw), day_df in group_iter:
+        ticker = str(ticker_raw)
+        date = str(date_raw)[:10]
+        # Mismo ensamblado que el loop de run_backtest (orden + dedup + mínimo 5 barras)
+        day_df = day_df.sort_values("timestamp").drop_duplicates(subset=["timestamp"]).reset_index(drop=True)
+        if len(day_df) < 5:
+            continue
+        ts_int64 = day_df["timestamp"].values.astype("datetime64[ns]").astype(np.int64)
+        abs_min = ts_int64 // 60_000_000_000
+        arrays = {
+            "open": day_df["open"].values.astype(np.float64),
+            "high": day_df["high"].values.astype(np.float64),
+            "low": day_df["low"].values.astype(np.float64),
+            "close": day_df["close"].values.astype(np.float64),
+            "volume": day_df["volume"].values.astype(np.float64),
+            "minutes_arr": abs_min % 1440,
+            "abs_min_arr": abs_min,
+        }
+        try:
+            batch = translate_strategy_native_batch(
+                arrays, compiled_list, daily_stats=qual_lookup.get((ticker, date), {})
+            )
+        except Exception as e:
+            logger.warning(f"[OPT] batch signals failed {ticker} {date}: {e}")
+            continue
+        has_entries = batch["entries"].any(axis=1)
+        for k, sig in enumerate(batch["signals"]):
+            if point_keys[k] is not None and (date, ticker_raw) not in point_keys[k]:
+                continue
+            caches[k][(ticker, date)] = {
+                "entries": sig["entries"].copy() if has_entries[k] else no_entries,
+                "exits": sig["exits"].copy() if has_entries[k] else no_entries,
+                "direction": sig["direction"],
+                "accept_reentries": sig["accept_reentries"],
+                "max_reentries": sig["max_reentries"],
+            }
+    return caches
+
+
+# Claves de risk_management que dan forma a los pares (qué días entran y con
+# qué barras): un bloque risk-only solo se simula junto si todas coinciden.
+_PAIR_SHAPING_RISK_KEYS = ("exclude_days_active", "exclude_days", "exclude_months", "swing_option")
+
+
+def _run_risk_batch(ctx: dict, idx_list: list[int], signal_cache) -> list | None:
+    """Bloque de puntos de un barrido risk-only en UNA pasada por los pares
+    (run_backtest_risk_batch): señales del caché y arrays una vez por par y una
+    sola llamada a simulate_jit_batch con las K configs de riesgo.
+
+    Devuelve [(idx, metric, detail)] o None si el bloque no es batcheable →
+    cada punto corre por run_backtest como siempre: barrido de indicadores,
+    kernel Numba apagado (BACKTEST_NUMBA_SIM; el batch ES el kernel), sin caché
+    de señales, precondiciones optimizadas, swing activo o puntos que difieren
+    en exclusiones/dirección.
+    """
+    from app.services.backtest_service import run_backtest_risk_batch
+    from app.services.sim_dispatch import _numba_sim_enabled
+
+    if (not ctx.get("is_risk_only") or signal_cache is None or ctx["opt_preconds"]
+            or len(idx_list) < 2 or not _numba_sim_enabled()):
+        return None
+    point_defs = [_point_strategy_def(ctx, idx) for idx in idx_list]
+    shapes = set()
+    for point_def in point_defs:
+        rm = point_def.get("risk_management") or {}
+        swing_opt = rm.get("swing_option", {})
+        if isinstance(swing_opt, dict) and swing_opt.get("active", False):
+            return None
+        shapes.add(repr([point_def.get("bias")] + [rm.get(k) for k in _PAIR_SHAPING_RISK_KEYS]))
+    if len(shapes) > 1:
+        return None
+
+    backtest_params = ctx["backtest_params"]
+    group_iter, _ = _point_groups(ctx, None)
+    try:
+        results = run_backtest_risk_batch(
+            qualifying_df=ctx["qualifying_df"],
+            strategy_defs=point_defs,
+            init_cash=backtest_params.get("init_cash", 10000),
+            risk_r=backtest_params.get("risk_r", 100),
+            risk_type=backtest_params.get("risk_type", "FIXED"),
+            size_by_sl=backtest_params.get("size_by_sl", False),
+            fees=backtest_params.get("fees", 0),
+            fee_type=backtest_params.get("fee_type", "PERCENT"),
+            slippage=backtest_params.get("slippage", 0),
+            market_sessions=backtest_params.get("market_sessions"),
+            custom_start_time=backtest_params.get("custom_start_time"),
+            custom_end_time=backtest_params.get("custom_end_time"),
+            locates_cost=backtest_params.get("locates_cost", 0),
+            look_ahead_prevention=backtest_params.get("look_ahead_prevention", False),
+            day_group_iter=group_iter,
+            _signal_cache=signal_cache,
+        )
+    except StaleSlabRef:
+        raise
+    except Exception as e:
+        logger.warning(f"[OPT] risk batch {idx_list[0]}-{idx_list[-1]} failed ({e}); running points one by one")
+        return None
+    return [(idx, *_point_summary(ctx, res)) for idx, res in zip(idx_list, results)]
+
+
+def _iter_grid_points(idx_list, ctx: dict, signal_cache: dict | None):
+    """Genera (idx, metric, detail) para `idx_list` en orden, en bloques de
+    _signal_batch_size() puntos: los barridos risk-only simulan el bloque junto
+    (_run_risk_batch) y los de indicadores precalculan sus señales juntas
+    (_build_batch_signal_caches); si el bloque no es batcheable cada punto corre
+    exactamente igual que antes."""
+    idx_list = list(idx_list)
+    block = _signal_batch_size()
+    if block < 2:
+        for idx in idx_list:
+            yield _run_grid_point(idx, ctx, signal_cache)
+        return
+    for b0 in range(0, len(idx_list), block):
+        block_idx = idx_list[b0:b0 + block]
+        rows = _run_risk_batch(ctx, block_idx, signal_cache)
+        if rows is not None:
+            yield from rows
+            continue
+        caches = _build_batch_signal_caches(ctx, block_idx)
+        for k, idx in enumerate(block_idx):
+            yield _run_grid_point(idx, ctx, caches[k] if caches is not None else signal_cache)
+
+
+def _concat_slab_pairs(intraday_df: pd.DataFrame, slab_refs: pd.DataFrame) -> pd.DataFrame:
+    """Fallback sin grid pack: materializa las refs de slab como filas intraday
+    (mismos dtypes float32/int32 del caché) y las une al intraday legacy.
+    StaleSlabRef si el layout de alguna ref ya no está disponible."""
+    from app.db.slab_store import get_month_layout
+
+    parts = [] if intraday_df.empty else [intraday_df]
+    for r in slab_refs.itertuples(index=False):
+        slab = get_month_layout(r.kind, int(r.year), int(r.month), r.layout)
+        arrs = slab.slice_native(int(r.row_start), int(r.row_end))
+        parts.append(pd.DataFrame({
+            "ticker": r.ticker, "date": r.date,
+            "timestamp": arrs.timestamps_dt64(),
+            "open": arrs.open, "high": arrs.high, "low": arrs.low,
+            "close": arrs.close, "volume": arrs.volume,
+        }))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+
+def _risk_only_signal_cache(ctx: dict, fallback: dict | None):
+    """Caché de señales de un sweep risk-only: el SignalStore persistente de la
+    lógica del sweep (compartido entre workers y entre runs, signal_store.py) o
+    `fallback` (dict por proceso) si está desactivado o no se pudo abrir.
+    None en sweeps de indicadores (cada punto traduce sus propias señales)."""
+    if not ctx.get("is_risk_only"):
+        return None
+    logic_hash = ctx.get("signal_logic_hash")
+    if logic_hash:
+        try:
+            from app.db.signal_store import open_signal_store
+            store = open_signal_store(logic_hash)
+            store.refresh()  # segmentos publicados por otros workers/runs
+            return store
+        except Exception as e:
+            logger.warning(f"[OPT] signal store unavailable ({e}); using in-process cache")
+    return fallback
+
+
+def _flush_signal_cache(signal_cache) -> None:
+    if hasattr(signal_cache, "flush"):
+        signal_cache.flush()
+
+
 def _init_grid_ctx(ctx: dict):
     """Inicializador de cada worker del grid (forkserver): fija _GRID_CTX.
 
     Con `forkserver` los workers se forkean desde un proceso servidor LIMPIO
     (un solo hilo) → NO heredan el global del padre por COW, así que el ctx
-    (dataset pre-agrupado incluido) se pasa pickled una vez por worker vía
-    `initargs`. Esto esquiva el segfault de fork-en-proceso-multihilo que
-    rompía el pool cuando el hilo SSL del live_screener estaba vivo. Con
-    `fork` el ctx ya se hereda por COW y esto es redundante pero inofensivo.
+    se pasa pickled una vez por worker vía `initargs`. Esto esquiva el
+    segfault de fork-en-proceso-multihilo que rompía el pool cuando el hilo
+    SSL del live_screener estaba vivo. Con `fork` el ctx ya se hereda por COW
+    y esto es redundante pero inofensivo.
+
+    Si el ctx trae `grid_pack_dir` el dataset NO viaja por initargs: el worker
+    abre el pack publicado por el padre (mmap compartido, grid_pack.py).
     """
     global _GRID_CTX
+    pack_dir = ctx.get("grid_pack_dir")
+    if pack_dir:
+        from app.db.grid_pack import open_grid_pack
+        pack = open_grid_pack(pack_dir)
+        ctx = {**ctx, "grid_pack": pack, "qualifying_df": pack.qualifying_df}
     _GRID_CTX = ctx
 
 
@@ -568,13 +860,17 @@ def _run_grid_chunk(idx_list: list[int]):
 
     Reads the dataset from _GRID_CTX (heredado por COW con `fork`, o fijado
     por `_init_grid_ctx` con `forkserver`); only the index list and the
-    per-point results cross the process boundary. The signal cache persists
-    in the child across chunks, so each worker translates the strategy signals
-    at most once per (ticker, date) on risk-only sweeps.
+    per-point results cross the process boundary. On risk-only sweeps the
+    signal cache is the shared persistent SignalStore (new pairs are published
+    at the end of each chunk) or, with it disabled, a per-child dict that
+    persists across chunks — either way signals are translated at most once
+    per (ticker, date).
     """
     ctx = _GRID_CTX
-    signal_cache = _WORKER_SIGNAL_CACHE if ctx.get("is_risk_only") else None
-    return [_run_grid_point(idx, ctx, signal_cache) for idx in idx_list]
+    signal_cache = _risk_only_signal_cache(ctx, _WORKER_SIGNAL_CACHE)
+    results = list(_iter_grid_points(idx_list, ctx, signal_cache))
+    _flush_signal_cache(signal_cache)
+    return results
 
 
 def run_optimization_grid(
@@ -704,12 +1000,34 @@ def run_optimization_grid(
     dates = pd.to_datetime(qualifying_df["date"])
     ym_pairs = sorted(set(zip(dates.dt.year, dates.dt.month)))
 
+    # Slab-native source (BTT_SLAB_STREAM_ENABLED): months with a published slab
+    # are served as row-range refs into the mmapped slab (no fetch, no concat,
+    # no merge, no groupby). Only months WITHOUT a slab take the legacy fetch.
+    slab_refs = None
+    from app.services.backtest_signals import slab_stream_enabled
+    from app.db.grid_pack import grid_pack_enabled
+    if slab_stream_enabled() and grid_pack_enabled():
+        try:
+            from app.db.slab_store import get_month_any_kind, slab_pair_refs
+            slab_months = [ym for ym in ym_pairs if get_month_any_kind(*ym) is not None]
+            if slab_months:
+                slab_refs = slab_pair_refs(qualifying_df, slab_months)
+                ym_pairs = [ym for ym in ym_pairs if ym not in set(slab_months)]
+                logger.info(
+                    f"[OPT][SLAB] {len(slab_refs)} pairs from {len(slab_months)} slab month(s); "
+                    f"{len(ym_pairs)} month(s) via legacy fetch"
+                )
+        except Exception as e:
+            logger.warning(f"[OPT][SLAB] slab source failed ({e}); legacy fetch for all months")
+            slab_refs = None
+            ym_pairs = sorted(set(zip(dates.dt.year, dates.dt.month)))
+
     # Parallel month fetch — the optimization path has no chronological-order
     # requirement (chunks are concat'd then re-grouped), so months download
     # concurrently to overlap GCS network latency. Each worker uses its own
     # thread-local DuckDB connection; _fetch_and_cache_month is thread-safe
     # (atomic per-ticker writes + in-flight dedup). Workers capped to cores.
-    N_FETCH_WORKERS = min(4, len(ym_pairs))
+    N_FETCH_WORKERS = max(1, min(4, len(ym_pairs)))
 
     def _fetch_one_month(args):
         year, month, valid_pairs_month, batch_size, i, n_chunks = args
@@ -764,30 +1082,34 @@ def run_optimization_grid(
         intraday_df["date"] = intraday_df["date"].astype(str)
         intraday_df = intraday_df.merge(valid_pairs, on=["ticker", "date"], how="inner")
 
-    # Apply date filters to intraday as fallback
-    if start_date:
+    # Apply date filters to intraday as fallback (slab refs already come from
+    # the date-filtered qualifying_df)
+    if start_date and not intraday_df.empty:
         intraday_df = intraday_df[intraday_df["date"].astype(str) >= start_date]
-    if opt_end_date:
+    if opt_end_date and not intraday_df.empty:
         intraday_df = intraday_df[intraday_df["date"].astype(str) <= opt_end_date]
 
     if task_id:
         set_progress(task_id, 5.0)
 
-    if qualifying_df.empty or intraday_df.empty:
+    has_slab_pairs = slab_refs is not None and not slab_refs.empty
+    if qualifying_df.empty or (intraday_df.empty and not has_slab_pairs):
         raise ValueError("No data for selected period/preconditions")
 
-    # --- OPTIMIZATION: Pre-group data once ---
-    precomputed_groups = list(intraday_df.groupby(["date", "ticker"]))
-    n_groups = len(precomputed_groups)
-    logger.info(f"[OPT] Pre-grouped {n_groups} day/ticker groups")
-
     # --- OPTIMIZATION: Detect risk-only parameters ---
     is_risk_only = all(
         pc["path"].startswith("risk_management.")
         for pc in param_configs
     )
+    signal_logic_hash = None
     if is_risk_only:
         logger.info("[OPT] Risk-only parameters detected — signal caching ENABLED")
+        from app.db.signal_store import signal_store_enabled, signal_logic_hash as _logic_hash
+        if signal_store_enabled():
+            try:
+                signal_logic_hash = _logic_hash(base_def)
+            except Exception as e:
+                logger.warning(f"[OPT] signal logic hash failed ({e}); persistent signal cache off")
     else:
         logger.info("[OPT] Indicator parameters detected — signal caching disabled")
 
@@ -825,12 +1147,45 @@ def run_optimization_grid(
         "param_configs": param_configs,
         "opt_preconds": opt_preconds,
         "qualifying_df": qualifying_df,
-        "precomputed_groups": precomputed_groups,
         "backtest_params": backtest_params,
         "metric_key": metric_key,
         "is_risk_only": is_risk_only,
+        "signal_logic_hash": signal_logic_hash,
     }
 
+    # --- OPTIMIZATION: Pre-group data once ---
+    # Parallel or slab-sourced: the dataset is published ONCE as a shared mmap
+    # pack (slab months as refs) and workers attach to it (grid_pack.py)
+    # instead of unpickling a full copy each.
+    # Sequential without slabs (or pack publish failure): legacy groupby list.
+    worker_ctx = ctx
+    grid_pack_dir = None
+    if use_parallel or has_slab_pairs:
+        from app.db.grid_pack import publish_grid_pack, open_grid_pack
+        if grid_pack_enabled():
+            try:
+                grid_pack_dir = publish_grid_pack(intraday_df, qualifying_df, slab_refs=slab_refs)
+                ctx["grid_pack"] = open_grid_pack(grid_pack_dir)
+                worker_ctx = {k: v for k, v in ctx.items()
+                              if k not in ("qualifying_df", "grid_pack")}
+                worker_ctx["grid_pack_dir"] = grid_pack_dir
+                n_groups = len(ctx["grid_pack"])
+                logger.info(f"[OPT] Published grid pack with {n_groups} day/ticker groups")
+            except Exception as e:
+                logger.warning(f"[OPT] grid pack publish failed ({e}); pickling dataset to workers")
+                grid_pack_dir = None
+                ctx.pop("grid_pack", None)
+    if "grid_pack" not in ctx:
+        if has_slab_pairs:
+            # Sin pack no hay quien resuelva las refs: materializa los pares del
+            # slab como filas normales y sigue por el path legacy.
+            intraday_df = _concat_slab_pairs(intraday_df, slab_refs)
+        precomputed_groups = list(intraday_df.groupby(["date", "ticker"]))
+        ctx["precomputed_groups"] = precomputed_groups
+        n_groups = len(precomputed_groups)
+        logger.info(f"[OPT] Pre-grouped {n_groups} day/ticker groups")
+    del intraday_df
+
     logger.info(
         f"[OPT] Starting grid sweep: {n_points} points, shape={shape}, "
         f"mode={f'parallel x{n_workers}' if use_parallel else 'sequential'}"
@@ -841,7 +1196,8 @@ def run_optimization_grid(
         # DuckDB (connections don't survive fork/forkserver).
         try:
             from app.services.indicators import prefetch_daily_ohlc
-            prefetch_daily_ohlc(list(qualifying_df["ticker"].unique()))
+            pairs = qualifying_df[["ticker", "date"]].drop_duplicates()
+            prefetch_daily_ohlc(list(pairs["ticker"]), list(pairs["date"]))
         except Exception as e:
             logger.warning(f"[OPT] prefetch_daily_ohlc pre-warm failed: {e}")
 
@@ -851,16 +1207,28 @@ def run_optimization_grid(
         _GRID_CTX.update(ctx)
         failed_idx: list[int] = []
         completed = 0
+        first_idx = 0
         try:
-            chunk_size = max(1, math.ceil(n_points / (n_workers * 4)))
+            if signal_logic_hash:
+                # Punto semilla en el padre: traduce y PUBLICA las señales de
+                # todos los pares una vez, así ningún worker las genera (todos
+                # arrancan leyendo el store). En un re-run ya viene caliente.
+                seed_cache = _risk_only_signal_cache(ctx, None)
+                if seed_cache is not None:
+                    _, metric_val, detail = _run_grid_point(0, ctx, seed_cache)
+                    _flush_signal_cache(seed_cache)
+                    results_flat[0] = metric_val
+                    details_flat[0] = detail
+                    first_idx = completed = 1
+            chunk_size = max(1, math.ceil((n_points - first_idx) / (n_workers * 4)))
             chunks = [
                 list(range(i, min(i + chunk_size, n_points)))
-                for i in range(0, n_points, chunk_size)
+                for i in range(first_idx, n_points, chunk_size)
             ]
             mp_ctx = multiprocessing.get_context(_grid_ctx_method)
             with ProcessPoolExecutor(
                 max_workers=n_workers, mp_context=mp_ctx,
-                initializer=_init_grid_ctx, initargs=(ctx,),
+                initializer=_init_grid_ctx, initargs=(worker_ctx,),
             ) as pool:
                 futures = {pool.submit(_run_grid_chunk, chunk): chunk for chunk in chunks}
                 for future in as_completed(futures):
@@ -890,6 +1258,10 @@ def run_optimization_grid(
                     logger.info(f"[OPT] Progress: {completed}/{n_points} ({elapsed}s)")
         finally:
             _GRID_CTX.clear()
+            # El pack abierto en ctx (padre) sigue siendo válido tras el unlink:
+            # la red de seguridad secuencial de abajo puede seguir leyéndolo.
+            from app.db.grid_pack import release_grid_pack
+            release_grid_pack(grid_pack_dir)
 
         # SAFETY NET: si el pool se degradó (p.ej. BrokenProcessPool), recomputa
         # los puntos caídos EN SERIE en el proceso padre (sin fork) en vez de
@@ -900,36 +1272,46 @@ def run_optimization_grid(
                 f"[OPT] Pool degraded — recomputing {len(failed_idx)}/{n_points} "
                 f"point(s) sequentially (worker pool broke)"
             )
-            seq_cache = {} if is_risk_only else None
+            seq_cache = _risk_only_signal_cache(ctx, {})
             done_par = n_points - len(failed_idx)
-            for j, idx in enumerate(failed_idx):
+            try:
+                for j, idx in enumerate(failed_idx):
+                    if is_optimization_cancelled(task_id):
+                        raise RuntimeError("OPTIMIZATION_CANCELLED")
+                    _, metric_val, detail = _run_grid_point(idx, ctx, seq_cache)
+                    results_flat[idx] = metric_val
+                    details_flat[idx] = detail
+                    if task_id:
+                        prog = round(5.0 + ((done_par + j + 1) / n_points) * 95.0, 2)
+                        set_progress(task_id, prog)
+            finally:
+                _flush_signal_cache(seq_cache)
+    else:
+        signal_cache = _risk_only_signal_cache(ctx, {})
+        try:
+            if is_optimization_cancelled(task_id):
+                logger.info(f"[OPT] Task {task_id} cancelled during sequential grid sweep.")
+                raise RuntimeError("OPTIMIZATION_CANCELLED")
+            for idx, metric_val, detail in _iter_grid_points(range(n_points), ctx, signal_cache):
                 if is_optimization_cancelled(task_id):
+                    logger.info(f"[OPT] Task {task_id} cancelled during sequential grid sweep.")
                     raise RuntimeError("OPTIMIZATION_CANCELLED")
-                _, metric_val, detail = _run_grid_point(idx, ctx, seq_cache)
                 results_flat[idx] = metric_val
                 details_flat[idx] = detail
+
                 if task_id:
-                    prog = round(5.0 + ((done_par + j + 1) / n_points) * 95.0, 2)
+                    prog = round(5.0 + ((idx + 1) / n_points) * 95.0, 2)
                     set_progress(task_id, prog)
-    else:
-        signal_cache = {} if is_risk_only else None
-        for idx in range(n_points):
-            if is_optimization_cancelled(task_id):
-                logger.info(f"[OPT] Task {task_id} cancelled during sequential grid sweep.")
-                raise RuntimeError("OPTIMIZATION_CANCELLED")
-            _, metric_val, detail = _run_grid_point(idx, ctx, signal_cache)
-            results_flat[idx] = metric_val
-            details_flat[idx] = detail
-
-            if task_id:
-                prog = round(5.0 + ((idx + 1) / n_points) * 95.0, 2)
-                set_progress(task_id, prog)
-                if (idx + 1) % 5 == 0:
-                    logger.info(f"[PROGRESS] {task_id}: {prog}%")
-
-            if (idx + 1) % 10 == 0:
-                elapsed = round(time.time() - t0, 1)
-                logger.info(f"[OPT] Progress: {idx+1}/{n_points} ({elapsed}s)")
+                    if (idx + 1) % 5 == 0:
+                        logger.info(f"[PROGRESS] {task_id}: {prog}%")
+
+                if (idx + 1) % 10 == 0:
+                    elapsed = round(time.time() - t0, 1)
+                    logger.info(f"[OPT] Progress: {idx+1}/{n_points} ({elapsed}s)")
+        finally:
+            _flush_signal_cache(signal_cache)
+            from app.db.grid_pack import release_grid_pack
+            release_grid_pack(grid_pack_dir)
 
     # Reshape to grid
     results_grid = results_flat.reshape(shape)
@@ -17,6 +17,10 @@ Hard rules for tol-0 equivalence:
 The core returns flat homogeneous arrays (one row per trade); the wrapper in
 portfolio_sim.py reassembles the exact trade dicts and applies the daily
 locates fee (which runs once, off the hot path).
+
+``_core_simulate_batch_jit`` runs the same core for K risk configurations of
+one pair in a single call (parameter matrices instead of scalars); see
+``sim_dispatch.simulate_jit_batch``.
 """
 
 import math
@@ -686,3 +690,152 @@ def _core_simulate_jit(
         r_return_pct, r_size, r_reason, r_mae, r_mfe, r_stop,
         max_short_size_today, risk_amount,
     )
+
+
+# --- batch kernel: K risk configurations over ONE pair ---------------------
+# Column layout of the per-config parameter matrices of _core_simulate_batch_jit.
+# cfg_f (float64[K, N_CFG_F])
+CF_INIT_CASH = 0
+CF_RISK_R = 1
+CF_FIXED_RATIO_DELTA = 2
+CF_FEES = 3
+CF_SLIPPAGE = 4
+CF_SL_STOP = 5
+CF_TP_STOP = 6
+CF_TP_TIME_VALUE = 7
+CF_TRAIL_PCT = 8
+CF_SL_OFFSET = 9
+CF_ELAPSED_LIMIT = 10
+N_CFG_F = 11
+# cfg_i (int64[K, N_CFG_I]); booleans as 0/1
+CI_RISK_TYPE = 0
+CI_SIZE_BY_SL = 1
+CI_FEE_TYPE = 2
+CI_HAS_SL_STOP = 3
+CI_SL_TRAIL = 4
+CI_HAS_TP_STOP = 5
+CI_TP_TIME_MODE = 6
+CI_TP_HOUR = 7
+CI_TP_MIN = 8
+CI_ACCUMULATE = 9
+CI_MAX_REENTRIES = 10
+CI_HAS_TRAIL_PCT = 11
+CI_LOOK_AHEAD = 12
+CI_HS_TYPE = 13
+CI_HS_VALUE = 14
+CI_ELAPSED_OP = 15
+CI_N_PT = 16
+CI_HAS_HOURS = 17
+N_CFG_I = 18
+
+
+@njit(cache=True)
+def _core_simulate_batch_jit(
+    close, open_, high, low, entries, exits,
+    is_long,
+    cfg_f, cfg_i,
+    pt_type, pt_value, pt_cap_frac, pt_hour, pt_min,
+    has_hods, hods,
+    has_lods, lods,
+    has_pm_high, pm_highs,
+    has_pm_low, pm_lows,
+    has_prev_high, prev_highs,
+    has_prev_low, prev_lows,
+    has_timestamps, timestamps,
+    row_hours, row_minutes,
+):
+    """Runs _core_simulate_jit once per row of (cfg_f, cfg_i) over the same
+    market arrays, inside numba (no Python wrapper cost per config). Each
+    config goes through the EXACT single-config core, so every result is
+    bit-identical to a separate call.
+
+    Returns (equity[K, n], offsets[K + 1], flat trade arrays, max_short[K],
+    last_risk[K]); config c owns trade rows offsets[c]:offsets[c + 1].
+    """
+    n_cfg = cfg_f.shape[0]
+    n = len(close)
+    total_cap = 0
+    for c in range(n_cfg):
+        total_cap += n * (cfg_i[c, CI_N_PT] + 1) + 4
+
+    equity = np.empty((n_cfg, n), dtype=np.float64)
+    offsets = np.zeros(n_cfg + 1, dtype=np.int64)
+    max_short = np.zeros(n_cfg, dtype=np.float64)
+    last_risk = np.zeros(n_cfg, dtype=np.float64)
+    o_entry_idx = np.empty(total_cap, dtype=np.int64)
+    o_exit_idx = np.empty(total_cap, dtype=np.int64)
+    o_entry_px = np.empty(total_cap, dtype=np.float64)
+    o_exit_px = np.empty(total_cap, dtype=np.float64)
+    o_pnl = np.empty(total_cap, dtype=np.float64)
+    o_fees = np.empty(total_cap, dtype=np.float64)
+    o_return_pct = np.empty(total_cap, dtype=np.float64)
+    o_size = np.empty(total_cap, dtype=np.float64)
+    o_reason = np.empty(total_cap, dtype=np.int64)
+    o_mae = np.empty(total_cap, dtype=np.float64)
+    o_mfe = np.empty(total_cap, dtype=np.float64)
+    o_stop = np.empty(total_cap, dtype=np.float64)
+
+    pos = 0
+    for c in range(n_cfg):
+        (
+            eq, k,
+            r_entry_idx, r_exit_idx, r_entry_px, r_exit_px, r_pnl, r_fees,
+            r_return_pct, r_size, r_reason, r_mae, r_mfe, r_stop,
+            ms, lr,
+        ) = _core_simulate_jit(
+            close, open_, high, low, entries, exits,
+            is_long,
+            cfg_f[c, CF_INIT_CASH], cfg_f[c, CF_RISK_R],
+            cfg_i[c, CI_RISK_TYPE],
+            cfg_f[c, CF_FIXED_RATIO_DELTA],
+            cfg_i[c, CI_SIZE_BY_SL] != 0,
+            cfg_f[c, CF_FEES], cfg_i[c, CI_FEE_TYPE],
+            cfg_f[c, CF_SLIPPAGE],
+            cfg_i[c, CI_HAS_SL_STOP] != 0, cfg_f[c, CF_SL_STOP],
+            cfg_i[c, CI_SL_TRAIL] != 0,
+            cfg_i[c, CI_HAS_TP_STOP] != 0, cfg_f[c, CF_TP_STOP],
+            cfg_i[c, CI_TP_TIME_MODE], cfg_f[c, CF_TP_TIME_VALUE],
+            cfg_i[c, CI_TP_HOUR], cfg_i[c, CI_TP_MIN],
+            cfg_i[c, CI_ACCUMULATE] != 0,
+            cfg_i[c, CI_MAX_REENTRIES],
+            cfg_i[c, CI_HAS_TRAIL_PCT] != 0, cfg_f[c, CF_TRAIL_PCT],
+            cfg_i[c, CI_LOOK_AHEAD] != 0,
+            cfg_i[c, CI_HS_TYPE], cfg_i[c, CI_HS_VALUE], cfg_f[c, CF_SL_OFFSET],
+            has_hods, hods,
+            has_lods, lods,
+            has_pm_high, pm_highs,
+            has_pm_low, pm_lows,
+            has_prev_high, prev_highs,
+            has_prev_low, prev_lows,
+            has_timestamps, timestamps,
+            cfg_i[c, CI_HAS_HOURS] != 0, row_hours, row_minutes,
+            cfg_f[c, CF_ELAPSED_LIMIT], cfg_i[c, CI_ELAPSED_OP],
+            cfg_i[c, CI_N_PT], pt_type[c], pt_value[c], pt_cap_frac[c],
+            pt_hour[c], pt_min[c],
+        )
+        equity[c, :] = eq
+        for t in range(k):
+            o_entry_idx[pos + t] = r_entry_idx[t]
+            o_exit_idx[pos + t] = r_exit_idx[t]
+            o_entry_px[pos + t] = r_entry_px[t]
+            o_exit_px[pos + t] = r_exit_px[t]
+            o_pnl[pos + t] = r_pnl[t]
+            o_fees[pos + t] = r_fees[t]
+            o_return_pct[pos + t] = r_return_pct[t]
+            o_size[pos + t] = r_size[t]
+            o_reason[pos + t] = r_reason[t]
+            o_mae[pos + t] = r_mae[t]
+            o_mfe[pos + t] = r_mfe[t]
+            o_stop[pos + t] = r_stop[t]
+        pos += k
+        offsets[c + 1] = pos
+        max_short[c] = ms
+        last_risk[c] = lr
+
+    return (
+        equity, offsets,
+        o_entry_idx[:pos], o_exit_idx[:pos], o_entry_px[:pos], o_exit_px[:pos],
+        o_pnl[:pos], o_fees[:pos], o_return_pct[:pos], o_size[:pos],
+        o_reason[:pos], o_mae[:pos], o_mfe[:pos], o_stop[:pos],
+        max_short, last_risk,
+    )
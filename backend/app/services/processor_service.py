@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from app.database import get_db_connection
 
 
 def process_daily_metrics(df, con=None):
@@ -208,48 +207,19 @@ def get_dashboard_stats(filtered_df):
 def get_aggregate_time_series(ticker_date_pairs):
     """
     For a list of (ticker, date), calculate the average % change from RTH open
-    at each minute of the day.
+    at each minute of the day (plus median / p25 / p75).
+
+    Every pair counts: per-pair 390-minute curves are precomputed per slab month
+    (app.db.open_curves) and reduced with numpy; months without slab fall back
+    to a single batched query per month.
     """
     if not ticker_date_pairs:
         return []
 
-    con = get_db_connection()
-    all_series = []
-
-    for item in ticker_date_pairs[:10]:
-        ticker = item["ticker"]
-        date = item["date"]
-
-        df = con.execute(
-            "SELECT timestamp, open, close FROM intraday_1m WHERE ticker = ? AND CAST(timestamp AS DATE) = CAST(? AS DATE)",
-            [ticker, date],
-        ).fetch_df()
-
-        if df.empty:
-            continue
-
-        df = df.sort_values("timestamp")
-        rth = df[
-            (df["timestamp"].dt.time >= pd.Timestamp("09:30").time())
-            & (df["timestamp"].dt.time < pd.Timestamp("16:00").time())
-        ]
+    from app.db import open_curves
 
-        if rth.empty:
-            continue
-
-        open_price = rth.iloc[0]["open"]
-        rth["pct_change"] = ((rth["close"] - open_price) / open_price) * 100
-        rth["time_str"] = rth["timestamp"].dt.strftime("%H:%M")
-
-        all_series.append(rth[["time_str", "pct_change"]])
-
-    con.close()
-
-    if not all_series:
+    pairs = [(item["ticker"], item["date"]) for item in ticker_date_pairs]
+    matrix = open_curves.dataset_curves(pairs)
+    if not len(matrix):
         return []
-
-    combined = pd.concat(all_series)
-    agg = combined.groupby("time_str")["pct_change"].mean().reset_index()
-
-    return agg.rename(columns={"time_str": "time", "pct_change": "value"}).to_dict(orient="records")
-
+    return open_curves.curve_points(open_curves.curve_stats(matrix))
@@ -0,0 +1,211 @@
+"""
+Planner compartido de consultas sobre daily_metrics.
+
+/api/data/filter y query_service.build_screener_query traducían fechas y reglas
+cada uno a su manera; el filtro de /filter comparaba ``CAST(timestamp AS
+VARCHAR)[:10]`` contra strings, lo que obliga a DuckDB a formatear cada fila del
+lake y no deja podar particiones hive. Aquí ambos obtienen:
+
+  * ``DatePlan`` — ventana [start, stop) en días, predicado tipado sobre
+    ``timestamp`` y la lista explícita de meses (year, month) que toca.
+  * ``partition_predicate`` — ``year``/``month`` para el pushdown de hive.
+  * ``daily_metrics_source`` — en GCS, ``read_parquet([...])`` sólo sobre los
+    meses del plan (misma proyección que la vista massive.daily_metrics), salvo
+    que la réplica local (app.db.daily_replica) esté adjunta.
+  * ``rule_predicate`` — reglas {metric, operator, value} → (sql, params).
+"""
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Optional
+
+# Operadores de reglas aceptados (UI + SQL) → SQL
+SQL_OPERATORS = {
+    "GREATER_THAN": ">",
+    "LESS_THAN": "<",
+    "GREATER_THAN_OR_EQUAL": ">=",
+    "LESS_THAN_OR_EQUAL": "<=",
+    "EQUAL": "=",
+    "CONTAINS": "LIKE",
+    "=": "=",
+    "!=": "!=",
+    ">": ">",
+    ">=": ">=",
+    "<": "<",
+    "<=": "<=",
+}
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+# Misma proyección que la vista massive.daily_metrics de database.py (GCS)
+_GCS_DAILY_PROJECTION = (
+    "SELECT * EXCLUDE (pmh_gap_pct), gap_pct AS gap_at_open_pct, "
+    "((pm_high - prev_close) / NULLIF(prev_close, 0) * 100) as pmh_gap_pct"
+)
+
+
+def parse_day(value: Any) -> Optional[date]:
+    """'YYYY-MM-DD[...]' | date → date. None/'' → None; formato inválido → ValueError."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise ValueError(f"invalid date: {value!r}")
+
+
+def months_between(first: date, last: date) -> list[tuple[int, int]]:
+    """(year, month) de first a last, ambos meses incluidos."""
+    out: list[tuple[int, int]] = []
+    y, m = first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        out.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+@dataclass(frozen=True)
+class DatePlan:
+    """Ventana de días [start, stop) — cualquiera de los extremos puede ser abierto."""
+    start: Optional[date] = None
+    stop: Optional[date] = None
+
+    @classmethod
+    def inclusive(cls, date_from: Any = None, date_to: Any = None) -> "DatePlan":
+        """date_from/date_to inclusivos (semántica de /filter)."""
+        d_to = parse_day(date_to)
+        return cls(parse_day(date_from), d_to + timedelta(days=1) if d_to else None)
+
+    @classmethod
+    def exclusive(cls, date_from: Any = None, date_to: Any = None) -> "DatePlan":
+        """date_to exclusivo (semántica histórica de build_screener_query)."""
+        return cls(parse_day(date_from), parse_day(date_to))
+
+    @classmethod
+    def day(cls, trade_date: Any) -> "DatePlan":
+        d = parse_day(trade_date)
+        return cls(d, d + timedelta(days=1) if d else None)
+
+    @property
+    def bounded(self) -> bool:
+        return self.start is not None and self.stop is not None
+
+    @property
+    def empty(self) -> bool:
+        return self.bounded and self.stop <= self.start
+
+    @property
+    def months(self) -> list[tuple[int, int]]:
+        """Meses que toca la ventana; [] si no está acotada por ambos lados."""
+        if not self.bounded or self.empty:
+            return []
+        return months_between(self.start, self.stop - timedelta(days=1))
+
+    def predicates(self, column: str = "timestamp") -> tuple[list[str], list[Any]]:
+        """Predicados tipados sobre la columna TIMESTAMP (sin formatear filas)."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if self.start is not None:
+            clauses.append(f"{column} >= CAST(? AS TIMESTAMP)")
+            params.append(self.start.isoformat())
+        if self.stop is not None:
+            clauses.append(f"{column} < CAST(? AS TIMESTAMP)")
+            params.append(self.stop.isoformat())
+        return clauses, params
+
+
+def partition_predicate(plan: DatePlan, year_col: str = "year", month_col: str = "month") -> Optional[str]:
+    """
+    Predicado sobre las columnas hive year/month con la lista explícita de meses
+    del plan — DuckDB lo evalúa contra las rutas y descarta ficheros sin leerlos.
+    Con un solo extremo se poda por año.
+    """
+    if plan.empty:
+        return "FALSE"
+    months = plan.months
+    if months:
+        by_year: dict[int, list[int]] = {}
+        for y, m in months:
+            by_year.setdefault(y, []).append(m)
+        parts = []
+        for y, ms in by_year.items():
+            if len(ms) == 12:
+                parts.append(f"{year_col} = {y}")
+            else:
+                parts.append(f"({year_col} = {y} AND {month_col} IN ({', '.join(str(m) for m in ms)}))")
+        return parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+    if plan.start is not None:
+        return f"{year_col} >= {plan.start.year}"
+    if plan.stop is not None:
+        return f"{year_col} <= {(plan.stop - timedelta(days=1)).year}"
+    return None
+
+
+def daily_metrics_source(conn, plan: DatePlan, provider: Optional[str] = None) -> str:
+    """
+    FROM de daily_metrics para el plan. Fuera de GCS (o sin ventana acotada) es
+    la vista ``daily_metrics``; en GCS, un ``read_parquet`` con las rutas de mes
+    explícitas (gcs_cache._daily_metrics_read_paths) aliasado como daily_metrics.
+    """
+    provider = (provider or os.getenv("DB_PROVIDER", "motherduck")).lower()
+    if provider != "gcs" or not plan.months:
+        return "daily_metrics"
+    try:
+        from app.db.daily_replica import is_attached
+        if conn is not None and is_attached(conn):
+            return "daily_metrics"  # réplica local (database.get_db_connection)
+    except Exception:
+        pass
+    try:
+        from app.db.gcs_cache import _daily_metrics_read_paths
+        years = {y for y, _ in plan.months}
+        last = plan.stop - timedelta(days=1)
+        paths = _daily_metrics_read_paths(
+            conn, years, {"date_from": plan.start.isoformat(), "date_to": last.isoformat()})
+    except Exception:
+        return "daily_metrics"
+    if not paths:
+        return "daily_metrics"
+    path_list = ", ".join("'" + p.replace("'", "''") + "'" for p in paths)
+    return (f"({_GCS_DAILY_PROJECTION} FROM read_parquet([{path_list}], "
+            f"hive_partitioning=true)) AS daily_metrics")
+
+
+def rule_predicate(
+    column: str,
+    operator: str,
+    value: Any,
+    *,
+    value_column: Optional[str] = None,
+    allowed_ops: Optional[set[str]] = None,
+) -> Optional[tuple[str, list[Any]]]:
+    """
+    Una regla → (sql, params), o None si no es aplicable. ``column`` y
+    ``value_column`` ya vienen resueltos por el mapa del llamador; un nombre sin
+    mapear sólo se acepta si es un identificador plano. Valores numéricos se
+    ligan como float; el resto como string.
+    """
+    sql_op = SQL_OPERATORS.get(operator)
+    if sql_op is None or (allowed_ops is not None and sql_op not in allowed_ops):
+        return None
+    if not column:
+        return None
+    if value_column is not None:
+        return f"{column} {sql_op} {value_column}", []
+    if value is None or value == "":
+        return None
+    try:
+        return f"{column} {sql_op} ?", [float(value)]
+    except (TypeError, ValueError):
+        return f"{column} {sql_op} ?", [value]
+
+
+def safe_column(name: Any) -> Optional[str]:
+    """Nombre de columna sin mapear → sólo si es un identificador plano."""
+    name = str(name or "")
+    return name if _IDENT.match(name) else None
@@ -3,6 +3,10 @@ from typing import Optional, List, Any, Tuple
 import math
 import os
 
+from app.services.query_planner import (
+    SQL_OPERATORS, DatePlan, partition_predicate, rule_predicate, safe_column,
+)
+
 def safe_float(v):
     if v is None: return 0.0
     try:
@@ -164,42 +168,27 @@ def build_screener_query(
     
     provider = os.getenv("DB_PROVIDER", "motherduck").lower()
 
+    # Ventana tipada + meses explícitos (query_planner, compartido con /api/data/filter).
+    # end_date es exclusivo; trade_date es un único día.
     if start_date and end_date:
-        m_filters.append("timestamp >= CAST(? AS TIMESTAMP) AND timestamp < CAST(? AS TIMESTAMP)")
-        sql_p.extend([str(start_date), str(end_date)])
-        
-        # Partition Pruning for GCS
-        if provider == "gcs":
-            try:
-                sy, ey = int(str(start_date)[:4]), int(str(end_date)[:4])
-                # Filter by year partition column
-                m_filters.append(f"year >= {sy} AND year <= {ey}")
-            except: pass
-            
+        plan = DatePlan.exclusive(start_date, end_date)
     elif trade_date:
-        m_filters.append("timestamp >= CAST(? AS TIMESTAMP) AND timestamp < CAST(? AS TIMESTAMP) + INTERVAL '1 day'")
-        sql_p.append(str(trade_date))
-        
-        # Partition Pruning for GCS
-        if provider == "gcs":
-            try:
-                y = int(str(trade_date)[:4])
-                m = int(str(trade_date)[5:7])
-                m_filters.append(f"year = {y} AND month = {m}")
-            except: pass
+        plan = DatePlan.day(trade_date)
     else:
         from datetime import datetime, timedelta
         default_end = datetime.now().date()
-        default_start = default_end - timedelta(days=7)
-        m_filters.append("timestamp >= CAST(? AS TIMESTAMP) AND timestamp < CAST(? AS TIMESTAMP)")
-        sql_p.extend([str(default_start), str(default_end)])
-        
-        # Partition Pruning for GCS
-        if provider == "gcs":
-            try:
-                m_filters.append(f"year >= {default_start.year} AND year <= {default_end.year}")
-            except: pass
-        
+        plan = DatePlan.exclusive(default_end - timedelta(days=7), default_end)
+
+    date_clauses, date_params = plan.predicates("timestamp")
+    m_filters.extend(date_clauses)
+    sql_p.extend(date_params)
+
+    # Partition Pruning for GCS: year/month de los meses que toca la ventana
+    if provider == "gcs":
+        part = partition_predicate(plan)
+        if part:
+            m_filters.append(part)
+
     if ticker:
         m_filters.append("daily_metrics.ticker = ?")
         sql_p.append(ticker.upper())
@@ -264,32 +253,17 @@ def build_screener_query(
             op = rule.get("operator")
             val = rule.get("value")
             if metric and op and val is not None:
-                # Map metric using field_map if possible
-                col = field_map.get(metric, metric)
-                
-                # Convert rule operator to SQL operator
-                sql_op = {
-                    "GREATER_THAN": ">",
-                    "LESS_THAN": "<",
-                    "GREATER_THAN_OR_EQUAL": ">=",
-                    "LESS_THAN_OR_EQUAL": "<=",
-                    "EQUAL": "=",
-                    "CONTAINS": "LIKE",
-                    "=": "=",
-                    "!=": "!=",
-                    ">": ">",
-                    ">=": ">=",
-                    "<": "<",
-                    "<=": "<="
-                }.get(op, op)
-                
-                try:
-                    val_float = float(val)
-                    m_filters.append(f"{col} {sql_op} ?")
-                    sql_p.append(val_float)
-                except ValueError:
-                    m_filters.append(f"{col} {sql_op} ?")
-                    sql_p.append(val)
+                # Map metric using field_map if possible; sin mapear sólo identificadores planos.
+                # Una regla inaplicable NO se ignora: ensancharía el resultado en silencio.
+                col = field_map.get(metric) or safe_column(metric)
+                if col is None:
+                    raise ValueError(f"invalid rule metric: {metric!r}")
+                if op not in SQL_OPERATORS:
+                    raise ValueError(f"unsupported rule operator: {op!r}")
+                pred = rule_predicate(col, op, val)
+                if pred:
+                    m_filters.append(pred[0])
+                    sql_p.extend(pred[1])
 
     # Join with massive.tickers for type filtering
     # We use a LEFT JOIN implicitly if we just want to filter, but an INNER JOIN is better to enforce existence in tickers table
@@ -11,9 +11,16 @@ Flag: BACKTEST_NUMBA_SIM=1 activa el kernel (default 0 = Python). Se lee en cada
 llamada (barato) para poder alternar en tests/bench sin reimportar.
 
 `simulate_jit` es el wrapper de la rama F2 adaptado a módulo propio: mapea
-strings/None/partial-TPs a enums+arrays, llama al kernel y reconstruye los dicts
-de trade EXACTOS (redondeos con round() de Python, `fees` ausente en parciales,
-locates fee post-proceso). Contrato completo en el PRD §03.4/§03.8.
+strings/None/partial-TPs a enums+arrays, llama al kernel y devuelve los trades
+como columnas (trade_ledger.SimTrades) con los valores EXACTOS de los dicts del
+simulador Python (mismos redondeos, `fees` ausente en parciales, locates fee
+post-proceso); se comparan/indexan como esa lista de dicts y el pipeline los
+enriquece sin materializarlos. Contrato completo en el PRD §03.4/§03.8.
+
+Motor float32 (BTT_FLOAT32_ENGINE): si los precios llegan en float32 el kernel
+los consume tal cual (especialización float32 de numba: cargas de 4 bytes,
+aritmética y resultados en float64). El path Python los sube a float64 en la
+entrada — la especificación no ve nunca float32.
 """
 import math
 import os
@@ -24,16 +31,26 @@ import numpy as np
 from app.services.portfolio_sim import simulate as _legacy_simulate
 from app.services import portfolio_sim_jit as _pjit
 from app.services.portfolio_sim_jit import _core_simulate_jit
+from app.services.trade_ledger import SimTrades
 
 
 def _numba_sim_enabled() -> bool:
     return os.getenv("BACKTEST_NUMBA_SIM", "0").strip().lower() in ("1", "true", "yes", "on")
 
 
+# arrays de precio/nivel que el motor float32 puede traer en float32
+_PRICE_KWARGS = ("close", "open_", "high", "low", "hods", "lods",
+                 "pm_highs", "pm_lows", "prev_highs", "prev_lows")
+
+
 def simulate(**kwargs) -> dict:
     """Punto único de entrada del simulador (misma firma/retorno que portfolio_sim)."""
     if _numba_sim_enabled():
         return simulate_jit(**kwargs)
+    for key in _PRICE_KWARGS:
+        arr = kwargs.get(key)
+        if getattr(arr, "dtype", None) == np.float32:
+            kwargs[key] = arr.astype(np.float64)
     return _legacy_simulate(**kwargs)
 
 
@@ -41,18 +58,21 @@ def warmup() -> float:
     """Compila el kernel (cache=True) fuera del primer backtest. Devuelve segundos.
     Best-effort: si numba fallara, el dispatcher sigue sirviendo el path Python."""
     import time
+    from app.services.backtest_signals import engine_dtype
     t0 = time.time()
     try:
         n = 8
-        close = np.linspace(10.0, 11.0, n)
         entries = np.zeros(n, dtype=bool)
         entries[2] = True
-        simulate_jit(
-            close=close, open_=close, high=close * 1.01, low=close * 0.99,
-            entries=entries, exits=np.zeros(n, dtype=bool),
-            direction="longonly", init_cash=1000.0, risk_r=10.0,
-            timestamps=(np.arange(n) * 60_000_000_000).astype(np.int64),
-        )
+        # float64 siempre; float32 además si el motor float32 está activo
+        for dt in {np.float64, engine_dtype()}:
+            close = np.linspace(10.0, 11.0, n).astype(dt)
+            simulate_jit(
+                close=close, open_=close, high=close * 1.01, low=close * 0.99,
+                entries=entries, exits=np.zeros(n, dtype=bool),
+                direction="longonly", init_cash=1000.0, risk_r=10.0,
+                timestamps=(np.arange(n) * 60_000_000_000).astype(np.int64),
+            )
     except Exception:
         pass
     return time.time() - t0
@@ -75,21 +95,16 @@ _REASON_STR = {
 _PARTIAL_REASONS = (6, 7, 8, 9)
 
 
-def simulate_jit(
-    close: np.ndarray,
-    open_: np.ndarray,
-    high: np.ndarray,
-    low: np.ndarray,
-    entries: np.ndarray,
-    exits: np.ndarray,
-    direction: str = "longonly",
+def _encode_risk_params(
+    n: int,
+    has_timestamps: bool,
     init_cash: float = 10000.0,
     risk_r: float = 100.0,
     risk_type: str = "FIXED",
     fixed_ratio_delta: float = 500.0,
     size_by_sl: bool = False,
     fees: float = 0.0,
-    fee_type: str = "PERCENT",  # "PERCENT" or "FLAT"
+    fee_type: str = "PERCENT",
     slippage: float = 0.0,
     sl_stop: float | None = None,
     sl_trail: bool = False,
@@ -98,35 +113,18 @@ def simulate_jit(
     accumulate: bool = False,
     max_reentries: int = -1,
     trail_pct: float | None = None,
-    locates_cost: float = 0.0,
-    locate_type: str = "FLAT",
     look_ahead_prevention: bool = True,
     partial_take_profits: list | None = None,
     hs_type: str | None = None,
     hs_value: str | float | None = None,
     hs_operator: str | None = ">=",
     hs_offset_pct: float | None = 0.0,
-    hods: np.ndarray | None = None,
-    lods: np.ndarray | None = None,
-    pm_highs: np.ndarray | None = None,
-    pm_lows: np.ndarray | None = None,
-    prev_highs: np.ndarray | None = None,
-    prev_lows: np.ndarray | None = None,
-    timestamps: np.ndarray | None = None,
     elapsed_limit: float = -1.0,
     elapsed_operator: str = "GREATER_THAN_OR_EQUAL",
 ) -> dict:
-    n = len(close)
-    is_long = direction == "longonly"
-
-    # --- coerce market arrays to the exact dtypes the JIT core expects ---
-    close = np.ascontiguousarray(close, dtype=np.float64)
-    open_ = np.ascontiguousarray(open_, dtype=np.float64)
-    high = np.ascontiguousarray(high, dtype=np.float64)
-    low = np.ascontiguousarray(low, dtype=np.float64)
-    entries = np.ascontiguousarray(entries, dtype=np.bool_)
-    exits = np.ascontiguousarray(exits, dtype=np.bool_)
-
+    """Mapea los parámetros de riesgo de UNA configuración (strings/None/partial
+    TPs) a los enums/escalares/arrays que espera el kernel. Compartido por
+    simulate_jit y simulate_jit_batch (mismo mapeo → mismos bits)."""
     # --- string params -> int enums ---
     if risk_type == "PERCENT":
         risk_type_code = _pjit.RISK_PERCENT
@@ -194,34 +192,6 @@ def simulate_jit(
             except Exception:
                 tp_time_value = 0.0
 
-    # --- optional scalar flags ---
-    has_sl_stop = sl_stop is not None
-    sl_stop_v = float(sl_stop) if has_sl_stop else 0.0
-    has_tp_stop = tp_stop is not None
-    tp_stop_v = float(tp_stop) if has_tp_stop else 0.0
-    has_trail_pct = trail_pct is not None
-    trail_pct_v = float(trail_pct) if has_trail_pct else 0.0
-
-    # --- optional arrays -> (flag, zeros-or-array) ---
-    def _opt(arr):
-        if arr is None:
-            return False, np.zeros(n, dtype=np.float64)
-        return True, np.ascontiguousarray(arr, dtype=np.float64)
-
-    has_hods, hods_a = _opt(hods)
-    has_lods, lods_a = _opt(lods)
-    has_pm_high, pm_high_a = _opt(pm_highs)
-    has_pm_low, pm_low_a = _opt(pm_lows)
-    has_prev_high, prev_high_a = _opt(prev_highs)
-    has_prev_low, prev_low_a = _opt(prev_lows)
-
-    if timestamps is None:
-        has_timestamps = False
-        timestamps_a = np.zeros(n, dtype=np.int64)
-    else:
-        has_timestamps = True
-        timestamps_a = np.ascontiguousarray(timestamps, dtype=np.int64)
-
     # --- partial take-profits -> parallel numeric arrays ---
     pt_list = partial_take_profits or []
     n_pt = len(pt_list)
@@ -254,19 +224,217 @@ def simulate_jit(
             pt_type[idx] = _pjit.PT_PCT
             pt_value[idx] = float(dist)
 
-    # --- precompute hour/minute only when an HOUR-based rule exists ---
+    # hour/minute only when an HOUR-based rule exists
+    needs_hours = (tp_time_mode == 2) or bool(np.any(pt_type == _pjit.PT_HOUR))
+
+    return {
+        "init_cash": float(init_cash), "risk_r": float(risk_r),
+        "risk_type_code": risk_type_code,
+        "fixed_ratio_delta": float(fixed_ratio_delta),
+        "size_by_sl": bool(size_by_sl),
+        "fees": float(fees), "fee_type_code": fee_type_code,
+        "slippage": float(slippage),
+        "has_sl_stop": sl_stop is not None,
+        "sl_stop": float(sl_stop) if sl_stop is not None else 0.0,
+        "sl_trail": bool(sl_trail),
+        "has_tp_stop": tp_stop is not None,
+        "tp_stop": float(tp_stop) if tp_stop is not None else 0.0,
+        "tp_time_mode": tp_time_mode, "tp_time_value": tp_time_value,
+        "tp_hour": tp_hour, "tp_min": tp_min,
+        "accumulate": bool(accumulate),
+        "max_reentries": int(max_reentries),
+        "has_trail_pct": trail_pct is not None,
+        "trail_pct": float(trail_pct) if trail_pct is not None else 0.0,
+        "look_ahead_prevention": bool(look_ahead_prevention),
+        "hs_type_code": hs_type_code, "hs_value_code": hs_value_code,
+        "sl_offset": sl_offset,
+        "elapsed_limit": float(elapsed_limit), "elapsed_op_code": elapsed_op_code,
+        "n_pt": n_pt, "pt_type": pt_type, "pt_value": pt_value,
+        "pt_cap_frac": pt_cap_frac, "pt_hour": pt_hour, "pt_min": pt_min,
+        "has_hours": needs_hours and has_timestamps,
+    }
+
+
+def _row_hours_minutes(n: int, timestamps_a: np.ndarray, needed: bool):
     # (replica datetime.fromtimestamp(ts/1e9, utc).hour/.minute con aritmética
     #  entera: idéntico para ts >= 0, sin coste de objetos datetime por barra)
-    needs_hours = (tp_time_mode == 2) or bool(np.any(pt_type == _pjit.PT_HOUR))
-    if needs_hours and has_timestamps:
-        has_hours = True
+    if needed:
         secs = timestamps_a // 1_000_000_000
-        row_hours = ((secs // 3600) % 24).astype(np.int64)
-        row_minutes = ((secs // 60) % 60).astype(np.int64)
+        return ((secs // 3600) % 24).astype(np.int64), ((secs // 60) % 60).astype(np.int64)
+    return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+
+
+def _market_arrays(close, open_, high, low, entries, exits, hods, lods,
+                   pm_highs, pm_lows, prev_highs, prev_lows, timestamps) -> dict:
+    """Coerce market arrays to the exact dtypes the JIT core expects: float64,
+    or float32 throughout when `close` arrives float32 (float32 engine)."""
+    n = len(close)
+    dt = np.float32 if getattr(close, "dtype", None) == np.float32 else np.float64
+
+    # --- optional arrays -> (flag, zeros-or-array) ---
+    def _opt(arr):
+        if arr is None:
+            return False, np.zeros(n, dtype=dt)
+        return True, np.ascontiguousarray(arr, dtype=dt)
+
+    m = {
+        "close": np.ascontiguousarray(close, dtype=dt),
+        "open_": np.ascontiguousarray(open_, dtype=dt),
+        "high": np.ascontiguousarray(high, dtype=dt),
+        "low": np.ascontiguousarray(low, dtype=dt),
+        "entries": np.ascontiguousarray(entries, dtype=np.bool_),
+        "exits": np.ascontiguousarray(exits, dtype=np.bool_),
+    }
+    m["has_hods"], m["hods"] = _opt(hods)
+    m["has_lods"], m["lods"] = _opt(lods)
+    m["has_pm_high"], m["pm_highs"] = _opt(pm_highs)
+    m["has_pm_low"], m["pm_lows"] = _opt(pm_lows)
+    m["has_prev_high"], m["prev_highs"] = _opt(prev_highs)
+    m["has_prev_low"], m["prev_lows"] = _opt(prev_lows)
+    if timestamps is None:
+        m["has_timestamps"] = False
+        m["timestamps"] = np.zeros(n, dtype=np.int64)
+    else:
+        m["has_timestamps"] = True
+        m["timestamps"] = np.ascontiguousarray(timestamps, dtype=np.int64)
+    return m
+
+
+# reason code -> exit_reason (object array: lookup vectorizado por código)
+_REASON_ARR = np.array([_REASON_STR[c] for c in range(len(_REASON_STR))], dtype=object)
+
+
+def _rebuild_trades(k, r_entry_idx, r_exit_idx, r_entry_px, r_exit_px, r_pnl, r_fees,
+                    r_return_pct, r_size, r_reason, r_mae, r_mfe, r_stop,
+                    is_long: bool) -> SimTrades:
+    """Trades del kernel como columnas (SimTrades) con los redondeos EXACTOS de
+    los dicts originales: round(np.float64, d) por trade es np.round, así que
+    el redondeo vectorizado da los mismos bits."""
+    reason = np.asarray(r_reason[:k], dtype=np.int64)
+    obj = np.empty(k, dtype=object)
+    obj[:] = "Long" if is_long else "Short"
+    status = np.empty(k, dtype=object)
+    status[:] = "Closed"
+    # el trade de cierre final SÍ lleva fees; los parciales NO (quirk contractual)
+    has_fees = ~np.isin(reason, _PARTIAL_REASONS)
+    return SimTrades({
+        "entry_idx": np.asarray(r_entry_idx[:k], dtype=np.int64),
+        "exit_idx": np.asarray(r_exit_idx[:k], dtype=np.int64),
+        "entry_price": np.round(r_entry_px[:k], 6),
+        "exit_price": np.round(r_exit_px[:k], 6),
+        "pnl": np.round(r_pnl[:k], 4),
+        "fees": np.where(has_fees, np.round(r_fees[:k], 4), 0.0),
+        "return_pct": np.round(r_return_pct[:k], 4),
+        "direction": obj,
+        "status": status,
+        "size": np.round(r_size[:k], 6),
+        "exit_reason": _REASON_ARR[reason],
+        "mae": np.round(r_mae[:k], 4),
+        "mfe": np.round(r_mfe[:k], 4),
+        "stop_loss": np.round(r_stop[:k], 6),
+        "has_fees": has_fees,
+    })
+
+
+def _daily_locates_fee(max_short_size_today, locates_cost, locate_type,
+                       risk_type, init_cash, risk_r) -> float:
+    """Daily Locates Fee (verbatim from the original; 0.0 when it does not apply)."""
+    if not (max_short_size_today > 0 and locates_cost > 0):
+        return 0.0
+    if locate_type == "PERCENT":
+        if risk_type == "PERCENT":
+            day_risk_unit = init_cash * (risk_r / 100.0)
+        else:
+            day_risk_unit = risk_r
+        cost_per_100 = day_risk_unit * (locates_cost / 100.0)
     else:
-        has_hours = False
-        row_hours = np.zeros(n, dtype=np.int64)
-        row_minutes = np.zeros(n, dtype=np.int64)
+        cost_per_100 = locates_cost
+    blocks_of_100 = math.ceil(max_short_size_today / 100.0)
+    return blocks_of_100 * cost_per_100
+
+
+def _apply_locates_fee(trades: SimTrades, equity: np.ndarray, daily_locates_fee: float) -> None:
+    # assign the deduction to the first short trade
+    short = np.flatnonzero(trades.column("direction") == "Short")
+    if len(short):
+        i = int(short[0])
+        pnl, fees, has_fees = (trades.column("pnl"), trades.column("fees"),
+                               trades.column("has_fees"))
+        pnl[i] = round(pnl[i] - daily_locates_fee, 4)
+        if has_fees[i]:
+            fees[i] = round(fees[i] + daily_locates_fee, 4)
+        else:
+            # t.get("fees", 0.0) del original: float de Python, la clave va al final
+            fees[i] = round(0.0 + daily_locates_fee, 4)
+            has_fees[i] = True
+            trades.fee_tail = i
+
+    # reflect it on the equity curve
+    for i in range(len(equity)):
+        equity[i] -= daily_locates_fee
+
+
+def simulate_jit(
+    close: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    direction: str = "longonly",
+    init_cash: float = 10000.0,
+    risk_r: float = 100.0,
+    risk_type: str = "FIXED",
+    fixed_ratio_delta: float = 500.0,
+    size_by_sl: bool = False,
+    fees: float = 0.0,
+    fee_type: str = "PERCENT",  # "PERCENT" or "FLAT"
+    slippage: float = 0.0,
+    sl_stop: float | None = None,
+    sl_trail: bool = False,
+    tp_stop: float | None = None,
+    tp_time_limit: float | str | None = None,
+    accumulate: bool = False,
+    max_reentries: int = -1,
+    trail_pct: float | None = None,
+    locates_cost: float = 0.0,
+    locate_type: str = "FLAT",
+    look_ahead_prevention: bool = True,
+    partial_take_profits: list | None = None,
+    hs_type: str | None = None,
+    hs_value: str | float | None = None,
+    hs_operator: str | None = ">=",
+    hs_offset_pct: float | None = 0.0,
+    hods: np.ndarray | None = None,
+    lods: np.ndarray | None = None,
+    pm_highs: np.ndarray | None = None,
+    pm_lows: np.ndarray | None = None,
+    prev_highs: np.ndarray | None = None,
+    prev_lows: np.ndarray | None = None,
+    timestamps: np.ndarray | None = None,
+    elapsed_limit: float = -1.0,
+    elapsed_operator: str = "GREATER_THAN_OR_EQUAL",
+) -> dict:
+    n = len(close)
+    is_long = direction == "longonly"
+
+    m = _market_arrays(close, open_, high, low, entries, exits, hods, lods,
+                       pm_highs, pm_lows, prev_highs, prev_lows, timestamps)
+    e = _encode_risk_params(
+        n, m["has_timestamps"],
+        init_cash=init_cash, risk_r=risk_r, risk_type=risk_type,
+        fixed_ratio_delta=fixed_ratio_delta, size_by_sl=size_by_sl,
+        fees=fees, fee_type=fee_type, slippage=slippage,
+        sl_stop=sl_stop, sl_trail=sl_trail, tp_stop=tp_stop,
+        tp_time_limit=tp_time_limit, accumulate=accumulate,
+        max_reentries=max_reentries, trail_pct=trail_pct,
+        look_ahead_prevention=look_ahead_prevention,
+        partial_take_profits=partial_take_profits,
+        hs_type=hs_type, hs_value=hs_value, hs_operator=hs_operator,
+        hs_offset_pct=hs_offset_pct,
+        elapsed_limit=elapsed_limit, elapsed_operator=elapsed_operator,
+    )
+    row_hours, row_minutes = _row_hours_minutes(n, m["timestamps"], e["has_hours"])
 
     # --- run the JIT core ---
     (
@@ -275,95 +443,46 @@ def simulate_jit(
         r_return_pct, r_size, r_reason, r_mae, r_mfe, r_stop,
         max_short_size_today, last_risk_amount,
     ) = _core_simulate_jit(
-        close, open_, high, low, entries, exits,
+        m["close"], m["open_"], m["high"], m["low"], m["entries"], m["exits"],
         is_long,
-        float(init_cash), float(risk_r),
-        risk_type_code,
-        float(fixed_ratio_delta),
-        bool(size_by_sl),
-        float(fees), fee_type_code,
-        float(slippage),
-        has_sl_stop, sl_stop_v,
-        bool(sl_trail),
-        has_tp_stop, tp_stop_v,
-        tp_time_mode, tp_time_value, tp_hour, tp_min,
-        bool(accumulate),
-        int(max_reentries),
-        has_trail_pct, trail_pct_v,
-        bool(look_ahead_prevention),
-        hs_type_code, hs_value_code, sl_offset,
-        has_hods, hods_a,
-        has_lods, lods_a,
-        has_pm_high, pm_high_a,
-        has_pm_low, pm_low_a,
-        has_prev_high, prev_high_a,
-        has_prev_low, prev_low_a,
-        has_timestamps, timestamps_a,
-        has_hours, row_hours, row_minutes,
-        float(elapsed_limit), elapsed_op_code,
-        n_pt, pt_type, pt_value, pt_cap_frac, pt_hour, pt_min,
+        e["init_cash"], e["risk_r"],
+        e["risk_type_code"],
+        e["fixed_ratio_delta"],
+        e["size_by_sl"],
+        e["fees"], e["fee_type_code"],
+        e["slippage"],
+        e["has_sl_stop"], e["sl_stop"],
+        e["sl_trail"],
+        e["has_tp_stop"], e["tp_stop"],
+        e["tp_time_mode"], e["tp_time_value"], e["tp_hour"], e["tp_min"],
+        e["accumulate"],
+        e["max_reentries"],
+        e["has_trail_pct"], e["trail_pct"],
+        e["look_ahead_prevention"],
+        e["hs_type_code"], e["hs_value_code"], e["sl_offset"],
+        m["has_hods"], m["hods"],
+        m["has_lods"], m["lods"],
+        m["has_pm_high"], m["pm_highs"],
+        m["has_pm_low"], m["pm_lows"],
+        m["has_prev_high"], m["prev_highs"],
+        m["has_prev_low"], m["prev_lows"],
+        m["has_timestamps"], m["timestamps"],
+        e["has_hours"], row_hours, row_minutes,
+        e["elapsed_limit"], e["elapsed_op_code"],
+        e["n_pt"], e["pt_type"], e["pt_value"], e["pt_cap_frac"], e["pt_hour"], e["pt_min"],
     )
 
-    # --- rebuild the exact trade dicts (rounding in Python, as the original) ---
-    direction_str = "Long" if is_long else "Short"
-    trades: list[dict] = []
-    for t in range(k):
-        rc = int(r_reason[t])
-        rec = {
-            "entry_idx": int(r_entry_idx[t]),
-            "exit_idx": int(r_exit_idx[t]),
-            "entry_price": round(r_entry_px[t], 6),
-            "exit_price": round(r_exit_px[t], 6),
-            "pnl": round(r_pnl[t], 4),
-            "return_pct": round(r_return_pct[t], 4),
-            "direction": direction_str,
-            "status": "Closed",
-            "size": round(r_size[t], 6),
-            "exit_reason": _REASON_STR[rc],
-            "mae": round(r_mae[t], 4),
-            "mfe": round(r_mfe[t], 4),
-            "stop_loss": round(r_stop[t], 6),
-        }
-        if rc not in _PARTIAL_REASONS:
-            # el trade de cierre final SÍ lleva fees; los parciales NO (quirk contractual)
-            rec_final = dict(rec)
-            rec_final["fees"] = round(r_fees[t], 4)
-            # preservar el ORDEN de claves del original (pnl, fees, return_pct, ...)
-            rec = {
-                "entry_idx": rec["entry_idx"], "exit_idx": rec["exit_idx"],
-                "entry_price": rec["entry_price"], "exit_price": rec["exit_price"],
-                "pnl": rec["pnl"], "fees": rec_final["fees"],
-                "return_pct": rec["return_pct"], "direction": rec["direction"],
-                "status": rec["status"], "size": rec["size"],
-                "exit_reason": rec["exit_reason"], "mae": rec["mae"],
-                "mfe": rec["mfe"], "stop_loss": rec["stop_loss"],
-            }
-        trades.append(rec)
+    trades = _rebuild_trades(
+        k, r_entry_idx, r_exit_idx, r_entry_px, r_exit_px, r_pnl, r_fees,
+        r_return_pct, r_size, r_reason, r_mae, r_mfe, r_stop, is_long,
+    )
 
     # --- Deduct Daily Locates Fee (verbatim from the original; runs once) ---
-    if max_short_size_today > 0 and locates_cost > 0:
-        if locate_type == "PERCENT":
-            if risk_type == "PERCENT":
-                day_risk_unit = init_cash * (risk_r / 100.0)
-            else:
-                day_risk_unit = risk_r
-            cost_per_100 = day_risk_unit * (locates_cost / 100.0)
-        else:
-            cost_per_100 = locates_cost
-
-        blocks_of_100 = math.ceil(max_short_size_today / 100.0)
-        daily_locates_fee = blocks_of_100 * cost_per_100
-
-        # assign the deduction to the first short trade
-        for t in trades:
-            if t["direction"] == "Short":
-                t["pnl"] = round(t["pnl"] - daily_locates_fee, 4)
-                t["fees"] = round(t.get("fees", 0.0) + daily_locates_fee, 4)
-                break
-
-        # reflect it on the equity curve
-        for i in range(len(equity)):
-            equity[i] -= daily_locates_fee
+    daily_locates_fee = _daily_locates_fee(
+        max_short_size_today, locates_cost, locate_type, risk_type, init_cash, risk_r,
+    )
+    if daily_locates_fee:
+        _apply_locates_fee(trades, equity, daily_locates_fee)
 
     # --- finalize ---
     results = {"equity": equity, "trades": trades}
@@ -373,3 +492,170 @@ def simulate_jit(
         results["last_risk_amount"] = risk_r
 
     return results
+
+
+class BatchSimResult:
+    """Resultado compacto de simulate_jit_batch (K configs de riesgo, un par).
+
+    Arrays densos para el ranking del sweep sin construir dicts:
+      equity[K, n], n_trades[K], pnl_sum[K] (pnl crudo, sin locates),
+      last_risk_amount[K]
+    `result(k)` construye (y memoiza) el resultado EXACTO de simulate_jit para
+    la config k — trades redondeados + locates fee aplicado — solo cuando se pide.
+    """
+
+    def __init__(self, raw: tuple, is_long: bool, configs: list[dict]):
+        (self._equity, self.offsets,
+         self._entry_idx, self._exit_idx, self._entry_px, self._exit_px,
+         self._pnl, self._fees, self._return_pct, self._size, self._reason,
+         self._mae, self._mfe, self._stop,
+         self._max_short, self._last_risk) = raw
+        self.is_long = is_long
+        self._configs = configs
+        self._cache: dict[int, dict] = {}
+        self.n_trades = np.diff(self.offsets)
+        cs = np.concatenate(([0.0], np.cumsum(self._pnl)))
+        self.pnl_sum = cs[self.offsets[1:]] - cs[self.offsets[:-1]]
+        self.last_risk_amount = np.array([
+            self._last_risk[k] if cfg.get("risk_type", "FIXED") == "PERCENT" else float(cfg.get("risk_r", 100.0))
+            for k, cfg in enumerate(configs)
+        ], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    @property
+    def equity(self) -> np.ndarray:
+        """Equity SIN locates fee (el fee se aplica al materializar result(k))."""
+        return self._equity
+
+    def result(self, k: int) -> dict:
+        res = self._cache.get(k)
+        if res is not None:
+            return res
+        a, b = int(self.offsets[k]), int(self.offsets[k + 1])
+        trades = _rebuild_trades(
+            b - a,
+            self._entry_idx[a:b], self._exit_idx[a:b], self._entry_px[a:b], self._exit_px[a:b],
+            self._pnl[a:b], self._fees[a:b], self._return_pct[a:b], self._size[a:b],
+            self._reason[a:b], self._mae[a:b], self._mfe[a:b], self._stop[a:b],
+            self.is_long,
+        )
+        cfg = self._configs[k]
+        equity = self._equity[k].copy()
+        fee = _daily_locates_fee(
+            self._max_short[k], cfg.get("locates_cost", 0.0), cfg.get("locate_type", "FLAT"),
+            cfg.get("risk_type", "FIXED"), cfg.get("init_cash", 10000.0), cfg.get("risk_r", 100.0),
+        )
+        if fee:
+            _apply_locates_fee(trades, equity, fee)
+        res = {"equity": equity, "trades": trades}
+        if cfg.get("risk_type", "FIXED") == "PERCENT":
+            res["last_risk_amount"] = self._last_risk[k]
+        else:
+            res["last_risk_amount"] = cfg.get("risk_r", 100.0)
+        self._cache[k] = res
+        return res
+
+
+def simulate_jit_batch(
+    close: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    configs: list[dict],
+    direction: str = "longonly",
+    hods: np.ndarray | None = None,
+    lods: np.ndarray | None = None,
+    pm_highs: np.ndarray | None = None,
+    pm_lows: np.ndarray | None = None,
+    prev_highs: np.ndarray | None = None,
+    prev_lows: np.ndarray | None = None,
+    timestamps: np.ndarray | None = None,
+) -> BatchSimResult:
+    """K configuraciones de riesgo sobre el MISMO par (mismas señales) en una
+    sola llamada al kernel. Cada `configs[k]` admite los kwargs de riesgo de
+    simulate_jit (init_cash, risk_r, sl_stop, partial_take_profits, locates...).
+
+    result(k) == simulate_jit(..., **configs[k]) exacto (mismo core por config).
+    Lo usa el sweep risk-only (backtest_service.run_backtest_risk_batch): una
+    llamada por par y bloque de puntos del grid.
+    """
+    n = len(close)
+    is_long = direction == "longonly"
+    m = _market_arrays(close, open_, high, low, entries, exits, hods, lods,
+                       pm_highs, pm_lows, prev_highs, prev_lows, timestamps)
+
+    n_cfg = len(configs)
+    encoded = []
+    for cfg in configs:
+        kw = {k: v for k, v in cfg.items() if k not in ("locates_cost", "locate_type")}
+        encoded.append(_encode_risk_params(n, m["has_timestamps"], **kw))
+
+    max_pt = max([e["pt_type"].shape[0] for e in encoded] or [1])
+    cfg_f = np.zeros((n_cfg, _pjit.N_CFG_F), dtype=np.float64)
+    cfg_i = np.zeros((n_cfg, _pjit.N_CFG_I), dtype=np.int64)
+    pt_type = np.zeros((n_cfg, max_pt), dtype=np.int64)
+    pt_value = np.zeros((n_cfg, max_pt), dtype=np.float64)
+    pt_cap_frac = np.zeros((n_cfg, max_pt), dtype=np.float64)
+    pt_hour = np.zeros((n_cfg, max_pt), dtype=np.int64)
+    pt_min = np.zeros((n_cfg, max_pt), dtype=np.int64)
+    for c, e in enumerate(encoded):
+        f, i = cfg_f[c], cfg_i[c]
+        f[_pjit.CF_INIT_CASH] = e["init_cash"]
+        f[_pjit.CF_RISK_R] = e["risk_r"]
+        f[_pjit.CF_FIXED_RATIO_DELTA] = e["fixed_ratio_delta"]
+        f[_pjit.CF_FEES] = e["fees"]
+        f[_pjit.CF_SLIPPAGE] = e["slippage"]
+        f[_pjit.CF_SL_STOP] = e["sl_stop"]
+        f[_pjit.CF_TP_STOP] = e["tp_stop"]
+        f[_pjit.CF_TP_TIME_VALUE] = e["tp_time_value"]
+        f[_pjit.CF_TRAIL_PCT] = e["trail_pct"]
+        f[_pjit.CF_SL_OFFSET] = e["sl_offset"]
+        f[_pjit.CF_ELAPSED_LIMIT] = e["elapsed_limit"]
+        i[_pjit.CI_RISK_TYPE] = e["risk_type_code"]
+        i[_pjit.CI_SIZE_BY_SL] = e["size_by_sl"]
+        i[_pjit.CI_FEE_TYPE] = e["fee_type_code"]
+        i[_pjit.CI_HAS_SL_STOP] = e["has_sl_stop"]
+        i[_pjit.CI_SL_TRAIL] = e["sl_trail"]
+        i[_pjit.CI_HAS_TP_STOP] = e["has_tp_stop"]
+        i[_pjit.CI_TP_TIME_MODE] = e["tp_time_mode"]
+        i[_pjit.CI_TP_HOUR] = e["tp_hour"]
+        i[_pjit.CI_TP_MIN] = e["tp_min"]
+        i[_pjit.CI_ACCUMULATE] = e["accumulate"]
+        i[_pjit.CI_MAX_REENTRIES] = e["max_reentries"]
+        i[_pjit.CI_HAS_TRAIL_PCT] = e["has_trail_pct"]
+        i[_pjit.CI_LOOK_AHEAD] = e["look_ahead_prevention"]
+        i[_pjit.CI_HS_TYPE] = e["hs_type_code"]
+        i[_pjit.CI_HS_VALUE] = e["hs_value_code"]
+        i[_pjit.CI_ELAPSED_OP] = e["elapsed_op_code"]
+        i[_pjit.CI_N_PT] = e["n_pt"]
+        i[_pjit.CI_HAS_HOURS] = e["has_hours"]
+        w = e["pt_type"].shape[0]
+        pt_type[c, :w] = e["pt_type"]
+        pt_value[c, :w] = e["pt_value"]
+        pt_cap_frac[c, :w] = e["pt_cap_frac"]
+        pt_hour[c, :w] = e["pt_hour"]
+        pt_min[c, :w] = e["pt_min"]
+
+    # hora/minuto por barra una sola vez para todo el batch
+    row_hours, row_minutes = _row_hours_minutes(
+        n, m["timestamps"], any(e["has_hours"] for e in encoded),
+    )
+    raw = _pjit._core_simulate_batch_jit(
+        m["close"], m["open_"], m["high"], m["low"], m["entries"], m["exits"],
+        is_long,
+        cfg_f, cfg_i,
+        pt_type, pt_value, pt_cap_frac, pt_hour, pt_min,
+        m["has_hods"], m["hods"],
+        m["has_lods"], m["lods"],
+        m["has_pm_high"], m["pm_highs"],
+        m["has_pm_low"], m["pm_lows"],
+        m["has_prev_high"], m["prev_highs"],
+        m["has_prev_low"], m["prev_lows"],
+        m["has_timestamps"], m["timestamps"],
+        row_hours, row_minutes,
+    )
+    return BatchSimResult(raw, is_long, list(configs))
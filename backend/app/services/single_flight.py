@@ -0,0 +1,150 @@
+"""
+Single-flight — coalescencia de peticiones concurrentes sobre la misma clave.
+
+Con la apertura de mercado, N pestañas piden el mismo ticker a la vez: cada miss
+de las cachés por endpoint (dicts en proceso + SWR sobre users.duckdb) lanzaba
+su propio cálculo DuckDB/HTTP. Con ``group(name).do(key, fn)`` el primer hilo
+(líder) ejecuta fn y los demás esperan y reciben SU resultado (o su excepción).
+
+Multi-worker (uvicorn/gunicorn con varios procesos): si el llamador pasa
+``recheck`` — una lectura barata de la caché compartida (users.duckdb, Redis) —
+y BTT_SINGLE_FLIGHT_REDIS está activo, el líder toma además un lock Redis
+(``SET NX PX``). El líder de otro worker que no lo consigue sondea ``recheck``
+hasta que el dueño publica, y sólo calcula él mismo si el lock expira o
+desaparece sin resultado. Sin Redis (o si falla) se queda en proceso.
+
+No cachea nada: la caché sigue siendo la de cada endpoint.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("backtester.single_flight")
+
+LOCK_S = float(os.getenv("BTT_SINGLE_FLIGHT_LOCK_S", "30"))
+_POLL_S = float(os.getenv("BTT_SINGLE_FLIGHT_POLL_S", "0.1"))
+
+# Borra el lock sólo si sigue siendo nuestro (no el de otro worker tras expirar).
+_RELEASE_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+_GROUPS: dict = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def redis_lock_enabled() -> bool:
+    return os.getenv("BTT_SINGLE_FLIGHT_REDIS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _key_str(key) -> str:
+    if isinstance(key, tuple):
+        return "|".join(str(k) for k in key)
+    return str(key)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Grupo de llamadas en vuelo, una por clave."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn, recheck=None):
+        """Ejecuta fn() una sola vez por clave entre las llamadas concurrentes.
+
+        Los que esperan reciben el mismo objeto resultado (no mutarlo) o la
+        misma excepción. ``recheck()`` → valor cacheado o None (ver módulo)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, recheck)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run(self, key, fn, recheck):
+        r = None
+        if recheck is not None and redis_lock_enabled():
+            from app.redis_client import get_redis
+            r = get_redis()
+        if r is None:
+            return fn()
+
+        lock_key = f"sf:{self.name}:{_key_str(key)}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = bool(r.set(lock_key, token, nx=True, px=int(LOCK_S * 1000)))
+        except Exception as e:
+            logger.warning(f"[SINGLE FLIGHT] lock Redis {lock_key} falló: {e}")
+            return fn()
+        if acquired:
+            try:
+                return fn()
+            finally:
+                try:
+                    r.eval(_RELEASE_LUA, 1, lock_key, token)
+                except Exception:
+                    pass  # expira solo (PX)
+
+        # Otro worker está calculando: esperar a que publique en la caché compartida.
+        deadline = time.monotonic() + LOCK_S
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_S)
+            hit = _safe_recheck(recheck)
+            if hit is not None:
+                return hit
+            try:
+                if not r.exists(lock_key):
+                    break
+            except Exception:
+                break
+        hit = _safe_recheck(recheck)
+        return hit if hit is not None else fn()
+
+
+def _safe_recheck(recheck):
+    try:
+        return recheck()
+    except Exception:
+        return None
+
+
+def group(name: str) -> SingleFlight:
+    """SingleFlight compartido por nombre (un grupo por caché/endpoint)."""
+    with _GROUPS_LOCK:
+        g = _GROUPS.get(name)
+        if g is None:
+            g = _GROUPS[name] = SingleFlight(name)
+        return g
@@ -24,6 +24,8 @@ import json
 import threading
 from datetime import datetime, timedelta, timezone
 
+from app.services import single_flight
+
 # Garantiza que backend/.env esté cargado antes de leer la configuración, sin
 # depender del orden de importación de otros módulos.
 try:
@@ -720,17 +722,25 @@ def _swr_cache(cache_key: str, endpoint: str, ttl: timedelta, fetch_fn, default)
                 threading.Thread(target=_refresh, daemon=True).start()
         return parsed
 
-    # Nunca visto: fetch síncrono.
-    try:
-        payload = fetch_fn()
-    except StocktwitsError:
-        raise  # el router lo mapea a 404/429/503
-    except Exception as e:
-        print(f"[STOCKTWITS][SWR] first fetch failed for {cache_key}/{endpoint}: {e}")
-        return default
+    # Nunca visto: fetch síncrono, uno solo por clave entre peticiones concurrentes.
+    def _first():
+        try:
+            payload = fetch_fn()
+        except StocktwitsError:
+            raise  # el router lo mapea a 404/429/503
+        except Exception as e:
+            print(f"[STOCKTWITS][SWR] first fetch failed for {cache_key}/{endpoint}: {e}")
+            return default
+        _cache_store(cache_key, endpoint, payload)
+        return payload
+
+    def _recheck():
+        hit = _cache_read(cache_key, endpoint)
+        if hit is None:
+            return None
+        return json.loads(hit[0]) if isinstance(hit[0], str) else hit[0]
 
-    _cache_store(cache_key, endpoint, payload)
-    return payload
+    return single_flight.group("stocktwits.swr").do((cache_key, endpoint), _first, recheck=_recheck)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
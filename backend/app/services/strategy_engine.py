@@ -13,7 +13,7 @@ from app.services.indicators import (
     _vwap, _sma, _ema, _rsi, _atr, _heikin_ashi, _bollinger_bands,
     _stochastic, _macd, _dmi, _cci, _roc, _momentum, _obv,
     _linear_regression, _consecutive_count,
-    _hammer, _shooting_star, _pivot_points, _safe_float,
+    _hammer, _shooting_star, _pivot_points, _safe_float, _engine_dtype,
 )
 
 logger = logging.getLogger("backtester.strategy_engine")
@@ -47,7 +47,7 @@ def _ri_close(c, h, l, o, v, p, p2, p3, sd, m, ds):  return c
 def _ri_open(c, h, l, o, v, p, p2, p3, sd, m, ds):   return o
 def _ri_high(c, h, l, o, v, p, p2, p3, sd, m, ds):   return h
 def _ri_low(c, h, l, o, v, p, p2, p3, sd, m, ds):    return l
-def _ri_volume(c, h, l, o, v, p, p2, p3, sd, m, ds): return v.astype(np.float64)
+def _ri_volume(c, h, l, o, v, p, p2, p3, sd, m, ds): return v.astype(_engine_dtype(v))
 def _ri_sma(c, h, l, o, v, p, p2, p3, sd, m, ds):    return _sma(c, p or 20)
 def _ri_ema(c, h, l, o, v, p, p2, p3, sd, m, ds):    return _ema(c, p or 20)
 def _ri_vwap(c, h, l, o, v, p, p2, p3, sd, m, ds):   return _vwap(h, l, c, v)
@@ -129,7 +129,7 @@ def _pm_running_native(vals, mins, which):
     pm_mask = (mins >= 240) & (mins < 570)
     if not pm_mask.any():
         return None
-    masked = np.where(pm_mask, np.asarray(vals, dtype=np.float64), np.nan)
+    masked = np.where(pm_mask, np.asarray(vals, dtype=_engine_dtype(vals)), np.nan)
     return np.fmax.accumulate(masked) if which == "high" else np.fmin.accumulate(masked)
 
 
@@ -178,7 +178,7 @@ def _rth_running_native(vals, mins, o, which):
         out = np.full(len(o), np.nan)
         out[first_idx:] = float(o[first_idx])
         return out
-    masked = np.where(rth_mask, np.asarray(vals, dtype=np.float64), np.nan)
+    masked = np.where(rth_mask, np.asarray(vals, dtype=_engine_dtype(vals)), np.nan)
     return np.fmax.accumulate(masked) if which == "high" else np.fmin.accumulate(masked)
 def _rth_constant_fallback_native(n, mins, ds, key):
     """Sin barras RTH: NaN si la sesión regular aún no llegó (constante sería
@@ -574,15 +574,28 @@ def translate_strategy_native(
     """Fast path: receive numpy arrays (not DataFrame), precompute all indicators,
     evaluate conditions with numpy boolean operations. No pandas overhead."""
     plan = compiled.get("_indicator_plan", {})
-    by_tf = plan.get("by_timeframe", {})
     has_special = plan.get("has_special", False)
 
+    # Fase 1: Precompute all indicators
+    indicator_results = {}
+    align_ctx = {}  # tf -> (gather_idx, valid) para llevar señales tf a la malla 1m
+    _precompute_plan_indicators(plan, arrays, daily_stats, indicator_results, align_ctx, {})
+    return _signals_from_indicators(compiled, arrays, indicator_results, align_ctx, has_special)
+
+
+def _precompute_plan_indicators(plan: dict, arrays: dict, daily_stats: dict | None,
+                                indicator_results: dict, align_ctx: dict,
+                                tf_inputs: dict) -> None:
+    """Fase 1 del nativo: rellena `indicator_results` (key del plan -> array) y
+    `align_ctx`. Memoiza por key: lo ya presente NO se recalcula, así varios
+    planes (puntos del grid) que comparten un indicador lo computan una vez.
+    `tf_inputs` cachea los OHLCV resampleados por tf entre llamadas."""
+    by_tf = plan.get("by_timeframe", {})
     C = arrays["close"]
     H = arrays["high"]
     L = arrays["low"]
     O = arrays["open"]
     V = arrays["volume"]
-    n_bars = len(C)
     minutes_arr = arrays.get("minutes_arr")
     # Minutos ABSOLUTOS (epoch//60) para el bucketing por reloj: en frames
     # multi-día (swing) los minutos-del-día colisionan entre días. Fallback a
@@ -591,22 +604,26 @@ def translate_strategy_native(
     if abs_min_arr is None:
         abs_min_arr = minutes_arr
 
-    # Fase 1: Precompute all indicators
-    indicator_results = {}
-    align_ctx = {}  # tf -> (gather_idx, valid) para llevar señales tf a la malla 1m
     base_ds = dict(daily_stats or {})
 
     for tf, specs in by_tf.items():
-        period_mins = _TF_MINUTES.get(tf, 1)
-        if period_mins <= 1 or minutes_arr is None:
-            c, h, l, o, v = C, H, L, O, V
-            mins_tf = minutes_arr
-        else:
-            c, h, l, o, v, mins_tf, labels = _resample_arrays_time_based(
-                C, H, L, O, V, minutes_arr, abs_min_arr, period_mins
-            )
-            if tf not in align_ctx:
-                align_ctx[tf] = _build_closed_bar_alignment(abs_min_arr, labels, period_mins)
+        pending = [spec for spec in specs if spec["key"] not in indicator_results]
+        if not pending:
+            continue
+        if tf not in tf_inputs:
+            period_mins = _TF_MINUTES.get(tf, 1)
+            if period_mins <= 1 or minutes_arr is None:
+                tf_inputs[tf] = (C, H, L, O, V, minutes_arr)
+            else:
+                c, h, l, o, v, mins_tf, labels = _resample_arrays_time_based(
+                    C, H, L, O, V, minutes_arr, abs_min_arr, period_mins
+                )
+                tf_inputs[tf] = (c, h, l, o, v, mins_tf)
+                if tf not in align_ctx:
+                    align_ctx[tf] = _build_closed_bar_alignment(abs_min_arr, labels, period_mins)
+        c, h, l, o, v, mins_tf = tf_inputs[tf]
+        # VWAP 1m precomputado (slab v2): misma fórmula sobre los mismos arrays
+        pre_vwap = arrays.get("vwap") if c is C else None
 
         # "_mins" = minutos-del-día de la PRIMERA barra de cada bucket (paridad
         # con el timestamp:"first" del resample legacy); lo usan los indicadores
@@ -614,7 +631,10 @@ def translate_strategy_native(
         ds_tf = dict(base_ds)
         ds_tf["_mins"] = mins_tf
 
-        for spec in specs:
+        for spec in pending:
+            if pre_vwap is not None and spec["name"] in ("VWAP", "AVWAP"):
+                indicator_results[spec["key"]] = pre_vwap
+                continue
             indicator_results[spec["key"]] = _compute_indicator_raw(
                 spec["name"], c, h, l, o, v,
                 period=spec.get("period"),
@@ -626,6 +646,17 @@ def translate_strategy_native(
                 daily_stats=ds_tf,
             )
 
+
+def _signals_from_indicators(compiled: dict, arrays: dict, indicator_results: dict,
+                             align_ctx: dict, has_special: bool) -> dict:
+    """Fases 2-3 del nativo: condiciones + risk management sobre indicadores ya
+    precomputados (que pueden incluir keys de otros planes — se ignoran)."""
+    C = arrays["close"]
+    H = arrays["high"]
+    L = arrays["low"]
+    n_bars = len(C)
+    minutes_arr = arrays.get("minutes_arr")
+
     # Fase 2: Evaluate conditions
     if not has_special:
         entries = _evaluate_group_native(
@@ -746,6 +777,41 @@ def translate_strategy_native(
     }
 
 
+def translate_strategy_native_batch(
+    arrays: dict,
+    compiled_list: list[dict],
+    daily_stats: dict | None = None,
+) -> dict:
+    """Nativo para K variantes de una estrategia (puntos de un grid) sobre el
+    MISMO par: une los planes, computa cada indicador distinto UNA vez (memo por
+    key) y evalúa las condiciones de cada variante sobre el pool compartido.
+
+    Devuelve {"entries": bool[K, n_bars], "exits": bool[K, n_bars],
+    "signals": [dict por variante]} — cada dict es exactamente lo que devolvería
+    translate_strategy_native(arrays, compiled_list[k], daily_stats), con
+    entries/exits como filas (vistas) de las matrices."""
+    n_bars = len(arrays["close"])
+    n_points = len(compiled_list)
+    entries = np.zeros((n_points, n_bars), dtype=bool)
+    exits = np.zeros((n_points, n_bars), dtype=bool)
+    indicator_results = {}
+    align_ctx = {}
+    tf_inputs = {}
+    signals = []
+    for k, compiled in enumerate(compiled_list):
+        plan = compiled.get("_indicator_plan", {})
+        _precompute_plan_indicators(plan, arrays, daily_stats, indicator_results, align_ctx, tf_inputs)
+        sig = _signals_from_indicators(
+            compiled, arrays, indicator_results, align_ctx, plan.get("has_special", False)
+        )
+        entries[k] = sig["entries"]
+        exits[k] = sig["exits"]
+        sig["entries"] = entries[k]
+        sig["exits"] = exits[k]
+        signals.append(sig)
+    return {"entries": entries, "exits": exits, "signals": signals}
+
+
 # Mismo mapa que _resample_if_needed/_align_signals_to_1m (tf desconocido → 1m,
 # replicando el tf_map.get(timeframe, "1min") del legacy).
 _TF_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60, "1d": 1440}
@@ -762,11 +828,14 @@ def _resample_arrays_time_based(C, H, L, O, V, minutes_arr, abs_min_arr, period_
     starts = np.flatnonzero(np.r_[True, labels_all[1:] != labels_all[:-1]])
     ends = np.r_[starts[1:], len(labels_all)]
     labels = labels_all[starts]
-    o_res = np.asarray(O, dtype=np.float64)[starts]
-    c_res = np.asarray(C, dtype=np.float64)[ends - 1]
-    h_res = np.maximum.reduceat(np.asarray(H, dtype=np.float64), starts)
-    l_res = np.minimum.reduceat(np.asarray(L, dtype=np.float64), starts)
-    v_res = np.add.reduceat(np.asarray(V, dtype=np.float64), starts)
+    # Motor float32: OHLC son selecciones exactas (se quedan en float32); el
+    # volumen se suma en float64 y se redondea una sola vez.
+    dt = _engine_dtype(C, H, L, O)
+    o_res = np.asarray(O, dtype=dt)[starts]
+    c_res = np.asarray(C, dtype=dt)[ends - 1]
+    h_res = np.maximum.reduceat(np.asarray(H, dtype=dt), starts)
+    l_res = np.minimum.reduceat(np.asarray(L, dtype=dt), starts)
+    v_res = np.add.reduceat(np.asarray(V, dtype=np.float64), starts).astype(dt, copy=False)
     mins_res = minutes_arr[starts]
     return c_res, h_res, l_res, o_res, v_res, mins_res, labels
 
@@ -865,8 +934,10 @@ def _eval_comparison_native(cond: dict, results: dict, tf: str) -> np.ndarray |
         return None
 
     # Escalar (int/float o string numérico — el legacy hace float(target_cfg)).
+    # np.float64 (no float): con arrays float32 NumPy 2 bajaría un float Python
+    # a float32 y "Close > 1.1" compararía contra float32(1.1).
     try:
-        target_val = float(target_cfg)
+        target_val = np.float64(float(target_cfg))
     except (TypeError, ValueError):
         return None
     return op(source_arr, target_val)
@@ -0,0 +1,425 @@
+"""
+Trade ledger columnar — struct-of-arrays en lugar de list[dict] en el pipeline.
+
+Con 100k+ trades la lista de dicts (24 claves, 2 pd.Timestamp por trade para
+las horas de entrada/salida) dominaba la RAM y las fases aggregate/serialize.
+`TradeLedger` guarda cada campo como un ndarray y:
+
+  - se comporta como una secuencia de dicts (len / iter / [i] / [a:b] / ==),
+    materializando SOLO los trades pedidos → los consumidores que esperan
+    `result["trades"]` como lista (paginación del API público, tests, what-if)
+    siguen funcionando sin cambios;
+  - expone las columnas (`column(name)`) para las métricas vectorizadas de
+    backtest_service;
+  - se serializa a Arrow (`to_arrow` / `from_arrow`) para persistir jobs sin
+    pasar por dicts.
+
+`SimTrades` es el equivalente para los trades CRUDOS de un par que devuelve el
+kernel JIT (sim_dispatch.simulate_jit): columnas con los mismos redondeos que
+los dicts del simulador Python. enrich_trade_columns las lee directamente; los
+dicts sólo existen en el path del simulador Python (o si alguien indexa).
+
+Los dicts materializados son IDÉNTICOS a los de backtest_service._enrich_trades
+(mismo orden de claves, mismos valores; test de equivalencia).
+"""
+import math
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+# Orden contractual de claves del dict de trade (== _enrich_trades).
+TRADE_FIELDS = (
+    "ticker", "date", "entry_time", "exit_time", "entry_idx", "exit_idx",
+    "entry_time_epoch", "exit_time_epoch", "entry_price", "exit_price", "pnl",
+    "fees", "return_pct", "direction", "status", "size", "exit_reason", "mae",
+    "mfe", "r_multiple", "entry_hour", "entry_weekday", "gap_pct", "stop_loss",
+)
+_INT_FIELDS = ("entry_idx", "exit_idx", "entry_time_epoch", "exit_time_epoch",
+               "entry_hour", "entry_weekday")
+_STR_FIELDS = ("ticker", "date", "entry_time", "exit_time", "direction", "status", "exit_reason")
+# columnas float que admiten None (máscara de nulos aparte)
+_NULLABLE_FIELDS = ("r_multiple", "gap_pct")
+_FLOAT_FIELDS = tuple(f for f in TRADE_FIELDS if f not in _INT_FIELDS and f not in _STR_FIELDS)
+
+
+def _empty_columns() -> dict:
+    cols = {}
+    for f in TRADE_FIELDS:
+        if f in _INT_FIELDS:
+            cols[f] = np.zeros(0, dtype=np.int64)
+        elif f in _STR_FIELDS:
+            cols[f] = np.zeros(0, dtype=object)
+        else:
+            cols[f] = np.zeros(0, dtype=np.float64)
+    for f in _NULLABLE_FIELDS:
+        cols[f + "__null"] = np.zeros(0, dtype=bool)
+    return cols
+
+
+class TradeLedger(Sequence):
+    """Trades en columnas. Inmutable una vez construido."""
+
+    __slots__ = ("_cols", "_n", "_sanitize")
+
+    def __init__(self, columns: dict | None = None, sanitize: bool = False):
+        self._cols = columns if columns is not None else _empty_columns()
+        self._n = len(self._cols["pnl"])
+        self._sanitize = sanitize
+
+    # ── secuencia de dicts ──────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._n)
+            if step != 1:
+                return [self._row_dicts(i, i + 1)[0] for i in range(start, stop, step)]
+            return self._row_dicts(start, stop)
+        i = int(key)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("trade index out of range")
+        return self._row_dicts(i, i + 1)[0]
+
+    def __iter__(self):
+        step = 4096
+        for a in range(0, self._n, step):
+            yield from self._row_dicts(a, min(a + step, self._n))
+
+    def __eq__(self, other):
+        if isinstance(other, TradeLedger):
+            other = other.to_dicts()
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TradeLedger({self._n} trades)"
+
+    def to_dicts(self, start: int = 0, stop: int | None = None) -> list[dict]:
+        return self._row_dicts(start, self._n if stop is None else min(stop, self._n))
+
+    def _row_dicts(self, a: int, b: int) -> list[dict]:
+        if b <= a:
+            return []
+        cols = self._cols
+        vals = {f: cols[f][a:b].tolist() for f in TRADE_FIELDS}
+        for f in _NULLABLE_FIELDS:
+            nulls = cols[f + "__null"][a:b]
+            if nulls.any():
+                col = vals[f]
+                for j in np.flatnonzero(nulls):
+                    col[j] = None
+        if self._sanitize:
+            # NaN/inf → None (mismo criterio que backtest_orchestrator.sanitize_floats)
+            for f in _FLOAT_FIELDS:
+                col = vals[f]
+                for j, v in enumerate(col):
+                    if v is not None and (math.isnan(v) or math.isinf(v)):
+                        col[j] = None
+        rows = zip(*(vals[f] for f in TRADE_FIELDS))
+        return [dict(zip(TRADE_FIELDS, r)) for r in rows]
+
+    # ── acceso columnar ─────────────────────────────────────────────────────
+    def column(self, name: str) -> np.ndarray:
+        """Columna cruda. Para r_multiple/gap_pct los nulos quedan como NaN
+        (ver `nulls`)."""
+        return self._cols[name]
+
+    def nulls(self, name: str) -> np.ndarray:
+        return self._cols[name + "__null"]
+
+    def sanitized(self) -> "TradeLedger":
+        """Vista que materializa NaN/inf como None (frontera HTTP)."""
+        return TradeLedger(self._cols, sanitize=True)
+
+    @classmethod
+    def concat(cls, ledgers: list["TradeLedger"]) -> "TradeLedger":
+        ledgers = [lg for lg in ledgers if len(lg)]
+        if not ledgers:
+            return cls()
+        if len(ledgers) == 1:
+            return ledgers[0]
+        keys = ledgers[0]._cols.keys()
+        return cls({k: np.concatenate([lg._cols[k] for lg in ledgers]) for k in keys})
+
+    @classmethod
+    def from_dicts(cls, trades: list[dict]) -> "TradeLedger":
+        """Construye el ledger desde dicts ya enriquecidos (compat / tests)."""
+        if not trades:
+            return cls()
+        n = len(trades)
+        cols = {}
+        for f in TRADE_FIELDS:
+            raw = [t.get(f) for t in trades]
+            if f in _STR_FIELDS:
+                arr = np.empty(n, dtype=object)
+                arr[:] = raw
+                cols[f] = arr
+            elif f in _NULLABLE_FIELDS:
+                cols[f + "__null"] = np.array([v is None for v in raw], dtype=bool)
+                cols[f] = np.array([np.nan if v is None else v for v in raw], dtype=np.float64)
+            else:
+                # clave ausente o None → 0, como los `t.get(f, 0)` del path de dicts
+                dtype = np.int64 if f in _INT_FIELDS else np.float64
+                cols[f] = np.array([0 if v is None else v for v in raw], dtype=dtype)
+        return cls(cols)
+
+    # ── Arrow ───────────────────────────────────────────────────────────────
+    def to_arrow(self):
+        import pyarrow as pa
+        arrays, names = [], []
+        for f in TRADE_FIELDS:
+            col = self._cols[f]
+            if f in _STR_FIELDS:
+                arrays.append(pa.array(col.tolist(), type=pa.string()))
+            elif f in _NULLABLE_FIELDS:
+                arrays.append(pa.array(col, mask=self._cols[f + "__null"], type=pa.float64()))
+            else:
+                arrays.append(pa.array(col))
+            names.append(f)
+        return pa.Table.from_arrays(arrays, names=names)
+
+    @classmethod
+    def from_arrow(cls, table) -> "TradeLedger":
+        n = table.num_rows
+        if n == 0:
+            return cls()
+        cols = {}
+        for f in TRADE_FIELDS:
+            col = table.column(f)
+            if f in _STR_FIELDS:
+                arr = np.empty(n, dtype=object)
+                arr[:] = col.to_pylist()
+                cols[f] = arr
+            elif f in _NULLABLE_FIELDS:
+                cols[f + "__null"] = col.is_null().to_numpy(zero_copy_only=False)
+                cols[f] = col.fill_null(np.nan).to_numpy(zero_copy_only=False).astype(np.float64)
+            else:
+                cols[f] = col.to_numpy(zero_copy_only=False)
+        return cls(cols)
+
+
+# Orden de claves de un trade crudo del simulador (portfolio_sim / _rebuild_trades
+# histórico); "fees" falta en los cierres parciales.
+SIM_TRADE_FIELDS = (
+    "entry_idx", "exit_idx", "entry_price", "exit_price", "pnl", "fees",
+    "return_pct", "direction", "status", "size", "exit_reason", "mae", "mfe",
+    "stop_loss",
+)
+
+
+class SimTrades(Sequence):
+    """Trades crudos de UN par en columnas (SIM_TRADE_FIELDS + máscara
+    `has_fees`). Se comporta como la lista de dicts del simulador Python
+    (len / iter / [i] / [a:b] / ==) materializando sólo lo pedido."""
+
+    __slots__ = ("_cols", "_n", "fee_tail")
+
+    def __init__(self, columns: dict):
+        self._cols = columns
+        self._n = len(columns["pnl"])
+        # trade al que el locates fee le añadió "fees" (clave al final del dict)
+        self.fee_tail = -1
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._n)
+            return [self._row_dicts(i, i + 1)[0] for i in range(start, stop, step)]
+        i = int(key)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("trade index out of range")
+        return self._row_dicts(i, i + 1)[0]
+
+    def __iter__(self):
+        return iter(self._row_dicts(0, self._n))
+
+    def __eq__(self, other):
+        if isinstance(other, SimTrades):
+            other = other.to_dicts()
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SimTrades({self._n} trades)"
+
+    def column(self, name: str) -> np.ndarray:
+        """Columna cruda (mutable: sim_dispatch aplica ahí el locates fee)."""
+        return self._cols[name]
+
+    def to_dicts(self) -> list[dict]:
+        return self._row_dicts(0, self._n)
+
+    def _row_dicts(self, a: int, b: int) -> list[dict]:
+        cols = self._cols
+        vals = [cols[f][a:b].tolist() for f in SIM_TRADE_FIELDS]
+        has_fees = cols["has_fees"][a:b].tolist()
+        out = []
+        for j, row in enumerate(zip(*vals)):
+            rec = dict(zip(SIM_TRADE_FIELDS, row))
+            if a + j == self.fee_tail:
+                rec["fees"] = rec.pop("fees")
+            elif not has_fees[j]:
+                del rec["fees"]
+            out.append(rec)
+        return out
+
+
+def trade_column(trades, name: str, default=0.0) -> np.ndarray:
+    """Columna `name` de un TradeLedger o de una lista de dicts (con el mismo
+    default que `t.get(name, default)`). Para r_multiple/gap_pct, None → NaN."""
+    if isinstance(trades, (TradeLedger, SimTrades)):
+        return trades.column(name)
+    if not trades:
+        return np.array([])
+    if name in _STR_FIELDS:
+        arr = np.empty(len(trades), dtype=object)
+        arr[:] = [t.get(name, default) for t in trades]
+        return arr
+    return np.array([t.get(name, default) for t in trades])
+
+
+def enrich_trade_columns(raw_trades, timestamps, ts_epoch, ticker, date, risk_unit_dollar, gap_pct) -> TradeLedger:
+    """Equivalente columnar de backtest_service._enrich_trades /
+    backtest_signals._enrich_trades_arr: trades crudos del simulador de UN par
+    → TradeLedger. `raw_trades` es el SimTrades del kernel JIT (columnas leídas
+    tal cual) o la lista de dicts del simulador Python. `timestamps` es el
+    ndarray datetime64 del par o una pd.Series (tz-aware incluida: sus
+    strings/horas se toman tal cual)."""
+    n = len(raw_trades)
+    if n == 0:
+        return TradeLedger()
+
+    if isinstance(raw_trades, SimTrades):
+        # "fees" de los parciales ya es 0.0 en la columna (== t.get("fees", 0.0))
+        def _f(key, default=None):
+            return np.asarray(raw_trades.column(key), dtype=np.float64)
+
+        def _str_col(key):
+            return raw_trades.column(key)
+
+        entry_idx = np.asarray(raw_trades.column("entry_idx"), dtype=np.int64)
+        exit_idx = np.asarray(raw_trades.column("exit_idx"), dtype=np.int64)
+    else:
+        def _f(key, default=None):
+            if default is None:
+                return np.fromiter((t[key] for t in raw_trades), dtype=np.float64, count=n)
+            return np.fromiter((t.get(key, default) for t in raw_trades), dtype=np.float64, count=n)
+
+        def _str_col(key):
+            return _s([t[key] for t in raw_trades])
+
+        entry_idx = np.fromiter((t["entry_idx"] for t in raw_trades), dtype=np.int64, count=n)
+        exit_idx = np.fromiter((t["exit_idx"] for t in raw_trades), dtype=np.int64, count=n)
+    max_idx = len(timestamps) - 1
+    ei = np.minimum(entry_idx, max_idx)
+    xi = np.minimum(exit_idx, max_idx)
+
+    entry_time, exit_time, entry_hour, entry_weekday = _time_fields(timestamps, ei, xi)
+
+    pnl = _f("pnl")
+    if risk_unit_dollar <= 0:
+        r_mult = np.full(n, np.nan)
+        r_null = np.ones(n, dtype=bool)
+    else:
+        # round() de Python por trade (np.round no es bit-idéntico)
+        r_mult = np.array([round(p / risk_unit_dollar, 2) for p in pnl.tolist()], dtype=np.float64)
+        r_null = np.zeros(n, dtype=bool)
+
+    def _s(values):
+        arr = np.empty(n, dtype=object)
+        arr[:] = values
+        return arr
+
+    cols = {
+        "ticker": _s([ticker] * n),
+        "date": _s([date] * n),
+        "entry_time": entry_time,
+        "exit_time": exit_time,
+        "entry_idx": entry_idx,
+        "exit_idx": exit_idx,
+        "entry_time_epoch": np.asarray(ts_epoch[ei], dtype=np.int64),
+        "exit_time_epoch": np.asarray(ts_epoch[xi], dtype=np.int64),
+        "entry_price": _f("entry_price"),
+        "exit_price": _f("exit_price"),
+        "pnl": pnl,
+        "fees": _f("fees", 0.0),
+        "return_pct": _f("return_pct"),
+        "direction": _str_col("direction"),
+        "status": _str_col("status"),
+        "size": _f("size"),
+        "exit_reason": _str_col("exit_reason"),
+        "mae": _f("mae"),
+        "mfe": _f("mfe", 0.0),
+        "r_multiple": r_mult,
+        "r_multiple__null": r_null,
+        "entry_hour": entry_hour,
+        "entry_weekday": entry_weekday,
+        "gap_pct": np.full(n, float(gap_pct) if gap_pct is not None else np.nan),
+        "gap_pct__null": np.full(n, gap_pct is None, dtype=bool),
+        "stop_loss": _f("stop_loss", 0.0),
+    }
+    return TradeLedger(cols)
+
+
+_NS_PER_HOUR = 3_600_000_000_000
+_NS_PER_DAY = 86_400_000_000_000
+
+
+def _time_fields(timestamps, ei, xi):
+    """(entry_time, exit_time, entry_hour, entry_weekday) — str(pd.Timestamp),
+    .hour y .weekday() del original, vectorizados cuando los timestamps son
+    naive y sin fracción de segundo (el caso de las velas de 1m)."""
+    if isinstance(timestamps, pd.Series):
+        if getattr(timestamps.dt, "tz", None) is not None:
+            ent = [timestamps.iloc[i] for i in ei.tolist()]
+            ext = [timestamps.iloc[i] for i in xi.tolist()]
+            out_e = np.empty(len(ei), dtype=object)
+            out_x = np.empty(len(xi), dtype=object)
+            out_e[:] = [str(t) for t in ent]
+            out_x[:] = [str(t) for t in ext]
+            return (out_e, out_x,
+                    np.array([t.hour for t in ent], dtype=np.int64),
+                    np.array([t.weekday() for t in ent], dtype=np.int64))
+        timestamps = timestamps.values
+    ns = np.asarray(timestamps).astype("datetime64[ns]").view(np.int64)
+    e_ns = ns[ei]
+    x_ns = ns[xi]
+    hour = (e_ns // _NS_PER_HOUR) % 24
+    weekday = (e_ns // _NS_PER_DAY + 3) % 7   # 1970-01-01 fue jueves (=3)
+
+    def _strs(v):
+        out = np.empty(len(v), dtype=object)
+        if len(v) and not (v % 1_000_000_000).any():
+            s = np.datetime_as_string(v.view("datetime64[ns]").astype("datetime64[s]"), unit="s")
+            out[:] = np.char.replace(s, "T", " ").tolist()
+        else:
+            out[:] = [str(pd.Timestamp(int(t))) for t in v.tolist()]
+        return out
+
+    return _strs(e_ns), _strs(x_ns), hour.astype(np.int64), weekday.astype(np.int64)
+
+
+def materialize_trades(result: dict) -> dict:
+    """Copia superficial de un resultado con `trades` como list[dict] — para
+    las respuestas que FastAPI serializa enteras (path síncrono)."""
+    trades = result.get("trades") if isinstance(result, dict) else None
+    if isinstance(trades, TradeLedger):
+        return {**result, "trades": trades.to_dicts()}
+    return result
+
+
+def ledger_json_default(o):
+    """`default=` de json.dumps: un TradeLedger se vuelca como lista de dicts."""
+    if isinstance(o, TradeLedger):
+        return o.to_dicts()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
@@ -0,0 +1,95 @@
+"""
+BENCH COLD TIER — tamaño y throughput de lectura del tier frío (slab_codec)
+frente al caliente, sobre el dataset sintético de bench_e2e.py.
+
+Construye los slabs en un dir propio (no toca los de bench_e2e), lee TODOS los
+pares con MonthSlab.slice (float64 y float32) en caliente, congela los meses
+(freeze_month) y repite: caché de bloques fría (primer barrido) y caliente.
+
+Uso:
+  python scripts/bench_cold_tier.py                     # 200 tickers × 3 meses
+  python scripts/bench_cold_tier.py --tickers 50 --months 1
+  ... --json out.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_e2e  # noqa: E402  (fija sys.path del backend y el entorno)
+
+import numpy as np  # noqa: E402
+
+
+def _sweep(months, dtype, repeats=3) -> float:
+    """Mejor tiempo (s) de un barrido slice() por todos los pares de los meses."""
+    from app.db.slab_store import get_month
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for y, m in months:
+            slab = get_month("opt", y, m)
+            idx = slab.pairs()
+            for s, e in zip(idx["row_start"].tolist(), idx["row_end"].tolist()):
+                slab.slice(s, e, dtype=dtype)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _dir_bytes(root: str, names) -> int:
+    total = 0
+    for dirpath, _dirs, files in os.walk(root):
+        total += sum(os.path.getsize(os.path.join(dirpath, n)) for n in files if n in names)
+    return total
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tickers", type=int, default=bench_e2e.DEFAULT_TICKERS_PER_MONTH)
+    ap.add_argument("--months", type=int, default=bench_e2e.DEFAULT_MONTHS)
+    ap.add_argument("--bars", type=int, default=bench_e2e.DEFAULT_BARS)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    bench_e2e._isolate_dirs(f"t{args.tickers}_m{args.months}_b{args.bars}_s{bench_e2e.SEED}_v1")
+    slab_dir = os.environ["BTT_SLAB_DIR"] + "_coldbench"
+    shutil.rmtree(slab_dir, ignore_errors=True)
+    os.environ["BTT_SLAB_DIR"] = slab_dir
+
+    from app.db import slab_builder, slab_codec, slab_store
+
+    bench_e2e.build_synthetic_source(args.tickers, args.months, args.bars)
+    months = bench_e2e._month_list(args.months)
+    for y, m in months:
+        slab_builder.build_month_from_ticker_cache(y, m, "opt")
+    n_rows = sum(slab_store.get_month("opt", y, m).n_rows for y, m in months)
+
+    res = {"rows": n_rows, "hot_bytes": _dir_bytes(slab_dir, {"slab.arrow"})}
+    res["hot_f64_s"] = _sweep(months, np.float64)
+    res["hot_f32_s"] = _sweep(months, np.float32)
+
+    for y, m in months:
+        slab_builder.freeze_month("opt", y, m)
+    slab_store._OPEN_SLABS.clear()
+    res["cold_bytes"] = _dir_bytes(slab_dir, {"slab.cold"})
+    slab_codec.clear_decode_cache()
+    res["cold_first_f64_s"] = _sweep(months, np.float64, repeats=1)  # decodifica todo
+    res["cold_f64_s"] = _sweep(months, np.float64)
+    res["cold_f32_s"] = _sweep(months, np.float32)
+    res["decode_cache"] = slab_codec.decode_cache_stats()
+
+    print(f"filas {n_rows:,}  bytes/fila caliente {res['hot_bytes'] / n_rows:.1f}  "
+          f"frío {res['cold_bytes'] / n_rows:.1f}  ({res['hot_bytes'] / res['cold_bytes']:.2f}x)")
+    for k in ("hot_f64_s", "hot_f32_s", "cold_first_f64_s", "cold_f64_s", "cold_f32_s"):
+        print(f"  {k:<18} {res[k] * 1e3:8.1f} ms   {n_rows / res[k] / 1e6:7.1f} Mfilas/s")
+    print(f"  caché de bloques: {res['decode_cache']}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(res, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+BENCH LIVE SCREENER — ingest + leaderboard + push WS del live screener, 100% offline.
+
+Ejercita el CÓDIGO REAL sobre un stream grabado o sintético:
+
+  ingest     ReplayServer (protocolo Massive) → LiveScreenerService._consume_massive_ws
+             → _handle_ws_message (batch por frame) → arrays + rankings
+  get_top    muestreo desde un hilo aparte (compite por el lock con el ingest)
+  push       uvicorn + /api/screener/live (live_screener_feed) con N clientes WS;
+             latencia = recepción en el cliente − tick que generó ese delta
+
+Uso:
+  python scripts/bench_live_screener.py                          # sintético, 5k símbolos, 5k ev/s, 20s
+  python scripts/bench_live_screener.py --speedup 0              # sin esperas: throughput máximo
+  python scripts/bench_live_screener.py --clients 200 --speedup 4
+  python scripts/bench_live_screener.py --recording open.jsonl.gz  # grabación real (LIVE_SCREENER_RECORD)
+  ... --json out.json                                            # volcar resultado JSON
+
+Con --speedup 0 el replay satura el consumidor: ingest msgs/s es la capacidad;
+con speedup ≥ 1 mide el comportamiento a ritmo real (o N× más rápido).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LIVE_SCREENER_PUSH_S", "0.25")
+
+import numpy as np
+
+
+def _pcts(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    a = np.asarray(samples_ms)
+    return {"n": int(a.size), "p50": round(float(np.percentile(a, 50)), 3),
+            "p95": round(float(np.percentile(a, 95)), 3), "p99": round(float(np.percentile(a, 99)), 3),
+            "max": round(float(a.max()), 3)}
+
+
+def _frames(args):
+    from app.services import live_replay
+
+    if args.recording:
+        return list(live_replay.read_recording(args.recording))
+    return list(live_replay.synthetic_frames(args.symbols, args.seconds, args.rate, args.batch))
+
+
+def _universe(frames):
+    syms = set()
+    for _, raw in frames:
+        for ev in json.loads(raw):
+            if isinstance(ev, dict) and ev.get("sym"):
+                syms.add(ev["sym"])
+    return syms
+
+
+async def _run(args):
+    import uvicorn
+    import websockets
+    from fastapi import FastAPI
+
+    from app.routers import screener
+    from app.services import live_screener_feed as feed_mod
+    from app.services import live_screener_service as lss
+    from app.services.live_replay import ReplayServer
+
+    frames = _frames(args)
+    n_events = sum(raw.count('"ev":"A"') + raw.count('"ev": "A"') for _, raw in frames)
+    svc, feed = lss.live_screener_service, feed_mod.live_screener_feed
+    universe = _universe(frames)
+    for sym in universe:
+        svc._states[sym] = lss.TickerLiveState(ticker=sym, prev_close=10.0, rth_close=10.0)
+    svc._allowlist = universe
+    svc._session = "rth"
+    print(f"replay: {len(frames)} frames, {n_events} aggregates, {len(universe)} symbols, "
+          f"speedup={args.speedup or 'max'}, clients={args.clients}")
+
+    # ingest: tiempo dentro del handler real (capacidad) + reloj de pared.
+    handled = {"events": 0, "busy": 0.0}
+    orig_handle = svc._handle_ws_message
+
+    def timed_handle(raw):
+        t = time.perf_counter()
+        orig_handle(raw)
+        handled["busy"] += time.perf_counter() - t
+        handled["events"] += raw.count('"ev":"A"') + raw.count('"ev": "A"')
+
+    svc._handle_ws_message = timed_handle
+
+    # push: instante de cada (tab, versión) generada por el feed.
+    tick_at = {}
+    orig_tick = feed.tick
+
+    def timed_tick():
+        t = time.perf_counter()
+        orig_tick()
+        for tab, ch in feed._channels.items():
+            tick_at.setdefault((tab, ch.version), t)
+
+    feed.tick = timed_tick
+
+    # get_top desde otro hilo, sin TTL, compitiendo con el ingest.
+    top_ms, stop = [], threading.Event()
+
+    def sampler():
+        tabs = list(lss.VALID_TABS)
+        k = 0
+        while not stop.is_set():
+            svc._top_cache.clear()
+            t = time.perf_counter()
+            svc.get_top(tabs[k % len(tabs)])
+            top_ms.append((time.perf_counter() - t) * 1e3)
+            k += 1
+            time.sleep(0.002)
+
+    app = FastAPI()
+    app.include_router(screener.router)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    push_ms, frames_rx, resyncs = [], [0], [0]
+
+    async def client(i):
+        tab = sorted(lss.VALID_TABS)[i % len(lss.VALID_TABS)]
+        async with websockets.connect(f"ws://127.0.0.1:{args.port}/api/screener/live", max_size=2**22) as ws:
+            if tab != lss.TAB_GAINERS:  # pestaña por defecto: sin re-subscribe
+                await ws.send(json.dumps({"action": "subscribe", "tab": tab}))
+            snapshots = 0
+            async for raw in ws:
+                now = time.perf_counter()
+                msg = json.loads(raw)
+                frames_rx[0] += 1
+                if msg.get("tab") != tab:
+                    continue  # snapshot inicial de la pestaña por defecto
+                if msg.get("type") == "delta":
+                    t = tick_at.get((msg["tab"], msg["version"]))
+                    if t is not None:
+                        push_ms.append((now - t) * 1e3)
+                else:
+                    snapshots += 1
+                    resyncs[0] += snapshots > 1  # snapshots tras el primero = backpressure
+
+    clients = [asyncio.create_task(client(i)) for i in range(args.clients)]
+    threading.Thread(target=sampler, daemon=True).start()
+
+    async with ReplayServer(frames, speedup=args.speedup) as replay:
+        lss.WS_URL, lss.API_KEY = replay.url, lss.API_KEY or "replay"
+        t0 = time.perf_counter()
+        consumer = asyncio.create_task(svc._consume_massive_ws())
+        await replay.done.wait()
+        while handled["events"] < n_events and time.perf_counter() - t0 < 600:
+            await asyncio.sleep(0.01)
+        wall = time.perf_counter() - t0
+        await asyncio.sleep(2 * feed_mod.PUSH_SECONDS + 0.2)  # últimos deltas
+        svc._stop = True
+        consumer.cancel()
+
+    stop.set()
+    for c in clients:
+        c.cancel()
+    server.should_exit = True
+    await asyncio.gather(server_task, *clients, return_exceptions=True)
+
+    return {
+        "frames": len(frames), "aggregates": n_events, "symbols": len(universe),
+        "speedup": args.speedup, "clients": args.clients,
+        "ingest": {
+            "wall_s": round(wall, 3),
+            "msgs_per_s_wall": round(handled["events"] / wall, 1) if wall else None,
+            "msgs_per_s_capacity": round(handled["events"] / handled["busy"], 1) if handled["busy"] else None,
+        },
+        "get_top_ms": _pcts(top_ms),
+        "push_ms": _pcts(push_ms),
+        "client_frames": frames_rx[0],
+        "client_resyncs": resyncs[0],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--recording", help="grabación JSONL(.gz) en formato live_replay")
+    ap.add_argument("--symbols", type=int, default=5000)
+    ap.add_argument("--seconds", type=int, default=20)
+    ap.add_argument("--rate", type=int, default=5000, help="aggregates por segundo (sintético)")
+    ap.add_argument("--batch", type=int, default=500, help="aggregates por frame WS (sintético)")
+    ap.add_argument("--speedup", type=float, default=1.0, help="0 = sin esperas")
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--json", help="volcar resultado JSON")
+    args = ap.parse_args()
+
+    res = asyncio.run(_run(args))
+    ing = res["ingest"]
+    print(f"ingest     {ing['msgs_per_s_wall']:>12,.0f} msgs/s (wall)   "
+          f"{ing['msgs_per_s_capacity']:>12,.0f} msgs/s (capacity)   {ing['wall_s']}s")
+    for name in ("get_top_ms", "push_ms"):
+        p = res[name]
+        if p["n"]:
+            print(f"{name:<11}n={p['n']:<7} p50={p['p50']:<8} p95={p['p95']:<8} p99={p['p99']:<8} max={p['max']}")
+        else:
+            print(f"{name:<11}sin muestras")
+    print(f"clients    frames={res['client_frames']} resyncs={res['client_resyncs']}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(res, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+PARITY FLOAT32 — paridad a nivel de trade del motor float32 contra el float64.
+
+Corre el run_backtest REAL dos veces (BTT_FLOAT32_ENGINE=0 / =1) sobre el
+dataset sintético de bench_e2e.py, en modo slab + N2a nativo + kernel Numba
+(el único camino donde el flag cambia algo), y compara trade a trade con
+app.services.float32_parity.
+
+Uso:
+  python scripts/parity_float32.py                      # 200 tickers × 3 meses
+  python scripts/parity_float32.py --tickers 20 --months 1
+  python scripts/parity_float32.py --rtol 1e-5          # tolerancia relativa por campo
+  ... --json out.json                                   # volcar el informe JSON
+
+Sale con código 1 si hay trades ausentes/sobrantes o campos fuera de tolerancia.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_e2e  # noqa: E402  (fija sys.path del backend y el entorno)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tickers", type=int, default=bench_e2e.DEFAULT_TICKERS_PER_MONTH)
+    ap.add_argument("--months", type=int, default=bench_e2e.DEFAULT_MONTHS)
+    ap.add_argument("--bars", type=int, default=bench_e2e.DEFAULT_BARS)
+    ap.add_argument("--rtol", type=float, default=1e-6)
+    ap.add_argument("--limit", type=int, default=20, help="divergencias a listar")
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    bench_e2e._isolate_dirs(f"t{args.tickers}_m{args.months}_b{args.bars}_s{bench_e2e.SEED}_v1")
+    os.environ["BTT_SLAB_STREAM_ENABLED"] = "1"
+    os.environ["BTT_N2A_NATIVE_ENABLED"] = "1"
+    os.environ["BACKTEST_NUMBA_SIM"] = "1"
+
+    from app.db.slab_store import ensure_slabs_from_ticker_cache
+    from app.services import float32_parity
+    from app.services.sim_dispatch import warmup
+
+    qualifying = bench_e2e.build_synthetic_source(args.tickers, args.months, args.bars)
+    ensure_slabs_from_ticker_cache(bench_e2e._month_list(args.months))
+    os.environ["BTT_FLOAT32_ENGINE"] = "1"
+    warmup()  # compila ambas especializaciones (float64 y float32) fuera del tiempo medido
+
+    report = float32_parity.run_backtest_parity(
+        rtol=args.rtol,
+        qualifying_df=qualifying, strategy_def=bench_e2e.STRATEGY,
+        init_cash=10000.0, risk_r=100.0, risk_type="FIXED",
+        market_sessions=bench_e2e.MARKET_SESSIONS,
+        day_group_iter=iter(()), n_groups_hint=len(qualifying),
+    )
+    print(float32_parity.format_report(report, limit=args.limit))
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Resultados de jobs paginados — trades / day_results / equity global en Arrow.
+
+Cubre: save_job_result parte el resultado en .trades/.days/.global.arrow y
+load_job_result_light reconstruye el payload legacy de /result; páginas
+ordenadas y filtradas idénticas a ordenar/filtrar los dicts en Python; stream
+Arrow IPC; day_results con tipos fijos y todas las claves (ida y vuelta igual
+a los dicts); resumen con desgloses server-side sin materializar el ledger y
+los endpoints HTTP.
+"""
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import backtest as backtest_router
+from app.services import backtest_jobs
+from tests.test_trade_ledger import _ledger
+
+
+def _result():
+    ledger = _ledger(n_pairs=10).sanitized()
+    pairs = sorted({(t["ticker"], t["date"]) for t in ledger})
+    day_results = [
+        {"ticker": tk, "date": d, "total_return_pct": 0 if i % 4 == 0 else 1.5 * i - 4,
+         "total_trades": i % 3, "gap_pct": None if i == 2 else 60.0 + i}
+        for i, (tk, d) in enumerate(pairs)
+    ]
+    dates = sorted({d for _, d in pairs})
+    times = [1756700000 + 86400 * i for i in range(len(dates))]
+    return {
+        "trades": ledger,
+        "day_results": day_results,
+        "equity_curves": [{"ticker": tk, "date": d, "equity": [{"time": 1, "value": 2.0}]}
+                          for tk, d in pairs],
+        "aggregate_metrics": {"total_trades": len(ledger)},
+        "global_equity": [{"time": t, "value": 10000.0 + i} for i, t in enumerate(times)],
+        "global_drawdown": [{"time": t, "value": -0.5 * i} for i, t in enumerate(times)],
+        "global_equity_expenses": [{"time": t, "value": 9990.0 + i} for i, t in enumerate(times)],
+    }
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtest_jobs, "RESULTS_DIR", str(tmp_path))
+    result = _result()
+    backtest_jobs.save_job_result("job1", result)
+    return result
+
+
+def test_save_splits_tables_and_light_is_backward_compatible(job, tmp_path):
+    for suffix in ("trades.arrow", "days.arrow", "global.arrow", "result", "equity"):
+        assert (tmp_path / f"job1.{suffix}").exists()
+    light = backtest_jobs.load_job_result_light("job1")
+    assert light["trades"] == job["trades"].to_dicts()
+    assert light["day_results"] == job["day_results"]
+    for key in ("global_equity", "global_drawdown", "global_equity_expenses"):
+        assert light[key] == job[key]
+    assert light["equity_curves"] == []
+    assert light["aggregate_metrics"] == job["aggregate_metrics"]
+
+
+def test_day_results_round_trip_keeps_keys_and_types(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtest_jobs, "RESULTS_DIR", str(tmp_path))
+    empty = {"ticker": "AAA", "date": "2025-09-01", "total_return_pct": 0, "total_trades": 0,
+             "gap_pct": None, "extra": 3}
+    days = [empty, {**empty, "ticker": "BBB", "total_return_pct": 1.25, "total_trades": 2,
+                    "gap_pct": 55.0, "extra": 4}]
+    backtest_jobs.save_job_result("days", {"trades": [], "day_results": days})
+    assert (tmp_path / "days.days.arrow").exists()
+    got = backtest_jobs.load_job_result_light("days")["day_results"]
+    assert got == days
+    assert [type(d["total_trades"]) for d in got] == [int, int]
+    assert [type(d["total_return_pct"]) for d in got] == [float, float]
+
+    # clave sólo en la segunda fila: from_pylist la perdería → se queda inline
+    days = [{"ticker": "AAA", "date": "2025-09-01"},
+            {"ticker": "BBB", "date": "2025-09-02", "note": "x"}]
+    backtest_jobs.save_job_result("mixed", {"trades": [], "day_results": days})
+    assert not (tmp_path / "mixed.days.arrow").exists()
+    assert backtest_jobs.load_job_result_light("mixed")["day_results"] == days
+
+
+def test_trade_pages_match_python_sort_and_filter(job):
+    trades = job["trades"].to_dicts()
+    ref = sorted((t for t in trades if t["ticker"] in ("T1", "T2")),
+                 key=lambda t: t["pnl"], reverse=True)
+    got, offset = [], 0
+    while offset is not None:
+        page = backtest_jobs.query_job_trades(
+            "job1", offset=offset, limit=3, sort="pnl", order="desc", ticker=["T1", "T2"])
+        assert page["page"]["total"] == len(ref)
+        got.extend(page["items"])
+        offset = page["page"]["next_offset"]
+    assert got == ref
+
+    d = trades[0]["date"]
+    page = backtest_jobs.query_job_trades("job1", date_from=d, date_to=d, limit=1000)
+    assert page["items"] == [t for t in trades if t["date"] == d]
+
+
+def test_day_pages_sort_with_nulls_last(job):
+    page = backtest_jobs.query_job_days("job1", sort="gap_pct", order="desc", limit=1000)
+    gaps = [d["gap_pct"] for d in page["items"]]
+    assert gaps[-1] is None
+    assert gaps[:-1] == sorted(gaps[:-1], reverse=True)
+
+
+def test_arrow_stream_and_invalid_queries(job):
+    blob = backtest_jobs.job_table_ipc("job1", "trades", sort="entry_time_epoch")
+    table = pa.ipc.open_stream(blob).read_all()
+    assert table.num_rows == len(job["trades"])
+    assert table.column("entry_time_epoch").to_pylist() == sorted(
+        t["entry_time_epoch"] for t in job["trades"])
+    with pytest.raises(backtest_jobs.ResultQueryError):
+        backtest_jobs.query_job_trades("job1", sort="nope")
+    with pytest.raises(backtest_jobs.ResultQueryError):
+        backtest_jobs.job_table_ipc("job1", "other")
+    assert backtest_jobs.query_job_trades("missing") is None
+
+
+def test_summary_breakdowns(job, monkeypatch):
+    # el resumen agrega sobre la tabla Arrow, sin reconstruir el ledger
+    monkeypatch.setattr(backtest_jobs.TradeLedger, "from_arrow",
+                        classmethod(lambda cls, table: pytest.fail("ledger materializado")))
+    summary = backtest_jobs.job_result_summary("job1")
+    trades = job["trades"].to_dicts()
+    assert "trades" not in summary and "day_results" not in summary
+    assert summary["global_equity"] == job["global_equity"]
+    assert summary["counts"] == {"trades": len(trades), "days": len(job["day_results"]),
+                                 "tickers": len({t["ticker"] for t in trades})}
+    by_ticker = {b["key"]: b for b in summary["breakdowns"]["ticker"]}
+    for tk, b in by_ticker.items():
+        mine = [t for t in trades if t["ticker"] == tk]
+        assert b["trades"] == len(mine)
+        assert b["wins"] == sum(t["pnl"] > 0 for t in mine)
+        assert b["pnl"] == pytest.approx(sum(t["pnl"] for t in mine), abs=0.01)
+    hours = [b["key"] for b in summary["breakdowns"]["entry_hour"]]
+    assert hours == sorted({t["entry_hour"] for t in trades})
+
+
+def test_http_endpoints(job, monkeypatch):
+    monkeypatch.setattr(backtest_jobs, "get_job_state", lambda job_id: {"status": "succeeded"})
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+
+    r = client.get("/api/backtest/job1/trades", params={"limit": 5, "sort": "pnl", "order": "desc"})
+    assert r.status_code == 200 and len(r.json()["items"]) == 5
+    assert client.get("/api/backtest/job1/trades", params={"sort": "nope"}).status_code == 400
+    assert client.get("/api/backtest/job1/days").json()["page"]["total"] == len(job["day_results"])
+    assert client.get("/api/backtest/job1/summary").json()["counts"]["trades"] == len(job["trades"])
+    r = client.get("/api/backtest/job1/global.arrow")
+    assert r.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert pa.ipc.open_stream(r.content).read_all().num_rows == len(job["global_equity"])
+    assert client.get("/api/backtest/job1/result").json()["trades"] == job["trades"].to_dicts()
+    assert client.get("/api/backtest/nope/trades").status_code == 404
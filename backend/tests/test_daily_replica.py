@@ -0,0 +1,131 @@
+"""
+Réplica local de daily_metrics (app.db.daily_replica).
+
+Cubre: build inicial desde un mirror local con layout hive (ordenado por
+timestamp, ticker), append incremental de un fichero nuevo como delta (sin
+tocar la base), recarga del mes cuando cambia un fichero ya consumido
+(compactación), "unchanged" sin cambios, y las vistas daily_metrics adjuntas
+sobre base + deltas con la misma proyección que la vista GCS (más el re-attach
+de database al publicarse una generación nueva).
+"""
+import os
+from datetime import datetime, timedelta
+
+import duckdb
+import pandas as pd
+import pytest
+
+from app import database
+from app.db import daily_replica
+
+
+@pytest.fixture
+def src(tmp_path, monkeypatch):
+    monkeypatch.setenv("BTT_DAILY_REPLICA_ENABLED", "1")
+    monkeypatch.setenv("BTT_DAILY_REPLICA_PATH", str(tmp_path / "replica" / "dm.duckdb"))
+    monkeypatch.setattr(daily_replica, "_CHECK_S", 0.0)
+    daily_replica._GEN_CACHE.clear()
+    return tmp_path / "src"
+
+
+def _write_day(root, day, tickers=("BBB", "AAA"), gap=10.0):
+    d = datetime.fromisoformat(day)
+    folder = root / "daily_metrics" / f"year={d.year}" / f"month={d.month}"
+    folder.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame({
+        "ticker": list(tickers),
+        "timestamp": [d + timedelta(hours=4)] * len(tickers),
+        "gap_pct": [gap + i for i in range(len(tickers))],
+        "pm_high": 12.0, "prev_close": 10.0, "pmh_gap_pct": -1.0, "rth_open": 11.0,
+    })
+    path = folder / f"{day}.parquet"
+    df.to_parquet(path, index=False)
+    return path
+
+
+def _segments():
+    path = daily_replica.replica_path()
+    return daily_replica._segment_paths(path, daily_replica._read_manifest(path))
+
+
+def _replica_rows():
+    """Filas de base + deltas en orden físico, vía las vistas adjuntas."""
+    con = duckdb.connect()
+    try:
+        con.execute("ATTACH ':memory:' AS massive")
+        assert daily_replica.attach_replica(con)
+        return con.execute("SELECT ticker, CAST(timestamp AS DATE)::VARCHAR, gap_pct, year, month "
+                           "FROM daily_metrics").fetchall()
+    finally:
+        con.close()
+
+
+def test_build_append_reload_and_unchanged(src):
+    _write_day(src, "2025-10-02")
+    _write_day(src, "2025-09-29")
+    res = daily_replica.sync_daily_replica(str(src))
+    assert res == {"action": "built", "files": 2, "months": 2, "rows": 4}
+    rows = _replica_rows()
+    assert [r[:2] for r in rows] == [("AAA", "2025-09-29"), ("BBB", "2025-09-29"),
+                                    ("AAA", "2025-10-02"), ("BBB", "2025-10-02")]
+    assert {(r[3], r[4]) for r in rows} == {(2025, 9), (2025, 10)}
+
+    assert daily_replica.sync_daily_replica(str(src))["action"] == "unchanged"
+
+    base, = _segments()
+    base_stat = os.stat(base)
+    _write_day(src, "2025-10-03", tickers=("CCC",))
+    res = daily_replica.sync_daily_replica(str(src))
+    assert res["action"] == "appended" and res["files"] == 1 and res["rows"] == 5
+    # el delta es un fichero aparte: la base no se copia ni se reescribe
+    segs = _segments()
+    assert segs[0] == base and len(segs) == 2
+    assert os.stat(base).st_mtime_ns == base_stat.st_mtime_ns
+    assert _replica_rows()[-1][:2] == ("CCC", "2025-10-03")
+
+    # fichero ya consumido reescrito: se recarga su mes en una base nueva ordenada
+    p = _write_day(src, "2025-09-29", tickers=("ZZZ",), gap=50.0)
+    os.utime(p, ns=(1, 1))
+    res = daily_replica.sync_daily_replica(str(src))
+    assert res["action"] == "compacted" and res["months"] == 1 and res["rows"] == 4
+    rows = _replica_rows()
+    assert [r[:3] for r in rows] == [("ZZZ", "2025-09-29", 50.0), ("AAA", "2025-10-02", 11.0),
+                                    ("BBB", "2025-10-02", 10.0), ("CCC", "2025-10-03", 10.0)]
+    assert len(_segments()) == 1 and not os.path.exists(base) and not os.path.exists(segs[1])
+    assert not [n for n in os.listdir(os.path.dirname(base)) if n.endswith(".tmp")]
+
+
+def test_deltas_compact_at_max(src, monkeypatch):
+    monkeypatch.setattr(daily_replica, "_MAX_DELTAS", 3)
+    _write_day(src, "2025-09-01")
+    daily_replica.sync_daily_replica(str(src))
+    actions = []
+    for day in ("2025-09-02", "2025-09-03", "2025-09-04"):
+        _write_day(src, day, tickers=("CCC",))
+        actions.append(daily_replica.sync_daily_replica(str(src))["action"])
+        assert len(_segments()) == (1 if actions[-1] == "compacted" else len(actions) + 1)
+    assert actions == ["appended", "appended", "compacted"]
+    rows = _replica_rows()
+    assert [r[1] for r in rows] == sorted(r[1] for r in rows) and len(rows) == 5
+
+
+def test_attach_views_match_gcs_projection(src, monkeypatch):
+    _write_day(src, "2025-09-29")
+    daily_replica.sync_daily_replica(str(src))
+
+    con = duckdb.connect()
+    con.execute("ATTACH ':memory:' AS massive")
+    monkeypatch.setattr(database, "_local", type("L", (), {})())
+    database._local.replica_gen = None
+    database._sync_daily_replica_views(con)
+    assert daily_replica.is_attached(con)
+    got = con.execute("SELECT ticker, gap_at_open_pct, pmh_gap_pct FROM daily_metrics "
+                      "ORDER BY ticker").fetchall()
+    assert got == [("AAA", 11.0, 20.0), ("BBB", 10.0, 20.0)]
+
+    # nueva generación publicada → re-attach y la vista ve las filas nuevas
+    _write_day(src, "2025-09-30", tickers=("CCC",))
+    daily_replica.sync_daily_replica(str(src))
+    database._sync_daily_replica_views(con)
+    assert con.execute("SELECT count(*) FROM massive.daily_metrics").fetchone()[0] == 3
+    con.close()
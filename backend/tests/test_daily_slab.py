@@ -0,0 +1,219 @@
+"""Slab diario de daily_metrics (slab_builder.build_daily_slab + slab_store.DailySlab).
+
+  - frame() reproduce las columnas LEAD/LAG/SMA del SQL de qualifying
+    (window functions de DuckDB sobre los mismos datos deduplicados);
+  - "High/Low of last X days" sale del slab con el mismo valor que el path
+    DataFrame por ticker;
+  - replica_sync.refresh_daily_slab sólo reconstruye si cambian los ficheros;
+  - el slab diario lleva siempre índice binario, aunque BTT_SLAB_PAIR_INDEX
+    esté apagado para los slabs mensuales;
+  - pmh_gap_pct / gap_at_open_pct salen recalculadas como en la vista
+    daily_metrics, no crudas del parquet;
+  - prefetch_daily_ohlc sólo deja al slab los tickers con todos sus días
+    pedidos dentro; el resto se sigue precargando de daily_metrics;
+  - las columnas LEAD/LAG/SMA de qualifying (path local) salen del slab con los
+    mismos valores que el SQL, y con un slab atrasado se vuelve al SQL.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import daily_replica, gcs_cache, replica_sync, slab_builder, slab_store
+from app.services import data_service, indicators
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(gcs_cache, "LOCAL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    monkeypatch.setenv("BTT_DAILY_SLAB_ENABLED", "1")
+    slab_store._OPEN_SLABS.clear()
+    yield
+    slab_store._OPEN_SLABS.clear()
+
+
+def _month_frame(y, m, tickers=("AAA", "BB", "C"), days=12, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for tk in tickers:
+        for d in pd.bdate_range(f"{y}-{m:02d}-01", periods=days):
+            c = float(rng.uniform(5, 15))
+            rows.append({"ticker": tk, "timestamp": d, "rth_open": c * 0.99, "rth_high": c * 1.05,
+                         "rth_low": c * 0.95, "rth_close": c, "rth_volume": int(rng.integers(1e3, 1e6)),
+                         "gap_pct": float(rng.normal(10, 20)), "open_lt_vwap": bool(rng.integers(2)),
+                         "pm_high_time": "08:15"})
+    df = pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    df.loc[3, "rth_high"] = np.nan  # nulos: las ventanas los ignoran
+    return df
+
+
+def _mirror(root, frames):
+    """<root>/daily_metrics/year=Y/month=M/data.parquet; devuelve el df fuente entero."""
+    for (y, m), df in frames.items():
+        d = root / "daily_metrics" / f"year={y}" / f"month={m}"
+        d.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(d / "data.parquet", index=False)
+    return pd.concat(frames.values(), ignore_index=True)
+
+
+def test_frame_matches_sql_lead_lag_and_sma(tmp_path):
+    sep, oct_ = _month_frame(2025, 9, seed=1), _month_frame(2025, 10, seed=2)
+    dup = oct_.iloc[[0]].copy()
+    dup["rth_close"] = 999.0  # mismo (ticker, día): keep-first lo descarta
+    src = _mirror(tmp_path / "mirror", {(2025, 9): sep, (2025, 10): pd.concat([oct_, dup])})
+    assert replica_sync.refresh_daily_slab(source=str(tmp_path / "mirror")) == "built"
+    daily = slab_store.get_daily()
+    assert daily.n_rows == len(src) - 1 and daily.manifest["skipped_columns"] == ["pm_high_time"]
+    assert daily.column("open_lt_vwap").dtype == np.uint8
+
+    import duckdb
+    ref = (src.sort_values(["ticker", "timestamp"], kind="stable")
+              .drop_duplicates(["ticker", "timestamp"]).reset_index(drop=True))
+    w = 'OVER (PARTITION BY ticker ORDER BY "timestamp")'
+    sql = duckdb.connect().execute(f"""
+        WITH s AS (SELECT *, AVG(rth_close) OVER (PARTITION BY ticker ORDER BY "timestamp"
+                                  ROWS BETWEEN 4 PRECEDING AND CURRENT ROW) AS sma_5 FROM ref)
+        SELECT ticker, strftime(CAST("timestamp" AS DATE), '%Y-%m-%d') AS date, rth_close, sma_5,
+               LAG(rth_high, 1) {w} AS lag_rth_high_1, LAG(rth_close, 2) {w} AS lag_rth_close_2,
+               LEAD(rth_open, 1) {w} AS lead_rth_open_1, LEAD(gap_pct, 2) {w} AS lead_gap_pct_2,
+               LEAD(sma_5, 1) {w} AS lead_sma_5_1, LEAD("timestamp", 1) {w} AS lead_timestamp_1
+        FROM s ORDER BY date, ticker""").fetchdf()
+    cols = [c for c in sql.columns if c not in ("ticker", "date")]
+    got = daily.frame(list(sql["ticker"]) + ["ZZZ"], list(sql["date"]) + ["2025-09-01"], cols)
+    assert got.iloc[-1].isna().all()  # par ausente
+    got = got.iloc[:-1]
+    for c in cols:
+        if c == "lead_timestamp_1":
+            assert np.array_equal(got[c].to_numpy(), sql[c].to_numpy("datetime64[ns]"), equal_nan=True)
+        else:
+            np.testing.assert_allclose(got[c].to_numpy(), sql[c].to_numpy(np.float64), rtol=1e-12)
+
+    assert replica_sync.refresh_daily_slab(source=str(tmp_path / "mirror")) == "unchanged"
+
+
+def test_last_x_days_lookback_from_slab_matches_frame_path(tmp_path, monkeypatch):
+    src = _mirror(tmp_path / "mirror", {(2025, 9): _month_frame(2025, 9, seed=3)})
+    slab_builder.build_daily_slab({str(p): "" for p in (tmp_path / "mirror").rglob("*.parquet")})
+    day = pd.DataFrame({"timestamp": pd.date_range("2025-09-10 09:30", periods=5, freq="1min"),
+                        "close": 1.0})
+    s = day["close"]
+
+    def _lookback(name, date, n):
+        out = indicators._compute_raw(name, s, s, s, s, s, None, None, None, None, None, n,
+                                      None, None, None, None, None, None,
+                                      {"ticker": "BB", "date": date}, day)
+        return out.iloc[0]
+
+    cases = [(name, date, n) for name in ("High of last X days", "Low of last X days")
+             for date in ("2025-09-01", "2025-09-04", "2025-09-12") for n in (1, 3, 20)]
+    via_slab = [_lookback(*c) for c in cases]
+    monkeypatch.setenv("BTT_DAILY_SLAB_ENABLED", "0")
+    bb = src[src["ticker"] == "BB"].sort_values("timestamp")
+    frame = bb.assign(date=bb["timestamp"].dt.strftime("%Y-%m-%d")).set_index("date")
+    monkeypatch.setitem(indicators._ticker_daily_ohlc_cache, "BB", frame[["rth_high", "rth_low"]])
+    via_frame = [_lookback(*c) for c in cases]
+    np.testing.assert_array_equal(via_slab, via_frame)
+    # NaN sólo el primer día del ticker (sin días previos)
+    assert [bool(np.isnan(v)) for v in via_slab] == [c[1] == "2025-09-01" for c in cases]
+
+
+def test_daily_slab_keeps_pair_index_with_flag_off(tmp_path, monkeypatch):
+    monkeypatch.setenv("BTT_SLAB_PAIR_INDEX", "0")
+    _mirror(tmp_path / "mirror", {(2025, 9): _month_frame(2025, 9, seed=4)})
+    manifest = slab_builder.build_daily_slab(
+        {str(p): "" for p in (tmp_path / "mirror").rglob("*.parquet")})
+    assert manifest.get("pair_index")
+    assert slab_store.get_daily().n_rows == manifest["n_rows"]
+
+
+def _gap_frame(y, m, days=12, seed=0):
+    """_month_frame con las columnas que lee qualifying; pmh_gap_pct cruda desfasada
+    a propósito (la vista la recalcula desde pm_high y prev_close)."""
+    df = _month_frame(y, m, days=days, seed=seed).drop(columns=["open_lt_vwap", "pm_high_time"])
+    rng = np.random.default_rng(seed + 100)
+    df["open"] = df["rth_open"] * 0.97
+    df["pm_high"] = df["rth_open"] * rng.uniform(1.0, 1.4, len(df))
+    df["pm_low"] = df["rth_open"] * 0.9
+    df["pm_volume"] = rng.integers(1e3, 1e6, len(df)).astype(np.int64)
+    df["prev_close"] = df["rth_close"] * rng.uniform(0.6, 1.0, len(df))
+    df.loc[5, "prev_close"] = 0.0  # NULLIF → NULL
+    df["pmh_gap_pct"] = -1.0
+    return df
+
+
+def test_frame_recomputes_view_columns(tmp_path):
+    import duckdb
+    src = _mirror(tmp_path / "mirror", {(2025, 9): _gap_frame(2025, 9, seed=5)})
+    slab_builder.build_daily_slab({str(p): "" for p in (tmp_path / "mirror").rglob("*.parquet")})
+    con = duckdb.connect()
+    con.register("src", src)
+    view = daily_replica._VIEW_SQL.format(source="SELECT * FROM src")
+    sql = con.execute(f"""
+        SELECT ticker, strftime(CAST("timestamp" AS DATE), '%Y-%m-%d') AS date, pmh_gap_pct,
+               gap_at_open_pct,
+               LEAD(pmh_gap_pct, 1) OVER (PARTITION BY ticker ORDER BY "timestamp") AS lead_pmh_gap_pct_1
+        FROM ({view}) ORDER BY ticker, date""").fetchdf()
+    cols = ["pmh_gap_pct", "gap_at_open_pct", "lead_pmh_gap_pct_1"]
+    got = slab_store.get_daily().frame(sql["ticker"], sql["date"], cols)
+    assert got["pmh_gap_pct"].isna().sum() == 1 and (got["pmh_gap_pct"].dropna() != -1.0).all()
+    for c in cols:
+        np.testing.assert_allclose(got[c].to_numpy(), sql[c].to_numpy(np.float64), rtol=1e-12)
+
+
+def test_prefetch_keeps_tickers_the_slab_does_not_cover(tmp_path, monkeypatch):
+    import duckdb
+    import app.database
+    sep, oct_ = _month_frame(2025, 9, seed=6), _month_frame(2025, 10, seed=7)
+    _mirror(tmp_path / "mirror", {(2025, 9): sep})
+    slab_builder.build_daily_slab({str(p): "" for p in (tmp_path / "mirror").rglob("*.parquet")})
+    con = duckdb.connect()
+    con.register("daily_metrics", pd.concat([sep, oct_], ignore_index=True))
+    monkeypatch.setattr(app.database, "get_db_connection", lambda *a, **k: con)
+    monkeypatch.setattr(indicators, "_ticker_daily_ohlc_cache", {})
+
+    # AAA: todos sus días en el slab; BB pide un día de octubre (slab atrasado)
+    indicators.prefetch_daily_ohlc(["AAA", "AAA", "BB"], ["2025-09-02", "2025-09-05", "2025-10-02"])
+    assert set(indicators._ticker_daily_ohlc_cache) == {"BB"}
+    assert "2025-10-02" in indicators._ticker_daily_ohlc_cache["BB"].index
+    indicators.prefetch_daily_ohlc(["C"])  # sin días: no se salta por estar en el slab
+    assert set(indicators._ticker_daily_ohlc_cache) == {"BB", "C"}
+
+
+@pytest.mark.parametrize("apply_day", ["gap_day", "gap_1_day"])
+@pytest.mark.parametrize("stale", [False, True])
+def test_qualifying_window_columns_from_slab_match_sql(tmp_path, monkeypatch, apply_day, stale):
+    import duckdb
+    import app.database
+    frames = {(2025, 9): _gap_frame(2025, 9, seed=8), (2025, 10): _gap_frame(2025, 10, seed=9)}
+    src = pd.concat(frames.values(), ignore_index=True)
+    _mirror(tmp_path / "mirror", {k: v for k, v in frames.items() if not stale or k == (2025, 9)})
+    slab_builder.build_daily_slab({str(p): "" for p in (tmp_path / "mirror").rglob("*.parquet")})
+    con = duckdb.connect()
+    con.execute("CREATE TABLE daily_metrics AS SELECT * FROM src")
+    monkeypatch.setenv("DB_PROVIDER", "local")
+    monkeypatch.setattr(app.database, "get_db_connection", lambda *a, **k: con)
+    monkeypatch.setattr(data_service, "_resolve_filters",
+                        lambda *a: {"min_gap_pct": 5, "start_date": "2025-09-03"})
+    served = []
+    real = data_service._slab_window_frame
+    monkeypatch.setattr(data_service, "_slab_window_frame",
+                        lambda *a, **k: served.append(real(*a, **k)) or served[-1])
+    precond = [{"day": "gap_day", "metric": "close_vs_sma", "operator": ">", "sma_period": 3},
+               {"day": "gap_1_day", "metric": "close_vs_high_low", "operator": "> High"}]
+
+    def _run():
+        df = data_service._fetch_qualifying_data_uncached("ds", preconditions=precond,
+                                                          apply_day=apply_day)
+        return df.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    got = _run()
+    assert len(served) == 1 and (served[0] is None) == stale
+    monkeypatch.setenv("BTT_DAILY_SLAB_ENABLED", "0")
+    ref = _run()
+    assert len(ref) and sorted(got.columns) == sorted(ref.columns)
+    for c in ref.columns:
+        if c in ("ticker", "date") or "timestamp" in c:
+            assert list(got[c].astype(str)) == list(ref[c].astype(str)), c
+        else:
+            np.testing.assert_allclose(got[c].to_numpy(np.float64), ref[c].to_numpy(np.float64),
+                                       rtol=1e-12, err_msg=c)
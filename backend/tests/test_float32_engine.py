@@ -0,0 +1,167 @@
+"""Motor float32 (BTT_FLOAT32_ENGINE): slab → indicadores nativos → kernel Numba.
+
+  - MonthSlab.slice(dtype=float32) entrega OHLC como vistas del mmap (sin copia);
+  - los indicadores del dispatch nativo conservan float32 y quedan a ~1e-6
+    relativo de su versión float64;
+  - run_backtest con el flag: paridad a nivel de trade contra el float64
+    (float32_parity), y resultado EXACTO cuando la estrategia no es nativa
+    (el clásico sube a float64 en su frontera);
+  - compare_trades detecta trades ausentes y campos divergentes.
+
+Fixture sintético como el de test_n2a_e2e_equivalence.py (offline, sin GCS).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import gcs_cache, slab_builder, slab_store
+from app.services import float32_parity
+from app.services.backtest_service import run_backtest
+from app.services.strategy_engine import _compute_indicator_raw
+
+STRATEGY_NATIVE = {
+    "bias": "short", "apply_day": "gap_day",
+    "entry_logic": {
+        "timeframe": "1m",
+        "root_condition": {"operator": "AND", "conditions": [
+            {"type": "indicator_comparison", "timeframe": "1m",
+             "source": {"name": "Bar Close"}, "comparator": "LESS_THAN", "target": {"name": "VWAP"}},
+            {"type": "indicator_comparison", "timeframe": "1m",
+             "source": {"name": "Bar Open"}, "comparator": "GREATER_THAN", "target": {"name": "VWAP"}},
+            {"type": "indicator_comparison", "timeframe": "5m",
+             "source": {"name": "RSI", "period": 7}, "comparator": "LESS_THAN", "target": 100},
+        ]},
+    },
+    "exit_logic": {
+        "timeframe": "1m",
+        "root_condition": {"operator": "AND", "conditions": [
+            {"type": "indicator_comparison", "timeframe": "1m",
+             "source": {"name": "Close"}, "comparator": "CROSSES_ABOVE", "target": {"name": "EMA", "period": 9}},
+        ]},
+    },
+    "risk_management": {"use_hard_stop": True, "hard_stop": {"type": "Percentage", "value": 15},
+                        "accept_reentries": True, "max_reentries": -1},
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(gcs_cache, "LOCAL_CACHE_DIR", str(cache_dir))
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    for var in ("BTT_FLOAT32_ENGINE", "BTT_N2A_NATIVE_ENABLED", "BACKTEST_PARALLEL_WORKERS"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "1")
+    slab_store._OPEN_SLABS.clear()
+    with gcs_cache._MONTH_CACHE_LOCK:
+        gcs_cache._MONTH_CACHE.clear()
+        gcs_cache._MONTH_CACHE_SIZES.clear()
+    yield
+    slab_store._OPEN_SLABS.clear()
+
+
+def _mk_day(ticker, date, n=420, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(f"{date} 04:00", periods=n, freq="1min")
+    close = 8.0 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = close * np.exp(rng.normal(0, 0.004, n))
+    return pd.DataFrame({
+        "ticker": ticker, "date": date, "timestamp": ts,
+        "open": open_, "high": np.maximum(open_, close) * 1.004,
+        "low": np.minimum(open_, close) * 0.996, "close": close,
+        "volume": rng.integers(100, 50000, n),
+    })
+
+
+def _setup_slab_month(n_tickers=6, y=2025, m=9):
+    days = ["2025-09-01", "2025-09-02", "2025-09-03"]
+    qual_rows = []
+    for i in range(n_tickers):
+        tk = f"TK{i:02d}"
+        month = pd.concat([_mk_day(tk, d, seed=i * 10 + j) for j, d in enumerate(days)],
+                          ignore_index=True)
+        month = gcs_cache._downcast_intraday(month)
+        gcs_cache._atomic_write_parquet(month, gcs_cache._ticker_cache_path(y, m, "opt", tk))
+        for d in days[:2]:
+            qual_rows.append({"ticker": tk, "date": d, "prev_close": 8.0, "gap_pct": 60.0,
+                              "yesterday_open": 7.7, "lag_rth_open_1": 7.7})
+    slab_builder.build_month_from_ticker_cache(y, m, "opt")
+    return pd.DataFrame(qual_rows)
+
+
+def _run_kwargs(qualifying, strategy=STRATEGY_NATIVE):
+    return dict(
+        qualifying_df=qualifying, strategy_def=strategy,
+        init_cash=10000.0, risk_r=100.0, risk_type="FIXED",
+        market_sessions=["pre", "rth"],
+        day_group_iter=iter(()), n_groups_hint=len(qualifying),
+    )
+
+
+def test_slab_float32_slice_is_zero_copy():
+    _setup_slab_month(n_tickers=1)
+    slab = slab_store.get_month("opt", 2025, 9)
+    rng = slab.lookup("TK00", "2025-09-02")
+    a64, a32 = slab.slice(*rng), slab.slice(*rng, dtype=np.float32)
+    assert a32.close.dtype == np.float32 and a32.volume.dtype == np.float32
+    assert not a32.close.flags.writeable                  # vista del mmap
+    assert np.shares_memory(a32.close, slab.slice_native(*rng).close)
+    assert np.array_equal(a32.close.astype(np.float64), a64.close)
+    assert np.array_equal(a32.volume.astype(np.float64), a64.volume)
+
+
+@pytest.mark.parametrize("name", [
+    "SMA", "EMA", "VWAP", "RSI", "ATR", "CCI", "ROC", "MACD", "Stochastic", "DMI",
+    "Bollinger Upper", "OBV", "HA Open", "Linear Regression", "Volume", "High of Day",
+])
+def test_native_indicators_keep_float32(name):
+    day = _mk_day("X", "2025-09-02")
+    cols = [day[c].to_numpy(np.float32) for c in ("close", "high", "low", "open", "volume")]
+    r32 = _compute_indicator_raw(name, *cols, period=14)
+    r64 = _compute_indicator_raw(name, *(c.astype(np.float64) for c in cols), period=14)
+    assert r32.dtype == np.float32 and r64.dtype == np.float64
+    ok = ~np.isnan(r64)
+    assert np.array_equal(np.isnan(r32), ~ok)
+    # atol relativa a la escala: CCI/DMI amplifican el redondeo cerca de cero.
+    scale = float(np.abs(r64[ok]).max()) if ok.any() else 1.0
+    np.testing.assert_allclose(r32[ok], r64[ok], rtol=2e-5, atol=1e-4 * scale)
+
+
+def test_run_backtest_float32_parity(monkeypatch):
+    qualifying = _setup_slab_month()
+    monkeypatch.setenv("BTT_SLAB_STREAM_ENABLED", "1")
+    monkeypatch.setenv("BTT_N2A_NATIVE_ENABLED", "1")
+    report = float32_parity.run_backtest_parity(**_run_kwargs(qualifying))
+    assert report["n_ref"] > 0, "el fixture debe producir trades"
+    # Divergencias posibles sólo en el filo de una comparación: en este fixture
+    # ninguna; los precios de trade salen de los mismos float32 → exactos.
+    assert report["ok"], float32_parity.format_report(report)
+    assert report["max_rel"]["exit_price"] == 0.0
+
+
+def test_float32_flag_is_exact_for_classic_engine(monkeypatch):
+    """Sin N2a el clásico recibe float64: el flag no cambia ni un bit."""
+    qualifying = _setup_slab_month()
+    monkeypatch.setenv("BTT_SLAB_STREAM_ENABLED", "1")
+    res64 = run_backtest(**_run_kwargs(qualifying.copy()))
+    monkeypatch.setenv("BTT_FLOAT32_ENGINE", "1")
+    res32 = run_backtest(**_run_kwargs(qualifying.copy()))
+    assert len(res64["trades"]) > 0
+    assert res64["trades"] == res32["trades"]
+    assert res64["aggregate_metrics"] == res32["aggregate_metrics"]
+
+
+def test_compare_trades_reports_divergences():
+    base = {"ticker": "A", "date": "2025-09-01", "entry_idx": 3, "exit_idx": 9,
+            "direction": "Short", "exit_reason": "SL", "entry_price": 10.0, "exit_price": 11.5,
+            "size": 100.0, "pnl": -150.0, "return_pct": -15.0, "mae": 0.0, "mfe": 0.0,
+            "stop_loss": 11.5}
+    ref = [base, dict(base, entry_idx=20, exit_idx=30, pnl=40.0), dict(base, entry_idx=50)]
+    cand = [dict(base, pnl=-150.00001), dict(base, entry_idx=20, exit_idx=31, pnl=40.0)]
+    rep = float32_parity.compare_trades(ref, cand, rtol=1e-6)
+    assert not rep["ok"]
+    assert rep["missing"] == [("A", "2025-09-01", 50, 0)] and rep["extra"] == []
+    assert [(d["key"][2], d["field"]) for d in rep["divergent"]] == [(20, "exit_idx")]
+    assert 0 < rep["max_rel"]["pnl"] < 1e-6
+    assert "DIVERGE" in float32_parity.format_report(rep)
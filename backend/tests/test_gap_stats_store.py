@@ -0,0 +1,149 @@
+"""
+Store de días de gap por ticker (app.db.gap_stats_store).
+
+Cubre: build desde daily_metrics + caminos 15-min desde el slab; las runner
+stats leídas del store (offsets 0/+1/+2, gap_dates y chart) son las mismas que
+el cálculo por petición (fallback daily_metrics + intradía de intraday_1m);
+refresco incremental que completa el +1 pendiente del último gap, "unchanged"
+sin filas nuevas, ticker sin gaps → None (el endpoint sigue por el fallback), y
+con el hot cache (sólo filas gap >= 10) el fallback da los mismos +1/+2 que el
+store: los offsets salen de la historia diaria completa, no de las filas del
+hot cache.
+"""
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import gap_stats_store, gcs_cache, slab_builder, slab_store
+from app.routers import ticker_analysis
+from app.services import cache_service, massive_service
+
+_DAYS = pd.bdate_range("2025-09-01", periods=9)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(gcs_cache, "LOCAL_CACHE_DIR", str(cache_dir))
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    monkeypatch.setenv("BTT_GAP_STATS_PATH", str(tmp_path / "gap_stats.duckdb"))
+    monkeypatch.setenv("DB_PROVIDER", "local")
+    monkeypatch.setattr(gap_stats_store, "_CHECK_S", 0.0)
+    monkeypatch.setattr(cache_service, "get_hot_daily_cache", lambda: None)
+    monkeypatch.setattr(massive_service, "get_minute_bars_for_dates", lambda *a, **k: [])
+    slab_store._OPEN_SLABS.clear()
+    gap_stats_store._READER.clear()
+
+    con = duckdb.connect()
+    daily = _daily(_DAYS[:8])
+    intraday = _intraday(daily)
+    con.execute("CREATE TABLE daily_metrics AS SELECT * FROM daily")
+    con.execute("CREATE TABLE intraday_1m AS SELECT *, year(timestamp) AS year, "
+                "month(timestamp) AS month FROM intraday")
+    slab_builder.build_month_from_df(intraday, "opt", 2025, 9)
+    monkeypatch.setattr(ticker_analysis, "get_db_connection", lambda: con)
+    yield con
+    con.close()
+    slab_store._OPEN_SLABS.clear()
+    gap_stats_store._READER.clear()
+
+
+def _daily(days, gaps=(1, 4, 7)):
+    rng = np.random.default_rng(3)
+    n = len(days)
+    rth_open = rng.uniform(2, 10, n)
+    df = pd.DataFrame({
+        "ticker": "AAA", "timestamp": days,
+        "gap_pct": 5.0, "pmh_gap_pct": [40.0 if i in gaps else 3.0 for i in range(n)],
+        "rth_open": rth_open, "rth_high": rth_open * 1.3, "rth_low": rth_open * 0.8,
+        "rth_close": rth_open * rng.uniform(0.7, 1.2, n), "pm_high": rth_open * 1.1,
+    })
+    df.loc[2, "rth_open"] = np.nan        # chart: open de la primera vela >= 09:30
+    df.loc[4, "pm_high"] = 0.0
+    other = df.head(3).assign(ticker="BBB", pmh_gap_pct=1.0)
+    return pd.concat([df, other], ignore_index=True)
+
+
+def _intraday(daily):
+    frames = []
+    for i, day in enumerate(daily.loc[daily["ticker"] == "AAA", "timestamp"]):
+        rng = np.random.default_rng(i)
+        ts = pd.date_range(day + pd.Timedelta(hours=4), day + pd.Timedelta(hours=19, minutes=59),
+                           freq="1min")
+        close = (5 + rng.normal(0, 0.05, len(ts)).cumsum()).astype(np.float32)
+        frames.append(pd.DataFrame({
+            "ticker": "AAA", "date": day.strftime("%Y-%m-%d"), "timestamp": ts,
+            "open": close * np.float32(1.001), "high": close, "low": close, "close": close,
+            "volume": 100,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _assert_same(got, ref):
+    assert got.keys() == ref.keys()
+    assert got["gap_dates"] == ref["gap_dates"]
+    for key in ("gap_stats", "gap_stats_plus_1", "gap_stats_plus_2"):
+        g, r = dict(got[key]), dict(ref[key])
+        gc, rc = g.pop("price_change_chart"), r.pop("price_change_chart")
+        assert g == pytest.approx(r)
+        assert [c["bin"] for c in gc] == [c["bin"] for c in rc]
+        assert [c["is_premarket"] for c in gc] == [c["is_premarket"] for c in rc]
+        np.testing.assert_allclose([c["avg_change_pct"] for c in gc],
+                                   [c["avg_change_pct"] for c in rc], rtol=1e-5)
+
+
+def test_store_matches_per_request_stats(env, monkeypatch):
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "0")
+    ref = ticker_analysis.get_gap_stats_all_days("AAA")
+    assert ref["gap_stats_plus_1"]["gap_days_count"] == 2 and ref["gap_stats"]["price_change_chart"]
+
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "1")
+    assert gap_stats_store.refresh_gap_stats(env) == {"action": "built", "tickers": 1, "rows": 7}
+    monkeypatch.setattr(ticker_analysis, "get_db_connection",
+                        lambda: pytest.fail("el store no debe abrir la conexión"))
+    got = ticker_analysis.get_gap_stats_all_days("aaa")
+    _assert_same(got, ref)
+    fast = ticker_analysis.get_gap_stats_all_days("AAA", include_chart=False)
+    assert fast["gap_stats"]["price_change_chart"] == []
+    assert gap_stats_store.read_gap_days("BBB") is None
+
+
+def test_incremental_refresh_completes_pending_offsets(env, monkeypatch):
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "1")
+    gap_stats_store.refresh_gap_stats(env)
+    assert gap_stats_store.refresh_gap_stats(env)["action"] == "unchanged"
+
+    new = _daily(_DAYS).query("ticker == 'AAA'").tail(1)
+    env.execute("INSERT INTO daily_metrics SELECT * FROM new")
+    res = gap_stats_store.refresh_gap_stats(env)
+    assert res == {"action": "appended", "tickers": 1, "rows": 8}
+
+    rows = gap_stats_store.read_gap_days("AAA")
+    last = rows[(rows["gap_date"] == _DAYS[7]) & (rows["day_offset"] == 1)]
+    assert len(last) == 1 and last["path_n"].isna().all()  # sin slab para ese día aún
+    kept = rows[rows["day_offset"] == 0]
+    assert kept["path_n"].map(lambda n: int(np.sum(n))).min() > 0  # caminos reutilizados
+    assert ticker_analysis._gap_stats_from_store("AAA", include_chart=True) is None
+    assert ticker_analysis._gap_stats_from_store("AAA", include_chart=False)[
+        "gap_stats_plus_1"]["gap_days_count"] == 3
+
+
+def test_fallback_with_hot_cache_matches_store(env, monkeypatch):
+    daily = env.execute("SELECT * FROM daily_metrics").fetch_df()
+    hot = daily[daily["pmh_gap_pct"] >= 10.0].reset_index(drop=True)
+    monkeypatch.setattr(cache_service, "get_hot_daily_cache", lambda: hot)
+
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "0")
+    fallback = ticker_analysis.get_gap_stats_all_days("AAA")
+    assert fallback["gap_stats_plus_1"]["gap_days_count"] == 2
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "1")
+    gap_stats_store.refresh_gap_stats(env)
+    _assert_same(ticker_analysis.get_gap_stats_all_days("AAA"), fallback)
+
+    # sin runner days en el hot cache → vacío sin abrir la conexión
+    monkeypatch.setattr(ticker_analysis, "get_db_connection",
+                        lambda: pytest.fail("sin gaps no hace falta daily_metrics"))
+    monkeypatch.setenv("BTT_GAP_STATS_ENABLED", "0")
+    assert ticker_analysis.get_gap_stats_all_days("BBB")["gap_stats"]["gap_days_count"] == 0
@@ -0,0 +1,269 @@
+"""
+Grid pack del optimizador — dataset publicado una vez (mmap) vs ctx pickled.
+
+Cubre: orden de pares y filas idéntico a list(groupby(["date","ticker"])),
+dtypes de la fuente preservados, filtrado por claves (re-evaluación de
+precondiciones), attach del worker vía _init_grid_ctx y equivalencia completa de
+run_backtest alimentado por el pack vs por los grupos legacy. Con el slab stream
+activo, los pares de meses con slab viajan como refs y no se descargan; los
+puntos sin caché de señales las pasan al pipeline slab de run_backtest sin
+reconstruir un day_df por par (solo las filas propias de meses sin slab).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import gcs_cache, grid_pack
+from app.services import optimization_service as opt
+from app.services.backtest_service import run_backtest
+
+STRATEGY = {
+    "bias": "short", "apply_day": "gap_day",
+    "entry_logic": {"timeframe": "1m", "root_condition": {"operator": "AND", "conditions": [
+        {"type": "indicator_comparison", "timeframe": "1m",
+         "source": {"name": "Bar Close"}, "comparator": "LESS_THAN", "target": {"name": "VWAP"}},
+    ]}},
+    "risk_management": {"use_hard_stop": True, "hard_stop": {"type": "Percentage", "value": 15},
+                        "accept_reentries": True, "max_reentries": -1},
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("BTT_GRID_PACK_DIR", str(tmp_path / "packs"))
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_DIR", str(tmp_path / "signals"))
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "0")
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    grid_pack._OPEN_PACKS.clear()
+    yield
+    for pack in grid_pack._OPEN_PACKS.values():
+        pack.close()
+    grid_pack._OPEN_PACKS.clear()
+
+
+def _mk_day(ticker, date, n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(f"{date} 09:00", periods=n, freq="1min")
+    close = 8.0 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = close * np.exp(rng.normal(0, 0.004, n))
+    return pd.DataFrame({
+        "ticker": ticker, "date": date, "timestamp": ts,
+        "open": open_, "high": np.maximum(open_, close) * 1.004,
+        "low": np.minimum(open_, close) * 0.996, "close": close,
+        "volume": rng.integers(100, 50000, n),
+    })
+
+
+def _intraday():
+    parts = []
+    for i, tk in enumerate(["BBB", "AAA", "CCC"]):
+        for j, d in enumerate(["2025-09-02", "2025-09-01"]):
+            parts.append(_mk_day(tk, d, seed=i * 10 + j))
+    df = pd.concat(parts, ignore_index=True)
+    # desorden + duplicados: el pack NO debe tocarlos (lo hace run_backtest)
+    df = pd.concat([df, df.iloc[5:9]], ignore_index=True).sample(frac=1.0, random_state=3)
+    df = gcs_cache._downcast_intraday(df.reset_index(drop=True))
+    df["date"] = df["date"].astype(str)
+    df["ticker"] = df["ticker"].astype(str)
+    return df
+
+
+def _qualifying():
+    return pd.DataFrame([
+        {"ticker": tk, "date": d, "prev_close": 8.0, "gap_pct": 60.0 + k}
+        for k, (tk, d) in enumerate([(t, d) for t in ["AAA", "BBB", "CCC"]
+                                     for d in ["2025-09-01", "2025-09-02"]])
+    ])
+
+
+def test_pack_matches_legacy_groupby():
+    df = _intraday()
+    legacy = list(df.groupby(["date", "ticker"]))
+    pack = grid_pack.open_grid_pack(grid_pack.publish_grid_pack(df, _qualifying()))
+
+    got = list(pack.iter_groups())
+    assert [k for k, _ in got] == [(str(d), str(t)) for (d, t), _ in legacy]
+    for (_, g_df), (_, l_df) in zip(got, legacy):
+        for c in ("open", "high", "low", "close", "volume"):
+            assert g_df[c].dtype == l_df[c].dtype
+            np.testing.assert_array_equal(g_df[c].values, l_df[c].values)
+        np.testing.assert_array_equal(g_df["timestamp"].values, l_df["timestamp"].values)
+    pd.testing.assert_frame_equal(pack.qualifying_df, _qualifying())
+
+
+def test_pack_indices_for_filters_keys_in_order():
+    pack = grid_pack.open_grid_pack(grid_pack.publish_grid_pack(_intraday(), _qualifying()))
+    idx = pack.indices_for({("2025-09-02", "AAA"), ("2025-09-01", "CCC")})
+    assert [pack.keys[i] for i in idx] == [("2025-09-01", "CCC"), ("2025-09-02", "AAA")]
+
+
+def test_release_removes_pack_dir():
+    pack_dir = grid_pack.publish_grid_pack(_intraday(), _qualifying())
+    grid_pack.open_grid_pack(pack_dir)
+    grid_pack.release_grid_pack(pack_dir)
+    import os
+    assert not os.path.exists(pack_dir)
+    assert pack_dir not in grid_pack._OPEN_PACKS
+
+
+def test_init_grid_ctx_attaches_pack():
+    pack_dir = grid_pack.publish_grid_pack(_intraday(), _qualifying())
+    opt._GRID_CTX.clear()
+    opt._init_grid_ctx({"grid_pack_dir": pack_dir, "is_risk_only": True})
+    try:
+        assert isinstance(opt._GRID_CTX["grid_pack"], grid_pack.GridPack)
+        assert len(opt._GRID_CTX["qualifying_df"]) == 6
+    finally:
+        opt._GRID_CTX.clear()
+
+
+def test_run_backtest_pack_equals_legacy_groups():
+    df, qual = _intraday(), _qualifying()
+    legacy = list(df.groupby(["date", "ticker"]))
+    pack = grid_pack.open_grid_pack(grid_pack.publish_grid_pack(df, qual))
+    kw = dict(qualifying_df=qual, strategy_def=STRATEGY, init_cash=10000,
+              risk_r=100, risk_type="PERCENT", _signal_cache={})
+    a = run_backtest(day_group_iter=iter(legacy), n_groups_hint=len(legacy), **kw)
+    kw["_signal_cache"] = {}
+    b = run_backtest(day_group_iter=pack.iter_groups(), n_groups_hint=len(pack), **kw)
+    assert a["trades"], "la estrategia de prueba debe producir trades"
+    assert a["trades"] == b["trades"]
+    assert a["aggregate_metrics"] == b["aggregate_metrics"]
+
+
+# ── pares servidos por ref al slab store (BTT_SLAB_STREAM_ENABLED) ──
+
+def _build_slab_month(df, tmp_path, monkeypatch):
+    from app.db import slab_builder, slab_store
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    slab_store._OPEN_SLABS.clear()
+    slab_builder.build_month_from_df(df, "opt", 2025, 9)
+    return slab_store
+
+
+def test_pack_slab_refs_match_legacy_groups(tmp_path, monkeypatch):
+    df, qual = _intraday(), _qualifying()
+    slab_store = _build_slab_month(df, tmp_path, monkeypatch)
+    refs = slab_store.slab_pair_refs(qual, [(2025, 9)])
+    assert len(refs) == 6
+    pack = grid_pack.open_grid_pack(grid_pack.publish_grid_pack(None, qual, slab_refs=refs))
+    assert pack.n_slab_refs == 6
+
+    legacy = list(df.groupby(["date", "ticker"]))
+    got = list(pack.iter_groups())
+    assert [k for k, _ in got] == [(str(d), str(t)) for (d, t), _ in legacy]
+    for (_, g_df), (_, l_df) in zip(got, legacy):
+        l_df = l_df.sort_values("timestamp", kind="stable").drop_duplicates(subset=["timestamp"])
+        assert g_df["close"].dtype == np.float32
+        np.testing.assert_array_equal(g_df["close"].values, l_df["close"].values)
+        np.testing.assert_array_equal(g_df["timestamp"].values, l_df["timestamp"].values)
+
+    kw = dict(qualifying_df=qual, strategy_def=STRATEGY, init_cash=10000,
+              risk_r=100, risk_type="PERCENT", _signal_cache={})
+    a = run_backtest(day_group_iter=iter(legacy), n_groups_hint=len(legacy), **kw)
+    kw["_signal_cache"] = {}
+    b = run_backtest(day_group_iter=pack.iter_groups(), n_groups_hint=len(pack), **kw)
+    assert a["trades"] == b["trades"]
+    slab_store._OPEN_SLABS.clear()
+
+
+def test_pack_slab_refs_detect_rebuilt_month(tmp_path, monkeypatch):
+    from app.db import slab_builder
+    df, qual = _intraday(), _qualifying()
+    slab_store = _build_slab_month(df, tmp_path, monkeypatch)
+    monkeypatch.setattr(slab_store, "_REFRESH_CHECK_S", 0.0)
+    refs = slab_store.slab_pair_refs(qual, [(2025, 9)])
+    layout = slab_store.get_month("opt", 2025, 9).layout
+    assert set(refs["layout"]) == {layout}
+    pack_dir = grid_pack.publish_grid_pack(None, qual, slab_refs=refs)
+    parent = grid_pack.open_grid_pack(pack_dir)
+    before = [g["close"].to_numpy().copy() for _, g in parent.iter_groups()]
+
+    # rebuild con un ticker que ordena delante: todos los rangos se desplazan
+    slab_builder.build_month_from_df(pd.concat([_mk_day("AA", "2025-09-01", seed=99), df]),
+                                     "opt", 2025, 9)
+    assert slab_store.get_month("opt", 2025, 9).layout != layout
+    slab_store._SUPERSEDED.clear()
+    # el pack abierto fijó el layout de sus refs: sigue sirviendo las mismas barras
+    for (_, g), exp in zip(parent.iter_groups(), before):
+        np.testing.assert_array_equal(g["close"].to_numpy(), exp)
+    parent.close()
+    assert ("opt", 2025, 9, layout) not in slab_store._PINNED
+    # un worker que abre el pack ahora no tiene ese layout: falla, no lee otro par
+    worker = grid_pack.GridPack(pack_dir)
+    with pytest.raises(slab_store.StaleSlabRef):
+        worker.day_df(0)
+    grid_pack.release_grid_pack(pack_dir)
+    with pytest.raises(slab_store.StaleSlabRef):
+        opt._concat_slab_pairs(pd.DataFrame(), refs)
+    slab_store._OPEN_SLABS.clear()
+
+def test_optimization_grid_skips_fetch_for_slab_months(tmp_path, monkeypatch):
+    df, qual = _intraday(), _qualifying()
+    slab_store = _build_slab_month(df, tmp_path, monkeypatch)
+    fetched = []
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month",
+                        lambda y, m, *a, **k: fetched.append((y, m)) or df.copy())
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    pcs = [{"id": "sl", "label": "sl", "path": "risk_management.hard_stop.value", "values": [5, 15]},
+           {"id": "r", "label": "r", "path": "risk_management.max_reentries", "values": [1, -1]}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": "PERCENT"})
+
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    legacy = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert fetched == [(2025, 9)]
+
+    fetched.clear()
+    monkeypatch.setenv("BTT_SLAB_STREAM_ENABLED", "1")
+    slab = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert fetched == []
+    assert slab["details"] == legacy["details"]
+    slab_store._OPEN_SLABS.clear()
+
+
+def test_slab_ref_points_use_slab_pipeline(tmp_path, monkeypatch):
+    aug = pd.concat([_mk_day(tk, "2025-08-29", seed=40 + i) for i, tk in enumerate(["AAA", "BBB"])])
+    aug = gcs_cache._downcast_intraday(aug.reset_index(drop=True))
+    df = pd.concat([aug, _intraday()], ignore_index=True)
+    qual = pd.concat([_qualifying(), pd.DataFrame([
+        {"ticker": tk, "date": "2025-08-29", "prev_close": 8.0, "gap_pct": 70.0} for tk in ["AAA", "BBB"]
+    ])], ignore_index=True)
+    slab_store = _build_slab_month(df[df["date"] >= "2025-09"], tmp_path, monkeypatch)
+    fetched = []
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month", lambda y, m, *a, **k: fetched.append((y, m))
+                        or df[df["date"].str[:7] == f"{y}-{m:02d}"].copy())
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "0")  # puntos sin caché de señales
+    monkeypatch.setenv("BACKTEST_PARALLEL_WORKERS", "1")
+    rebuilt = []
+    orig_day_df = grid_pack.GridPack.day_df
+    monkeypatch.setattr(grid_pack.GridPack, "day_df",
+                        lambda self, i: rebuilt.append(self.keys[i]) or orig_day_df(self, i))
+    strategy = {**STRATEGY, "entry_logic": {"timeframe": "1m", "root_condition": {
+        "operator": "AND", "conditions": [{
+            "type": "indicator_comparison", "timeframe": "1m", "source": {"name": "Bar Close"},
+            "comparator": "LESS_THAN", "target": {"name": "SMA", "period": 10}}]}}}
+    pcs = [{"id": "p", "label": "p", "values": [5, 20],
+            "path": "entry_logic.root_condition.conditions.0.target.period"}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": "PERCENT"})
+
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    legacy = opt.run_optimization_grid(*args, strategy_definition=strategy)
+    fetched.clear()
+    rebuilt.clear()
+    monkeypatch.setenv("BTT_SLAB_STREAM_ENABLED", "1")
+    slab = opt.run_optimization_grid(*args, strategy_definition=strategy)
+    # solo el mes sin slab se descarga (una vez, al publicar el pack) y solo sus
+    # pares se reconstruyen como DataFrame, una vez por punto
+    assert fetched == [(2025, 8)]
+    assert sorted(rebuilt) == sorted([("2025-08-29", "AAA"), ("2025-08-29", "BBB")] * 2)
+    assert any(d["total_trades"] for d in legacy["details"])
+    assert slab["details"] == legacy["details"]
+    slab_store._OPEN_SLABS.clear()
+
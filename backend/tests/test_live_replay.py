@@ -0,0 +1,63 @@
+"""
+Replay offline del live screener (app.services.live_replay).
+
+Cubre: la grabación JSONL(.gz) ida y vuelta conserva offsets y frames; y el
+ReplayServer alimenta al consumidor REAL (`_consume_massive_ws`, handshake
+Massive incluido) con un stream sintético a velocidad máxima, dejando el mismo
+estado que aplicar los frames directamente — y grabándolo con
+LIVE_SCREENER_RECORD.
+"""
+import asyncio
+
+import pytest
+
+from app.services import live_replay
+from app.services import live_screener_service as lss
+
+pytest.importorskip("websockets")
+
+
+def _svc(symbols):
+    svc = lss.LiveScreenerService()
+    svc._session = "rth"
+    for sym in symbols:
+        svc._states[sym] = lss.TickerLiveState(ticker=sym, prev_close=10.0)
+    svc._allowlist = set(symbols)
+    return svc
+
+
+def test_recording_roundtrip(tmp_path):
+    frames = list(live_replay.synthetic_frames(n_symbols=20, seconds=3, events_per_s=50, batch=20))
+    path = str(tmp_path / "open.jsonl.gz")
+    assert live_replay.write_recording(path, frames) == len(frames) == 9
+    assert list(live_replay.read_recording(path)) == [(round(t, 4), raw) for t, raw in frames]
+
+
+def test_replay_server_drives_real_consumer(tmp_path, monkeypatch):
+    frames = list(live_replay.synthetic_frames(n_symbols=50, seconds=4, events_per_s=200, batch=100))
+    symbols = live_replay.synthetic_symbols(50)
+    ref = _svc(symbols)
+    for _, raw in frames:
+        ref._handle_ws_message(raw)
+
+    svc = _svc(symbols)
+    record = str(tmp_path / "rec.jsonl")
+    monkeypatch.setenv("LIVE_SCREENER_RECORD", record)
+
+    async def run():
+        async with live_replay.ReplayServer(frames, speedup=0) as server:
+            monkeypatch.setattr(lss, "WS_URL", server.url)
+            monkeypatch.setattr(lss, "API_KEY", "replay")
+            task = asyncio.create_task(svc._consume_massive_ws())
+            await asyncio.wait_for(server.done.wait(), 10)
+            await asyncio.sleep(0.2)
+            assert svc.ws_connected
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert sum(1 for _ in live_replay.read_recording(record)) == 2 + len(frames)  # 2 status (auth/subscribe) + datos
+    for tab in lss.VALID_TABS:
+        assert svc.get_top(tab) == ref.get_top(tab)
+    assert svc._states["S00001"].day_volume == ref._states["S00001"].day_volume > 0
+
@@ -0,0 +1,108 @@
+"""
+Unit tests for the live screener delta feed (pure, no network).
+
+Validates that snapshot + deltas rebuild exactly the board a full resend would
+carry, that each tick serializes once per tab (same frame object for every
+subscriber), that an unchanged board sends nothing, and that a slow client
+drops its intermediate deltas and resyncs from a snapshot.
+"""
+import asyncio
+import json
+import random
+
+from app.services.live_screener_feed import LiveScreenerFeed, apply_delta, diff_rows
+from app.services.live_screener_service import TAB_GAINERS, TAB_LOSERS
+
+
+def _board(rng, n=20):
+    tickers = rng.sample([f"T{i:02d}" for i in range(40)], n)
+    rows = [{"ticker": tk, "price": round(rng.uniform(1, 20), 2), "change_pct": round(rng.uniform(0, 80), 2)}
+            for tk in tickers]
+    return sorted(rows, key=lambda r: -r["change_pct"])
+
+
+class _Source:
+    def __init__(self):
+        self.boards = {TAB_GAINERS: [], TAB_LOSERS: []}
+        self.calls = 0
+
+    def top(self, tab):
+        self.calls += 1
+        return self.boards[tab]
+
+
+def _feed(src):
+    return LiveScreenerFeed(top=src.top, meta=lambda: {"session": "rth", "ws_connected": True})
+
+
+async def _drain(sub):
+    frames = []
+    while sub._pending or sub._resync:
+        frames.append(json.loads(await sub.next_frame()))
+    return frames
+
+
+def test_diff_roundtrip_and_unchanged_board():
+    rng = random.Random(3)
+    prev = _board(rng)
+    for _ in range(50):
+        kept = prev[:5]                          # some rows keep identical values
+        new = kept + [r for r in _board(rng) if r["ticker"] not in {k["ticker"] for k in kept}]
+        assert apply_delta(prev, diff_rows(prev, new)) == new
+        prev = new
+    assert diff_rows(prev, list(prev)) == {}
+
+
+def test_deltas_rebuild_the_board_and_are_shared():
+    async def run():
+        rng = random.Random(5)
+        src = _Source()
+        src.boards[TAB_GAINERS] = _board(rng)
+        feed = _feed(src)
+        a, b = feed.subscribe(TAB_GAINERS), feed.subscribe(TAB_GAINERS)
+        (snap,) = await _drain(a)
+        await _drain(b)
+        assert snap["type"] == "snapshot" and snap["records"] == src.boards[TAB_GAINERS]
+
+        board, version = snap["records"], snap["version"]
+        for _ in range(10):
+            src.boards[TAB_GAINERS] = _board(rng)
+            feed.tick()
+            assert a._pending[0] is b._pending[0]    # serialized once per tab
+            (delta,) = await _drain(a)
+            await _drain(b)
+            assert delta["type"] == "delta" and delta["base"] == version
+            board, version = apply_delta(board, delta), delta["version"]
+            assert board == src.boards[TAB_GAINERS]
+
+        feed.tick()                                  # nothing changed → nothing sent
+        assert not a._pending
+        assert src.calls == 12                       # idle Losers tab is never computed
+
+    asyncio.run(run())
+
+
+def test_slow_client_drops_deltas_and_resyncs():
+    async def run():
+        rng = random.Random(9)
+        src = _Source()
+        feed = _feed(src)
+        slow = feed.subscribe(TAB_GAINERS, max_pending=3)
+        await _drain(slow)
+        for _ in range(6):
+            src.boards[TAB_GAINERS] = _board(rng)
+            feed.tick()
+        frames = await _drain(slow)
+        assert slow.dropped == 1
+        assert frames[0]["type"] == "snapshot" and frames[0]["records"] == src.boards[TAB_GAINERS]
+        # Deltas queued after the resync chain onto the snapshot's version.
+        assert [f["base"] for f in frames[1:]] == [frames[0]["version"] + i for i in range(len(frames) - 1)]
+
+        src.boards[TAB_LOSERS] = [{"ticker": "DN", "change_pct": -30.0}]
+        feed.switch(slow, TAB_LOSERS)
+        (snap,) = await _drain(slow)
+        assert snap["tab"] == TAB_LOSERS and snap["records"] == src.boards[TAB_LOSERS]
+        feed.unsubscribe(slow)
+        assert await slow.next_frame() is None
+
+    asyncio.run(run())
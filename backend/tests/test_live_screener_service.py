@@ -318,3 +318,109 @@ class TestOutlierGate:
         ])
         tickers = [r["ticker"] for r in svc.get_top(TAB_GAINERS)]
         assert "REAL" in tickers and "CORRUPT" not in tickers
+
+
+class TestIncrementalRanking:
+    @staticmethod
+    def _full_scan(svc, tab):
+        """Reference: scan + sort of the whole universe (pre-ranking get_top)."""
+        metric = {TAB_GAINERS: "change_pct", TAB_LOSERS: "change_pct",
+                  TAB_PRE: "pre_pct", TAB_AFT: "after_pct"}[tab]
+        rows = []
+        for st in svc._states.values():
+            m = svc._metrics(st)
+            if m is None or any(v is not None and abs(v) > 500.0
+                                for v in (m["change_pct"], m["pre_pct"], m["after_pct"])):
+                continue
+            v = m[metric]
+            if v is None or (tab == TAB_GAINERS and v <= 0) or (tab == TAB_LOSERS and v >= 0):
+                continue
+            rows.append(m)
+        rows.sort(key=lambda r: (r[metric] if tab == TAB_LOSERS else -r[metric], r["ticker"]))
+        return [r["ticker"] for r in rows[:50]]
+
+    def test_rankings_track_aggregates_like_a_full_scan(self):
+        import random
+
+        rng = random.Random(7)
+        states = [_state(f"T{i:03d}", 10.0, 10.0, rth_close=10.0 if i % 3 else None,
+                         pre_high=10.0 + i / 50 if i % 4 else None) for i in range(300)]
+        states.append(_state("NOPX", 10.0, None))
+        svc = _svc_with(states)
+        tabs = (TAB_GAINERS, TAB_LOSERS, TAB_PRE, TAB_AFT)
+        for step in range(2000):
+            price = rng.choice([rng.uniform(5.0, 15.0), 200.0])  # 200 → +1900%, outlier gate drops it
+            svc._apply_aggregate({"ev": "A", "sym": f"T{rng.randrange(300):03d}", "c": price})
+            if step % 250 == 0:
+                svc._top_cache.clear()
+                for tab in tabs:
+                    assert [r["ticker"] for r in svc.get_top(tab)] == self._full_scan(svc, tab)
+
+        del svc._states["T000"]            # allow-list prune
+        svc._capture_rth_close()
+        svc._top_cache.clear()
+        for tab in tabs:
+            assert [r["ticker"] for r in svc.get_top(tab)] == self._full_scan(svc, tab)
+        assert "T000" not in {tk for tab in tabs for tk in svc._rankings[tab].head(400)}
+        # Everything is flat vs. the freshly captured close (no threshold: still listed).
+        assert {r["after_pct"] for r in svc.get_top(TAB_AFT)} == {0.0}
+
+
+class TestArrayState:
+    @staticmethod
+    def _events(rng, syms, n, base_ts):
+        evs = []
+        for _ in range(n):
+            ev = {"ev": "A", "sym": rng.choice(syms)}
+            for k in ("c", "vw", "o", "h", "l", "v", "av"):
+                if rng.random() < 0.7:
+                    ev[k] = round(rng.uniform(5.0, 15.0), 2) if k not in ("v", "av") else rng.randrange(1, 5000)
+            if rng.random() < 0.9:
+                ev["s"] = base_ts + rng.randrange(0, 3) * 3_600_000 + rng.randrange(0, 60_000)
+            evs.append(ev)
+        return evs
+
+    def test_batched_frame_matches_event_by_event(self):
+        import json
+        import random
+
+        from app.services.live_state_arrays import FIELDS
+
+        rng = random.Random(11)
+        syms = ["AAA", "BBB", "CCC", "DDD"]
+        pre_ts = int(datetime(2024, 1, 8, 8, 0, tzinfo=ET).timestamp() * 1000)  # pre → rth → rth
+        seq = _svc_with([_state(tk, 10.0, None) for tk in syms])
+        batch = _svc_with([_state(tk, 10.0, None) for tk in syms])
+        for tk in ("CCC", "DDD"):
+            seq._allowlist.discard(tk)
+            batch._allowlist.discard(tk)
+        for frame in range(20):
+            evs = self._events(rng, syms + ["ZZZ"], 40, pre_ts)
+            for ev in evs:
+                seq._apply_aggregate(ev)
+            batch._handle_ws_message(json.dumps(evs + [{"ev": "status"}]))
+        for tk in syms:
+            a, b = seq._states[tk], batch._states[tk]
+            for f in FIELDS:
+                if f != "updated_at":
+                    assert getattr(a, f) == pytest.approx(getattr(b, f), nan_ok=True), (tk, f)
+        assert batch._states["AAA"].day_open is not None and batch._states["CCC"].last_price is None
+        for tab in (TAB_GAINERS, TAB_LOSERS, TAB_PRE, TAB_AFT):
+            assert batch.get_top(tab) == seq.get_top(tab)
+            assert batch.get_top(tab) == [batch._metrics(batch._states[r["ticker"]]) for r in batch.get_top(tab)]
+
+    def test_slots_grow_and_recycle(self):
+        from app.services.live_state_arrays import LiveStateArrays
+
+        svc = _svc_with([])
+        svc._arrays = arrays = LiveStateArrays(capacity=4)
+        svc._states._arrays = arrays
+        for i in range(10):
+            svc._states[f"T{i}"] = _state(f"T{i}", 10.0, 10.0 + i)
+        assert arrays.capacity == 16 and len(svc._states) == 10
+        assert [r["ticker"] for r in svc.get_top(TAB_GAINERS)][:3] == ["T9", "T8", "T7"]
+        del svc._states["T9"]
+        svc._states["NEW"] = _state("NEW", 10.0, 9.0)
+        assert arrays.slot["NEW"] == 9 and svc._states["NEW"].day_high is None
+        svc._top_cache.clear()
+        assert [r["ticker"] for r in svc.get_top(TAB_LOSERS)] == ["NEW"]
@@ -0,0 +1,139 @@
+"""
+Market Analysis columnar — paridad con el camino por records (SIN BD).
+
+Cubre: analyze_period sobre un frame sintético con NaN, tickers inválidos,
+splits same-day / reverse (borde de 5 días), black swan y derivado parcial da el
+mismo payload y contadores de calidad que merge_derived + apply_quality_filters
++ compute_market_analysis; get_market_analysis con MA_COLUMNAR=1 y =0 devuelve
+lo mismo, y el índice del derivado se construye una vez por objeto de cache.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import cache_service
+from app.services import market_analysis_columnar as col
+from app.services import market_analysis_service as ma
+
+
+def _hot_df(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2026-05-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    rth_open = rng.uniform(1, 20, n)
+    df = pd.DataFrame({
+        "ticker": rng.choice(["AAA", "bbb", "CCC", "DDD", "XXX"], n),
+        "timestamp": days,
+        "gap_pct": rng.uniform(10, 500, n),
+        "pmh_gap_pct": rng.uniform(-20, 450, n),
+        "pm_high": np.where(rng.random(n) < 0.2, 0.0, rng.uniform(1, 25, n)),
+        "rth_open": np.where(rng.random(n) < 0.1, 0.0, rth_open),
+        "rth_close": rth_open * rng.uniform(0.6, 1.4, n),
+        "rth_high": rth_open * 1.2, "rth_volume": rng.uniform(1e5, 1e7, n),
+        "pm_volume": rng.uniform(1e4, 1e6, n), "volume": rng.uniform(1e5, 1e7, n),
+        "close_1559": rth_open * rng.uniform(0.5, 1.5, n),
+        "day_return_pct": rng.normal(0, 20, n),
+        "m30_return_pct": rng.normal(0, 10, n),
+        "m60_return_pct": np.where(rng.random(n) < 0.3, np.nan, rng.normal(0, 10, n)),
+    })
+    df.loc[3, "gap_pct"] = np.nan
+    df.loc[5, "close_1559"] = np.inf
+    return df
+
+
+def _refs(df):
+    splits = pd.DataFrame([
+        {"ticker": "AAA", "execution_date": df.loc[0, "timestamp"].date(), "split_from": 1, "split_to": 2},
+        {"ticker": "CCC", "execution_date": (df.loc[1, "timestamp"] - pd.Timedelta(days=4)).date(),
+         "split_from": 10, "split_to": 1},
+        {"ticker": "DDD", "execution_date": (df.loc[2, "timestamp"] - pd.Timedelta(days=5)).date(),
+         "split_from": 10, "split_to": 1},
+        {"ticker": "AAA", "execution_date": "2026-05-20", "split_from": None, "split_to": None},
+    ])
+    tickers = pd.DataFrame({"ticker": ["AAA", "BBB", "CCC", "DDD"]})
+    sub = df.iloc[::3]
+    derived = pd.DataFrame({
+        "ticker": sub["ticker"].str.upper(), "date": sub["timestamp"].dt.strftime("%Y-%m-%d"),
+        "m0_return_pct": np.linspace(-5, 5, len(sub)),
+        "m90_return_pct": np.linspace(-10, 2, len(sub)),
+        "max_spike_5m_pct": np.linspace(0, 400, len(sub)),
+    })
+    return splits, tickers, derived
+
+
+def _legacy(frame, splits, tickers, derived, thr, full=True):
+    records = frame.to_dict("records")
+    dmap = {(t, d): {"m0_return_pct": a, "m90_return_pct": b, "max_spike_5m_pct": c}
+            for t, d, a, b, c in zip(derived["ticker"], derived["date"], derived["m0_return_pct"],
+                                     derived["m90_return_pct"], derived["max_spike_5m_pct"])}
+    ma.merge_derived(records, dmap)
+    records, quality = ma.apply_quality_filters(
+        records, splits=splits.to_dict("records"),
+        valid_tickers=set(tickers["ticker"]), black_swan_available=True)
+    if not full:
+        return {"kpis": ma.compute_kpis(records, fade_threshold=thr)}, quality
+    return ma.compute_market_analysis(records, fade_threshold=thr), quality
+
+
+def _assert_close(a, b):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for k in a:
+            _assert_close(a[k], b[k])
+    elif isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _assert_close(x, y)
+    elif isinstance(a, float) and isinstance(b, float):
+        assert a == pytest.approx(b, abs=1e-4)
+    else:
+        assert a == b
+
+
+@pytest.mark.parametrize("thr", [50.0, 120.0])
+def test_analyze_period_matches_record_pipeline(thr):
+    df = _hot_df()
+    splits, tickers, derived = _refs(df)
+    frame = ma._hot_frame(df, {"min_gap": 10, "start_date": "2026-05-01", "end_date": "2026-06-20"}, 5000)
+    got, q_got = col.analyze_period(frame, fade_threshold=thr, splits_df=splits,
+                                    tickers_df=tickers, derived_df=derived)
+    ref, q_ref = _legacy(frame, splits, tickers, derived, thr)
+    assert q_got == q_ref
+    assert all(q_ref[k] for k in ("excluded_ticker_type", "excluded_gap_gt_400",
+                                  "excluded_pmh_gap_gt_400", "excluded_same_day_split",
+                                  "excluded_reverse_split", "excluded_black_swan"))
+    _assert_close(got, ref)
+
+
+def test_empty_and_no_derived_are_wellformed():
+    empty = _hot_df().iloc[:0]
+    got, quality = col.analyze_period(empty, fade_threshold=50.0)
+    ref = ma.compute_market_analysis([], fade_threshold=50.0)
+    _assert_close(got, ref)
+    assert quality["excluded_black_swan"] is None
+
+    frame = _hot_df().head(20)
+    got, _ = col.analyze_period(frame, fade_threshold=50.0)
+    assert [w.get("pending_backfill") for w in got["fade_windows"]["rth"]] == [True, None, None, True]
+
+
+def test_get_market_analysis_columnar_equals_records(monkeypatch):
+    df = _hot_df()
+    splits, tickers, derived = _refs(df)
+    monkeypatch.setattr(cache_service, "get_hot_daily_df", lambda: df)
+    monkeypatch.setattr(cache_service, "get_effective_splits_df", lambda: splits)
+    monkeypatch.setattr(cache_service, "get_tickers_df", lambda: tickers)
+    monkeypatch.setattr(cache_service, "get_ma_derived_df", lambda: derived)
+    filters = {"min_gap": 20, "period": "1m"}
+
+    monkeypatch.setenv("MA_COLUMNAR", "0")
+    legacy = ma.get_market_analysis(dict(filters))
+    monkeypatch.setenv("MA_COLUMNAR", "1")
+    calls = []
+    orig = col._build_derived_index
+    monkeypatch.setattr(col, "_build_derived_index", lambda d: calls.append(1) or orig(d))
+    col._INDEX_CACHE.clear()
+    fast = ma.get_market_analysis(dict(filters))
+    ma.get_market_analysis(dict(filters))
+    assert fast["kpis"]["gappers_count"]["value"] > 0
+    _assert_close(fast, legacy)
+    assert calls == [1]
@@ -0,0 +1,129 @@
+"""
+Curvas "% change desde el open RTH" precalculadas (app.db.open_curves).
+
+Cubre: paridad de get_aggregate_time_series con el cálculo por par legacy
+(pandas, primera vela RTH como referencia, media por minuto) sobre un slab con
+delta, velas pre/post-market y huecos; todos los pares cuentan (sin el tope de
+10); la matriz se persiste junto al slab y se recalcula al cambiar el manifest;
+y el fallback sin slab (una query por bloque de pares del mes) da la misma curva.
+"""
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import gcs_cache, open_curves, slab_builder, slab_store
+from app.services import processor_service
+
+
+@pytest.fixture(autouse=True)
+def _isolated_dirs(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(gcs_cache, "LOCAL_CACHE_DIR", str(cache_dir))
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    monkeypatch.setattr(slab_store, "_REFRESH_CHECK_S", 0.0)
+    slab_store._OPEN_SLABS.clear()
+    open_curves._CURVES.clear()
+    yield
+    slab_store._OPEN_SLABS.clear()
+    open_curves._CURVES.clear()
+
+
+def _mk_day(ticker, date, seed, start="08:00", n=540, drop=()):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(f"{date} {start}", periods=n, freq="1min")
+    close = 10 + rng.normal(0, 0.1, n).cumsum()
+    df = pd.DataFrame({
+        "ticker": ticker, "date": date, "timestamp": ts,
+        "open": close * 1.001, "high": close * 1.004, "low": close * 0.996,
+        "close": close, "volume": rng.integers(100, 9999, n),
+    })
+    return df.drop(index=list(drop)).reset_index(drop=True)
+
+
+def _source():
+    return [
+        _mk_day("AAA", "2025-09-02", 1),
+        _mk_day("BBB", "2025-09-02", 2, drop=range(90, 95)),  # sin 09:30–09:34
+        _mk_day("CCC", "2025-09-03", 3, start="10:15", n=100),
+    ] + [_mk_day(f"T{i:02d}", "2025-09-04", 10 + i) for i in range(12)]
+
+
+def _legacy(frames):
+    """Cálculo por par de la versión anterior de get_aggregate_time_series."""
+    series = []
+    for df in frames:
+        df = df.assign(open=df["open"].astype(np.float32), close=df["close"].astype(np.float32))
+        df = df.sort_values("timestamp")
+        rth = df[(df["timestamp"].dt.time >= pd.Timestamp("09:30").time())
+                 & (df["timestamp"].dt.time < pd.Timestamp("16:00").time())].copy()
+        open_price = float(rth.iloc[0]["open"])
+        rth["pct_change"] = ((rth["close"].astype(np.float64) - open_price) / open_price) * 100
+        rth["time_str"] = rth["timestamp"].dt.strftime("%H:%M")
+        series.append(rth[["time_str", "pct_change"]])
+    agg = pd.concat(series).groupby("time_str")["pct_change"].mean().reset_index()
+    return agg.rename(columns={"time_str": "time", "pct_change": "value"}).to_dict(orient="records")
+
+
+def _pairs(frames):
+    return [{"ticker": f["ticker"].iloc[0], "date": f["date"].iloc[0]} for f in frames]
+
+
+def _assert_points(got, ref):
+    assert [p["time"] for p in got] == [p["time"] for p in ref]
+    np.testing.assert_allclose([p["value"] for p in got], [p["value"] for p in ref], atol=1e-4)
+
+
+def test_slab_curves_match_legacy_for_all_pairs():
+    frames = _source()
+    slab_builder.build_month_from_df(pd.concat(frames[:3]), "opt", 2025, 9)
+    assert slab_builder.append_delta_from_df(pd.concat(frames[3:]), "opt", 2025, 9) is not None
+
+    got = processor_service.get_aggregate_time_series(_pairs(frames))
+    _assert_points(got, _legacy(frames))
+    assert got[0]["time"] == "09:30" and got[-1]["time"] == "15:59"
+    assert {"median", "p25", "p75"} <= got[0].keys()
+
+    stats = open_curves.curve_stats(open_curves.dataset_curves(
+        [(p["ticker"], p["date"]) for p in _pairs(frames)]))
+    assert stats["count"][0] == 13  # 15 pares; BBB sin 09:30, CCC empieza a las 10:15
+    assert stats["count"][45] == 15
+
+
+def test_matrix_persisted_and_invalidated_by_manifest(monkeypatch):
+    frames = _source()
+    slab_builder.build_month_from_df(pd.concat(frames[:3]), "opt", 2025, 9)
+    slab = slab_store.get_month("opt", 2025, 9)
+    calls = []
+    orig = open_curves._compute_month
+    monkeypatch.setattr(open_curves, "_compute_month", lambda s: calls.append(1) or orig(s))
+
+    assert open_curves.build_month_curves("opt", 2025, 9) == 3
+    open_curves._CURVES.clear()
+    matrix, rows = open_curves.month_curves(slab)  # desde disco (mmap), sin recalcular
+    assert calls == [1] and isinstance(matrix, np.memmap) and len(rows) == 3
+
+    slab_builder.append_delta_from_df(frames[3], "opt", 2025, 9)
+    assert open_curves.build_month_curves("opt", 2025, 9) == 4
+    assert calls == [1, 1]
+
+
+@pytest.mark.parametrize("query_pairs", [1000, 3])
+def test_fallback_without_slab_matches_legacy(monkeypatch, query_pairs):
+    monkeypatch.setattr(open_curves, "_QUERY_PAIRS", query_pairs)
+    queries = []
+    orig = open_curves._query_month_curves
+    monkeypatch.setattr(open_curves, "_query_month_curves",
+                        lambda con, pairs: queries.append(len(pairs)) or orig(con, pairs))
+    frames = _source()[:4]
+    con = duckdb.connect()
+    src = pd.concat(frames)[["ticker", "timestamp", "open", "close"]]
+    src = src.assign(open=src["open"].astype(np.float32), close=src["close"].astype(np.float32))
+    con.execute("CREATE TABLE intraday_1m AS SELECT * FROM src")
+    matrix = open_curves.dataset_curves([(p["ticker"], p["date"]) for p in _pairs(frames)], con=con)
+    assert matrix.shape == (4, open_curves.RTH_MINUTES)
+    assert queries == ([4] if query_pairs >= 4 else [3, 1])
+    got = open_curves.curve_points(open_curves.curve_stats(matrix))
+    _assert_points(got, _legacy(frames))
+    con.close()
@@ -0,0 +1,98 @@
+"""
+Mitad B en paralelo (BACKTEST_PARALLEL_SIM) — simulate por par en un pool fork +
+reconciliación del compounding.
+
+Exigencia tol-0: trades, curvas de equity y stats por día IDÉNTICOS al loop
+serial para FIXED / FIXED_RATIO (sonda + cash especulado) y PERCENT (olas por
+día), incluido el caso en que el tope por cash disponible invalida la
+especulación y la reconciliación termina en serie.
+"""
+import numpy as np
+import pytest
+
+from app.services import backtest_signals as bsig
+from tests.test_sim_jit_equivalence import _mk_pair
+
+pytestmark = pytest.mark.skipif(not bsig.fork_available(), reason="requiere fork")
+
+
+def _signals(n_days=6, per_day=4, seed=11):
+    rng = np.random.default_rng(seed)
+    out = []
+    for d in range(n_days):
+        for k in range(per_day if d % 3 else 1):
+            p = _mk_pair(rng, 240)
+            p["entries"] = rng.random(240) < 0.04
+            out.append({
+                "date": f"2025-09-{d + 1:02d}", "ticker": f"T{k}",
+                "arrays": {"open": p["open_"], "high": p["high"], "low": p["low"],
+                           "close": p["close"], "timestamp": p["timestamps"].astype("datetime64[ns]"),
+                           "hod": p["hods"], "lod": p["lods"]},
+                "entries_arr": p["entries"], "exits_arr": p["exits"],
+                "timestamps_arr": p["timestamps"],
+                "sig_direction": "shortonly" if k % 2 else "longonly",
+                "sig_accept_reentries": True, "sig_max_reentries": 2,
+                "sig_sl_stop": 0.03, "sig_sl_trail": False, "sig_tp_stop": 0.04,
+                "sig_tp_time_limit": None, "sig_trail_pct": None, "sig_partial_tps": None,
+                "gap_pct": 50.0 + k,
+            })
+    return out
+
+
+def _params(risk_type, init_cash=10000.0, risk_r=100.0, size_by_sl=False):
+    return {
+        "init_cash": init_cash, "risk_r": risk_r, "risk_type": risk_type,
+        "fixed_ratio_delta": 500.0, "size_by_sl": size_by_sl,
+        "fees": 1.0, "fee_type": "FLAT", "slippage": 0.0005,
+        "locates_cost": 0.5, "locate_type": "FLAT", "look_ahead_prevention": True,
+        "strategy_def": {"risk_management": {"use_hard_stop": False}},
+        "elapsed_limit": -1.0, "elapsed_operator": "GREATER_THAN_OR_EQUAL",
+    }
+
+
+def _run(monkeypatch, signals, params, parallel):
+    monkeypatch.setenv("BACKTEST_PARALLEL_SIM", "1" if parallel else "0")
+    monkeypatch.setenv("BACKTEST_PARALLEL_WORKERS", "3")
+    return bsig.simulate_and_accumulate(signals, params)
+
+
+def _assert_same(a, b):
+    assert a[0], "el escenario debe producir trades"
+    assert a[0] == b[0]
+    assert a[1] == b[1]
+    assert a[2] == b[2]
+
+
+@pytest.mark.parametrize("risk_type", ["FIXED", "FIXED_RATIO", "PERCENT"])
+def test_parallel_sim_equals_serial(monkeypatch, risk_type):
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "1")
+    signals = _signals()
+    params = _params(risk_type, risk_r=2.0 if risk_type == "PERCENT" else 100.0)
+    serial = _run(monkeypatch, signals, params, parallel=False)
+    parallel = _run(monkeypatch, signals, params, parallel=True)
+    _assert_same(serial, parallel)
+
+
+def test_cash_cap_breaks_speculation_and_reconciles(monkeypatch):
+    """FIXED con size_by_sl y poco cash: el tope por cash muerde, el PnL depende
+    del cash y la especulación falla → la reconciliación recalcula en serie."""
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "1")
+    signals = _signals(seed=3)
+    params = _params("FIXED", init_cash=400.0, risk_r=100.0, size_by_sl=True)
+    serial = _run(monkeypatch, signals, params, parallel=False)
+
+    fallbacks = []
+    orig = bsig._simulate_serial
+    monkeypatch.setattr(bsig, "_simulate_serial",
+                        lambda *a, **k: fallbacks.append(k.get("start_day")) or orig(*a, **k))
+    parallel = _run(monkeypatch, signals, params, parallel=True)
+    assert fallbacks and fallbacks[0] > 0
+    _assert_same(serial, parallel)
+
+
+def test_parallel_sim_python_engine(monkeypatch):
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "0")
+    signals = _signals(n_days=3)
+    params = _params("PERCENT", risk_r=1.0)
+    _assert_same(_run(monkeypatch, signals, params, parallel=False),
+                 _run(monkeypatch, signals, params, parallel=True))
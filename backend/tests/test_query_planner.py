@@ -0,0 +1,128 @@
+"""
+Planner de daily_metrics — fechas tipadas + meses explícitos.
+
+Cubre: ventanas inclusivas/exclusivas y los meses que tocan, el predicado de
+particiones year/month, el FROM explícito en GCS, build_screener_query con
+trade_date (placeholders == params), reglas con operador o métrica inválidos
+rechazadas (400 al guardar el dataset) y /api/data/filter sobre una tabla DuckDB
+local con el mismo resultado que el filtro legacy por string.
+"""
+from datetime import date, datetime, timedelta
+
+import duckdb
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import data as data_router
+from app.services import query_planner as qp
+from app.services.query_service import build_screener_query
+
+
+def test_week_window_touches_only_its_months():
+    plan = qp.DatePlan.inclusive("2025-09-28", "2025-10-04")
+    assert plan.start == date(2025, 9, 28) and plan.stop == date(2025, 10, 5)
+    assert plan.months == [(2025, 9), (2025, 10)]
+    clauses, params = plan.predicates("timestamp")
+    assert clauses == ["timestamp >= CAST(? AS TIMESTAMP)", "timestamp < CAST(? AS TIMESTAMP)"]
+    assert params == ["2025-09-28", "2025-10-05"]
+    assert qp.partition_predicate(plan) == "(year = 2025 AND month IN (9, 10))"
+
+    cross = qp.DatePlan.exclusive("2024-12-30", "2025-01-02")
+    assert cross.months == [(2024, 12), (2025, 1)]
+    assert qp.partition_predicate(cross) == \
+        "((year = 2024 AND month IN (12)) OR (year = 2025 AND month IN (1)))"
+    assert qp.partition_predicate(qp.DatePlan.inclusive("2025-01-01", "2025-12-31")) == "year = 2025"
+    assert qp.partition_predicate(qp.DatePlan.inclusive("2025-03-01", None)) == "year >= 2025"
+    assert qp.partition_predicate(qp.DatePlan.inclusive("2025-03-02", "2025-03-01")) == "FALSE"
+    assert qp.partition_predicate(qp.DatePlan()) is None
+    with pytest.raises(ValueError):
+        qp.DatePlan.inclusive("2025-13-01", None)
+
+
+def test_gcs_source_reads_explicit_month_paths(monkeypatch):
+    from app.db import gcs_cache
+    seen = {}
+
+    def _paths(conn, years, filters):
+        seen.update(years=years, filters=filters)
+        return [f"gs://b/daily_metrics/year=2025/month={m:02d}/*.parquet" for m in (9, 10)]
+
+    monkeypatch.setattr(gcs_cache, "_daily_metrics_read_paths", _paths)
+    plan = qp.DatePlan.inclusive("2025-09-28", "2025-10-04")
+    src = qp.daily_metrics_source(None, plan, provider="gcs")
+    assert "month=09" in src and "month=10" in src and src.endswith("AS daily_metrics")
+    assert seen == {"years": {2025}, "filters": {"date_from": "2025-09-28", "date_to": "2025-10-04"}}
+    assert qp.daily_metrics_source(None, plan, provider="local") == "daily_metrics"
+    assert qp.daily_metrics_source(None, qp.DatePlan(), provider="gcs") == "daily_metrics"
+
+
+def test_screener_query_trade_date_binds_every_placeholder(monkeypatch):
+    monkeypatch.setenv("DB_PROVIDER", "gcs")
+    q, params, *_ = build_screener_query({
+        "trade_date": "2025-09-03", "min_gap": 20,
+        "rules": [{"metric": "Open Gap %", "operator": "GREATER_THAN", "value": "50"},
+                  {"metric": "rth_close", "operator": "<=", "value": "abc"}],
+    })
+    assert q.count("?") == len(params)
+    assert params[:2] == ["2025-09-03", "2025-09-04"]
+    assert "year = 2025 AND month IN (9)" in q
+    assert "gap_pct > ?" in q and 50.0 in params and "abc" in params
+
+
+@pytest.mark.parametrize("rule", [{"metric": "rth_close", "operator": "BOGUS", "value": 1},
+                                  {"metric": "x; DROP TABLE t", "operator": ">", "value": 1}])
+def test_screener_rejects_rules_it_cannot_apply(rule, monkeypatch):
+    with pytest.raises(ValueError):
+        build_screener_query({"trade_date": "2025-09-03", "rules": [rule]})
+
+    from app.routers import query as query_router
+    monkeypatch.setattr(query_router, "get_user_db_connection",
+                        lambda: pytest.fail("dataset persistido con una regla inválida"))
+    app = FastAPI()
+    app.include_router(query_router.router, prefix="/api/queries")
+    app.dependency_overrides[query_router.get_current_user_id] = lambda: "u1"
+    r = TestClient(app).post("/api/queries/", json={"name": "n", "filters": {"rules": [rule]}})
+    assert r.status_code == 400
+
+
+def _legacy_filter(con, date_from, date_to):
+    return con.execute(
+        "SELECT ticker, CAST(timestamp AS VARCHAR)[:10] AS date FROM daily_metrics "
+        "WHERE CAST(timestamp AS VARCHAR)[:10] >= ? AND CAST(timestamp AS VARCHAR)[:10] <= ? "
+        "ORDER BY date DESC, ticker", [date_from, date_to]).fetchall()
+
+
+def test_filter_endpoint_matches_legacy_string_predicates(tmp_path, monkeypatch):
+    db = str(tmp_path / "dm.duckdb")
+    con = duckdb.connect(db)
+    con.execute("CREATE TABLE daily_metrics (ticker VARCHAR, timestamp TIMESTAMP, year INTEGER, "
+                "month INTEGER, gap_at_open_pct DOUBLE, rth_volume DOUBLE)")
+    start = datetime(2025, 9, 20, 4, 0)
+    rows = [(tk, start + timedelta(days=d, hours=h), 0, 0, 10.0 + d, 1000.0 * (k + 1))
+            for d in range(20) for k, (tk, h) in enumerate([("AAA", 0), ("BBB", 19)])]
+    con.executemany("INSERT INTO daily_metrics VALUES (?, ?, ?, ?, ?, ?)", rows)
+    con.execute("UPDATE daily_metrics SET year = year(timestamp), month = month(timestamp)")
+    legacy = _legacy_filter(con, "2025-09-28", "2025-10-04")
+    con.close()
+
+    monkeypatch.setenv("DB_PROVIDER", "gcs")  # activa el predicado year/month
+    monkeypatch.setattr(data_router, "daily_metrics_source", lambda conn, plan: "daily_metrics")
+    monkeypatch.setattr(data_router, "get_db_connection", lambda read_only=True: duckdb.connect(db))
+    from app.services import processor_service
+    monkeypatch.setattr(processor_service, "get_aggregate_time_series", lambda pairs: [])
+
+    app = FastAPI()
+    app.include_router(data_router.router, prefix="/api/data")
+    client = TestClient(app)
+    body = {"date_from": "2025-09-28", "date_to": "2025-10-04",
+            "rules": [{"id": "1", "category": "c", "metric": "Open Gap %", "operator": ">=",
+                       "valueType": "static", "value": "0"}]}
+    r = client.post("/api/data/filter", json=body)
+    assert r.status_code == 200
+    got = sorted(((x["ticker"], x["date"]) for x in r.json()["records"]),
+                 key=lambda t: (t[1], t[0]))
+    assert len(legacy) == 14
+    assert got == sorted(legacy, key=lambda t: (t[1], t[0]))
+
+    assert client.post("/api/data/filter", json={"date_from": "nope"}).status_code == 400
@@ -3,9 +3,10 @@ EPIC C (PRD rendimiento-backtester) — réplica local de slabs con fuente confi
 
 Se testea el branch de fuente LOCAL (mirror con layout hive), que es además el modo
 post-migración de datos al hardware propio. El branch GCS comparte todo el código
-salvo el listado (glob DuckDB) — cubierto por el contrato de discover_months.
+salvo el listado (read_blob DuckDB), que se prueba redirigido al mirror local.
 """
 import datetime
+import os
 
 import numpy as np
 import pandas as pd
@@ -69,18 +70,46 @@ def test_discover_months_local_prefers_opt(tmp_path):
     assert by_key == {(2025, 5): "opt", (2025, 6): "raw"}
 
 
+def test_discover_months_gcs_tokens_track_rewrites(tmp_path, monkeypatch):
+    """Branch GCS con el listado redirigido al mirror local: read_blob da el
+    mismo size/last_modified que sobre gs://."""
+    import duckdb
+    from app.db import connection
+    root = tmp_path / "mirror"
+    _mk_local_mirror(root, [(2025, 6)])
+    prefix = f"gs://{connection.GCS_BUCKET}/cold_storage"
+    real = replica_sync._gcs_file_tokens
+    monkeypatch.setattr(connection, "get_connection", lambda: duckdb.connect())
+    monkeypatch.setattr(replica_sync, "_gcs_file_tokens",
+                        lambda conn, pattern: real(conn, pattern.replace(prefix, str(root))))
+
+    before = replica_sync.discover_months("gcs")[0]["files"]
+    (path, tok), = before.items()
+    assert tok.startswith(f"{os.path.getsize(path)}|")
+    df = pd.read_parquet(path)
+    df.iloc[: len(df) // 2].to_parquet(path, index=False)  # mismo nombre, otro contenido
+    after = replica_sync.discover_months("gcs")[0]["files"]
+    assert list(after) == [path] and after[path] != tok
+
 def test_sync_builds_skips_and_rebuilds_current_month(tmp_path):
     root = _mk_local_mirror(tmp_path / "mirror", [(2025, 5), (2025, 6)])
     fake_today = datetime.date(2025, 6, 15)  # junio = mes corriente
 
     r1 = replica_sync.run_sync_once(source=root, years={2025}, now=fake_today)
-    assert r1 == {"built": 2, "skipped": 0, "failed": 0, "months": 2}
+    assert r1 == {"built": 2, "appended": 0, "skipped": 0, "failed": 0, "months": 2}
     assert slab_store.slab_exists("opt", 2025, 5)
     assert slab_store.slab_exists("opt", 2025, 6)
 
-    # segunda pasada: mayo al día (skip); junio (corriente) se reconstruye
+    # segunda pasada: mayo al día (skip); junio (corriente) sin ficheros nuevos → skip
     r2 = replica_sync.run_sync_once(source=root, years={2025}, now=fake_today)
-    assert r2["built"] == 1 and r2["skipped"] == 1 and r2["failed"] == 0
+    assert r2 == {"built": 0, "appended": 0, "skipped": 2, "failed": 0, "months": 2}
+
+    # un fichero ya consumido cambia → rebuild completo del mes corriente
+    d = tmp_path / "mirror" / "intraday_1m_optimized" / "year=2025" / "month=6"
+    _mk_month_frame("TK9", 2025, 6, days=1, seed=99).to_parquet(d / "data.parquet", index=False)
+    r3 = replica_sync.run_sync_once(source=root, years={2025}, now=fake_today)
+    assert r3["built"] == 1 and r3["skipped"] == 1
+    assert slab_store.get_month("opt", 2025, 6).lookup("TK9", "2025-06-01") is not None
 
     # el slab construido sirve datos correctos
     slab = slab_store.get_month("opt", 2025, 5)
@@ -100,7 +129,7 @@ def test_sync_never_raises_on_bad_source(tmp_path):
     # fuente inexistente → 0 meses, sin excepción
     r = replica_sync.run_sync_once(source=str(tmp_path / "nope"), years=set(),
                                    now=datetime.date(2025, 1, 1))
-    assert r == {"built": 0, "skipped": 0, "failed": 0, "months": 0}
+    assert r == {"built": 0, "appended": 0, "skipped": 0, "failed": 0, "months": 0}
 
     # parquet corrupto → failed, sin excepción
     root = tmp_path / "mirror"
@@ -123,3 +152,119 @@ def test_warm_page_cache_reads_all_slabs(tmp_path):
     # límite respetado
     read_capped = replica_sync.warm_page_cache(max_bytes=100)
     assert 0 < read_capped <= 8 * 1024 * 1024
+
+
+def _day_file(root, y, m, day, tickers=("TK0", "TK1", "TK2")):
+    """Fichero de UN día, como los que escribe catch-up (catchup_intraday_{date})."""
+    d = root / "intraday_1m_optimized" / f"year={y}" / f"month={m}"
+    d.mkdir(parents=True, exist_ok=True)
+    df = pd.concat([_mk_month_frame(tk, y, m, days=day, seed=i * 3 + day).iloc[-30:]
+                    for i, tk in enumerate(tickers)], ignore_index=True)
+    df.to_parquet(d / f"catchup_intraday_{y}-{m:02d}-{day:02d}.parquet", index=False)
+    return df
+
+
+def _slab_rows(kind, y, m):
+    """Filas (ticker, date, ts, close) del slab vía la API pública, por par."""
+    slab = slab_store.get_month(kind, y, m)
+    out = {}
+    for t, d in zip(slab.pairs()["ticker"], slab.pairs()["date"]):
+        a = slab.slice_pair(t, d)
+        out[(t, d)] = (a.ts_ns.tolist(), a.close.tolist(), a.volume.tolist())
+    return out
+
+
+def test_current_month_appends_deltas_equal_to_full_build(tmp_path, monkeypatch):
+    from app.db import slab_builder
+    root = tmp_path / "mirror"
+    fake_today = datetime.date(2025, 6, 15)
+    _day_file(root, 2025, 6, 1)
+    r1 = replica_sync.run_sync_once(source=str(root), years={2025}, now=fake_today)
+    assert r1["built"] == 1
+
+    read = []
+    orig = slab_builder._read_parquet_source
+    monkeypatch.setattr(slab_builder, "_read_parquet_source",
+                        lambda src, *a, **k: read.append(src) or orig(src, *a, **k))
+    for day in (2, 3):
+        _day_file(root, 2025, 6, day)
+        r = replica_sync.run_sync_once(source=str(root), years={2025}, now=fake_today)
+        assert r["appended"] == 1 and r["built"] == 0
+    # solo se leyó el fichero del día nuevo en cada pasada
+    assert [len(src) for src in read] == [1, 1]
+    assert read[1][0].endswith("2025-06-03.parquet")
+
+    man = slab_builder.read_manifest(slab_paths("opt", 2025, 6))
+    assert len(man["deltas"]) == 2 and man["n_pairs"] == 9
+    incremental = _slab_rows("opt", 2025, 6)
+
+    # referencia: build completo del mismo mes en otro root
+    monkeypatch.setattr(slab_builder, "_read_parquet_source", orig)
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "full"))
+    slab_store._OPEN_SLABS.clear()
+    glob = str(root / "intraday_1m_optimized" / "year=2025" / "month=6" / "*.parquet")
+    slab_builder.build_month_from_parquet_glob(glob, "opt", 2025, 6)
+    assert _slab_rows("opt", 2025, 6) == incremental
+
+    # compactación: mismo contenido, sin deltas
+    monkeypatch.setenv("BTT_SLAB_DIR", str(tmp_path / "slabs"))
+    slab_store._OPEN_SLABS.clear()
+    slab_builder.compact_month("opt", 2025, 6)
+    man = slab_builder.read_manifest(slab_paths("opt", 2025, 6))
+    assert man["deltas"] == [] and man["n_rows"] == 9 * 30
+    assert not [n for n in os.listdir(slab_paths("opt", 2025, 6)["dir"]) if n.startswith("delta-")]
+    assert _slab_rows("opt", 2025, 6) == incremental
+
+
+def test_delta_overlapping_pairs_falls_back_to_rebuild(tmp_path):
+    root = tmp_path / "mirror"
+    fake_today = datetime.date(2025, 6, 15)
+    _day_file(root, 2025, 6, 1)
+    replica_sync.run_sync_once(source=str(root), years={2025}, now=fake_today)
+    # fichero nuevo con un par (TK0, 06-01) que YA está en el slab → no es anexable
+    d = root / "intraday_1m_optimized" / "year=2025" / "month=6"
+    _mk_month_frame("TK0", 2025, 6, days=1, seed=5).to_parquet(d / "late.parquet", index=False)
+    r = replica_sync.run_sync_once(source=str(root), years={2025}, now=fake_today)
+    assert r["built"] == 1 and r["appended"] == 0
+    assert slab_store.get_month("opt", 2025, 6).n_rows == 3 * 30
+
+
+def test_refresh_coalesced_builds_catalog_and_closed_year_slabs(tmp_path, monkeypatch):
+    from app.db import slab_builder
+    root = _mk_local_mirror(tmp_path / "mirror", [(2024, 11), (2024, 12), (2025, 1)])
+    now = datetime.date(2025, 1, 20)
+    replica_sync.run_sync_once(source=root, years={2024, 2025}, now=now)
+
+    # por defecto sólo el catálogo; los slabs anuales son opt-in
+    assert replica_sync.refresh_coalesced(now) == {"catalog": True, "year_slabs": 0}
+    assert slab_builder.read_manifest(slab_builder.catalog_paths())["n_pairs"] == 3 * 3 * 3
+
+    monkeypatch.setenv("BTT_SLAB_YEAR_SLABS", "1")
+    assert replica_sync.refresh_coalesced(now) == {"catalog": False, "year_slabs": 1}  # 2025 abierto
+    assert slab_store.get_year("opt", 2024).n_rows == 2 * 3 * 3 * 30
+    assert slab_store.get_year("opt", 2025) is None
+    assert replica_sync.refresh_coalesced(now) == {"catalog": False, "year_slabs": 0}
+
+
+def test_apply_cold_tier_freezes_outside_hot_window(tmp_path, monkeypatch):
+    from app.db import slab_builder
+    root = _mk_local_mirror(tmp_path / "mirror", [(2024, 11), (2024, 12), (2025, 1)])
+    now = datetime.date(2025, 1, 20)
+    replica_sync.run_sync_once(source=root, years={2024, 2025}, now=now)
+    rows = _slab_rows("opt", 2024, 11)
+
+    assert replica_sync.apply_cold_tier(now) == 0  # opt-in
+    monkeypatch.setenv("BTT_SLAB_COLD_ENABLED", "1")
+    monkeypatch.setenv("BTT_SLAB_HOT_MONTHS", "2")  # enero y diciembre se quedan calientes
+    assert replica_sync.apply_cold_tier(now) == 1
+    assert replica_sync.apply_cold_tier(now) == 0
+    tiers = {(y, m): slab_builder.read_manifest(slab_paths("opt", y, m)).get("tier")
+             for y, m in [(2024, 11), (2024, 12), (2025, 1)]}
+    assert tiers == {(2024, 11): "cold", (2024, 12): None, (2025, 1): None}
+
+    # el sync no reconstruye el mes frío y se lee igual
+    assert replica_sync.run_sync_once(source=root, years={2024}, now=now)["built"] == 0
+    slab_store._OPEN_SLABS.clear()
+    assert slab_store.get_month("opt", 2024, 11).cold
+    assert _slab_rows("opt", 2024, 11) == rows
+    assert replica_sync.warm_page_cache() > 0
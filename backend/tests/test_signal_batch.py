@@ -0,0 +1,169 @@
+"""
+Señales batch del optimizer — K puntos de un barrido de indicadores por par.
+
+Cubre: translate_strategy_native_batch fila a fila == translate_strategy_native
+por punto (1m y multi-tf), memo de indicadores compartidos (VWAP se computa una
+vez por par aunque lo usen los K puntos) y run_optimization_grid con bloques
+batch (OPT_SIGNAL_BATCH) idéntico al barrido punto a punto, sin evaluar los
+pares que las precondiciones optimizadas descartan en todo el bloque.
+"""
+import numpy as np
+import pytest
+
+from app.services import optimization_service as opt
+from app.services import strategy_engine as se
+from tests.test_grid_pack import _intraday, _qualifying
+from tests.test_n2a_native_equivalence import (
+    _cmp, _make_arrays, _make_daily_stats, _make_day_df, _strategy,
+)
+
+
+def _sweep_defs(periods, tf="1m"):
+    return [
+        _strategy([
+            _cmp({"name": "Close"}, "GREATER_THAN", {"name": "SMA", "period": p}),
+            _cmp({"name": "Close"}, "GREATER_THAN", {"name": "VWAP"}, tf="5m"),
+        ], operator="OR", tf=tf)
+        for p in periods
+    ]
+
+
+@pytest.mark.parametrize("tf", ["1m", "5m"])
+def test_batch_rows_equal_per_point_native(tf):
+    df = _make_day_df()
+    ds = _make_daily_stats(df)
+    arrays = _make_arrays(df)
+    compiled = [se.compile_strategy_def(d) for d in _sweep_defs([5, 10, 20, 50], tf=tf)]
+
+    batch = se.translate_strategy_native_batch(arrays, compiled, ds)
+    assert batch["entries"].shape == (4, len(df))
+    for k, c in enumerate(compiled):
+        one = se.translate_strategy_native(arrays, c, ds)
+        np.testing.assert_array_equal(batch["entries"][k], one["entries"])
+        np.testing.assert_array_equal(batch["exits"][k], one["exits"])
+        for key in ("direction", "sl_stop", "tp_stop", "max_reentries", "accept_reentries"):
+            assert batch["signals"][k][key] == one[key]
+    assert len({batch["entries"][k].tobytes() for k in range(4)}) > 1
+
+
+def test_batch_memoizes_shared_indicators(monkeypatch):
+    calls = {"VWAP": 0, "SMA": 0}
+    orig_vwap, orig_sma = se._RAW_INDICATOR_DISPATCH["VWAP"], se._RAW_INDICATOR_DISPATCH["SMA"]
+
+    def _count(name, fn):
+        def wrapped(*a):
+            calls[name] += 1
+            return fn(*a)
+        return wrapped
+
+    monkeypatch.setitem(se._RAW_INDICATOR_DISPATCH, "VWAP", _count("VWAP", orig_vwap))
+    monkeypatch.setitem(se._RAW_INDICATOR_DISPATCH, "SMA", _count("SMA", orig_sma))
+    df = _make_day_df()
+    compiled = [se.compile_strategy_def(d) for d in _sweep_defs([5, 10, 10, 20])]
+    se.translate_strategy_native_batch(_make_arrays(df), compiled, _make_daily_stats(df))
+    # VWAP 5m (entry) + VWAP 1m (exit) una vez cada uno; SMA una por periodo distinto
+    assert calls == {"VWAP": 2, "SMA": 3}
+
+
+STRATEGY = {
+    "bias": "short", "apply_day": "gap_day",
+    "entry_logic": {"timeframe": "1m", "root_condition": {"operator": "AND", "conditions": [
+        {"type": "indicator_comparison", "timeframe": "1m",
+         "source": {"name": "Bar Close"}, "comparator": "LESS_THAN",
+         "target": {"name": "SMA", "period": 10}},
+    ]}},
+    "risk_management": {"use_hard_stop": True, "hard_stop": {"type": "Percentage", "value": 15},
+                        "accept_reentries": True, "max_reentries": -1},
+}
+
+
+def test_optimization_grid_batch_equals_per_point(tmp_path, monkeypatch):
+    df, qual = _intraday(), _qualifying()
+    monkeypatch.setenv("BTT_GRID_PACK_DIR", str(tmp_path / "packs"))
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_DIR", str(tmp_path / "signals"))
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "0")
+    monkeypatch.setenv("BTT_N2A_NATIVE_ENABLED", "1")
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month", lambda *a, **k: df.copy())
+
+    built = []
+    orig_build = opt._build_batch_signal_caches
+
+    def _spy(ctx, idx):
+        caches = orig_build(ctx, idx)
+        built.append(len(caches) if caches is not None else None)
+        return caches
+
+    monkeypatch.setattr(opt, "_build_batch_signal_caches", _spy)
+    pcs = [{"id": "p", "label": "p", "values": [5, 10, 20, 40],
+            "path": "entry_logic.root_condition.conditions.0.target.period"},
+           {"id": "sl", "label": "sl", "values": [5, 15],
+            "path": "risk_management.hard_stop.value"}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": "PERCENT"})
+
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "0")
+    per_point = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert built == []
+
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "3")
+    batched = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert built == [3, 3, 2]
+    assert any(d["total_trades"] for d in per_point["details"])
+    assert batched["details"] == per_point["details"]
+    assert batched["grid"] == per_point["grid"]
+
+
+def test_batch_signals_skip_pairs_filtered_by_preconditions(tmp_path, monkeypatch):
+    df, qual = _intraday(), _qualifying()  # gap_pct 60..65
+    monkeypatch.setenv("BTT_GRID_PACK_DIR", str(tmp_path / "packs"))
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_DIR", str(tmp_path / "signals"))
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "0")
+    monkeypatch.setenv("BTT_N2A_NATIVE_ENABLED", "1")
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month", lambda *a, **k: df.copy())
+    # precondición de juguete: gap_pct >= value
+    monkeypatch.setattr(opt, "_evaluate_postgap_preconditions",
+                        lambda q, pcs: q[q["gap_pct"] >= pcs[0]["value"]] if pcs else q)
+
+    evaluated = []
+    orig_batch = se.translate_strategy_native_batch
+
+    def _spy_batch(arrays, compiled, daily_stats=None):
+        evaluated.append(daily_stats["gap_pct"])
+        return orig_batch(arrays, compiled, daily_stats)
+
+    monkeypatch.setattr(se, "translate_strategy_native_batch", _spy_batch)
+    cached = []
+    orig_build = opt._build_batch_signal_caches
+
+    def _spy_build(ctx, idx):
+        caches = orig_build(ctx, idx)
+        cached.extend(sorted(c) for c in caches)
+        return caches
+
+    monkeypatch.setattr(opt, "_build_batch_signal_caches", _spy_build)
+    strategy = {**STRATEGY, "postgap_preconditions": [{"metric": "gap_pct", "value": 0}]}
+    pcs = [{"id": "p", "label": "p", "values": [5, 10],
+            "path": "entry_logic.root_condition.conditions.0.target.period"},
+           {"id": "g", "label": "g", "values": [63, 64],
+            "path": "postgap_preconditions.0.value"}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": "PERCENT"})
+
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "0")
+    per_point = opt.run_optimization_grid(*args, strategy_definition=strategy)
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "4")
+    batched = opt.run_optimization_grid(*args, strategy_definition=strategy)
+
+    # unión de los pares válidos del bloque (gap >= 63): los de 60..62 nunca se evalúan
+    assert sorted(evaluated) == [63.0, 64.0, 65.0]
+    # cada punto guarda sólo sus pares (value=64 no ve BBB 2025-09-02)
+    assert [len(c) for c in cached] == [3, 2, 3, 2]
+    assert batched["details"] == per_point["details"]
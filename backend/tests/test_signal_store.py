@@ -0,0 +1,113 @@
+"""
+Signal store persistente — señales entry/exit por par en bits empaquetados (mmap).
+
+Cubre: round-trip de bits (longitudes no múltiplo de 8), publicación por
+segmentos visible para otro lector tras refresh, huella de contenido sensible a
+datos y daily_stats, hash de lógica estable ante cambios de risk management y
+sensible al código de señales (strategy_engine / indicators), y
+run_optimization_grid risk-only: un re-run NO regenera señales (translate_strategy
+no se llama) y produce resultados idénticos al caché en memoria.
+"""
+import numpy as np
+import pytest
+
+from app.db import signal_store
+from app.services import backtest_service
+from app.services import optimization_service as opt
+from tests.test_grid_pack import STRATEGY, _intraday, _qualifying
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_DIR", str(tmp_path / "signals"))
+    monkeypatch.setenv("BTT_GRID_PACK_DIR", str(tmp_path / "packs"))
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "0")
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    signal_store._OPEN_STORES.clear()
+    yield
+    signal_store._OPEN_STORES.clear()
+
+
+def test_store_roundtrip_and_cross_reader_visibility():
+    rng = np.random.default_rng(0)
+    a = signal_store.open_signal_store("logic")
+    sigs = {}
+    for n in (5, 8, 13, 391):
+        key = ("T", f"2025-01-{n:02d}"[:10], f"fp{n}")
+        sigs[key] = {"entries": rng.random(n) > 0.5, "exits": rng.random(n) > 0.7}
+        a[key] = sigs[key]
+    b = signal_store.SignalStore("logic", root=signal_store.signal_store_root())
+    assert len(b) == 0
+    assert a.flush() == 4
+    assert b.refresh() == 1
+    for key, sig in sigs.items():
+        for store in (a, b):
+            got = store[key]
+            np.testing.assert_array_equal(got["entries"], sig["entries"])
+            np.testing.assert_array_equal(got["exits"], sig["exits"])
+    assert ("T", "2025-01-05", "other") not in b
+
+
+def test_fingerprint_and_logic_hash():
+    ts = np.arange(10, dtype=np.int64) * 60_000_000_000
+    px = np.linspace(1, 2, 10)
+    base = signal_store.pair_fingerprint(ts, px, px, px, px, px, {"prev_close": 1.0})
+    assert base == signal_store.pair_fingerprint(ts, px.copy(), px, px, px, px, {"prev_close": 1.0})
+    assert base != signal_store.pair_fingerprint(ts, px, px, px, px * 1.01, px, {"prev_close": 1.0})
+    assert base != signal_store.pair_fingerprint(ts, px, px, px, px, px, {"prev_close": 1.1})
+
+    import copy
+    other_risk = copy.deepcopy(STRATEGY)
+    other_risk["risk_management"]["hard_stop"]["value"] = 3
+    other_logic = copy.deepcopy(STRATEGY)
+    other_logic["bias"] = "long"
+    h = signal_store.signal_logic_hash(STRATEGY)
+    assert h == signal_store.signal_logic_hash(other_risk)
+    assert h != signal_store.signal_logic_hash(other_logic)
+
+
+def test_logic_hash_tracks_signal_code(monkeypatch):
+    h = signal_store.signal_logic_hash(STRATEGY)
+    fp = signal_store.signal_code_fingerprint()
+    # otro código de señales (aquí: otra lista de módulos) → otra huella y otra clave
+    monkeypatch.setattr(signal_store, "_SIGNAL_CODE_MODULES", ("app.services.strategy_engine",))
+    signal_store.signal_code_fingerprint.cache_clear()
+    try:
+        assert signal_store.signal_code_fingerprint() != fp
+        assert signal_store.signal_logic_hash(STRATEGY) != h
+    finally:
+        signal_store.signal_code_fingerprint.cache_clear()
+
+
+def test_risk_only_rerun_skips_signal_generation(monkeypatch):
+    df, qual = _intraday(), _qualifying()
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month", lambda *a, **k: df.copy())
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    calls = []
+    orig = backtest_service.translate_strategy
+    monkeypatch.setattr(backtest_service, "translate_strategy",
+                        lambda *a, **k: calls.append(1) or orig(*a, **k))
+    pcs = [{"id": "sl", "label": "sl", "path": "risk_management.hard_stop.value", "values": [5, 15]},
+           {"id": "r", "label": "r", "path": "risk_management.max_reentries", "values": [0, -1]}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": "PERCENT"})
+
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_ENABLED", "0")
+    in_memory = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    n_pairs = len(calls)
+    assert n_pairs == 6
+
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_ENABLED", "1")
+    calls.clear()
+    first = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert len(calls) == n_pairs
+    signal_store._OPEN_STORES.clear()  # otro proceso / otro run: solo disco
+    calls.clear()
+    rerun = opt.run_optimization_grid(*args, strategy_definition=STRATEGY)
+    assert calls == []
+    assert first["details"] == in_memory["details"] == rerun["details"]
+    # max_reentries barrido en risk-only: el caché no debe congelarlo
+    trades = [d["total_trades"] for d in rerun["details"]]
+    assert trades[0] != trades[1]
@@ -0,0 +1,114 @@
+"""
+Kernel batch del simulador — K configuraciones de riesgo por par en una llamada.
+
+Exigencia: result(k) de simulate_jit_batch IDÉNTICO a simulate_jit(**configs[k])
+(trades, equity bit a bit, last_risk_amount), incluido el locates fee aplicado
+al materializar; los arrays compactos (n_trades, pnl_sum) cuadran con los dicts.
+Y el sweep risk-only que lo usa: run_optimization_grid con bloques batch (una
+llamada al kernel por par y bloque) da la misma superficie que punto a punto.
+"""
+import numpy as np
+import pytest
+
+from app.services import optimization_service as opt
+from app.services import sim_dispatch
+from app.services.sim_dispatch import simulate_jit, simulate_jit_batch, warmup
+from tests.test_grid_pack import _intraday, _qualifying
+from tests.test_signal_batch import STRATEGY
+from tests.test_sim_jit_equivalence import _assert_equal, _mk_pair, _sample_config
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _warm():
+    warmup()
+
+
+@pytest.mark.parametrize("direction", ["longonly", "shortonly"])
+def test_batch_equals_per_config(direction):
+    rng = np.random.default_rng(20261018)
+    for n_bars in (390, 960):
+        pair = _mk_pair(rng, n_bars)
+        pair["entries"] = rng.random(n_bars) < 0.03
+        configs = []
+        for _ in range(24):
+            cfg = _sample_config(rng)
+            cfg.pop("direction")
+            configs.append(cfg)
+
+        batch = simulate_jit_batch(configs=configs, direction=direction, **pair)
+        assert len(batch) == 24 and batch.equity.shape == (24, n_bars)
+        for k, cfg in enumerate(configs):
+            one = simulate_jit(direction=direction, **pair, **cfg)
+            got = batch.result(k)
+            _assert_equal(one, got, f"{direction} n={n_bars} k={k}")
+            assert batch.n_trades[k] == len(one["trades"])
+            assert batch.result(k) is got  # memoizado
+        assert batch.n_trades.sum() > 0
+
+
+def test_batch_compact_summaries_without_materializing():
+    rng = np.random.default_rng(7)
+    pair = _mk_pair(rng, 390)
+    pair["entries"] = rng.random(390) < 0.05
+    configs = [{"risk_r": 100.0, "sl_stop": s} for s in (0.02, 0.05, 0.1)] + [{"risk_r": 100.0}]
+    batch = simulate_jit_batch(configs=configs, **pair)
+    for k, cfg in enumerate(configs):
+        one = simulate_jit(**pair, **cfg)
+        assert batch.pnl_sum[k] == pytest.approx(sum(t["pnl"] for t in one["trades"]), abs=1e-3)
+        assert batch.last_risk_amount[k] == one["last_risk_amount"]
+    assert batch._cache == {}
+
+
+def test_batch_empty_signals():
+    rng = np.random.default_rng(1)
+    pair = _mk_pair(rng, 120)
+    pair["entries"] = np.zeros(120, dtype=bool)
+    batch = simulate_jit_batch(configs=[{}, {"risk_type": "PERCENT"}], **pair)
+    assert list(batch.n_trades) == [0, 0]
+    assert batch.result(1)["trades"] == []
+    np.testing.assert_array_equal(batch.result(0)["equity"], simulate_jit(**pair)["equity"])
+
+
+@pytest.mark.parametrize("risk_type", ["FIXED", "PERCENT"])
+def test_risk_only_sweep_batch_equals_per_point(tmp_path, monkeypatch, risk_type):
+    df, qual = _intraday(), _qualifying()
+    monkeypatch.setenv("BTT_GRID_PACK_DIR", str(tmp_path / "packs"))
+    monkeypatch.setenv("BTT_SIGNAL_CACHE_DIR", str(tmp_path / "signals"))
+    monkeypatch.setenv("BACKTEST_NUMBA_SIM", "1")
+    monkeypatch.setenv("OPT_PARALLEL_WORKERS", "1")
+    monkeypatch.delenv("BTT_SLAB_STREAM_ENABLED", raising=False)
+    monkeypatch.setattr(opt, "fetch_qualifying_data", lambda *a, **k: qual.copy())
+    monkeypatch.setattr(opt, "_select_intraday_glob_for_month", lambda c, y, m: "x")
+    monkeypatch.setattr(opt, "get_connection", lambda: None)
+    monkeypatch.setattr(opt, "_fetch_and_cache_month", lambda *a, **k: df.copy())
+
+    calls = []
+    orig_batch = sim_dispatch.simulate_jit_batch
+
+    def _spy(*a, configs, **k):
+        calls.append(len(configs))
+        return orig_batch(*a, configs=configs, **k)
+
+    monkeypatch.setattr(sim_dispatch, "simulate_jit_batch", _spy)
+    strategy = {**STRATEGY, "risk_management": {
+        **STRATEGY["risk_management"], "use_take_profit": True,
+        "take_profit": {"type": "Percentage", "value": 5},
+    }}
+    pcs = [{"id": "sl", "label": "sl", "values": [2, 5, 15],
+            "path": "risk_management.hard_stop.value"},
+           {"id": "tp", "label": "tp", "values": [1, 4],
+            "path": "risk_management.take_profit.value"},
+           {"id": "re", "label": "re", "values": [0, 2],
+            "path": "risk_management.max_reentries"}]
+    args = ("s", "d", pcs, "total_return", {"risk_type": risk_type, "risk_r": 2 if risk_type == "PERCENT" else 100})
+
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "0")
+    per_point = opt.run_optimization_grid(*args, strategy_definition=strategy)
+    assert calls == []
+
+    monkeypatch.setenv("OPT_SIGNAL_BATCH", "5")
+    batched = opt.run_optimization_grid(*args, strategy_definition=strategy)
+    assert calls and set(calls) <= {5, 2}  # 12 puntos → bloques de 5, 5 y 2
+    assert len({d["total_trades"] for d in per_point["details"]}) > 1
+    assert batched["details"] == per_point["details"]
+    assert batched["grid"] == per_point["grid"]
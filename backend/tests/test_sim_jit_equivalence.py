@@ -112,6 +112,8 @@ def _sample_config(rng):
 def _assert_equal(res_py, res_jit, ctx):
     assert res_py["trades"] == res_jit["trades"], (
         f"trades difieren [{ctx}]:\npy : {res_py['trades'][:3]}\njit: {res_jit['trades'][:3]}")
+    assert [list(t) for t in res_py["trades"]] == [list(t) for t in res_jit["trades"]], (
+        f"orden de claves [{ctx}]")
     np.testing.assert_array_equal(res_py["equity"], res_jit["equity"],
                                   err_msg=f"equity difiere [{ctx}]")
     assert res_py["last_risk_amount"] == res_jit["last_risk_amount"], f"last_risk [{ctx}]"
@@ -0,0 +1,130 @@
+"""
+Single-flight (app.services.single_flight).
+
+Cubre: N misses concurrentes de la misma clave → un único cálculo y todos
+reciben su resultado; la excepción del líder llega a todos y la siguiente
+llamada recalcula; con lock Redis (fake) un worker que no tiene el lock espera
+al resultado publicado vía recheck sin calcular, y el dueño lo libera; y el
+caso real de EDGAR submissions (una sola request HTTP por CIK).
+"""
+import threading
+import time
+
+import pytest
+
+from app.services import edgar_service, single_flight
+
+
+def _herd(n, target):
+    barrier = threading.Barrier(n)
+    out, errors = [None] * n, [None] * n
+
+    def run(i):
+        barrier.wait()
+        try:
+            out[i] = target()
+        except Exception as e:  # noqa: BLE001
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return out, errors
+
+
+def test_concurrent_misses_share_one_computation():
+    sf = single_flight.SingleFlight("t")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"v": 42}
+
+    out, errors = _herd(8, lambda: sf.do("AAA", slow))
+    assert calls == [1] and errors == [None] * 8
+    assert all(o is out[0] for o in out) and out[0] == {"v": 42}
+    assert not sf.in_flight("AAA")
+    assert sf.do("BBB", lambda: 7) == 7
+
+
+def test_leader_error_reaches_waiters_then_retries():
+    sf = single_flight.SingleFlight("t")
+    calls = []
+
+    def boom():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("upstream 503")
+
+    _out, errors = _herd(5, lambda: sf.do("AAA", boom))
+    assert len(calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert sf.do("AAA", lambda: "ok") == "ok"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.kv, self.evals = {}, []
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.kv:
+            return None
+        self.kv[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.kv)
+
+    def eval(self, _script, _n, key, token):
+        self.evals.append(key)
+        if self.kv.get(key) == token:
+            del self.kv[key]
+            return 1
+        return 0
+
+
+def test_redis_lock_waits_for_other_worker(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setenv("BTT_SINGLE_FLIGHT_REDIS", "1")
+    monkeypatch.setattr(single_flight, "_POLL_S", 0.01)
+    monkeypatch.setattr("app.redis_client.get_redis", lambda: fake)
+    sf = single_flight.SingleFlight("ta")
+
+    # otro worker tiene el lock y publica al 3er sondeo
+    fake.kv["sf:ta:AAA|chart"] = "other"
+    polls = []
+
+    def recheck():
+        polls.append(1)
+        return "published" if len(polls) >= 3 else None
+
+    got = sf.do(("AAA", "chart"), lambda: pytest.fail("no debe calcular"), recheck=recheck)
+    assert got == "published" and len(polls) == 3
+
+    # lock libre → este worker calcula y lo libera (compare-and-delete)
+    del fake.kv["sf:ta:AAA|chart"]
+    assert sf.do(("AAA", "chart"), lambda: "mine", recheck=lambda: None) == "mine"
+    assert fake.evals == ["sf:ta:AAA|chart"] and not fake.kv
+
+
+def test_edgar_submissions_single_request(monkeypatch):
+    calls = []
+
+    class _Resp:
+        def json(self):
+            return {"filings": {"recent": {"form": ["8-K"]}}}
+
+    def fake_get(*_a, **_k):
+        calls.append(1)
+        time.sleep(0.2)
+        return _Resp()
+
+    monkeypatch.setattr(edgar_service.requests, "get", fake_get)
+    edgar_service._SUBMISSIONS_CACHE.clear()
+    out, errors = _herd(6, lambda: edgar_service._get_submissions_recent("0000000001"))
+    assert calls == [1] and errors == [None] * 6
+    assert all(o == {"form": ["8-K"]} for o in out)
+    edgar_service._SUBMISSIONS_CACHE.clear()
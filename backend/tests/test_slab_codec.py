@@ -0,0 +1,74 @@
+"""Codec del tier frío (slab_codec): sin pérdidas bit a bit y caché de bloques acotada."""
+import numpy as np
+import pytest
+
+from app.db import slab_codec
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    slab_codec.clear_decode_cache()
+    yield
+    slab_codec.clear_decode_cache()
+
+
+def _columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    m = max(n, 300)
+    ts = (np.datetime64("2025-09-02T04:00", "ns").astype(np.int64)
+          + np.cumsum(rng.choice([60, 60, 60, 120, 86400], m)) * 1_000_000_000)
+    close = (10 + rng.normal(0, 0.05, m).cumsum()).astype(np.float32)
+    # casos degenerados: NaN, ±inf, negativos, -0.0, subnormales y saltos de signo
+    close[[3, 50, 51]] = [np.nan, np.inf, -np.inf]
+    close[100:110] = -close[100:110]
+    close[200] = -0.0
+    close[201] = np.float32(1e-42)
+    cols = {
+        "ts_ns": ts, "open": close * np.float32(1.001), "high": close * np.float32(1.01),
+        "low": close * np.float32(0.99), "close": close,
+        "volume": rng.integers(-5, 2**31 - 1, m).astype(np.int32),
+    }
+    return {k: v[:n] for k, v in cols.items()}
+
+
+@pytest.mark.parametrize("n", [0, 1, 37, 64, 1000])
+def test_roundtrip_is_bit_exact(tmp_path, n):
+    cols = _columns(n)
+    path = str(tmp_path / "slab.cold")
+    layout = slab_codec.write_cold_file(path, cols, block_rows=64)
+    cold = slab_codec.ColdColumns(path, layout, key="t")
+    full = cold.decode_all()
+    for (name, _codec, dtype), got in zip(slab_codec.COLUMN_CODECS, full):
+        assert got.dtype == dtype
+        assert got.tobytes() == np.asarray(cols[name], dtype=dtype).tobytes(), name
+    # rangos dentro de un bloque y cruzando bloques
+    for s, e in [(0, min(n, 10)), (60, min(n, 70)), (5, n), (n, n)]:
+        if s > e:
+            continue
+        part = cold.rows(s, e)
+        for k, (name, _c, dtype) in enumerate(slab_codec.COLUMN_CODECS):
+            assert part[k].tobytes() == np.asarray(cols[name], dtype=dtype)[s:e].tobytes()
+
+
+def test_cold_file_is_smaller_than_raw_columns(tmp_path):
+    cols = _columns(20_000)
+    layout = slab_codec.write_cold_file(str(tmp_path / "slab.cold"), cols)
+    raw = sum(np.asarray(v).nbytes for v in cols.values())
+    assert layout["nbytes"] < 0.75 * raw
+
+
+def test_decode_cache_hits_and_stays_bounded(tmp_path, monkeypatch):
+    cols = _columns(1000)
+    path = str(tmp_path / "slab.cold")
+    cold = slab_codec.ColdColumns(path, slab_codec.write_cold_file(path, cols, block_rows=100), key="t")
+    block_bytes = sum(a.nbytes for a in cold._decode(0))
+    monkeypatch.setattr(slab_codec, "DECODE_CACHE_BYTES", 3 * block_bytes)
+
+    a = cold.rows(10, 20)
+    b = cold.rows(30, 40)  # mismo bloque → hit, vistas del mismo array cacheado
+    assert a[4].base is b[4].base and not a[4].flags.writeable
+    for s in range(0, 1000, 100):
+        cold.rows(s, s + 5)
+    st = slab_codec.decode_cache_stats()
+    assert st["hits"] == 2 and st["misses"] == 10  # el bloque 0 seguía cacheado
+    assert st["blocks"] == 3 and st["bytes"] <= 3 * block_bytes
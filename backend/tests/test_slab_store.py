@@ -24,8 +24,10 @@ def _isolated_dirs(tmp_path, monkeypatch):
     monkeypatch.setattr(gcs_cache, "LOCAL_CACHE_DIR", str(cache_dir))
     monkeypatch.setenv("BTT_SLAB_DIR", str(slab_dir))
     slab_store._OPEN_SLABS.clear()
+    slab_store._SUPERSEDED.clear()
     yield
     slab_store._OPEN_SLABS.clear()
+    slab_store._SUPERSEDED.clear()
 
 
 def _mk_day(ticker, date, n=60, start_hour=9, start_min=30, seed=0):
@@ -142,6 +144,104 @@ def test_manifest_publishes_last_and_get_month_requires_it():
     assert slab_store.get_month("opt", 2025, 9) is None
 
 
+def test_delta_append_keeps_ranges_and_reopens(monkeypatch):
+    src = _source_month()
+    slab_builder.build_month_from_df(pd.concat([src["AAA"], src["BBB"]]), "opt", 2025, 9)
+    monkeypatch.setattr(slab_store, "_REFRESH_CHECK_S", 0.0)
+    before = slab_store.get_month("opt", 2025, 9)
+    rng_a = before.lookup("AAA", "2025-09-02")
+    close_a = before.slice_pair("AAA", "2025-09-02").close.copy()
+
+    assert slab_builder.append_delta_from_df(src["CCC"], "opt", 2025, 9) is not None
+    # un delta con pares ya presentes no se acepta (el caller hace rebuild)
+    assert slab_builder.append_delta_from_df(src["AAA"], "opt", 2025, 9) is None
+
+    after = slab_store.get_month("opt", 2025, 9)
+    assert after is not before  # manifest nuevo → reabierto
+    assert after.lookup("AAA", "2025-09-02") == rng_a
+    np.testing.assert_array_equal(after.slice_pair("AAA", "2025-09-02").close, close_a)
+    c = after.slice_native(*after.lookup("CCC", "2025-09-03"))
+    assert c.close.dtype == np.float32 and len(c) == 60
+    assert after.n_rows == after.pairs()["row_end"].max()
+
+
+def test_refs_keep_their_layout_across_compaction(monkeypatch):
+    src = _source_month()
+    slab_builder.build_month_from_df(pd.concat([src["AAA"], src["CCC"]]), "opt", 2025, 9)
+    assert slab_builder.append_delta_from_df(src["BBB"], "opt", 2025, 9) is not None
+    monkeypatch.setattr(slab_store, "_REFRESH_CHECK_S", 0.0)
+    pairs = [("BBB", "2025-09-02"), ("CCC", "2025-09-03")]
+    qual = _qualifying_for(pairs)
+    qlk = {(r["ticker"], r["date"]): r for r in qual.to_dict("records")}
+    old = slab_store.get_month("opt", 2025, 9)
+    expected = [old.slice_pair(t, d).close.copy() for t, d in pairs]
+
+    items = slab_store.iter_slab_items(qual, [(2025, 9)], {}, qlk)
+    refs = [next(items)[3]]
+    # la compactación reordena: BBB (delta) pasa delante de CCC → rangos nuevos
+    slab_builder.compact_month("opt", 2025, 9)
+    current = slab_store.get_month("opt", 2025, 9)
+    assert current.layout != old.layout and current.lookup(*pairs[0]) != refs[0][4:6]
+    refs.append(next(items)[3])
+    assert [r[-1] for r in refs] == [old.layout, old.layout]
+
+    slab_store._SUPERSEDED.clear()  # sólo queda el slab fijado por el iterador vivo
+    for ref, exp in zip(refs, expected):
+        np.testing.assert_array_equal(slab_store.resolve_slab_item(ref).close, exp)
+    items.close()
+    assert ("opt", 2025, 9, old.layout) not in slab_store._PINNED
+    with pytest.raises(slab_store.StaleSlabRef):
+        slab_store.resolve_slab_item(refs[0])
+
+    # el proceso que ya tenía el layout viejo mapeado lo conserva como sustituido
+    slab_store._OPEN_SLABS[("opt", 2025, 9)] = old
+    assert slab_store.get_month("opt", 2025, 9) is not old
+    np.testing.assert_array_equal(slab_store.resolve_slab_item(refs[1]).close, expected[1])
+    fresh = [it[3] for it in slab_store.iter_slab_items(qual, [(2025, 9)], {}, qlk)]
+    for ref, exp in zip(fresh, expected):
+        assert ref[-1] == current.layout
+        np.testing.assert_array_equal(slab_store.resolve_slab_item(ref).close, exp)
+
+def test_binary_pair_index_opens_without_parquet(monkeypatch):
+    src = _source_month()
+    slab_builder.build_month_from_df(pd.concat([src["AAA"], src["BBB"]]), "opt", 2025, 9)
+    paths = slab_builder.slab_paths("opt", 2025, 9)
+    first = slab_builder.read_manifest(paths)["pair_index"]
+    assert first["n_pairs"] == 4 and first["n_tickers"] == 2
+    assert slab_builder.append_delta_from_df(src["CCC"], "opt", 2025, 9) is not None
+    meta = slab_builder.read_manifest(paths)["pair_index"]
+    # el índice del append cubre base + delta; el anterior se borra tras publicar
+    assert meta["n_pairs"] == 6 and meta["pairs"] != first["pairs"]
+    assert not os.path.exists(os.path.join(paths["dir"], first["pairs"]))
+
+    ref = pd.concat([pd.read_parquet(paths["index"])] + [
+        pd.read_parquet(slab_builder.delta_paths(paths, d["name"])["index"])
+        for d in slab_builder.read_manifest(paths)["deltas"]])
+    monkeypatch.setattr(slab_store.pd, "read_parquet",
+                        lambda *a, **k: pytest.fail("abrir/lookup no debe leer index.parquet"))
+    slab = slab_store.MonthSlab("opt", 2025, 9, paths)
+    assert isinstance(slab._pair_index.keys, np.memmap)
+    for t, d, s, e in zip(ref["ticker"], ref["date"], ref["row_start"], ref["row_end"]):
+        assert slab.lookup(t, d) == (s, e)
+    assert slab.lookup("ZZZ", "2025-09-01") is None and slab.lookup("AAA", "2025-09-15") is None
+    starts, ends = slab.lookup_many(["CCC", "AAA", "ZZZ", "BBB"],
+                                    ["2025-09-03", "2025-09-15", "2025-09-01", "2025-09-02"])
+    assert starts.tolist() == [slab.lookup("CCC", "2025-09-03")[0], -1, -1, slab.lookup("BBB", "2025-09-02")[0]]
+    assert ends[0] - starts[0] == 60
+
+
+def test_slab_without_pair_index_falls_back_to_parquet(monkeypatch):
+    monkeypatch.setenv("BTT_SLAB_PAIR_INDEX", "0")
+    src = _source_month()
+    slab_builder.build_month_from_df(pd.concat(src.values()), "opt", 2025, 9)
+    paths = slab_builder.slab_paths("opt", 2025, 9)
+    assert "pair_index" not in slab_builder.read_manifest(paths)
+    slab = slab_store.get_month("opt", 2025, 9)
+    assert slab._pair_index is None
+    assert slab.lookup("CCC", "2025-09-03")[1] - slab.lookup("CCC", "2025-09-03")[0] == 60
+    assert slab.lookup_many(["AAA", "ZZZ"], ["2025-09-01", "2025-09-01"])[0].tolist() == [0, -1]
+
+
 def test_empty_source_returns_none():
     assert slab_builder.build_month_from_ticker_cache(2025, 9, "opt") is None
     assert slab_builder.build_month_from_df(pd.DataFrame(), "opt", 2025, 9) is None
@@ -220,3 +320,132 @@ def test_iter_slab_groups_swing_concat_cross_month():
     qlk2 = {("AAA", "2025-09-30"): qual2.iloc[0].to_dict()}
     out2 = list(slab_store.iter_slab_groups(qual2, [(2025, 9)], strat, qlk2))
     assert len(out2) == 1 and len(out2[0][3]) == 60
+
+
+def _two_month_slabs():
+    """AAA/BBB con días a caballo de sept/oct (opt) + un mes raw (ago)."""
+    _write_ticker_cache({"AAA": pd.concat([_mk_day("AAA", "2025-09-29", seed=1),
+                                           _mk_day("AAA", "2025-09-30", seed=2)]),
+                         "BBB": _mk_day("BBB", "2025-09-30", seed=3)}, y=2025, m=9)
+    _write_ticker_cache({"AAA": _mk_day("AAA", "2025-10-01", seed=4),
+                         "BBB": _mk_day("BBB", "2025-10-01", seed=5)}, y=2025, m=10)
+    _write_ticker_cache({"CCC": _mk_day("CCC", "2025-08-29", seed=6)}, y=2025, m=8, kind="raw")
+    for y, m, kind in ((2025, 9, "opt"), (2025, 10, "opt"), (2025, 8, "raw")):
+        slab_builder.build_month_from_ticker_cache(y, m, kind)
+
+
+def test_catalog_resolves_pairs_across_months_and_kinds():
+    _two_month_slabs()
+    assert slab_builder.catalog_stale()
+    man = slab_builder.build_catalog()
+    assert man["n_pairs"] == 6 and not slab_builder.catalog_stale()
+    assert man["months"]["2025-08"]["kind"] == "raw"
+
+    cat = slab_store.get_catalog()
+    pairs = [("AAA", "2025-09-30"), ("BBB", "2025-10-01"), ("CCC", "2025-08-29"),
+             ("ZZZ", "2025-09-30"), ("AAA", "2025-10-02")]
+    kinds, starts, ends = cat.resolve([t for t, _ in pairs], [d for _, d in pairs])
+    assert kinds == ["opt", "opt", "raw", None, None]
+    for (t, d), k, s, e in zip(pairs[:3], kinds, starts, ends):
+        month = slab_store.get_month(k, int(d[:4]), int(d[5:7]))
+        assert cat.covers(month) and month.lookup(t, d) == (s, e)
+
+    qual = _qualifying_for(pairs)
+    refs = slab_store.slab_pair_refs(qual, [(2025, 8), (2025, 9), (2025, 10)])
+    assert sorted(map(tuple, refs[["ticker", "date", "kind", "month"]].values.tolist())) == [
+        ("AAA", "2025-09-30", "opt", 9), ("BBB", "2025-10-01", "opt", 10), ("CCC", "2025-08-29", "raw", 8)]
+
+    # un delta anexado después deja el mes fuera del catálogo (vuelve a su índice)
+    slab_builder.append_delta_from_df(_mk_day("DDD", "2025-10-02", seed=7), "opt", 2025, 10)
+    slab_store._OPEN_SLABS.clear()
+    oct_slab = slab_store.get_month("opt", 2025, 10)
+    assert not slab_store.get_catalog().covers(oct_slab) and slab_builder.catalog_stale()
+    qual2 = _qualifying_for([("DDD", "2025-10-02"), ("AAA", "2025-09-30")])
+    refs2 = slab_store.slab_pair_refs(qual2, [(2025, 9), (2025, 10)])
+    assert sorted(refs2["ticker"]) == ["AAA", "DDD"]
+    out = list(slab_store.iter_slab_groups(qual2, [(2025, 9), (2025, 10)], {}, {}))
+    assert [t for _, t, _, _ in out] == ["AAA", "DDD"]
+
+
+def test_year_slab_serves_swing_window_as_one_range():
+    _two_month_slabs()
+    qual = pd.DataFrame([
+        {"ticker": "AAA", "date": "2025-09-29", "lead_timestamp_1": pd.Timestamp("2025-09-30"),
+         "lead_timestamp_2": pd.Timestamp("2025-10-01")},
+        {"ticker": "BBB", "date": "2025-09-30", "lead_timestamp_1": pd.Timestamp("2025-10-01"),
+         "lead_timestamp_2": pd.Timestamp("2025-10-02")},  # lead 2 sin datos
+    ])
+    qlk = {(r["ticker"], r["date"]): r for r in qual.to_dict("records")}
+    strat = {"apply_day": "gap_day",
+             "risk_management": {"swing_option": {"active": True, "target_day": "gap_2_day"}}}
+    months = [(2025, 9)]
+    merged = list(slab_store.iter_slab_items(qual, months, strat, qlk))
+    assert [p[3][0] for p in merged] == ["arr", "arr"]
+
+    man = slab_builder.build_year_slab("opt", 2025)
+    assert man["n_pairs"] == 5 and set(man["months"]) == {"09", "10"}
+    assert not slab_builder.year_slab_stale("opt", 2025)
+    spans = list(slab_store.iter_slab_items(qual, months, strat, qlk))
+    assert [p[3][0] for p in spans] == ["span", "span"]
+    for (_, _, _, (_, a)), (_, _, _, span) in zip(merged, spans):
+        b = slab_store.resolve_slab_item(span)
+        assert len(b) == len(a) and not b.has_derived
+        for col in ("ts_ns", "open", "high", "low", "close", "volume"):
+            np.testing.assert_array_equal(getattr(b, col), getattr(a, col))
+
+    # mes fuente reconstruido → el slab anual ya no casa: vuelta al merge
+    slab_builder.build_month_from_df(pd.concat([_mk_day("AAA", "2025-10-01", seed=9),
+                                                _mk_day("BBB", "2025-10-01", seed=5)]), "opt", 2025, 10)
+    slab_store._OPEN_SLABS.clear()
+    assert slab_builder.year_slab_stale("opt", 2025)
+    assert [p[3][0] for p in slab_store.iter_slab_items(qual, months, strat, qlk)] == ["arr", "arr"]
+
+
+def _groups(slab_months, qual, strat=None):
+    qlk = {(r["ticker"], r["date"]): r for r in qual.to_dict("records")}
+    return list(slab_store.iter_slab_groups(qual, slab_months, strat or {}, qlk))
+
+
+def test_cold_month_serves_same_arrays_and_thaws():
+    src = _source_month()
+    _write_ticker_cache(src)
+    slab_builder.build_month_from_ticker_cache(2025, 9, "opt")
+    # un delta encima: freeze compacta antes de comprimir
+    slab_builder.append_delta_from_df(_mk_day("DDD", "2025-09-02", seed=9), "opt", 2025, 9,
+                                      source_files={"d.parquet": "1"})
+    pairs = [("AAA", "2025-09-01"), ("AAA", "2025-09-02"), ("BBB", "2025-09-01"),
+             ("BBB", "2025-09-02"), ("CCC", "2025-09-03"), ("DDD", "2025-09-02")]
+    qual = _qualifying_for(pairs)
+    slab_store._OPEN_SLABS.clear()
+    hot = _groups([(2025, 9)], qual)
+
+    man = slab_builder.freeze_month("opt", 2025, 9)
+    paths = slab_builder.slab_paths("opt", 2025, 9)
+    assert man["tier"] == "cold" and man["deltas"] == [] and not man["derived"]
+    assert not os.path.exists(paths["slab"]) and os.path.exists(paths["cold"])
+    assert slab_builder.published_months("opt") == [(2025, 9)]
+    slab_store._OPEN_SLABS.clear()
+    slab = slab_store.get_month("opt", 2025, 9)
+    assert slab.cold and slab.n_rows == man["n_rows"]
+
+    cold = _groups([(2025, 9)], qual)
+    assert [(d, t) for d, t, _, _ in cold] == [(d, t) for d, t, _, _ in hot]
+    for (_, _, _, a), (_, _, _, b) in zip(hot, cold):
+        assert not b.has_derived
+        for col in ("ts_ns", "open", "high", "low", "close", "volume"):
+            np.testing.assert_array_equal(getattr(b, col), getattr(a, col))
+    rng = slab.lookup("AAA", "2025-09-02")
+    f32 = slab.slice(*rng, dtype=np.float32)
+    assert f32.close.dtype == np.float32 and not f32.close.flags.writeable
+    (_, seg), = slab.segments()
+    np.testing.assert_array_equal(seg[4][rng[0]:rng[1]], f32.close)
+    # un mes frío no admite deltas: el sync reconstruye
+    assert slab_builder.append_delta_from_df(_mk_day("EEE", "2025-09-02"), "opt", 2025, 9) is None
+
+    man = slab_builder.thaw_month("opt", 2025, 9)
+    assert "tier" not in man and os.path.exists(paths["slab"]) and not os.path.exists(paths["cold"])
+    slab_store._OPEN_SLABS.clear()
+    thawed = _groups([(2025, 9)], qual)
+    for (_, _, _, a), (_, _, _, b) in zip(hot, thawed):
+        np.testing.assert_array_equal(b.close, a.close)
+        np.testing.assert_array_equal(b.ts_ns, a.ts_ns)
@@ -190,3 +190,41 @@ def test_signals_equivalence_legacy_translate_path():
         _signals_equal(r_legacy, r_slab)
         checked += 1
     assert checked > 0
+
+
+@pytest.mark.parametrize("native", ["0", "1"])
+def test_derived_columns_match_runtime_structure(native, monkeypatch):
+    """Slab v2: hod/lod/pm/vwap/minute precomputados == los que calcula la fase
+    de señales, y las señales con derivadas == sin ellas (N2a incluido)."""
+    from app.services.indicators import _vwap
+    from app.db.slab_store import PairArrays
+    monkeypatch.setenv("BTT_N2A_NATIVE_ENABLED", native)
+    qualifying = _build_month(n_tickers=4)
+    qlk = {(r["ticker"], r["date"]): r for r in qualifying.to_dict("records")}
+    slab = _slab_pairs(qualifying, qlk)
+    compiled = compile_strategy_def(STRATEGY)
+
+    n_signals = 0
+    for date, tk, stats, arrs in slab:
+        assert arrs.has_derived and arrs.vwap.dtype == np.float64 and arrs.minute.dtype == np.int16
+        np.testing.assert_array_equal(arrs.minute, (arrs.ts_ns // 60_000_000_000) % 1440)
+        np.testing.assert_array_equal(arrs.hod, np.maximum.accumulate(arrs.high))
+        np.testing.assert_array_equal(arrs.lod, np.minimum.accumulate(arrs.low))
+        np.testing.assert_array_equal(arrs.vwap, _vwap(arrs.high, arrs.low, arrs.close, arrs.volume))
+
+        bare = PairArrays(arrs.ts_ns, arrs.open, arrs.high, arrs.low, arrs.close, arrs.volume)
+        args = (date, tk, None, stats, STRATEGY, compiled, ["pre", "rth"], None, None, False)
+        r_bare = _compute_signals_for_pair(*args, pair_arrays=bare)
+        _signals_equal(r_bare, _compute_signals_for_pair(*args, pair_arrays=arrs))
+        n_signals += r_bare is not None
+    assert n_signals > 0
+
+
+def test_derived_columns_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("BTT_SLAB_DERIVED_COLS", "0")
+    qualifying = _build_month(n_tickers=2)
+    qlk = {(r["ticker"], r["date"]): r for r in qualifying.to_dict("records")}
+    slab = _slab_pairs(qualifying, qlk)
+    assert slab and not any(arrs.has_derived for *_, arrs in slab)
+    man = slab_builder.read_manifest(slab_builder.slab_paths("opt", 2025, 9))
+    assert man["derived"] is False and man["schema_version"] == 2
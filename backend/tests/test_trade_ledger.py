@@ -0,0 +1,147 @@
+"""
+Trade ledger columnar — TradeLedger vs list[dict] en el pipeline de resultados.
+
+Cubre: enrich_trade_columns materializa dicts IDÉNTICOS (orden de claves
+incluido) a backtest_service._enrich_trades (timestamps naive, con fracción de
+segundo y tz-aware), también leyendo las columnas del kernel JIT (SimTrades,
+con el locates fee cayendo en un cierre parcial), round-trip Arrow, semántica de secuencia (len/iter/slice),
+métricas agregadas y equity global idénticas sobre ledger vs dicts, y la
+persistencia de jobs (trades en .trades.arrow, dicts solo al cargar).
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import backtest_jobs
+from app.services.backtest_orchestrator import sanitize_floats
+from app.services.backtest_service import (
+    _aggregate_metrics, _compute_global_equity_and_drawdown, _enrich_trades,
+)
+from app.services.trade_ledger import TradeLedger, enrich_trade_columns, materialize_trades
+from tests.test_accum_fast_equivalence import _mk_raw_trades
+
+
+@pytest.mark.parametrize("start,tz", [
+    ("2025-09-03 09:30", None),
+    ("2025-09-06 23:58:30.5", None),
+    ("2025-09-03 09:30", "America/New_York"),
+])
+def test_enrich_columns_identical_to_dicts(start, tz):
+    rng = np.random.default_rng(5)
+    n_bars = 120
+    idx = pd.date_range(start, periods=n_bars, freq="1min")
+    ts = pd.Series(idx.tz_localize(tz)) if tz else idx.values
+    ts_series = ts if tz else pd.Series(ts)
+    ts_epoch = ts_series.values.astype("datetime64[s]").astype("int64")
+    raw = _mk_raw_trades(rng, n_bars, 8)
+    for risk_unit in (100.0, 0.0):
+        for gap in (55.5, None):
+            ref = _enrich_trades(raw, ts_series, "TK", "2025-09-03", {}, risk_unit, gap_pct=gap)
+            ledger = enrich_trade_columns(raw, ts, ts_epoch, "TK", "2025-09-03", risk_unit, gap)
+            got = ledger.to_dicts()
+            assert got == ref
+            assert [list(d) for d in got] == [list(d) for d in ref]
+
+
+def test_enrich_from_jit_columns_identical_to_dicts():
+    from app.services.portfolio_sim import simulate as sim_py
+    from app.services.sim_dispatch import simulate_jit
+    from app.services.trade_ledger import SimTrades
+    from tests.test_sim_jit_equivalence import _mk_pair
+
+    rng = np.random.default_rng(11)
+    hit_tail = False
+    for seed in range(40):
+        pair = _mk_pair(np.random.default_rng(seed), 390)
+        pair["entries"] = np.random.default_rng(seed).random(390) < 0.05
+        kwargs = dict(pair, direction="shortonly", sl_stop=0.05, accumulate=True,
+                      partial_take_profits=[{"distance_pct": 0.002, "capital_pct": 0.5}],
+                      locates_cost=1.5, locate_type="FLAT")
+        raw = simulate_jit(**kwargs)["trades"]
+        assert isinstance(raw, SimTrades)
+        if not len(raw):
+            continue
+        hit_tail |= raw.fee_tail == 0
+        dicts = raw.to_dicts()
+        py = sim_py(**kwargs)["trades"]
+        assert dicts == py and [list(d) for d in dicts] == [list(d) for d in py]
+        assert list(raw) == dicts and raw[0] == dicts[0] and raw[-2:] == dicts[-2:]
+        ts = pd.date_range("2025-09-03 07:00", periods=390, freq="1min").values
+        ts_epoch = ts.astype("datetime64[s]").astype("int64")
+        gap = float(rng.uniform(20, 80))
+        got = enrich_trade_columns(raw, ts, ts_epoch, "TK", "2025-09-03", 100.0, gap).to_dicts()
+        ref = enrich_trade_columns(dicts, ts, ts_epoch, "TK", "2025-09-03", 100.0, gap).to_dicts()
+        assert got == ref and [list(d) for d in got] == [list(d) for d in ref]
+    assert hit_tail  # algún día con el fee sobre un parcial (clave "fees" añadida al final)
+
+
+def _ledger(n_pairs=12, seed=3):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for p in range(n_pairs):
+        ts = pd.date_range(f"2025-{9 + p % 3}-{1 + p:02d} 09:30", periods=90, freq="1min").values
+        raw = _mk_raw_trades(rng, 90, int(rng.integers(1, 5)))
+        chunks.append(enrich_trade_columns(
+            raw, ts, ts.astype("datetime64[s]").astype("int64"),
+            f"T{p % 4}", str(ts[0])[:10], 100.0 if p % 5 else 0.0, 60.0 + p,
+        ))
+    return TradeLedger.concat(chunks)
+
+
+def test_sequence_semantics_and_arrow_roundtrip():
+    ledger = _ledger()
+    dicts = ledger.to_dicts()
+    assert len(ledger) == len(dicts)
+    assert list(ledger) == dicts
+    assert ledger[3] == dicts[3] and ledger[-1] == dicts[-1]
+    assert ledger[5:9] == dicts[5:9] and ledger[::3] == dicts[::3]
+    assert ledger == dicts and ledger != dicts[:-1]
+    assert TradeLedger.from_arrow(ledger.to_arrow()) == dicts
+    assert TradeLedger.from_dicts(dicts) == dicts
+    assert TradeLedger() == [] and not TradeLedger()
+
+
+def test_from_dicts_defaults_missing_optional_fields():
+    dicts = _ledger(n_pairs=2).to_dicts()
+    partial = [dict(t) for t in dicts]
+    del partial[0]["entry_hour"], partial[0]["fees"], partial[0]["r_multiple"]
+    partial[1]["exit_time_epoch"] = None
+    ledger = TradeLedger.from_dicts(partial)
+    assert ledger[0]["entry_hour"] == 0 and ledger[0]["fees"] == 0.0
+    assert ledger[0]["r_multiple"] is None and ledger.nulls("r_multiple")[0]
+    assert ledger[1]["exit_time_epoch"] == 0
+    assert ledger.column("entry_hour").dtype == np.int64
+    assert ledger[2:] == dicts[2:]
+
+def test_metrics_on_ledger_equal_dicts():
+    ledger = _ledger(n_pairs=30)
+    dicts = ledger.to_dicts()
+    for expenses in (0.0, 75.0):
+        a = _compute_global_equity_and_drawdown(dicts, 10000.0, expenses)
+        b = _compute_global_equity_and_drawdown(ledger, 10000.0, expenses)
+        assert a == b
+        day_results = [{"total_trades": 2, "max_drawdown_pct": -1.5, "total_return_pct": 0.4}]
+        for dr in ([], day_results):
+            assert (_aggregate_metrics(dr, dicts, a[0], a[1], 10000.0, 100.0, expenses)
+                    == _aggregate_metrics(dr, ledger, b[0], b[1], 10000.0, 100.0, expenses))
+
+
+def test_sanitize_and_job_roundtrip(tmp_path, monkeypatch):
+    ledger = _ledger(n_pairs=3)
+    dicts = ledger.to_dicts()
+    cols = {k: v.copy() for k, v in ledger._cols.items()}
+    cols["mae"][0] = np.nan
+    result = sanitize_floats({"trades": TradeLedger(cols), "day_results": [], "equity_curves": []})
+    assert isinstance(result["trades"], TradeLedger)
+    assert result["trades"][0]["mae"] is None
+    assert materialize_trades(result)["trades"][1] == dicts[1]
+
+    monkeypatch.setattr(backtest_jobs, "RESULTS_DIR", str(tmp_path))
+    backtest_jobs.save_job_result("job1", result)
+    assert (tmp_path / "job1.trades.arrow").exists()
+    light = backtest_jobs.load_job_result_light("job1")
+    assert light["trades"][1:] == dicts[1:]
+    assert light["trades"][0]["mae"] is None and not math.isnan(light["trades"][0]["pnl"])
+    assert len(backtest_jobs.load_job_trades("job1")) == len(dicts)
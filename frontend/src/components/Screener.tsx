@@ -618,6 +618,27 @@ function playBeep(volume: number) {
   } catch { /* ignore */ }
 }
 
+// Applies a live-feed delta (see backend live_screener_feed.py) on top of the
+// board at version `base`: removes, inserts, per-field updates, then the new order.
+interface ScreenerDelta {
+  insert?: ScreenerRecord[];
+  update?: (Partial<ScreenerRecord> & { ticker: string })[];
+  remove?: string[];
+  order?: string[];
+}
+
+function applyScreenerDelta(rows: ScreenerRecord[], delta: ScreenerDelta): ScreenerRecord[] {
+  const byTicker = new Map(rows.map((r) => [r.ticker, r]));
+  for (const tk of delta.remove ?? []) byTicker.delete(tk);
+  for (const r of delta.insert ?? []) byTicker.set(r.ticker, r);
+  for (const u of delta.update ?? []) {
+    const prev = byTicker.get(u.ticker);
+    if (prev) byTicker.set(u.ticker, { ...prev, ...u });
+  }
+  const order = delta.order ?? rows.map((r) => r.ticker);
+  return order.map((tk) => byTicker.get(tk)).filter((r): r is ScreenerRecord => !!r);
+}
+
 // ═══════════════════════════════════════════════════════════
 //  MAIN COMPONENT
 // ═══════════════════════════════════════════════════════════
@@ -655,6 +676,9 @@ export default function Screener() {
   const flashUntilRef = useRef<Map<string, { dir: "up" | "down"; until: number }>>(new Map());
 
   const wsRef = useRef<WebSocket | null>(null);
+  // Live-feed board: version + rows the next delta applies to (null = waiting for a snapshot).
+  const feedVersionRef = useRef<number | null>(null);
+  const feedRowsRef = useRef<ScreenerRecord[]>([]);
   const activeTabRef = useRef<TabKey>(activeTab);
   activeTabRef.current = activeTab;
 
@@ -798,7 +822,8 @@ export default function Screener() {
   }, []);
 
   // ── Live WebSocket: one persistent connection, auto-reconnect on drop. The
-  // backend streams the top-50 of the subscribed tab once per second. ──
+  // backend sends a snapshot of the subscribed tab's top-50, then per-second
+  // deltas (only what changed); on a version gap we ask for a resync. ──
   useEffect(() => {
     let stopped = false;
     let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
@@ -818,6 +843,7 @@ export default function Screener() {
       ws.onopen = () => {
         if (stopped) return;
         setConnected(true);
+        feedVersionRef.current = null;
         ws.send(JSON.stringify({ action: "subscribe", tab: TAB_SERVER[activeTabRef.current] }));
       };
       ws.onmessage = (ev) => {
@@ -825,7 +851,21 @@ export default function Screener() {
           const msg = JSON.parse(ev.data);
           // Ignore frames for a tab we just switched away from.
           if (msg.tab !== TAB_SERVER[activeTabRef.current]) return;
-          setRecords(Array.isArray(msg.records) ? msg.records : []);
+          let rows: ScreenerRecord[];
+          if (msg.type === "delta") {
+            if (feedVersionRef.current === null) return; // snapshot on its way
+            if (msg.base !== feedVersionRef.current) {
+              feedVersionRef.current = null;
+              ws.send(JSON.stringify({ action: "resync" }));
+              return;
+            }
+            rows = applyScreenerDelta(feedRowsRef.current, msg);
+          } else {
+            rows = Array.isArray(msg.records) ? msg.records : [];
+          }
+          feedVersionRef.current = typeof msg.version === "number" ? msg.version : null;
+          feedRowsRef.current = rows;
+          setRecords(rows);
           if (typeof msg.session === "string") setSession(msg.session);
           setLoading(false);
           setError(null);
@@ -856,6 +896,7 @@ export default function Screener() {
   useEffect(() => {
     setLoading(true);
     setRecords([]);
+    feedVersionRef.current = null;
     const ws = wsRef.current;
     if (ws && ws.readyState === WebSocket.OPEN) {
       ws.send(JSON.stringify({ action: "subscribe", tab: TAB_SERVER[activeTab] }));